@@ -0,0 +1,270 @@
+"""
+Selection-free API of the toolkit. Every operation takes explicit nodes and typed options and never reads or changes maya selection,
+so scripts don't pay selection changed callbacks, Outliner and Channel Box refreshes. The toolkit interface is a thin caller of these functions.
+
+    from nb_rigging_toolkit import nb_rgtk_api as nb_api
+    nb_api.parent_constraint (['chest_ctrl', 'hand_ctrl'], axes = nb_api.AxisMask(scale = False))
+    nb_api.parent_constraints ([(['hip_proxy'], 'hip_jnt'), (['knee_proxy'], 'knee_jnt')], in_opm = False)
+    nb_api.mass_attach (cmds.ls ('button_*_ctrl'), cmds.ls ('spine_*_jnt'), count = 2)
+    nb_api.aim_constraint ('look_at_ctrl', 'eye_jnt', primary_axis = (0, 0, 1), input_mode = 'parent')
+    nb_api.aim_constraints ([('look_at_ctrl', 'eye_L_jnt'), ('look_at_ctrl', 'eye_R_jnt')])
+    nb_api.aim_chain (['tail_01_jnt', 'tail_02_jnt', 'tail_03_jnt'], up_mode = 'chain')
+    nb_api.parent_space ('hand_ctrl', 'hand_settings_ctrl', ['world_ctrl', 'chest_ctrl'])
+    nb_api.bulk_connect (['main_ctrl.visibility -> *_geo_grp.visibility'], policy = 'force')
+    nb_api.orient_skeleton (['root_jnt'], mode = 'aim', primary_axis = (1, 0, 0), secondary_axis = (0, 0, 1))
+"""
+from maya import cmds
+from nb_rigging_toolkit import nb_rgtk_matrix as nb_mat
+from nb_rigging_toolkit import nb_rgtk_parent_space as nb_ps
+from nb_rigging_toolkit import nb_rgtk_utils as nb_utils
+from nb_rigging_toolkit import nb_rgtk_skeleton as nb_skeleton
+from nb_rigging_toolkit import nb_rgtk_optimize as nb_optimize
+from nb_rigging_toolkit import nb_rgtk_evaluator as nb_eval
+
+class AxisMask () :
+    '''
+    Enabled axis of translate, rotate and scale channels. Replaces out_connect rules of matrix constraints
+        AxisMask ()                                     # every axis
+        AxisMask (scale = False)                        # translate and rotate
+        AxisMask (translate = 'xz', rotate = 'y')       # some axis
+    '''
+    def __init__ (self, translate = True, rotate = True, scale = True) :
+        '''
+        translate, rotate, scale -> enable every axis, or enabled axis names ex : 'xz', or one value per axis (bool, str or list of 3 bool)
+        '''
+        self.translate = self._get_axis (translate)
+        self.rotate = self._get_axis (rotate)
+        self.scale = self._get_axis (scale)
+
+    @staticmethod
+    def _get_axis (value) :
+        '''
+        Return enabled state of x, y and z axis
+        '''
+        if isinstance(value, str) :
+            unknown = set(value.lower()) - set('xyz')
+            if unknown :
+                raise ValueError ("Unknown axis {}, use x, y and z".format(', '.join(sorted(unknown))))
+            return [axis in value.lower() for axis in 'xyz']
+
+        if isinstance(value, (list, tuple)) :
+            if len(value) != 3 :
+                raise ValueError ("Axis mask needs 3 values")
+            return [bool(each) for each in value]
+
+        return [bool(value)] * 3
+
+    def get_channels (self) :
+        '''
+        Return channels description used by MatrixConstraint.get_out_connect
+        '''
+        return {'translate' : list(self.translate), 'rotate' : list(self.rotate), 'scale' : list(self.scale)}
+
+    def get_out_connect (self, in_opm = True) :
+        '''
+        Return MatrixConstraint out_connect rules
+        in_opm -> connect target offsetParentMatrix, otherwise target translate, rotate and scale (bool)
+        '''
+        return nb_mat.MatrixConstraint.get_out_connect (nb_mat.MatrixConstraint, dict(self.get_channels(), in_opm = in_opm))
+
+    def __eq__ (self, other) :
+        return isinstance(other, AxisMask) and other.get_channels() == self.get_channels()
+
+    def __ne__ (self, other) :
+        return not self == other
+
+    def __repr__ (self) :
+        return 'AxisMask({})'.format(', '.join('{}={}'.format(channel, ''.join(axis for axis, is_on in zip('xyz', values) if is_on) or False)
+                                               for channel, values in sorted(self.get_channels().items())))
+
+def get_selection (minimum = 0, maximum = None) :
+    '''
+    Return selected objects, used by the toolkit interface to call this API. Warn and return None if the selection count is not valid
+    minimum, maximum -> number of objects needed, no maximum if None (int)
+    '''
+    objects_ = cmds.ls (sl = True) or []
+
+    if len(objects_) < minimum :
+        cmds.warning ("Select at least {} object{}".format(minimum, 's' if minimum > 1 else ''))
+        return None
+    if maximum is not None and len(objects_) > maximum :
+        cmds.warning ("Select at most {} object{}".format(maximum, 's' if maximum > 1 else ''))
+        return None
+
+    return objects_
+
+def parent_constraint (objects_, offset = True, axes = None, in_opm = True, mode = 'default', pattern = None, trigger_matrix = 'worldMatrix[0]') :
+    '''
+    Parent constraints between objects, paired according to mode
+    objects_ -> ordered objects (list)
+    offset -> maintain offset between objects (bool)
+    axes -> constrained axis, every axis if None (AxisMask)
+    in_opm -> connect targets offsetParentMatrix, otherwise translate, rotate and scale (bool)
+    mode -> 'default' (last object is the target), 'pairwise', 'one_to_many' or 'name', see MatrixConstraint.get_constraint_pairs (str)
+    pattern -> trigger and target name patterns for 'name' mode ex : ('*_proxy', '*_jnt') (tuple)
+    trigger_matrix -> trigger matrix attribut (str)
+    Return True if constraints are built, otherwise False
+    '''
+    pairs = nb_mat.MatrixConstraint.get_constraint_pairs (nb_mat.MatrixConstraint, list(objects_), mode, pattern)
+    if not pairs :
+        return False
+
+    return parent_constraints (pairs, offset, axes, in_opm, trigger_matrix)
+
+def parent_constraints (pairs, offset = True, axes = None, in_opm = True, trigger_matrix = 'worldMatrix[0]') :
+    '''
+    Parent constraints of explicit triggers and targets, checked and built in one transaction
+    pairs -> list of (triggers, target) (list)
+    offset, axes, in_opm, trigger_matrix -> see parent_constraint
+    Return True if constraints are built, otherwise False
+    '''
+    axes = axes or AxisMask ()
+    pairs = [[list(triggers), target] for triggers, target in pairs]
+
+    return nb_mat.MatrixConstraint.matrix_parent_constraint_batch (nb_mat.MatrixConstraint, pairs, offset, trigger_matrix, axes.get_out_connect(in_opm))
+
+def mass_attach (followers, drivers, count = 3, falloff = 'inverse', power = 2.0, radius = None, offset = True, axes = None, in_opm = True,
+                 trigger_matrix = 'worldMatrix[0]') :
+    '''
+    Parent constraint each follower to its nearest drivers, weighted by distance, see MatrixConstraint.mass_attach
+    followers, drivers -> constrained objects and objects they can follow (list)
+    count -> maximum number of drivers of each follower (int)
+    falloff -> 'inverse' (1 / distance ** power), 'linear' or 'smooth' (within radius, farthest driver distance if None) (str)
+    offset, axes, in_opm, trigger_matrix -> see parent_constraint
+    Return attachments, for each follower [follower, [(driver, weight), ...]], None if objects are not valid
+    '''
+    axes = axes or AxisMask ()
+
+    return nb_mat.MatrixConstraint.mass_attach (nb_mat.MatrixConstraint, list(followers), list(drivers), count, falloff, power, radius, offset,
+                                                trigger_matrix, axes.get_out_connect(in_opm))
+
+def aim_constraint (trigger, target, in_opm = False, world_up_vector = (0, 1, 0), world_up_object = None, primary_axis = (1, 0, 0), secondary_axis = (0, 1, 0),
+                    input_mode = 'group') :
+    '''
+    Aim constraint of target to trigger
+    in_opm -> connect aim rotation in target offsetParentMatrix, otherwise in target rotate (bool)
+    world_up_vector -> up vector (tuple)
+    world_up_object -> object giving the up direction, trigger if None (str)
+    primary_axis, secondary_axis -> target aim and up axis (tuple)
+    input_mode -> 'group' (target parented under an input group), 'static' or 'parent' (target stays in place, aim in offsetParentMatrix) (str)
+    Return created nodes, None if the constraint is not valid
+    '''
+    return nb_mat.MatrixConstraint.aim_constraint (nb_mat.MatrixConstraint, trigger, target, in_opm, tuple(world_up_vector), world_up_object or '',
+                                                   tuple(primary_axis), tuple(secondary_axis), input_mode)
+
+def aim_constraints (pairs, in_opm = False, world_up_vector = (0, 1, 0), world_up_object = None, primary_axis = (1, 0, 0), secondary_axis = (0, 1, 0),
+                     input_mode = 'group') :
+    '''
+    Aim constraints of many (trigger, target) pairs, all objects are resolved once. Options are shared by every pair, see aim_constraint
+    Return created nodes of all pairs, None if a pair is not valid
+    '''
+    pairs = [[trigger, target] for trigger, target in pairs]
+
+    return nb_mat.MatrixConstraint.aim_constraint_batch (nb_mat.MatrixConstraint, pairs, in_opm, tuple(world_up_vector), world_up_object or '',
+                                                         tuple(primary_axis), tuple(secondary_axis), input_mode)
+
+def aim_chain (chain, world_up_vector = (0, 1, 0), world_up_object = None, primary_axis = (1, 0, 0), secondary_axis = (0, 1, 0), up_mode = 'object',
+               last_mode = 'align', last_target = None) :
+    '''
+    Aim each object of an ordered chain at the next one, see MatrixConstraint.aim_chain. Objects keep their parent, the aim is always in offsetParentMatrix
+    chain -> ordered objects, from root to tip (list)
+    world_up_object -> shared up object, world_up_vector is used in world space if None (str)
+    up_mode -> 'object' (shared up) or 'chain' (up given by the previous object) (str)
+    last_mode -> last object 'align' (previous object rotation), 'aim' (aims at last_target) or 'none' (str)
+    Return created nodes, None if the chain is not valid
+    '''
+    return nb_mat.MatrixConstraint.aim_chain (nb_mat.MatrixConstraint, list(chain), tuple(world_up_vector), world_up_object or '',
+                                              tuple(primary_axis), tuple(secondary_axis), up_mode, last_mode, last_target)
+
+def parent_space (target, settings, triggers, attr_name = 'parentSpace', parent_translate = True) :
+    '''
+    Parent spaces of one control, selected by an enum attribut of settings
+    target -> control following parent spaces (str)
+    settings -> control holding the parent space attribut (str)
+    triggers -> parent space objects (list)
+    attr_name -> parent space attribut name (str)
+    parent_translate -> parent spaces drive translate and rotate, otherwise only rotate (bool)
+    Return True if the parent space is built, otherwise False
+    '''
+    return parent_spaces ([(target, settings, list(triggers), attr_name, parent_translate)])
+
+def parent_spaces (records) :
+    '''
+    Parent spaces of many controls, checked and built in one transaction
+    records -> list of (target, settings, triggers, attr_name, parent_translate) (list)
+    Return True if parent spaces are built, otherwise False
+    '''
+    return nb_ps.parent_space_batch ([tuple(record) for record in records])
+
+def create_module (name) :
+    '''
+    Rigging module groups, see nb_rgtk_utils.create_rigging_module. Return created groups
+    '''
+    return nb_utils.create_rigging_module (name)
+
+def create_modules (prefixes, template = None, parent = None) :
+    '''
+    Rigging modules of many prefixes in one pass, see nb_rgtk_utils.create_modules
+    template -> module layout, default layout if None (dict, see nb_rgtk_utils.MODULE_TEMPLATE)
+    parent -> node receiving module roots, world if None (str)
+    Return summary : {'created', 'skipped', 'groups', 'existing'}
+    '''
+    return nb_utils.create_modules (list(prefixes), template, parent)
+
+def set_transform_in_opm (objects_, hierarchy = False) :
+    '''
+    Move objects translate, rotate and scale in offsetParentMatrix
+    hierarchy -> also modify all transform descendants of objects_ (bool)
+    Return modified objects
+    '''
+    return nb_utils.set_transform_in_opm (list(objects_), hierarchy)
+
+def reset_joint_orient (objects_, keep_world = False, hierarchy = False) :
+    '''
+    Reset jointOrient of joints in objects_, other objects are ignored. Return reset joints
+    keep_world -> move jointOrient in rotate so joints keep their world orientation (bool)
+    hierarchy -> also reset all joint descendants of objects_ (bool)
+    '''
+    return nb_utils.reset_joint_orient (list(objects_), keep_world, hierarchy)
+
+def orient_skeleton (objects_, mode = 'zero_orient', hierarchy = True, primary_axis = (1, 0, 0), secondary_axis = (0, 1, 0), world_up_vector = (0, 1, 0)) :
+    '''
+    Orient joints of whole skeletons in one pass, see nb_rgtk_skeleton.orient_skeleton
+    objects_ -> joints or skeleton roots (list)
+    mode -> 'zero_orient' (jointOrient in rotate), 'rotation_to_orient' (rotate in jointOrient) or 'aim' (primary axis at first child joint) (str)
+    hierarchy -> also orient all joint descendants of objects_ (bool)
+    primary_axis, secondary_axis -> aim mode joint aim and up axis (tuple)
+    world_up_vector -> aim mode up direction in world space (tuple)
+    Return oriented joints long names
+    '''
+    return nb_skeleton.orient_skeleton (list(objects_), mode, hierarchy, tuple(primary_axis), tuple(secondary_axis), tuple(world_up_vector))
+
+def connect_attr (attribut, source, destinations, policy = 'skip') :
+    '''
+    Connect source.attribut to attribut of each destination
+    policy -> already connected destinations : 'skip', 'force' or 'error', see nb_rgtk_utils.bulk_connect (str)
+    Return bulk_connect report
+    '''
+    return nb_utils.fast_connect_attr (attribut, [source] + list(destinations), policy)
+
+def bulk_connect (rules, policy = 'skip') :
+    '''
+    Connect source plugs to pattern target sets, ex : ['main_ctrl.globalScale -> *_geo_grp.scaleX'], see nb_rgtk_utils.bulk_connect
+    policy -> already connected destinations : 'skip', 'force' or 'error' (str)
+    Return report : {'connected', 'replaced', 'kept', 'skipped'}
+    '''
+    return nb_utils.bulk_connect (list(rules), policy)
+
+def optimize_scene (dry_run = False) :
+    '''
+    Optimize toolkit networks already in the scene, see nb_rgtk_optimize.optimize_scene. Return the optimization report
+    '''
+    return nb_optimize.optimize_scene (dry_run)
+
+def check_networks (nodes, tolerance = nb_eval.TOLERANCE) :
+    '''
+    Evaluate the networks of nodes offline and compare them with the scene, see nb_rgtk_evaluator.check_scene
+    nodes -> checked nodes, ex : constrained targets (list)
+    Return {plug : largest difference} of world matrices over tolerance, empty if networks match the scene
+    '''
+    return nb_eval.check_scene (list(nodes), tolerance)
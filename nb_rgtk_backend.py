@@ -0,0 +1,367 @@
+"""
+Scene builders used by toolkit operations to create nodes, set attributs and connect them.
+- CmdsBuilder calls maya.cmds for each edit, edits are undoable like any maya command
+- ModifierBuilder queues all edits in OpenMaya 2.0 modifiers and commits them in one doIt(). Nodes and plugs are cached as MObject / MPlug,
+  so names are resolved only once. Edits done with this builder are not registered in maya undo queue, so ModifierBuilder is batch-only :
+  it refuses to build in an interactive session while the undo queue is recording, where Ctrl+Z would only undo part of the rig.
+
+Nodes are given to builders as names or node handles (existing nodes, see nb_rgtk_handles) or as values returned by create_node (new nodes).
+Attributs are given as attribut paths relative to the node, ex : 'matrixIn[0]', 'target[2].weight', 'worldMatrix[0]'
+"""
+import re
+import time
+
+from maya import cmds
+from nb_rigging_toolkit import nb_rgtk_math as nb_math
+from nb_rigging_toolkit import nb_rgtk_profiling as nb_profiling
+
+# Name of the builder used by toolkit operations
+_current_backend = 'cmds'
+
+# Node types already tested as DAG or DG nodes
+_dag_types = {}
+
+class CmdsBuilder () :
+    '''
+    Builder that edits the scene with maya.cmds
+    '''
+    def __init__ (self) :
+        '''
+        Initialize builder
+        '''
+        self.created_nodes = []
+        self.connection_count = 0
+
+    def create_node (self, node_type, name) :
+        '''
+        Create a node and return it
+        node_type -> maya node type (str)
+        name -> node name (str)
+        '''
+        node = cmds.createNode (node_type, name = name)
+        self.created_nodes.append (node)
+
+        return node
+
+    def connect (self, source_node, source_attr, destination_node, destination_attr) :
+        '''
+        Connect source_node.source_attr to destination_node.destination_attr
+        '''
+        cmds.connectAttr ('{}.{}'.format(source_node, source_attr), '{}.{}'.format(destination_node, destination_attr))
+        self.connection_count += 1
+
+    def disconnect (self, source_node, source_attr, destination_node, destination_attr) :
+        '''
+        Disconnect source_node.source_attr from destination_node.destination_attr
+        '''
+        cmds.disconnectAttr ('{}.{}'.format(source_node, source_attr), '{}.{}'.format(destination_node, destination_attr))
+
+    def set_attr (self, node, attr, *values, **kwargs) :
+        '''
+        Set node.attr values
+        values -> one value, or one value per child of a compound attribut
+        attr_type -> maya data type, only 'matrix' is supported (str)
+        '''
+        if kwargs.get('attr_type') == 'matrix' :
+            cmds.setAttr ('{}.{}'.format(node, attr), values[0], type = 'matrix')
+        else :
+            cmds.setAttr ('{}.{}'.format(node, attr), *values)
+
+    def add_enum_attr (self, node, attr, fields) :
+        '''
+        Add a keyable enum attribut to node
+        fields -> enum fields names (list)
+        '''
+        cmds.addAttr (str(node), ln = attr, at = "enum", en = ':'.join(fields), k = True)
+
+    def set_compose_matrix (self, compose_node, matrix) :
+        '''
+        Set composeMatrix input attributs so its outputMatrix is equal to matrix
+        compose_node -> composeMatrix node
+        matrix -> matrix value (numpy array (4, 4))
+        '''
+        translates, rotates, scales = nb_math.decompose_matrices (matrix)
+
+        self.set_attr (compose_node, 'inputTranslate', *translates[0])
+        self.set_attr (compose_node, 'inputRotate', *rotates[0])
+        self.set_attr (compose_node, 'inputScale', *scales[0])
+
+    def name (self, node) :
+        '''
+        Return node name
+        '''
+        return node
+
+    def commit (self) :
+        '''
+        Nothing to commit, each edit is already done
+        '''
+        return self.created_nodes
+
+class PendingNode () :
+    '''
+    Node created by a ModifierBuilder. The node exists as an MObject but is added to the scene on commit
+    '''
+    def __init__ (self, mobject, name) :
+        self.mobject = mobject
+        self.requested_name = name
+
+    def __repr__ (self) :
+        return self.requested_name
+
+class ModifierBuilder (CmdsBuilder) :
+    '''
+    Builder that queues all edits in an MDGModifier (DG nodes, connections and values) and an MDagModifier (DAG nodes),
+    then commits them in one doIt()
+    '''
+    # Split 'target[2]' in 'target' and '2'
+    _element_regex = re.compile (r'^(\w+)(?:\[(\d+)\])?$')
+
+    def __init__ (self) :
+        '''
+        Initialize builder and its modifiers. Refuse to build in an interactive session with undo queue enabled,
+        modifier edits can't be undone with the cmds edits of the same undo chunk
+        '''
+        if not cmds.about (batch = True) and cmds.undoInfo (query = True, state = True) :
+            raise RuntimeError ("om2 backend edits can't be undone, use it in batch mode or with undo queue disabled")
+
+        super (ModifierBuilder, self).__init__()
+
+        from maya.api import OpenMaya as om2
+        self.om2 = om2
+
+        self.dg_modifier = om2.MDGModifier()
+        self.dag_modifier = om2.MDagModifier()
+        self._mobjects = {}
+        self._plugs = {}
+
+    def _get_mobject (self, node) :
+        '''
+        Return node MObject. Existing nodes are resolved once and cached as MObjectHandle, handles of the same node share one entry
+        '''
+        if isinstance(node, PendingNode) :
+            return node.mobject
+
+        if node not in self._mobjects or not self._mobjects[node].isValid() :
+            selection = self.om2.MSelectionList()
+            selection.add (str(node))
+            self._mobjects[node] = self.om2.MObjectHandle (selection.getDependNode(0))
+
+        return self._mobjects[node].object()
+
+    def _get_plug (self, node, attr) :
+        '''
+        Return node.attr MPlug. Plugs are cached
+        attr -> attribut path, ex : 'target[2].weight' (str)
+        '''
+        key = (id(node) if isinstance(node, PendingNode) else node, attr)
+        if key in self._plugs :
+            return self._plugs[key]
+
+        fn_node = self.om2.MFnDependencyNode (self._get_mobject(node))
+        plug = None
+
+        for segment in attr.split('.') :
+            attr_name, index = self._element_regex.match(segment).groups()
+
+            if plug is None :
+                plug = fn_node.findPlug (attr_name, False)
+            else :
+                plug = plug.child (fn_node.attribute(attr_name))
+
+            if index is not None :
+                plug = plug.elementByLogicalIndex (int(index))
+
+        self._plugs[key] = plug
+
+        return plug
+
+    def create_node (self, node_type, name) :
+        '''
+        Queue a node creation and return a PendingNode
+        '''
+        if node_type not in _dag_types :
+            _dag_types[node_type] = 'dagNode' in (cmds.nodeType (node_type, inherited = True, isTypeName = True) or [])
+
+        if _dag_types[node_type] :
+            mobject = self.dag_modifier.createNode (node_type)
+            self.dag_modifier.renameNode (mobject, name)
+        else :
+            mobject = self.dg_modifier.createNode (node_type)
+            self.dg_modifier.renameNode (mobject, name)
+
+        node = PendingNode (mobject, name)
+        self.created_nodes.append (node)
+        nb_profiling.count ('om2.createNode')
+
+        return node
+
+    def connect (self, source_node, source_attr, destination_node, destination_attr) :
+        '''
+        Queue a connection
+        '''
+        self.dg_modifier.connect (self._get_plug(source_node, source_attr), self._get_plug(destination_node, destination_attr))
+        self.connection_count += 1
+        nb_profiling.count ('om2.connect')
+
+    def disconnect (self, source_node, source_attr, destination_node, destination_attr) :
+        '''
+        Queue a disconnection
+        '''
+        self.dg_modifier.disconnect (self._get_plug(source_node, source_attr), self._get_plug(destination_node, destination_attr))
+        nb_profiling.count ('om2.disconnect')
+
+    def set_attr (self, node, attr, *values, **kwargs) :
+        '''
+        Queue new plug values
+        values -> one value, or one value per child of a compound attribut
+        attr_type -> maya data type, only 'matrix' is supported (str)
+        '''
+        plug = self._get_plug (node, attr)
+        nb_profiling.count ('om2.setAttr')
+
+        if kwargs.get('attr_type') == 'matrix' :
+            data = self.om2.MFnMatrixData().create (self.om2.MMatrix(values[0]))
+            self.dg_modifier.newPlugValue (plug, data)
+            return
+
+        if len(values) == 1 :
+            self._set_plug_value (plug, values[0])
+            return
+
+        for x, value in enumerate(values) :
+            self._set_plug_value (plug.child(x), value)
+
+    def _set_plug_value (self, plug, value) :
+        '''
+        Queue a numeric plug value. Angle values are given in degrees, like cmds.setAttr
+        '''
+        attribute = plug.attribute()
+
+        if isinstance(value, bool) :
+            self.dg_modifier.newPlugValueBool (plug, value)
+        elif attribute.hasFn(self.om2.MFn.kUnitAttribute) and self.om2.MFnUnitAttribute(attribute).unitType() == self.om2.MFnUnitAttribute.kAngle :
+            self.dg_modifier.newPlugValueMAngle (plug, self.om2.MAngle(float(value), self.om2.MAngle.kDegrees))
+        else :
+            self.dg_modifier.newPlugValueDouble (plug, float(value))
+
+    def add_enum_attr (self, node, attr, fields) :
+        '''
+        Add a keyable enum attribut to an existing node. The attribut is added immediately so its plug can be connected
+        '''
+        super (ModifierBuilder, self).add_enum_attr (node, attr, fields)
+
+    def name (self, node) :
+        '''
+        Return node name. Created nodes have their final name only after commit
+        '''
+        if isinstance(node, PendingNode) :
+            return self.om2.MFnDependencyNode(node.mobject).name()
+
+        return node
+
+    def commit (self) :
+        '''
+        Create DAG nodes, then DG nodes, connections and values in one doIt() each
+        Return created nodes names
+        '''
+        with nb_profiling.step ('om2 doIt') :
+            self.dag_modifier.doIt()
+            self.dg_modifier.doIt()
+
+        return [self.name(node) for node in self.created_nodes]
+
+BACKENDS = {'cmds' : CmdsBuilder,
+            'om2' : ModifierBuilder}
+
+def set_backend (backend_name) :
+    '''
+    Set the builder used by toolkit operations. 'om2' is batch-only, see ModifierBuilder
+    backend_name -> 'cmds' or 'om2' (str)
+    '''
+    global _current_backend
+
+    if backend_name not in BACKENDS :
+        raise ValueError ("Unknown backend {}, use one of {}".format(backend_name, ', '.join(BACKENDS)))
+
+    _current_backend = backend_name
+
+def get_backend () :
+    '''
+    Return current backend name
+    '''
+    return _current_backend
+
+def new_builder () :
+    '''
+    Return a new builder of the current backend
+    '''
+    return BACKENDS[_current_backend]()
+
+def benchmark_backends (count = 100, spaces = 4, force = False) :
+    '''
+    Compare backends on identical builds : count pairwise parent constraints and count controls with parent spaces.
+    Warning : each build runs in a new empty scene, current scene is lost. Scenes with unsaved changes are refused unless force is True.
+    Undo queue is disabled during the benchmark, so the om2 backend can build
+    count -> number of constraints and parent space controls to build (int)
+    spaces -> number of parent spaces per control (int)
+    force -> run even if current scene has unsaved changes (bool)
+    Return a dict {backend_name : {'parent_constraint' : seconds, 'parent_space' : seconds}}, None if the scene has unsaved changes
+    '''
+    if not force and cmds.file (query = True, modified = True) :
+        cmds.warning ("Current scene has unsaved changes, save it or use force = True to run the benchmark")
+        return None
+
+    from nb_rigging_toolkit import nb_rgtk_matrix as nb_mat
+    from nb_rigging_toolkit import nb_rgtk_parent_space as nb_ps
+
+    out_connect = [[[['TranslateX', 'translateX'], True], [['TranslateY', 'translateY'], True], [['TranslateZ', 'translateZ'], True]],
+                   [[['RotateX', 'rotateX'], True], [['RotateY', 'rotateY'], True], [['RotateZ', 'rotateZ'], True]],
+                   [[['ScaleX', 'scaleX'], True], [['ScaleY', 'scaleY'], True], [['ScaleZ', 'scaleZ'], True]],
+                   True]
+
+    previous_backend = get_backend()
+    undo_state = cmds.undoInfo (query = True, state = True)
+    results = {}
+
+    try :
+        cmds.undoInfo (stateWithoutFlush = False)
+
+        for backend_name in BACKENDS :
+            set_backend (backend_name)
+            results[backend_name] = {}
+
+            # Parent constraints
+            cmds.file (new = True, force = True)
+            pairs = []
+            for x in range(count) :
+                trigger_ = cmds.createNode ('transform', name = 'bench_trigger_{}'.format(x))
+                target_ = cmds.createNode ('transform', name = 'bench_target_{}'.format(x))
+                cmds.setAttr ('{}.translate'.format(trigger_), x, 1, 0)
+                pairs.append ([[trigger_], target_])
+
+            start = time.perf_counter()
+            nb_mat.MatrixConstraint.matrix_parent_constraint_batch (nb_mat.MatrixConstraint, pairs, True, 'worldMatrix[0]', out_connect)
+            results[backend_name]['parent_constraint'] = time.perf_counter() - start
+
+            # Parent spaces
+            cmds.file (new = True, force = True)
+            triggers = [cmds.createNode ('transform', name = 'bench_space_{}_ctrl'.format(x)) for x in range(spaces)]
+            records = []
+            for x in range(count) :
+                target_ = cmds.createNode ('transform', name = 'bench_{}_ctrl'.format(x))
+                records.append ((target_, target_, triggers, 'parentSpace', True))
+
+            start = time.perf_counter()
+            nb_ps.parent_space_batch (records)
+            results[backend_name]['parent_space'] = time.perf_counter() - start
+
+    finally :
+        set_backend (previous_backend)
+        cmds.file (new = True, force = True)
+        cmds.undoInfo (stateWithoutFlush = undo_state)
+
+    for backend_name, timings in results.items() :
+        print ('{:<6} parent constraint : {:.3f}s    parent space : {:.3f}s'.format(backend_name, timings['parent_constraint'], timings['parent_space']))
+
+    return results
@@ -0,0 +1,387 @@
+"""
+Headless batch runner applying toolkit operations to many scene files, in parallel, under mayapy.
+
+    mayapy -m nb_rigging_toolkit.nb_rgtk_batch job.json --workers 4 --report report.json
+
+A job is a JSON file :
+    {
+        "files" : ["assets/chair.ma", {"path" : "assets/table.ma", "operations" : [...]}],
+        "operations" : [
+            {"operation" : "parent_constraint", "pairs" : [[["chair_proxy"], "chair_jnt"]], "offset" : true, "channels" : {"scale" : false}},
+            {"operation" : "mass_attach", "followers" : ["button_*_ctrl"], "drivers" : ["spine_*_jnt"], "count" : 2},
+            {"operation" : "aim_constraint", "pairs" : [["look_at", "eye_jnt"]], "primary_axis" : [0, 0, 1]},
+            {"operation" : "aim_chain", "chains" : [["tail_01_jnt", "tail_02_jnt", "tail_03_jnt"]], "up_mode" : "chain"},
+            {"operation" : "parent_space", "records" : [["hand_ctrl", "settings_ctrl", ["world_ctrl", "chest_ctrl"], "parentSpace", true]]},
+            {"operation" : "connect", "rules" : ["main_ctrl.visibility -> *_geo_grp.visibility"], "policy" : "skip"},
+            {"operation" : "module", "names" : ["arm_L"]},
+            {"operation" : "opm", "objects" : ["root_ctrl"], "hierarchy" : true},
+            {"operation" : "orient_skeleton", "objects" : ["root_jnt"], "mode" : "aim", "primary_axis" : [1, 0, 0], "secondary_axis" : [0, 1, 0]}
+        ],
+        "save" : true,
+        "output_dir" : null
+    }
+Job operations run on every file, then the file own operations. Each file is opened, modified and saved by one worker process,
+so job files must be different and so must saved files : with output_dir, files of the same name from different folders are refused.
+A file stops at its first failed operation and is not saved. A summary of each file timing and failures is printed at the end.
+
+Maya is reached through a layer object (MayapyLayer by default), so the scheduler can run with another layer.
+"""
+import argparse
+import json
+import multiprocessing
+import multiprocessing.util
+import os
+import sys
+import time
+import traceback
+
+class BatchError (Exception) :
+    '''
+    Error raised when a job or an operation is not valid
+    '''
+
+class MayapyLayer () :
+    '''
+    Maya layer of batch workers : starts maya standalone, opens and saves files
+    '''
+    def initialize (self) :
+        '''
+        Start maya standalone in the worker process
+        '''
+        import maya.standalone
+        maya.standalone.initialize (name = 'python')
+
+    def open_file (self, path) :
+        '''
+        Open path, current scene is discarded
+        '''
+        from maya import cmds
+        cmds.file (path, open = True, force = True)
+
+    def save_file (self, path) :
+        '''
+        Save current scene as path, with the file type of its extension
+        '''
+        from maya import cmds
+        cmds.file (rename = path)
+        cmds.file (save = True, force = True, type = 'mayaBinary' if path.lower().endswith('.mb') else 'mayaAscii')
+
+    def uninitialize (self) :
+        '''
+        Stop maya standalone
+        '''
+        import maya.standalone
+        maya.standalone.uninitialize ()
+
+# Layer of the current worker process, created by its first file
+_layer_factory = MayapyLayer
+_layer = None
+
+# Finalizer stopping the layer when the worker process exits
+_finalizer = None
+
+def run_parent_constraint (operation) :
+    '''
+    Parent constraints. operation keys : pairs ([[triggers, target], ...]), offset, trigger_matrix, channels
+    '''
+    from nb_rigging_toolkit import nb_rgtk_matrix as nb_mat
+
+    pairs = [[list(triggers), target] for triggers, target in operation['pairs']]
+    if not nb_mat.MatrixConstraint.matrix_parent_constraint_batch (nb_mat.MatrixConstraint, pairs, operation.get('offset', True),
+                                                                 operation.get('trigger_matrix', 'worldMatrix[0]'),
+                                                                 nb_mat.MatrixConstraint.get_out_connect (nb_mat.MatrixConstraint, operation.get('channels'))) :
+        raise BatchError ("Parent constraints are not valid, see warnings")
+
+def run_mass_attach (operation) :
+    '''
+    Attach followers to their nearest drivers. operation keys : followers, drivers (lists of names or patterns), count, falloff, power, radius,
+    offset, channels, trigger_matrix
+    '''
+    from maya import cmds
+    from nb_rigging_toolkit import nb_rgtk_matrix as nb_mat
+
+    followers = cmds.ls (operation['followers']) or []
+    drivers = cmds.ls (operation['drivers']) or []
+
+    if not nb_mat.MatrixConstraint.mass_attach (nb_mat.MatrixConstraint, followers, drivers, operation.get('count', 3), operation.get('falloff', 'inverse'),
+                                                operation.get('power', 2.0), operation.get('radius'), operation.get('offset', True),
+                                                operation.get('trigger_matrix', 'worldMatrix[0]'),
+                                                nb_mat.MatrixConstraint.get_out_connect (nb_mat.MatrixConstraint, operation.get('channels'))) :
+        raise BatchError ("Mass attach is not valid, see warnings")
+
+def run_aim_constraint (operation) :
+    '''
+    Aim constraints. operation keys : pairs ([[trigger, target], ...]), in_opm, world_up_vector, world_up_object, primary_axis, secondary_axis, input_mode
+    '''
+    from nb_rigging_toolkit import nb_rgtk_api as nb_api
+
+    # All pairs are resolved once, in one transaction
+    if not nb_api.aim_constraints (operation['pairs'], operation.get('in_opm', False), operation.get('world_up_vector', (0, 1, 0)),
+                                   operation.get('world_up_object'), operation.get('primary_axis', (1, 0, 0)), operation.get('secondary_axis', (0, 1, 0)),
+                                   operation.get('input_mode', 'group')) :
+        raise BatchError ("Aim constraints are not valid, see warnings")
+
+def run_aim_chain (operation) :
+    '''
+    Aim chains, always connected in offsetParentMatrix. operation keys : chains ([[root, ..., tip], ...]), world_up_vector, world_up_object,
+    primary_axis, secondary_axis, up_mode, last_mode, last_target
+    '''
+    from nb_rigging_toolkit import nb_rgtk_api as nb_api
+
+    if 'in_opm' in operation :
+        raise BatchError ("aim_chain can't use in_opm, chains are always connected in offsetParentMatrix")
+
+    for chain in operation['chains'] :
+        if not nb_api.aim_chain (chain, operation.get('world_up_vector', (0, 1, 0)), operation.get('world_up_object'),
+                                 operation.get('primary_axis', (1, 0, 0)), operation.get('secondary_axis', (0, 1, 0)), operation.get('up_mode', 'object'),
+                                 operation.get('last_mode', 'align'), operation.get('last_target')) :
+            raise BatchError ("Aim chain of {} is not valid, see warnings".format(chain[0] if chain else None))
+
+def run_connect (operation) :
+    '''
+    Bulk connections. operation keys : rules (['source.attr -> targets.attr', ...]), policy
+    '''
+    from nb_rigging_toolkit import nb_rgtk_utils as nb_utils
+
+    try :
+        nb_utils.bulk_connect (operation['rules'], operation.get('policy', 'skip'))
+    except nb_utils.ConnectConflictError as error :
+        raise BatchError ("Connections are not valid : {}".format(error))
+
+def run_parent_space (operation) :
+    '''
+    Parent spaces. operation keys : records ([[target, settings, triggers, attr_name, parent_translate], ...])
+    '''
+    from nb_rigging_toolkit import nb_rgtk_parent_space as nb_ps
+
+    records = [(target, settings, list(triggers), attr_name, parent_translate) for target, settings, triggers, attr_name, parent_translate in operation['records']]
+    if not nb_ps.parent_space_batch (records) :
+        raise BatchError ("Parent spaces are not valid, see warnings")
+
+def run_module (operation) :
+    '''
+    Rigging modules. operation keys : names (list), template (dict, see nb_rgtk_utils.MODULE_TEMPLATE), parent (str)
+    '''
+    from nb_rigging_toolkit import nb_rgtk_utils as nb_utils
+
+    try :
+        nb_utils.create_modules (operation['names'], operation.get('template'), operation.get('parent'))
+    except ValueError as error :
+        raise BatchError ("Module template is not valid : {}".format(error))
+
+def run_opm (operation) :
+    '''
+    Set transforms in offsetParentMatrix. operation keys : objects (list), hierarchy (bool)
+    '''
+    from nb_rigging_toolkit import nb_rgtk_utils as nb_utils
+
+    nb_utils.set_transform_in_opm (list(operation['objects']), operation.get('hierarchy', False))
+
+def run_orient_skeleton (operation) :
+    '''
+    Orient skeletons. operation keys : objects (list of joints or roots), mode, hierarchy, primary_axis, secondary_axis, world_up_vector
+    '''
+    from nb_rigging_toolkit import nb_rgtk_skeleton as nb_skeleton
+
+    mode = operation.get('mode', 'zero_orient')
+    if mode not in nb_skeleton.ORIENT_MODES :
+        raise BatchError ("Unknown orient mode {}".format(mode))
+
+    if not nb_skeleton.orient_skeleton (list(operation['objects']), mode, operation.get('hierarchy', True), tuple(operation.get('primary_axis', (1, 0, 0))),
+                                        tuple(operation.get('secondary_axis', (0, 1, 0))), tuple(operation.get('world_up_vector', (0, 1, 0)))) :
+        raise BatchError ("No joint oriented, see warnings")
+
+OPERATIONS = {'parent_constraint' : run_parent_constraint,
+              'mass_attach' : run_mass_attach,
+              'aim_constraint' : run_aim_constraint,
+              'aim_chain' : run_aim_chain,
+              'parent_space' : run_parent_space,
+              'connect' : run_connect,
+              'module' : run_module,
+              'opm' : run_opm,
+              'orient_skeleton' : run_orient_skeleton}
+
+def load_job (job) :
+    '''
+    Read and check a job, return a list of tasks : {'index', 'path', 'output', 'operations'}
+    A file given twice or two files saved as the same output raise a BatchError
+    job -> job file path or job dict (str or dict)
+    '''
+    if not isinstance(job, dict) :
+        with open (job) as job_file :
+            job = json.load (job_file)
+
+    if not job.get ('files') :
+        raise BatchError ("Job has no file")
+
+    tasks = []
+    inputs = set()
+    outputs = {}
+    for each in job['files'] :
+        entry = each if isinstance(each, dict) else {'path' : each}
+        operations = list(job.get ('operations', [])) + list(entry.get ('operations', []))
+
+        unknown = [operation.get('operation') for operation in operations if operation.get('operation') not in OPERATIONS]
+        if unknown :
+            raise BatchError ("Unknown operations {} for {}, use one of {}".format(', '.join(map(str, unknown)), entry['path'], ', '.join(OPERATIONS)))
+
+        output = None
+        if job.get ('save', True) :
+            output = os.path.join (job['output_dir'], os.path.basename(entry['path'])) if job.get ('output_dir') else entry['path']
+
+        # Each file is opened and saved by one worker, two tasks can't read or write the same file
+        input_key = os.path.normcase (os.path.abspath(entry['path']))
+        if input_key in inputs :
+            raise BatchError ("{} is given twice".format(entry['path']))
+        inputs.add (input_key)
+
+        if output :
+            output_key = os.path.normcase (os.path.abspath(output))
+            if output_key in outputs :
+                raise BatchError ("{} and {} are both saved as {}".format(outputs[output_key], entry['path'], output))
+            outputs[output_key] = entry['path']
+
+        tasks.append ({'index' : len(tasks), 'path' : entry['path'], 'output' : output, 'operations' : operations})
+
+    return tasks
+
+def _initialize_worker (layer_factory) :
+    '''
+    Set the layer used by a worker process. The layer is initialized by the first file, so a failed maya start is reported
+    as a failed file instead of killing the worker.
+    Pool workers don't run atexit functions, the layer is stopped by a multiprocessing finalizer when the worker exits
+    '''
+    global _layer_factory, _layer, _finalizer
+
+    _layer_factory = layer_factory
+    _layer = None
+
+    if _finalizer is not None :
+        _finalizer.cancel ()
+    _finalizer = multiprocessing.util.Finalize (None, _uninitialize_worker, exitpriority = 10)
+
+def _uninitialize_worker () :
+    '''
+    Stop the layer of the worker process, if a file started it
+    '''
+    global _layer
+
+    if _layer is not None :
+        _layer.uninitialize ()
+    _layer = None
+
+def process_file (task) :
+    '''
+    Open task file, run its operations and save it. Run in a worker process
+    Return a result : {'index', 'path', 'status' ('ok' or 'failed'), 'duration', 'operations' : [(name, duration)], 'error'}
+    '''
+    global _layer
+
+    result = {'index' : task['index'], 'path' : task['path'], 'status' : 'ok', 'duration' : 0.0, 'operations' : [], 'error' : None, 'pid' : os.getpid()}
+    start = time.perf_counter()
+
+    try :
+        if _layer is None :
+            layer = _layer_factory ()
+            layer.initialize ()
+            _layer = layer
+
+        _layer.open_file (task['path'])
+
+        for operation in task['operations'] :
+            operation_start = time.perf_counter()
+            OPERATIONS[operation['operation']] (operation)
+            result['operations'].append ((operation['operation'], time.perf_counter() - operation_start))
+
+        if task['output'] :
+            _layer.save_file (task['output'])
+
+    except Exception as error :
+        result['status'] = 'failed'
+        result['error'] = '{}: {}'.format(type(error).__name__, error)
+        result['traceback'] = traceback.format_exc ()
+
+    result['duration'] = time.perf_counter() - start
+
+    return result
+
+def run_job (job, workers = None, layer_factory = MayapyLayer) :
+    '''
+    Run a job over a pool of worker processes
+    job -> job file path or job dict (str or dict)
+    workers -> number of worker processes, cpu count if None, 0 to run in the current process (int)
+    layer_factory -> callable returning the maya layer of each worker (class)
+    Return results in job files order (list)
+    '''
+    tasks = load_job (job)
+    if workers is None :
+        workers = multiprocessing.cpu_count ()
+
+    # Run in current process, mostly used for debugging
+    if workers == 0 :
+        _initialize_worker (layer_factory)
+        try :
+            return [process_file (task) for task in tasks]
+        finally :
+            # Stop the layer now and unregister its finalizer
+            _finalizer ()
+
+    # Files are given one by one to the first free worker, so a long file doesn't hold others
+    pool = multiprocessing.Pool (processes = min(workers, len(tasks)), initializer = _initialize_worker, initargs = (layer_factory,))
+    try :
+        results = list(pool.imap_unordered (process_file, tasks, chunksize = 1))
+    finally :
+        pool.close ()
+        pool.join ()
+
+    # Workers return results in completion order, put them back in job order
+    return sorted (results, key = lambda result : result['index'])
+
+def print_summary (results, wall_time = None) :
+    '''
+    Print each file status and timing, then totals. Return the summary text
+    '''
+    lines = ['{:<48} {:<7} {:>9}  {}'.format('File', 'Status', 'Time (s)', 'Operations / Error')]
+
+    for result in results :
+        details = result['error'] or ', '.join('{} {:.2f}s'.format(name, duration) for name, duration in result['operations'])
+        lines.append ('{:<48} {:<7} {:>9.2f}  {}'.format(result['path'], result['status'], result['duration'], details))
+
+    failed = [result for result in results if result['status'] != 'ok']
+    total = '{} files, {} ok, {} failed, {:.2f}s of work'.format(len(results), len(results) - len(failed), len(failed), sum(result['duration'] for result in results))
+    if wall_time is not None :
+        total += ' in {:.2f}s'.format(wall_time)
+    lines.append (total)
+
+    text = '\n'.join (lines)
+    print (text)
+
+    return text
+
+def main (argv = None) :
+    '''
+    Command line entry point. Return 0 if every file succeeded, 1 otherwise
+    '''
+    parser = argparse.ArgumentParser (description = "Apply NB Rigging Toolkit operations to many scene files under mayapy")
+    parser.add_argument ('job', help = "job JSON file")
+    parser.add_argument ('--workers', type = int, default = None, help = "number of worker processes, cpu count by default, 0 to run in this process")
+    parser.add_argument ('--report', default = None, help = "JSON file where results are written")
+    args = parser.parse_args (argv)
+
+    start = time.perf_counter()
+    try :
+        results = run_job (args.job, args.workers)
+    except BatchError as error :
+        print ('Job error : {}'.format(error))
+        return 1
+
+    print_summary (results, time.perf_counter() - start)
+
+    if args.report :
+        with open (args.report, 'w') as report_file :
+            json.dump (results, report_file, indent = 4)
+
+    return 0 if all(result['status'] == 'ok' for result in results) else 1
+
+if __name__ == '__main__' :
+    sys.exit (main ())
@@ -0,0 +1,671 @@
+"""
+Offline evaluator of the matrix networks built by the toolkit. It runs without maya : a network is read once from the scene
+(read_network) or loaded from a JSON graph (load_graph), then evaluated with numpy for a whole batch of input poses or frames at once.
+Long frame ranges can be split in chunks evaluated by worker processes. Workers are only started when they are asked for :
+they run sys.executable, which is the maya binary in an interactive session, so call multiprocessing.set_executable with mayapy
+before using workers from the script editor.
+
+    from nb_rigging_toolkit import nb_rgtk_evaluator as nb_eval
+    graph = nb_eval.read_network (['hand_jnt'])                     # in maya
+    nb_eval.save_graph (graph, 'hand.json')
+
+    graph = nb_eval.load_graph ('hand.json')                        # anywhere, maya is not needed
+    results = nb_eval.evaluate (graph, ['hand_jnt.worldMatrix[0]'], {'hand_ctrl.translate' : translates}, workers = 4)
+
+A graph is a dict :
+    {'nodes' : {'hand_ctrl' : {'type' : 'transform', 'parent' : 'arm_grp', 'values' : {'translate' : [0, 0, 0], ...}}, ...},
+     'connections' : [['hand_ctrl.worldMatrix[0]', 'hand_jnt_parentMConstraint_multMat.matrixIn[1]'], ...]}
+Supported node types : transform and joint (with offsetParentMatrix), multMatrix, blendMatrix, aimMatrix, composeMatrix, decomposeMatrix,
+pickMatrix and choice. Nodes of other types are 'input' nodes : their plugs keep the value read from the scene, or are given as inputs.
+
+Inputs and results hold one value per frame : arrays of shape (frames, 4, 4) for matrices, (frames, 3) for vectors and (frames,) for numbers.
+Like the rest of the toolkit, rotations use xyz rotate order, rotateAxis and shear are ignored.
+"""
+import json
+import multiprocessing
+import re
+import time
+
+import numpy as np
+
+from nb_rigging_toolkit import nb_rgtk_math as nb_math
+
+class EvaluationError (Exception) :
+    '''
+    Error raised when a graph can't be evaluated : missing value, cycle or invalid input
+    '''
+
+# Long names of short attribut names, by node type. '*' names are used by every type
+ATTR_LONG_NAMES = {'*' : {'imat' : 'inputMatrix', 'omat' : 'outputMatrix', 'tmat' : 'targetMatrix', 'rot' : 'rotateWeight', 'tra' : 'translateWeight',
+                          'sca' : 'scaleWeight', 'ot' : 'outputTranslate', 'or' : 'outputRotate', 'os' : 'outputScale', 'it' : 'inputTranslate',
+                          'ir' : 'inputRotate', 'is' : 'inputScale'},
+                   'transform' : {'t' : 'translate', 'tx' : 'translateX', 'ty' : 'translateY', 'tz' : 'translateZ',
+                                  'r' : 'rotate', 'rx' : 'rotateX', 'ry' : 'rotateY', 'rz' : 'rotateZ',
+                                  's' : 'scale', 'sx' : 'scaleX', 'sy' : 'scaleY', 'sz' : 'scaleZ', 'jo' : 'jointOrient', 'opm' : 'offsetParentMatrix',
+                                  'm' : 'matrix', 'wm' : 'worldMatrix', 'wim' : 'worldInverseMatrix', 'pm' : 'parentMatrix', 'pim' : 'inverseParentMatrix'},
+                   'multMatrix' : {'i' : 'matrixIn', 'o' : 'matrixSum'},
+                   'choice' : {'s' : 'selector', 'i' : 'input', 'o' : 'output'}}
+
+# Attributs read from the scene by node type. Multi attributs are given with [], their children after the dot
+TYPE_ATTRS = {'transform' : ['translate', 'rotate', 'scale', 'offsetParentMatrix'],
+              'joint' : ['translate', 'rotate', 'scale', 'jointOrient', 'offsetParentMatrix'],
+              'multMatrix' : ['matrixIn[]'],
+              'blendMatrix' : ['inputMatrix', 'envelope', 'target[].targetMatrix', 'target[].weight', 'target[].translateWeight',
+                               'target[].rotateWeight', 'target[].scaleWeight'],
+              'aimMatrix' : ['inputMatrix', 'primaryInputAxis', 'primaryMode', 'primaryTargetVector', 'primaryTargetMatrix',
+                             'secondaryInputAxis', 'secondaryMode', 'secondaryTargetVector', 'secondaryTargetMatrix'],
+              'composeMatrix' : ['inputTranslate', 'inputRotate', 'inputScale'],
+              'decomposeMatrix' : ['inputMatrix'],
+              'pickMatrix' : ['inputMatrix', 'useTranslate', 'useRotate', 'useScale'],
+              'choice' : ['selector', 'input[]']}
+
+TRANSFORM_TYPES = ('transform', 'joint')
+
+# Output attributs of each node type
+OUTPUT_ATTRS = {'transform' : ('matrix', 'worldMatrix', 'worldInverseMatrix', 'parentMatrix', 'inverseParentMatrix'),
+                'multMatrix' : ('matrixSum',),
+                'blendMatrix' : ('outputMatrix',),
+                'aimMatrix' : ('outputMatrix',),
+                'composeMatrix' : ('outputMatrix',),
+                'decomposeMatrix' : ('outputTranslate', 'outputRotate', 'outputScale'),
+                'pickMatrix' : ('outputMatrix',),
+                'choice' : ('output',)}
+
+# Default values of attributs, multi indices removed
+IDENTITY = np.identity (4)
+DEFAULTS = {'translate' : (0, 0, 0), 'rotate' : (0, 0, 0), 'scale' : (1, 1, 1), 'jointOrient' : (0, 0, 0), 'offsetParentMatrix' : IDENTITY,
+            'matrixIn' : IDENTITY, 'inputMatrix' : IDENTITY, 'envelope' : 1.0, 'target.targetMatrix' : IDENTITY, 'target.weight' : 1.0,
+            'target.translateWeight' : 1.0, 'target.rotateWeight' : 1.0, 'target.scaleWeight' : 1.0,
+            'primaryInputAxis' : (1, 0, 0), 'primaryMode' : 1, 'primaryTargetVector' : (1, 0, 0), 'primaryTargetMatrix' : IDENTITY,
+            'secondaryInputAxis' : (0, 1, 0), 'secondaryMode' : 0, 'secondaryTargetVector' : (0, 1, 0), 'secondaryTargetMatrix' : IDENTITY,
+            'inputTranslate' : (0, 0, 0), 'inputRotate' : (0, 0, 0), 'inputScale' : (1, 1, 1),
+            'useTranslate' : True, 'useRotate' : True, 'useScale' : True, 'selector' : 0}
+
+# Vector attributs, their X, Y and Z children can be connected one by one
+VECTOR_ATTRS = ('translate', 'rotate', 'scale', 'jointOrient', 'inputTranslate', 'inputRotate', 'inputScale', 'outputTranslate', 'outputRotate',
+                'outputScale', 'primaryInputAxis', 'primaryTargetVector', 'secondaryInputAxis', 'secondaryTargetVector')
+
+# Transform matrix attributs with one element, 'worldMatrix[0]' is stored as 'worldMatrix'
+SINGLE_ELEMENT_ATTRS = ('worldMatrix', 'worldInverseMatrix', 'parentMatrix', 'inverseParentMatrix')
+
+# aimMatrix modes
+LOCK, AIM, ALIGN = 0, 1, 2
+
+# Tolerance used to compare evaluated and expected values
+TOLERANCE = 1e-4
+
+# Evaluator of the current worker process
+_worker_evaluator = None
+
+def get_type (node_type) :
+    '''
+    Return the evaluated type of a maya node type : joints are evaluated as transforms, unsupported types are 'input'
+    '''
+    if node_type in TRANSFORM_TYPES :
+        return 'transform'
+
+    return node_type if node_type in OUTPUT_ATTRS else 'input'
+
+def long_attr (node_type, attr) :
+    '''
+    Return attribut path with long names, ex : ('blendMatrix', 'target[0].tmat') -> 'target[0].targetMatrix'
+    Single element transform matrices lose their index : 'worldMatrix[0]' -> 'worldMatrix'
+    '''
+    names = dict(ATTR_LONG_NAMES['*'], **ATTR_LONG_NAMES.get (get_type(node_type), {}))
+    attr = '.'.join (re.sub(r'^\w+', lambda match : names.get(match.group(0), match.group(0)), part) for part in attr.split('.'))
+
+    if get_type (node_type) == 'transform' :
+        attr = re.sub (r'^({})\[0\]$'.format('|'.join(SINGLE_ELEMENT_ATTRS)), r'\1', attr)
+
+    return attr
+
+def default_key (attr) :
+    '''
+    Return DEFAULTS key of an attribut path, ex : 'target[2].weight' -> 'target.weight'
+    '''
+    return re.sub (r'\[\d+\]', '', attr)
+
+def to_value (value) :
+    '''
+    Return a static value as a numpy array : (4, 4) for matrices, (3,) for vectors, () for numbers
+    value -> value returned by cmds.getAttr or stored in a graph (float, list or tuple)
+    '''
+    value = np.asarray (value, dtype = float)
+
+    if value.size == 16 :
+        return value.reshape (4, 4)
+    if value.size == 3 :
+        return value.reshape (3)
+    if value.size == 1 :
+        return value.reshape (())
+
+    raise EvaluationError ("Value of {} elements is not supported".format(value.size))
+
+def to_frames (value, frames = None) :
+    '''
+    Return input values of each frame as a numpy array : (frames, 4, 4) for matrices, (frames, 3) for vectors, (frames,) for numbers
+    value -> one value per frame (array like)
+    frames -> expected number of frames, any if None (int)
+    '''
+    value = np.asarray (value, dtype = float)
+    if value.ndim == 0 :
+        raise EvaluationError ("Inputs need one value per frame")
+
+    value = value.reshape (len(value), -1)
+    if frames is not None and len(value) != frames :
+        raise EvaluationError ("Inputs have {} and {} frames".format(len(value), frames))
+
+    if value.shape[1] == 16 :
+        return value.reshape (-1, 4, 4)
+    if value.shape[1] == 3 :
+        return value
+    if value.shape[1] == 1 :
+        return value.reshape (-1)
+
+    raise EvaluationError ("Input values of {} elements are not supported".format(value.shape[1]))
+
+def to_plain (value) :
+    '''
+    Return a value that can be saved as JSON : float or list of floats
+    '''
+    value = np.asarray (value, dtype = float)
+
+    return float(value) if value.ndim == 0 else [float(each) for each in value.reshape(-1)]
+
+def get_frame_count (inputs) :
+    '''
+    Return the number of frames of inputs, None if inputs are empty. Raise EvaluationError if inputs don't have the same number of frames
+    '''
+    counts = set(len(np.asarray(value).reshape(len(value), -1)) for value in inputs.values())
+    if len(counts) > 1 :
+        raise EvaluationError ("Inputs have different numbers of frames : {}".format(', '.join(map(str, sorted(counts)))))
+
+    return counts.pop () if counts else None
+
+def quaternions (rotations) :
+    '''
+    Return unit quaternions (x, y, z, w) of rotation matrices (numpy array (n, 3, 3), row vectors). Quaternions are found as
+    the main eigen vector of the symmetric matrix of each rotation, which is stable for every angle
+    '''
+    r = np.transpose (rotations, (0, 2, 1))
+    k = np.empty ((len(r), 4, 4))
+    k[:, 0] = np.stack ([r[:, 0, 0] - r[:, 1, 1] - r[:, 2, 2], r[:, 1, 0] + r[:, 0, 1], r[:, 2, 0] + r[:, 0, 2], r[:, 2, 1] - r[:, 1, 2]], axis = -1)
+    k[:, 1] = np.stack ([r[:, 1, 0] + r[:, 0, 1], r[:, 1, 1] - r[:, 0, 0] - r[:, 2, 2], r[:, 2, 1] + r[:, 1, 2], r[:, 0, 2] - r[:, 2, 0]], axis = -1)
+    k[:, 2] = np.stack ([r[:, 2, 0] + r[:, 0, 2], r[:, 2, 1] + r[:, 1, 2], r[:, 2, 2] - r[:, 0, 0] - r[:, 1, 1], r[:, 1, 0] - r[:, 0, 1]], axis = -1)
+    k[:, 3] = np.stack ([r[:, 2, 1] - r[:, 1, 2], r[:, 0, 2] - r[:, 2, 0], r[:, 1, 0] - r[:, 0, 1], r[:, 0, 0] + r[:, 1, 1] + r[:, 2, 2]], axis = -1)
+
+    return np.linalg.eigh (k / 3.0)[1][:, :, -1]
+
+def quaternion_rotations (quats) :
+    '''
+    Return rotation matrices (numpy array (n, 3, 3), row vectors) of unit quaternions (x, y, z, w)
+    '''
+    x, y, z, w = np.transpose (quats)
+    rotations = np.stack ([np.stack ([1 - 2 * (y * y + z * z), 2 * (x * y + z * w), 2 * (x * z - y * w)], axis = -1),
+                           np.stack ([2 * (x * y - z * w), 1 - 2 * (x * x + z * z), 2 * (y * z + x * w)], axis = -1),
+                           np.stack ([2 * (x * z + y * w), 2 * (y * z - x * w), 1 - 2 * (x * x + y * y)], axis = -1)], axis = 1)
+
+    return rotations
+
+def slerp (quats_a, quats_b, weights) :
+    '''
+    Spherical interpolation of quaternions, by the shortest path
+    quats_a, quats_b -> start and end quaternions (numpy arrays (n, 4))
+    weights -> interpolation weights, 0 gives quats_a (numpy array (n,))
+    '''
+    dots = np.sum (quats_a * quats_b, axis = -1)
+    quats_b = np.where ((dots < 0)[:, None], -quats_b, quats_b)
+    dots = np.clip (np.abs(dots), 0.0, 1.0)
+
+    angles = np.arccos (dots)
+    sines = np.sin (angles)
+    close = sines < 1e-6
+    safe_sines = np.where (close, 1.0, sines)
+
+    # Close quaternions are linearly interpolated
+    factors_a = np.where (close, 1.0 - weights, np.sin((1.0 - weights) * angles) / safe_sines)
+    factors_b = np.where (close, weights, np.sin(weights * angles) / safe_sines)
+    quats = factors_a[:, None] * quats_a + factors_b[:, None] * quats_b
+
+    return quats / np.linalg.norm (quats, axis = -1)[:, None]
+
+def split_matrices (matrices) :
+    '''
+    Return translates (n, 3), rotations (n, 3, 3) without scale and scales (n, 3) of matrices. Shear is ignored
+    '''
+    scales = nb_math.decompose_matrices (matrices)[2]
+    rows = matrices[:, :3, :3] / np.where(scales == 0, 1.0, scales)[:, :, None]
+
+    return matrices[:, 3, :3], rows, scales
+
+def join_matrices (translates, rotations, scales) :
+    '''
+    Return matrices of translates (n, 3), rotations (n, 3, 3) and scales (n, 3), like composeMatrix
+    '''
+    matrices = np.tile (IDENTITY, (len(translates), 1, 1))
+    matrices[:, :3, :3] = rotations * scales[:, :, None]
+    matrices[:, 3, :3] = translates
+
+    return matrices
+
+def blend_matrices (matrices_a, matrices_b, translate_weights, rotate_weights, scale_weights) :
+    '''
+    Blend matrices like one blendMatrix target : translate and scale are interpolated linearly, rotation spherically
+    matrices_a, matrices_b -> start and end matrices (numpy arrays (n, 4, 4))
+    translate_weights, rotate_weights, scale_weights -> weight of matrices_b for each channel (numpy arrays (n,))
+    '''
+    translates_a, rotations_a, scales_a = split_matrices (matrices_a)
+    translates_b, rotations_b, scales_b = split_matrices (matrices_b)
+
+    translates = translates_a + (translates_b - translates_a) * translate_weights[:, None]
+    scales = scales_a + (scales_b - scales_a) * scale_weights[:, None]
+    rotations = quaternion_rotations (slerp (quaternions(rotations_a), quaternions(rotations_b), rotate_weights))
+
+    return join_matrices (translates, rotations, scales)
+
+class NetworkEvaluator () :
+    '''
+    Evaluate plugs of a graph for many frames at once. Each plug is computed once per evaluation, for all frames
+    '''
+    def __init__ (self, graph) :
+        '''
+        graph -> nodes and connections, see module documentation (dict)
+        '''
+        self.nodes = graph['nodes']
+
+        # {(destination node, attribut) : (source node, attribut)}, with long attribut names
+        self.connections = {}
+        # {node : destination attributs}, used to find connected multi indices
+        self.destinations = {}
+        for source, destination in graph['connections'] :
+            destination = self.split_plug (destination)
+            self.connections[destination] = self.split_plug (source)
+            self.destinations.setdefault (destination[0], []).append (destination[1])
+
+        self.frames = 1
+        self.cache = {}
+        self.pending = set()
+
+    def node_type (self, node) :
+        '''
+        Return the evaluated type of node, see get_type
+        '''
+        if node not in self.nodes :
+            raise EvaluationError ("Node {} is not in the graph".format(node))
+
+        return get_type (self.nodes[node]['type'])
+
+    def split_plug (self, plug) :
+        '''
+        Return node and long attribut path of plug, ex : 'hand_ctrl.wm[0]' -> ('hand_ctrl', 'worldMatrix')
+        '''
+        node, attr = plug.split ('.', 1)
+
+        return node, long_attr (self.nodes[node]['type'] if node in self.nodes else 'input', attr)
+
+    def evaluate (self, plugs, inputs = None, frames = None) :
+        '''
+        Evaluate plugs for each frame
+        plugs -> evaluated plugs, ex : ['hand_jnt.worldMatrix[0]'] (list)
+        inputs -> {plug : one value per frame}, these plugs don't use their graph value or connection (dict)
+        frames -> number of frames if there is no input, 1 if None (int)
+        Return {plug : one value per frame}
+        '''
+        inputs = inputs or {}
+        self.frames = get_frame_count (inputs) or frames or 1
+        self.cache = {self.split_plug (plug) : to_frames (value, self.frames) for plug, value in inputs.items()}
+        self.pending = set()
+
+        return {plug : self.get_value (*self.split_plug(plug)) for plug in plugs}
+
+    def get_value (self, node, attr) :
+        '''
+        Return node.attr value of each frame : input value, connected source value, computed output or static value
+        '''
+        key = (node, attr)
+        if key in self.cache :
+            return self.cache[key]
+
+        if key in self.pending :
+            raise EvaluationError ("Cycle found at {}.{}".format(node, attr))
+        self.pending.add (key)
+
+        if key in self.connections :
+            value = self.get_value (*self.connections[key])
+        elif attr[-1:] in ('X', 'Y', 'Z') and attr[:-1] in VECTOR_ATTRS :
+            value = self.get_value (node, attr[:-1])[:, 'XYZ'.index(attr[-1])]
+        elif attr in VECTOR_ATTRS and any(self.is_driven (node, attr + axis) for axis in 'XYZ') :
+            # Children without connection or input keep the compound value
+            static_value = self.get_static_value (node, attr)
+            value = np.stack ([self.get_value (node, attr + axis) if self.is_driven (node, attr + axis) else static_value[:, x]
+                               for x, axis in enumerate('XYZ')], axis = -1)
+        elif attr in OUTPUT_ATTRS.get (self.node_type(node), ()) :
+            value = getattr(self, 'compute_' + self.node_type(node)) (node, attr)
+        else :
+            value = self.get_static_value (node, attr)
+
+        self.pending.discard (key)
+        self.cache[key] = value
+
+        return value
+
+    def is_driven (self, node, attr) :
+        '''
+        Return True if node.attr is connected or given as input
+        '''
+        return (node, attr) in self.connections or (node, attr) in self.cache
+
+    def get_static_value (self, node, attr) :
+        '''
+        Return node.attr graph value, or its default value, repeated for each frame
+        '''
+        values = self.nodes[node].get ('values', {})
+        if attr in values :
+            value = to_value (values[attr])
+        elif default_key (attr) in DEFAULTS and self.node_type(node) != 'input' :
+            value = to_value (DEFAULTS[default_key(attr)])
+        else :
+            raise EvaluationError ("{}.{} has no value, give it as input".format(node, attr))
+
+        return np.broadcast_to (value, (self.frames,) + value.shape)
+
+    def get_indices (self, node, multi) :
+        '''
+        Return sorted indices of a multi attribut that have a value or a connection, ex : get_indices ('multMat', 'matrixIn') -> [0, 1]
+        '''
+        pattern = re.compile (r'^{}\[(\d+)\]'.format(re.escape(multi)))
+        attrs = list(self.nodes[node].get ('values', {})) + self.destinations.get (node, [])
+
+        return sorted (set(int(match.group(1)) for match in map(pattern.match, attrs) if match))
+
+    def compute_transform (self, node, attr) :
+        '''
+        Transform matrices. Local matrix is scale * rotate * jointOrient * translate, world matrix is local * offsetParentMatrix * parent world
+        '''
+        if attr in ('parentMatrix', 'inverseParentMatrix') :
+            parent = self.nodes[node].get ('parent')
+            matrices = self.get_value (parent, 'worldMatrix') if parent else np.broadcast_to (IDENTITY, (self.frames, 4, 4))
+            return np.linalg.inv (matrices) if attr == 'inverseParentMatrix' else matrices
+
+        if attr == 'matrix' :
+            rotations = nb_math.compose_matrices (np.zeros((self.frames, 3)), self.get_value (node, 'rotate'), np.ones((self.frames, 3)))
+            if self.nodes[node]['type'] == 'joint' :
+                orients = nb_math.compose_matrices (np.zeros((self.frames, 3)), self.get_value (node, 'jointOrient'), np.ones((self.frames, 3)))
+                rotations = np.matmul (rotations, orients)
+            return join_matrices (self.get_value (node, 'translate'), rotations[:, :3, :3], self.get_value (node, 'scale'))
+
+        world_matrices = np.matmul (np.matmul (self.get_value (node, 'matrix'), self.get_value (node, 'offsetParentMatrix')),
+                                    self.get_value (node, 'parentMatrix'))
+
+        return np.linalg.inv (world_matrices) if attr == 'worldInverseMatrix' else world_matrices
+
+    def compute_multMatrix (self, node, attr) :
+        '''
+        Product of matrixIn elements, in index order
+        '''
+        result = np.broadcast_to (IDENTITY, (self.frames, 4, 4))
+        for index in self.get_indices (node, 'matrixIn') :
+            result = np.matmul (result, self.get_value (node, 'matrixIn[{}]'.format(index)))
+
+        return result
+
+    def compute_blendMatrix (self, node, attr) :
+        '''
+        inputMatrix blended with each target in index order, then with the result by envelope
+        '''
+        input_matrices = self.get_value (node, 'inputMatrix')
+        result = input_matrices
+
+        targets = self.get_indices (node, 'target')
+        for index in targets :
+            target = 'target[{}].'.format(index)
+            weights = self.get_value (node, target + 'weight')
+            result = blend_matrices (result, self.get_value (node, target + 'targetMatrix'), weights * self.get_value (node, target + 'translateWeight'),
+                                     weights * self.get_value (node, target + 'rotateWeight'), weights * self.get_value (node, target + 'scaleWeight'))
+
+        envelopes = self.get_value (node, 'envelope')
+        if targets and np.any (envelopes != 1.0) :
+            result = blend_matrices (input_matrices, result, envelopes, envelopes, envelopes)
+
+        return result
+
+    def compute_aimMatrix (self, node, attr) :
+        '''
+        inputMatrix rotated so primaryInputAxis aims (or aligns) at its target and secondaryInputAxis is as close as possible to its target.
+        Position and scale of inputMatrix are kept
+        '''
+        translates, rotations, scales = split_matrices (self.get_value (node, 'inputMatrix'))
+        directions = {}
+
+        for axis in ('primary', 'secondary') :
+            input_axes = self.get_value (node, axis + 'InputAxis')
+            modes = np.round (self.get_value (node, axis + 'Mode')).astype(int)
+            target_matrices = self.get_value (node, axis + 'TargetMatrix')
+
+            # Lock (primary) or None (secondary) mode keeps the current axis
+            current = np.einsum ('ni,nij->nj', input_axes, rotations)
+            aimed = target_matrices[:, 3, :3] - translates
+            aligned = np.einsum ('ni,nij->nj', self.get_value (node, axis + 'TargetVector'), target_matrices[:, :3, :3])
+            directions[axis] = np.where ((modes == AIM)[:, None], aimed, np.where ((modes == ALIGN)[:, None], aligned, current))
+
+        aims, valid = nb_math.aim_rotations (directions['primary'], directions['secondary'], self.get_value (node, 'primaryInputAxis'),
+                                             self.get_value (node, 'secondaryInputAxis'))
+
+        return join_matrices (translates, np.where (valid[:, None, None], aims, rotations), scales)
+
+    def compute_composeMatrix (self, node, attr) :
+        '''
+        Matrix of inputTranslate, inputRotate and inputScale
+        '''
+        return nb_math.compose_matrices (self.get_value (node, 'inputTranslate'), self.get_value (node, 'inputRotate'), self.get_value (node, 'inputScale'))
+
+    def compute_decomposeMatrix (self, node, attr) :
+        '''
+        Translate, rotate and scale of inputMatrix. All outputs are cached at once
+        '''
+        outputs = nb_math.decompose_matrices (self.get_value (node, 'inputMatrix'))
+        for output, value in zip(OUTPUT_ATTRS['decomposeMatrix'], outputs) :
+            self.cache[(node, output)] = value
+
+        return self.cache[(node, attr)]
+
+    def compute_pickMatrix (self, node, attr) :
+        '''
+        inputMatrix with only used channels, others are reset
+        '''
+        translates, rotations, scales = split_matrices (self.get_value (node, 'inputMatrix'))
+        uses = [self.get_value (node, 'use' + channel).astype(bool) for channel in ('Translate', 'Rotate', 'Scale')]
+
+        return join_matrices (np.where (uses[0][:, None], translates, 0.0), np.where (uses[1][:, None, None], rotations, np.identity(3)),
+                              np.where (uses[2][:, None], scales, 1.0))
+
+    def compute_choice (self, node, attr) :
+        '''
+        input element given by selector, for each frame
+        '''
+        indices = self.get_indices (node, 'input')
+        selectors = np.round (self.get_value (node, 'selector')).astype(int)
+
+        missing = sorted (set(selectors.tolist()) - set(indices))
+        if missing :
+            raise EvaluationError ("{}.input has no element {}".format(node, ', '.join(map(str, missing))))
+
+        values = np.stack ([self.get_value (node, 'input[{}]'.format(index)) for index in indices])
+
+        return values[np.searchsorted (indices, selectors), np.arange (self.frames)]
+
+def read_network (nodes) :
+    '''
+    Read the network driving nodes from the scene : nodes, their upstream nodes and transform parents, values and connections.
+    Upstream nodes of an unsupported type are 'input' nodes, their connected plugs keep their current value
+    nodes -> nodes whose network is read, ex : constrained targets (list)
+    Return graph, see module documentation (dict)
+    '''
+    from maya import cmds
+
+    graph = {'nodes' : {}, 'connections' : []}
+    pending = cmds.ls (list(nodes)) or []
+
+    while pending :
+        names = [each for each in dict.fromkeys (pending) if each not in graph['nodes']]
+        pending = []
+
+        for each in names :
+            node_type = cmds.nodeType (each)
+            graph['nodes'][each] = {'type' : node_type if get_type (node_type) != 'input' else 'input', 'values' : {}}
+
+            if get_type (node_type) == 'transform' :
+                parents = cmds.listRelatives (each, parent = True) or []
+                graph['nodes'][each]['parent'] = parents[0] if parents else None
+                pending += parents
+
+        supported = [each for each in names if graph['nodes'][each]['type'] != 'input']
+        connections = cmds.listConnections (supported, source = True, destination = False, connections = True, plugs = True) if supported else None
+
+        # connections is a flat list : [destination plug, source plug, destination plug, source plug, ...]
+        connections = connections or []
+        for destination, source in zip(connections[::2], connections[1::2]) :
+            graph['connections'].append ([source, destination])
+            pending.append (source.split('.', 1)[0])
+
+    evaluator = NetworkEvaluator (graph)
+    for node, data in graph['nodes'].items() :
+        if data['type'] == 'input' :
+            continue
+
+        for attr in get_read_attrs (evaluator, node) :
+            if (node, attr) not in evaluator.connections :
+                data['values'][attr] = to_plain (cmds.getAttr ('{}.{}'.format(node, attr)))
+
+    # Connected plugs that are not computed keep their value : plugs of input nodes, and other attributs like a parent space enum
+    for source, destination in graph['connections'] :
+        node, attr = evaluator.split_plug (source)
+        node_type = get_type (graph['nodes'][node]['type'])
+        if attr not in OUTPUT_ATTRS.get (node_type, ()) and attr[:-1] not in OUTPUT_ATTRS.get (node_type, ()) :
+            graph['nodes'][node]['values'].setdefault (attr, to_plain (cmds.getAttr (source)))
+
+    return graph
+
+def get_read_attrs (evaluator, node) :
+    '''
+    Return attributs of node read from the scene. Elements of multi attributs are found with getAttr multiIndices and connections
+    '''
+    from maya import cmds
+
+    attrs = []
+    multi_indices = {}
+    for attr in TYPE_ATTRS[evaluator.nodes[node]['type']] :
+        if '[]' not in attr :
+            attrs.append (attr)
+            continue
+
+        multi, child = attr.split ('[]')
+        if multi not in multi_indices :
+            indices = set(cmds.getAttr ('{}.{}'.format(node, multi), multiIndices = True) or [])
+            multi_indices[multi] = sorted (indices | set(evaluator.get_indices (node, multi)))
+        attrs += ['{}[{}]{}'.format(multi, index, child) for index in multi_indices[multi]]
+
+    return attrs
+
+def save_graph (graph, path) :
+    '''
+    Write graph as a JSON file
+    '''
+    with open (path, 'w') as graph_file :
+        json.dump (graph, graph_file, indent = 1)
+
+def load_graph (path) :
+    '''
+    Read a graph written by save_graph
+    '''
+    with open (path) as graph_file :
+        return json.load (graph_file)
+
+def _initialize_worker (graph) :
+    '''
+    Create the evaluator of a worker process, the graph is sent once to each worker
+    '''
+    global _worker_evaluator
+
+    _worker_evaluator = NetworkEvaluator (graph)
+
+def _evaluate_chunk (task) :
+    '''
+    Evaluate one chunk of frames in a worker process. task -> (plugs, chunk inputs, chunk frames)
+    '''
+    plugs, inputs, frames = task
+
+    return _worker_evaluator.evaluate (plugs, inputs, frames)
+
+def evaluate (graph, plugs, inputs = None, frames = None, workers = 0, chunk_size = 2000) :
+    '''
+    Evaluate plugs of graph for each frame. With workers, frames are split in chunks evaluated by a pool of worker processes
+    when there is more than one chunk. Worker processes run sys.executable, see module documentation to use them inside maya
+    graph -> nodes and connections, see module documentation (dict)
+    plugs -> evaluated plugs, ex : ['hand_jnt.worldMatrix[0]'] (list)
+    inputs -> {plug : one value per frame} (dict)
+    frames -> number of frames if there is no input, 1 if None (int)
+    workers -> number of worker processes, 0 to evaluate in the current process, cpu count if None (int)
+    chunk_size -> number of frames evaluated at once by each worker (int)
+    Return {plug : one value per frame}
+    '''
+    inputs = {plug : to_frames (value) for plug, value in (inputs or {}).items()}
+    frames = get_frame_count (inputs) or frames or 1
+
+    if workers is None :
+        workers = multiprocessing.cpu_count ()
+
+    starts = list(range (0, frames, chunk_size))
+    if workers == 0 or len(starts) == 1 :
+        return NetworkEvaluator (graph).evaluate (plugs, inputs, frames)
+
+    tasks = [(plugs, {plug : value[start:start + chunk_size] for plug, value in inputs.items()}, min(chunk_size, frames - start)) for start in starts]
+
+    # Chunks are given one by one to the first free worker, results come back in frames order
+    pool = multiprocessing.Pool (processes = min(workers, len(tasks)), initializer = _initialize_worker, initargs = (graph,))
+    try :
+        chunks = list(pool.imap (_evaluate_chunk, tasks, chunksize = 1))
+    finally :
+        pool.close ()
+        pool.join ()
+
+    return {plug : np.concatenate ([chunk[plug] for chunk in chunks]) for plug in plugs}
+
+def get_errors (results, expected, tolerance = TOLERANCE) :
+    '''
+    Compare evaluated values with expected values
+    results, expected -> {plug : one value per frame} (dict)
+    tolerance -> largest accepted difference (float)
+    Return {plug : largest difference} of plugs over tolerance, empty if results match
+    '''
+    errors = {}
+    for plug, values in expected.items() :
+        error = float(np.max (np.abs (np.asarray(results[plug], dtype = float) - to_frames (values, len(results[plug])))))
+        if error > tolerance :
+            errors[plug] = error
+
+    return errors
+
+def check_scene (nodes, tolerance = TOLERANCE) :
+    '''
+    Read the network of nodes and compare evaluated world matrices of its transforms with their world matrices in the scene
+    nodes -> checked nodes, ex : constrained targets (list)
+    Return {plug : largest difference} of plugs over tolerance, empty if the offline evaluation matches the scene
+    '''
+    graph = read_network (nodes)
+    plugs = ['{}.worldMatrix[0]'.format(node) for node, data in graph['nodes'].items() if data['type'] in TRANSFORM_TYPES]
+    expected = {plug : matrix[None] for plug, matrix in zip(plugs, nb_math.get_matrices (plugs))}
+
+    return get_errors (evaluate (graph, plugs, workers = 0), expected, tolerance)
+
+def benchmark (graph, plugs, inputs = None, frames = 1000, workers = 0, chunk_size = 2000) :
+    '''
+    Time the evaluation of plugs, used as reference to compare other builds of the same network
+    Return {'frames', 'seconds', 'frames_per_second'}
+    '''
+    start = time.perf_counter ()
+    results = evaluate (graph, plugs, inputs, frames, workers, chunk_size)
+    seconds = time.perf_counter () - start
+    frames = len(next(iter(results.values()))) if results else frames
+
+    return {'frames' : frames, 'seconds' : seconds, 'frames_per_second' : frames / seconds if seconds else float('inf')}
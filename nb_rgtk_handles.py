@@ -0,0 +1,228 @@
+"""
+Node handles used by toolkit operations instead of name strings.
+Input names are resolved once, at the start of an operation, into handles keeping the node uuid. A handle formats as the node long path,
+so it is used in plugs like a name : '{}.worldMatrix[0]'.format(handle). Duplicate short names are resolved once to a unique path.
+
+Handles are cached for the time of the outer transaction (see nb_rgtk_transaction) : nested operations and checks reuse them
+without querying the scene again. Inside an operation, paths are trusted : operations that reparent, rename or delete nodes call
+invalidate (or refresh the moved handle). A path found out of the current operation (before it, or out of any transaction) is checked
+against the uuid on its first use in the operation, so a handle still finds its node after a rename or a reparent done in between.
+"""
+from maya import cmds
+
+# Handles of the current operation {name : NodeHandle}, None out of operations
+_cache = None
+
+# Handles used during the current operation, refreshed by invalidate
+_handles = []
+
+# Number of the current operation, changed when an operation opens or closes. Handle paths are trusted in the operation they were checked in
+_operation = 0
+
+class NodeHandle () :
+    '''
+    Scene node found by its uuid
+    '''
+    def __init__ (self, uuid, path) :
+        '''
+        uuid -> node uuid (str)
+        path -> node long path (str)
+        '''
+        self.uuid = uuid
+        self._path = path
+        self._operation = _operation if _cache is not None else None
+
+    @property
+    def path (self) :
+        '''
+        Return node path, long path unless a new path was given to refresh. After refresh, the path is queried again from the uuid.
+        A path found out of the current operation is checked first, it is queried again if it isn't the node path anymore
+        '''
+        if self._path is not None and self._operation != _operation :
+            if cmds.ls (self._path, uuid = True) != [self.uuid] :
+                self._path = None
+
+        if self._path is None :
+            paths = cmds.ls (self.uuid, long = True)
+            if not paths :
+                raise ValueError ("Node {} doesn't exist anymore".format(self.uuid))
+            self._path = paths[0]
+
+        # Out of operations every use is checked, in an operation the handle is refreshed by invalidate
+        if _cache is None :
+            self._operation = None
+        elif self._operation != _operation :
+            self._operation = _operation
+            _handles.append (self)
+
+        return self._path
+
+    @property
+    def short_name (self) :
+        '''
+        Return node name without its parents, used to name created nodes
+        '''
+        return self.path.split('|')[-1]
+
+    def refresh (self, path = None) :
+        '''
+        Forget node path, it is queried again on next use
+        path -> new node path if it is already known, ex : returned by cmds.parent or cmds.rename (str)
+        '''
+        self._path = path
+
+    def __str__ (self) :
+        return self.path
+
+    def __format__ (self, format_spec) :
+        return format (self.path, format_spec)
+
+    def __repr__ (self) :
+        return 'NodeHandle({!r})'.format(self._path or self.uuid)
+
+    def __eq__ (self, other) :
+        return isinstance(other, NodeHandle) and other.uuid == self.uuid
+
+    def __ne__ (self, other) :
+        return not self == other
+
+    def __hash__ (self) :
+        return hash (self.uuid)
+
+def open_cache () :
+    '''
+    Start caching handles, called when the outer transaction opens
+    '''
+    global _cache, _handles, _operation
+
+    _cache = {}
+    _handles = []
+    _operation += 1
+
+def close_cache () :
+    '''
+    Stop caching handles, called when the outer transaction closes
+    '''
+    global _cache, _handles, _operation
+
+    _cache = None
+    _handles = []
+    _operation += 1
+
+def invalidate (path = None) :
+    '''
+    Forget cached names and the path of every handle of the current operation. Call it after nodes are reparented, renamed or deleted
+    path -> only forget handles of the node at path and of its children, ex : path of a reparented node before it moved (str)
+    '''
+    if path is None :
+        affected = list(_handles)
+    else :
+        affected = [handle for handle in _handles if handle._path is not None and (handle._path == path or handle._path.startswith (path + '|'))]
+
+    if _cache is not None :
+        if path is None :
+            _cache.clear ()
+        else :
+            for name in [name for name, handle in _cache.items() if handle in affected] :
+                del _cache[name]
+
+    for handle in affected :
+        handle.refresh ()
+
+def short_name (node) :
+    '''
+    Return node name without its parents
+    node -> node name, path or handle (str or NodeHandle)
+    '''
+    return node.short_name if isinstance(node, NodeHandle) else str(node).split('|')[-1]
+
+def get_handles (names) :
+    '''
+    Return handles of names that match exactly one node. All names are queried at once, names already resolved in the
+    current operation are not queried again
+    names -> node names, paths, uuids or handles (list)
+    Return {name : NodeHandle}, missing and not unique names are not in it
+    '''
+    handles = {}
+    cache = _cache if _cache is not None else {}
+    queried = []
+
+    for name in names :
+        if isinstance(name, NodeHandle) :
+            handles[name] = name
+        elif name in cache :
+            handles[name] = cache[name]
+        elif name and name not in handles :
+            handles[name] = None
+            queried.append (name)
+
+    if not queried :
+        return handles
+
+    # Both ls return the same nodes in the same order. A name is resolved if it matches exactly one listed node,
+    # other names (missing, not unique or uuids) are queried one by one
+    uuids = cmds.ls (queried, uuid = True) or []
+    paths = cmds.ls (queried, long = True) or []
+    short_names = {}
+    for x, path in enumerate(paths) :
+        short_names.setdefault (path.split('|')[-1], []).append (x)
+
+    resolved = []
+    for name in queried :
+        found = [x for x in short_names.get (name.split('|')[-1], ()) if _matches(name, paths[x])]
+        if len(found) == 1 and len(uuids) == len(paths) :
+            resolved.append ((name, uuids[found[0]], paths[found[0]]))
+            continue
+
+        name_paths = cmds.ls (name, long = True) or []
+        if len(name_paths) == 1 :
+            resolved.append ((name, cmds.ls (name_paths[0], uuid = True)[0], name_paths[0]))
+
+    for name, uuid, path in resolved :
+        handle = NodeHandle (uuid, path)
+        handles[name] = cache[name] = handle
+        if _cache is not None :
+            _handles.append (handle)
+
+    return {name : handle for name, handle in handles.items() if handle is not None}
+
+def get_selection () :
+    '''
+    Return handles of selected nodes, in selection order. Selected nodes are queried with two ls calls and cached by long path
+    '''
+    uuids = cmds.ls (selection = True, uuid = True) or []
+    paths = cmds.ls (selection = True, long = True) or []
+    if len(paths) != len(uuids) :
+        handles = get_handles (uuids)
+        return [handles[uuid] for uuid in uuids if uuid in handles]
+
+    cache = _cache if _cache is not None else {}
+    handles = []
+    for uuid, path in zip(uuids, paths) :
+        if path not in cache :
+            cache[path] = NodeHandle (uuid, path)
+            if _cache is not None :
+                _handles.append (cache[path])
+        handles.append (cache[path])
+
+    return handles
+
+def _matches (name, path) :
+    '''
+    Return True if path is the long path of name (name, partial path or long path)
+    '''
+    return path == name or path.endswith ('|' + name)
+
+def resolve (names) :
+    '''
+    Return one handle per name, in names order
+    names -> node names, paths, uuids or handles (list)
+    Raise ValueError with all names that don't match exactly one node
+    '''
+    handles = get_handles (names)
+
+    missing = [str(name) for name in names if name not in handles]
+    if missing :
+        raise ValueError ("{} doesn't exist or is not unique".format(', '.join(missing)))
+
+    return [handles[name] for name in names]
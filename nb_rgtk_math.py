@@ -0,0 +1,235 @@
+"""
+Matrix helpers used by the toolkit to get offsets and transforms values without creating temporary nodes.
+Matrices follow maya convention : row vectors, translation stored in the last row, rotations in degrees with xyz rotate order.
+All functions work on arrays of matrices (shape (n, 4, 4)) so many objects can be computed in one pass.
+Only get_matrices needs maya, other helpers also run without maya (see nb_rgtk_evaluator).
+"""
+import numpy as np
+
+def get_matrices (plugs) :
+    '''
+    Query matrix plugs and return them as an array of matrices
+    plugs -> list of matrix plugs, ex : ['pCube1.worldMatrix[0]'] (list)
+    Return numpy array of shape (n, 4, 4)
+    '''
+    from maya import cmds
+
+    values = [cmds.getAttr(plug) for plug in plugs]
+    return np.array(values, dtype=float).reshape(-1, 4, 4)
+
+def offset_matrices (target_matrices, trigger_matrices) :
+    '''
+    Get offset between targets and triggers world matrices : target world * inverse trigger world
+    target_matrices -> targets world matrices (numpy array (n, 4, 4))
+    trigger_matrices -> triggers world matrices (numpy array (n, 4, 4))
+    Return numpy array of shape (n, 4, 4)
+    '''
+    return np.matmul(target_matrices, np.linalg.inv(trigger_matrices))
+
+def remove_scale (matrices) :
+    '''
+    Return matrices with a scale of 1 on each axis, translate and rotate are kept
+    matrices -> matrices to modify (numpy array (n, 4, 4))
+    Return numpy array of shape (n, 4, 4)
+    '''
+    matrices = np.array(matrices, dtype=float).reshape(-1, 4, 4)
+    lengths = np.linalg.norm(matrices[:, :3, :3], axis=-1)
+    matrices[:, :3, :3] /= np.where(lengths == 0, 1.0, lengths)[:, :, None]
+
+    return matrices
+
+def compose_matrices (translates, rotates, scales) :
+    '''
+    Build matrices from translate, rotate and scale values, like a composeMatrix node does
+    translates -> translate values (array like (n, 3))
+    rotates -> rotate values in degrees, xyz rotate order (array like (n, 3))
+    scales -> scale values (array like (n, 3))
+    Return numpy array of shape (n, 4, 4)
+    '''
+    translates = np.asarray(translates, dtype=float).reshape(-1, 3)
+    rotates = np.radians(np.asarray(rotates, dtype=float).reshape(-1, 3))
+    scales = np.asarray(scales, dtype=float).reshape(-1, 3)
+
+    cx, cy, cz = np.cos(rotates).T
+    sx, sy, sz = np.sin(rotates).T
+
+    # Rotation matrix for xyz rotate order (Rx * Ry * Rz with row vectors)
+    matrices = np.zeros((len(translates), 4, 4))
+    matrices[:, 0, :3] = np.stack([cy * cz, cy * sz, -sy], axis=-1)
+    matrices[:, 1, :3] = np.stack([sx * sy * cz - cx * sz, sx * sy * sz + cx * cz, sx * cy], axis=-1)
+    matrices[:, 2, :3] = np.stack([cx * sy * cz + sx * sz, cx * sy * sz - sx * cz, cx * cy], axis=-1)
+
+    # Scale each row, then set translation
+    matrices[:, :3, :3] *= scales[:, :, None]
+    matrices[:, 3, :3] = translates
+    matrices[:, 3, 3] = 1.0
+
+    return matrices
+
+def decompose_matrices (matrices) :
+    '''
+    Get translate, rotate and scale values of matrices, like a decomposeMatrix node does. Shear is ignored
+    matrices -> matrices to decompose (numpy array (n, 4, 4))
+    Return translates, rotates (degrees, xyz rotate order) and scales as numpy arrays of shape (n, 3)
+    '''
+    matrices = np.asarray(matrices, dtype=float).reshape(-1, 4, 4)
+    translates = matrices[:, 3, :3].copy()
+
+    # Scale is the length of each row. A negative determinant is stored in scale X
+    rows = matrices[:, :3, :3].copy()
+    scales = np.linalg.norm(rows, axis=-1)
+    negative = np.linalg.det(rows) < 0
+    scales[negative, 0] *= -1
+
+    safe_scales = np.where(scales == 0, 1.0, scales)
+    rows /= safe_scales[:, :, None]
+
+    # Extract xyz euler angles. When cos(y) is null (gimbal lock), rotate Z is set to 0
+    cos_y = np.hypot(rows[:, 0, 0], rows[:, 0, 1])
+    gimbal = cos_y < 1e-8
+
+    rotate_x = np.where(gimbal, np.arctan2(rows[:, 1, 0] * -rows[:, 0, 2], rows[:, 1, 1]), np.arctan2(rows[:, 1, 2], rows[:, 2, 2]))
+    rotate_y = np.arctan2(-rows[:, 0, 2], cos_y)
+    rotate_z = np.where(gimbal, 0.0, np.arctan2(rows[:, 0, 1], rows[:, 0, 0]))
+
+    rotates = np.degrees(np.stack([rotate_x, rotate_y, rotate_z], axis=-1))
+
+    return translates, rotates, scales
+
+def flatten_matrix (matrix) :
+    '''
+    Return matrix as a list of 16 floats, as cmds.setAttr (type = "matrix") needs it
+    matrix -> matrix value (numpy array (4, 4))
+    '''
+    return [float(value) for value in np.asarray(matrix).reshape(16)]
+
+def nearest_points (points, queries, count = 1, chunk_size = 2048) :
+    '''
+    Find the nearest points of each query point. scipy cKDTree is used if available, otherwise distances are computed
+    by chunks of queries, so memory stays low with many queries
+    points -> searched positions (array like (n, 3))
+    queries -> query positions (array like (m, 3))
+    count -> number of nearest points of each query, limited to n (int)
+    chunk_size -> number of queries computed at once without scipy (int)
+    Return indices of nearest points (numpy int array (m, count)) and their distances (numpy array (m, count)), nearest first
+    '''
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    queries = np.asarray(queries, dtype=float).reshape(-1, 3)
+    count = min(count, len(points))
+
+    try :
+        from scipy.spatial import cKDTree
+    except ImportError :
+        cKDTree = None
+
+    if cKDTree is not None :
+        distances, indices = cKDTree(points).query(queries, k=count)
+        return np.asarray(indices).reshape(-1, count), np.asarray(distances).reshape(-1, count)
+
+    indices = np.empty((len(queries), count), dtype=int)
+    distances = np.empty((len(queries), count))
+    squared_points = np.einsum('ij,ij->i', points, points)
+
+    for start in range(0, len(queries), chunk_size) :
+        chunk = queries[start:start + chunk_size]
+
+        # |q - p|^2 = |q|^2 - 2 q.p + |p|^2
+        squared = np.einsum('ij,ij->i', chunk, chunk)[:, None] - 2.0 * chunk @ points.T + squared_points[None, :]
+        np.maximum(squared, 0.0, out=squared)
+
+        nearest = np.argpartition(squared, count - 1, axis=1)[:, :count] if count < len(points) else np.tile(np.arange(len(points)), (len(chunk), 1))
+        nearest_squared = np.take_along_axis(squared, nearest, axis=1)
+        order = np.argsort(nearest_squared, axis=1)
+
+        indices[start:start + len(chunk)] = np.take_along_axis(nearest, order, axis=1)
+        distances[start:start + len(chunk)] = np.sqrt(np.take_along_axis(nearest_squared, order, axis=1))
+
+    return indices, distances
+
+def falloff_weights (distances, falloff = 'inverse', power = 2.0, radius = None) :
+    '''
+    Get normalized weights from distances, the sum of each row is 1
+    distances -> distances to each driver, nearest first (array like (m, k))
+    falloff -> 'inverse' : 1 / distance ** power, 'linear' : 1 - distance / radius, 'smooth' : smoothstep of the linear falloff (str)
+    power -> inverse falloff power (float)
+    radius -> linear and smooth falloff radius, if None each row uses its farthest distance, so the farthest driver gets no weight (float)
+    Return numpy array of shape (m, k). A row without weight gives all its weight to its nearest driver
+    '''
+    distances = np.asarray(distances, dtype=float)
+    distances = distances.reshape(-1, distances.shape[-1] if distances.ndim > 1 else 1)
+
+    if falloff == 'inverse' :
+        with np.errstate(divide='ignore') :
+            weights = 1.0 / np.power(distances, power)
+
+        # A driver at the same position as its follower gets all the weight
+        exact = np.isinf(weights)
+        weights = np.where(exact.any(axis=1)[:, None], exact.astype(float), weights)
+
+    elif falloff in ('linear', 'smooth') :
+        radii = np.full((len(distances), 1), float(radius)) if radius is not None else distances.max(axis=1, keepdims=True)
+        weights = 1.0 - distances / np.where(radii == 0, 1.0, radii)
+        weights = np.clip(np.where(radii == 0, 1.0, weights), 0.0, 1.0)
+
+        if falloff == 'smooth' :
+            weights = weights * weights * (3.0 - 2.0 * weights)
+
+    else :
+        raise ValueError ("Unknown falloff {}, use inverse, linear or smooth".format(falloff))
+
+    totals = weights.sum(axis=1, keepdims=True)
+    empty = totals[:, 0] == 0
+    weights[empty] = 0.0
+    weights[empty, 0] = 1.0
+    totals[empty] = 1.0
+
+    return weights / totals
+
+def blend_weights (weights) :
+    '''
+    Convert normalized weights to blendMatrix target weights. blendMatrix blends its targets one after the other,
+    so target i weight is weights[i] / sum(weights[:i + 1]). The first weight, used by inputMatrix, is always 1
+    weights -> normalized weights of each input (array like (k,) or (m, k))
+    Return numpy array of the same shape
+    '''
+    weights = np.asarray(weights, dtype=float)
+    totals = np.cumsum(weights, axis=-1)
+
+    return np.divide(weights, totals, out=np.ones_like(weights), where=totals > 0)
+
+def axes_frames (primary_axes, secondary_axes) :
+    '''
+    Get orthonormal frames (rows primary, secondary, third) of local aim and up axes
+    primary_axes, secondary_axes -> local aim and up axes, one axis or one per frame (array like (3,) or (n, 3))
+    Return frames (numpy array (n, 3, 3)) and valid mask (numpy bool array (n,)), False where axes are null or parallel
+    '''
+    primary = np.atleast_2d (np.asarray(primary_axes, dtype=float))
+    secondary = np.atleast_2d (np.asarray(secondary_axes, dtype=float))
+    primary, secondary = np.broadcast_arrays (primary, secondary)
+
+    primary_lengths = np.linalg.norm(primary, axis=-1)
+    thirds = np.cross(primary, secondary)
+    third_lengths = np.linalg.norm(thirds, axis=-1)
+    valid = (primary_lengths > 1e-8) & (third_lengths > 1e-8 * np.maximum(primary_lengths, 1.0))
+
+    primary = primary / np.where(primary_lengths == 0, 1.0, primary_lengths)[:, None]
+    thirds = thirds / np.where(third_lengths == 0, 1.0, third_lengths)[:, None]
+
+    return np.stack([primary, np.cross(thirds, primary), thirds], axis=1), valid
+
+def aim_rotations (aim_vectors, up_vectors, primary_axes, secondary_axes) :
+    '''
+    Get world rotations aiming primary axes along aim vectors, with secondary axes as close as possible to up vectors, like an aimMatrix node does
+    aim_vectors, up_vectors -> world directions (array like (n, 3))
+    primary_axes, secondary_axes -> local aim and up axes, one axis or one per rotation (array like (3,) or (n, 3))
+    Return rotation matrices (numpy array (n, 3, 3)) and valid mask (numpy bool array (n,)), False where aim is null or parallel to up
+    '''
+    aim_vectors = np.asarray(aim_vectors, dtype=float).reshape(-1, 3)
+    up_vectors = np.broadcast_to(np.asarray(up_vectors, dtype=float), aim_vectors.shape)
+
+    world_frames, valid = axes_frames (aim_vectors, up_vectors)
+    local_frames, valid_axes = axes_frames (primary_axes, secondary_axes)
+
+    # Local frame F and world frame W share their rows : rotation = F.T * W sends primary axis on aim and secondary on up
+    return np.matmul(np.transpose(local_frames, (0, 2, 1)), world_frames), valid & valid_axes
+
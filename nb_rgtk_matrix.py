@@ -1,15 +1,24 @@
+import re
+
+import numpy as np
+
 from maya import cmds
 from nb_rigging_toolkit import nb_rgtk_utils as nb_utils
+from nb_rigging_toolkit import nb_rgtk_math as nb_math
+from nb_rigging_toolkit import nb_rgtk_backend as nb_backend
+from nb_rigging_toolkit import nb_rgtk_transaction as nb_transaction
+from nb_rigging_toolkit import nb_rgtk_profiling as nb_profiling
+from nb_rigging_toolkit import nb_rgtk_handles as nb_handles
 
 class MatrixConstraint () :
 
     def get_objects (self) :
         '''
         Get maya current selected objects. First object is the target, the other are triggers objects
-        Return target_object and trigger_objects
+        Return target_object and trigger_objects, as node handles
         '''
-        # Get maya selection
-        maya_sel = cmds.ls(sl=True)
+        # Get maya selection, already resolved to handles
+        maya_sel = nb_handles.get_selection()
 
         # Test maya current selection
         if not maya_sel :
@@ -25,68 +34,32 @@ class MatrixConstraint () :
 
         return [trigger_obj, target_obj]
 
-    def get_offset_matrix(self, target_, trigger_) :
+    def get_offset_matrix(self, target_, trigger_, offset_value = None, builder = None) :
         '''
         This function get offset matrix between two objects
+        Offset is computed from world matrices (target world * inverse trigger world) so no temporary node is created and target is never reparented
         Return an composeMatrix with offsetMatrix value in
-        target_ -> target object to get offset
-        trigger_ -> target object to base offset
-        '''
-        # Creates necesary nodes
-        offset_node = cmds.createNode ('composeMatrix', name = '{}_{}_parentMConstraint_offset'.format(trigger_, target_))
-        temp_offset = cmds.createNode ('composeMatrix', name = trigger_ + '_temp_offset')
-        temp_mult = cmds.createNode ('multMatrix', name = trigger_ + '_temp_mult')
-        temp_decMat = cmds.createNode ('decomposeMatrix', name = trigger_ + '_temp_decMat')
-
-        # Get target parent
-        parent = cmds.listRelatives (target_, p=True, typ = 'transform')
-
-        # Parent target_ to trigger_
-        cmds.parent (target_, trigger_)
-
-        # Try to connect target_ to temp_offset. If RuntimeError, then connect trigger_|target_ to temp_offset. This is necessary due to maya
-        # name spaces
-        temp_target_ = target_
-        try :
-            cmds.connectAttr ('{}.t'.format (target_), '{}.inputTranslate'.format (temp_offset))
-        except RuntimeError :
-            cmds.connectAttr ('{}|{}.t'.format (trigger_,target_), '{}.inputTranslate'.format (temp_offset))
-            temp_target_ = f'{trigger_}|{target_}'
-            
-        # Get translate relative to trigger_
-        cmds.connectAttr ('{}.r'.format (temp_target_), '{}.inputRotate'.format (temp_offset))
-        cmds.connectAttr ('{}.s'.format (temp_target_), '{}.inputScale'.format (temp_offset))
-
-        cmds.disconnectAttr ('{}.t'.format (temp_target_), '{}.inputTranslate'.format (temp_offset))
-        cmds.disconnectAttr ('{}.r'.format (temp_target_), '{}.inputRotate'.format (temp_offset))
-        cmds.disconnectAttr ('{}.s'.format (temp_target_), '{}.inputScale'.format (temp_offset))
-
-        # Reparent target_ to initial parent
-        if parent != None :
-            cmds.parent (temp_target_, parent)
-        else :
-            cmds.parent (temp_target_, w=True)  
+        target_ -> target object to get offset (str or NodeHandle)
+        trigger_ -> target object to base offset (str or NodeHandle)
+        offset_value -> offset matrix already computed, if None it is computed from world matrices (numpy array (4, 4))
+        builder -> scene builder used to create node, if None a builder of the current backend is used and committed
+        '''
+        commit = builder is None
+        if commit :
+            builder = nb_backend.new_builder()
 
-        # Get offset Node
-        cmds.connectAttr ('{}.outputMatrix'.format(temp_offset), '{}.matrixIn[0]'.format(temp_mult))
-        cmds.connectAttr ('{}.offsetParentMatrix'.format(target_), '{}.matrixIn[1]'.format(temp_mult))
-        cmds.connectAttr ('{}.matrixSum'.format(temp_mult), '{}.inputMatrix'.format(temp_decMat))
+        # Creates offset node
+        offset_node = builder.create_node ('composeMatrix', '{}_{}_parentMConstraint_offset'.format(nb_handles.short_name(trigger_), nb_handles.short_name(target_)))
 
-        cmds.connectAttr ('{}.outputTranslate'.format (temp_decMat), '{}.inputTranslate'.format (offset_node))
-        cmds.connectAttr ('{}.outputRotate'.format (temp_decMat), '{}.inputRotate'.format (offset_node))
-        cmds.connectAttr ('{}.outputScale'.format (temp_decMat), '{}.inputScale'.format (offset_node))
+        # Get offset value and set it in offset node
+        if offset_value is None :
+            world_matrices = nb_math.get_matrices (['{}.worldMatrix[0]'.format(target_), '{}.worldMatrix[0]'.format(trigger_)])
+            offset_value = nb_math.offset_matrices (world_matrices[:1], world_matrices[1:])[0]
 
-        cmds.disconnectAttr ('{}.outputTranslate'.format (temp_decMat), '{}.inputTranslate'.format (offset_node))
-        cmds.disconnectAttr ('{}.outputRotate'.format (temp_decMat), '{}.inputRotate'.format (offset_node))
-        cmds.disconnectAttr ('{}.outputScale'.format (temp_decMat), '{}.inputScale'.format (offset_node))
+        builder.set_compose_matrix (offset_node, offset_value)
 
-        # Delete unused nodes
-        if cmds.objExists(temp_offset) :
-            cmds.delete (temp_offset)
-        if cmds.objExists(temp_mult) :
-            cmds.delete (temp_mult)
-        if cmds.objExists(temp_decMat) :
-            cmds.delete (temp_decMat) 
+        if commit :
+            builder.commit()
 
         return offset_node
             
@@ -104,7 +77,7 @@ class MatrixConstraint () :
         if cmds.objExists(temp_comp) :
             cmds.delete (temp_comp)
 
-    def connect_out_constraint (self, out_connect, target_, out_attribut) :
+    def connect_out_constraint (self, out_connect, target_, out_attribut, builder = None) :
         '''
         This function connect one attribut to objec based on out_connect
         out_connect -> list of rules to connect object (list)
@@ -112,67 +85,188 @@ class MatrixConstraint () :
             [[['RotateX', 'rotateX'], bool], [['RotateY', 'rotateY'], bool], [['RotateZ', 'rotateZ'], bool]],
             [['ScaleX', 'scaleX'], bool], [['ScaleY', 'scaleY'], bool], [['ScaleZ', 'scaleZ'], bool]],
             bool]
-        target_ -> target object to connect (str)
-        out_attribut -> attribut to connect to object (str)
+        target_ -> target object to connect (str or NodeHandle)
+        out_attribut -> node and attribut to connect to object, ex : [multMatrix node, 'matrixSum'] (list)
+        builder -> scene builder used to create nodes, if None a builder of the current backend is used and committed
         '''
+        commit = builder is None
+        if commit :
+            builder = nb_backend.new_builder()
+
         # Connect to offsetParentMatrix bool 
         is_offset_parent_matrix = out_connect[3]
-
-        # Create a decomposeMatrix node and connect out attribut to input matrix
-        decomp_mat = cmds.createNode('decomposeMatrix', name = '{}_parentMConstraint_decMat'.format(target_))
-        cmds.connectAttr(out_attribut, '{}.inputMatrix'.format(decomp_mat))
         out_translate = out_connect[0]
         out_rotate = out_connect[1]
         out_scale = out_connect[2]
 
+        # if is_offset_parent_matrix and translate, rotate and scale axis are all enabled or all disabled,
+        # connect out attribut to offsetParentMatrix without decomposing it
+        channel_states = self.get_channel_states (self, out_connect)
+        target_name = nb_handles.short_name (target_)
+        if is_offset_parent_matrix and None not in channel_states :
+
+            # Every axis enabled, out attribut is already the wanted matrix. Otherwise a pickMatrix node removes disabled channels
+            if all(channel_states) :
+                builder.connect(out_attribut[0], out_attribut[1], target_, 'offsetParentMatrix')
+            else :
+                pick_mat = builder.create_node('pickMatrix', '{}_parentMConstraint_pickMat'.format(target_name))
+                builder.connect(out_attribut[0], out_attribut[1], pick_mat, 'inputMatrix')
+
+                for attr, is_connect in zip(('useTranslate', 'useRotate', 'useScale'), channel_states) :
+                    if not is_connect :
+                        builder.set_attr (pick_mat, attr, False)
+                builder.set_attr (pick_mat, 'useShear', False)
+
+                builder.connect(pick_mat, 'outputMatrix', target_, 'offsetParentMatrix')
+
+            self.reset_out_channels (self, out_connect, target_, builder)
+
         # if is_offset_parent_matrix, create a compose matrix so the file attribut type will be matrix
-        if is_offset_parent_matrix :
-            comp_mat = cmds.createNode('composeMatrix', name = '{}_parentMConstraint_compMat'.format(target_))
+        elif is_offset_parent_matrix :
+            # Create a decomposeMatrix node and connect out attribut to input matrix
+            decomp_mat = builder.create_node('decomposeMatrix', '{}_parentMConstraint_decMat'.format(target_name))
+            builder.connect(out_attribut[0], out_attribut[1], decomp_mat, 'inputMatrix')
+
+            comp_mat = builder.create_node('composeMatrix', '{}_parentMConstraint_compMat'.format(target_name))
             # Connect traslate, rotate and scale according to out_connect values
             for each in out_translate, out_rotate, out_scale:
                 for transform_axis, is_connect in each:
                     if is_connect :
-                        cmds.connectAttr ('{}.output{}'.format(decomp_mat, transform_axis[0]), '{}.input{}'.format(comp_mat, transform_axis[0]))
-                        
-                        if not 'scale' in transform_axis[1] :
-                            cmds.setAttr ('{}.{}'.format(target_, transform_axis[1]), 0)
-                        else :
-                            cmds.setAttr ('{}.{}'.format(target_, transform_axis[1]), 1) 
+                        builder.connect (decomp_mat, 'output{}'.format(transform_axis[0]), comp_mat, 'input{}'.format(transform_axis[0]))
+
+            self.reset_out_channels (self, out_connect, target_, builder)
 
             # Connect compose Matrix to target's offsetParentMatrix
-            cmds.connectAttr('{}.outputMatrix'.format(comp_mat), '{}.offsetParentMatrix'.format(target_))
+            builder.connect(comp_mat, 'outputMatrix', target_, 'offsetParentMatrix')
 
         else :
+            # Create a decomposeMatrix node and connect out attribut to input matrix
+            decomp_mat = builder.create_node('decomposeMatrix', '{}_parentMConstraint_decMat'.format(target_name))
+            builder.connect(out_attribut[0], out_attribut[1], decomp_mat, 'inputMatrix')
+
             # Connect decomposeMatrix attributs to target's translate, rotate and scale according to out_connect values
             out_connect_list = out_connect[0] + out_connect[1] + out_connect[2]
             for transform_axis, is_connect in out_connect_list:
                 if is_connect :
-                    cmds.connectAttr ('{}.output{}'.format(decomp_mat, transform_axis[0]), '{}.{}'.format(target_, transform_axis[1]))
+                    builder.connect (decomp_mat, 'output{}'.format(transform_axis[0]), target_, transform_axis[1])
 
-    # main parent matrix function
-    def matrix_parent_constraint (self, offset, trigger_matrix, out_connect) :
+        if commit :
+            builder.commit()
 
+    def get_out_connect (self, channels = None) :
         '''
-        This function create a parent constraint with matrix
-        offset -> Maintain offset between objects (bool)
-        trigger_matrix -> matrix to connect for parent constraint (str)
-        out_connect -> parameter of connections to connect target object (list)
-            [[[['TranslateX', 'translateX'], bool], [['TranslateY', 'translateY'], bool], [['TranslateZ', 'translateZ'], bool]], 
-            [[['RotateX', 'rotateX'], bool], [['RotateY', 'rotateY'], bool], [['RotateZ', 'rotateZ'], bool]],
-            [['ScaleX', 'scaleX'], bool], [['ScaleY', 'scaleY'], bool], [['ScaleZ', 'scaleZ'], bool]],
-            bool]
+        Return out_connect rules from a channels description, ex : {'scale' : False} connects translate and rotate in offsetParentMatrix
+        channels -> {'translate', 'rotate', 'scale' : bool or list of 3 bool, 'in_opm' : bool}, missing keys are True (dict)
         '''
-        # Get selected objects
-        objects_ = self.get_objects(self)
-        if not objects_ :
-            return
-        
-        # Set target and trigger variable
-        trigger_obj = objects_[0]
-        target_obj = objects_[1]
+        channels = channels or {}
+        out_connect = []
 
-        # Out mult matrix attributs
-        out_attribut = []
+        for channel in ('translate', 'rotate', 'scale') :
+            enabled = channels.get (channel, True)
+            enabled = list(enabled) if isinstance(enabled, (list, tuple)) else [enabled] * 3
+            if len(enabled) != 3 :
+                raise ValueError ("{} channel needs 3 values".format(channel))
+
+            out_connect.append ([[['{}{}'.format(channel.capitalize(), axis), '{}{}'.format(channel, axis)], bool(value)] for axis, value in zip('XYZ', enabled)])
+
+        return out_connect + [bool(channels.get ('in_opm', True))]
+
+    def get_channel_states (self, out_connect) :
+        '''
+        Return translate, rotate and scale states of out_connect : True if all axis are enabled, False if none is, None if only some are
+        out_connect -> list of rules to connect object (list)
+        '''
+        channel_states = []
+        for each in out_connect[0], out_connect[1], out_connect[2] :
+            axis_states = set(bool(is_connect) for transform_axis, is_connect in each)
+            channel_states.append (axis_states.pop() if len(axis_states) == 1 else None)
+
+        return channel_states
+
+    def reset_out_channels (self, out_connect, target_, builder) :
+        '''
+        Reset target channels driven through offsetParentMatrix : translate and rotate to 0, scale to 1
+        '''
+        for each in out_connect[0], out_connect[1], out_connect[2] :
+            for transform_axis, is_connect in each :
+                if is_connect :
+                    if not 'scale' in transform_axis[1] :
+                        builder.set_attr (target_, transform_axis[1], 0)
+                    else :
+                        builder.set_attr (target_, transform_axis[1], 1)
+
+    def get_constraint_pairs (self, objects_, mode = 'default', pattern = None) :
+        '''
+        Sort objects in a list of (triggers, target) according to mode
+        objects_ -> ordered objects, usualy maya selection (list)
+        mode -> how objects are paired (str)
+            'default' : last object is the target, all others are triggers
+            'pairwise' : first half of objects are triggers, second half are targets (A1, A2, B1, B2 -> A1>B1, A2>B2)
+            'one_to_many' : first object is the trigger of all other objects
+            'name' : triggers are mapped to targets by name pattern. If objects_ is empty, triggers are searched in scene
+        pattern -> trigger and target name patterns for 'name' mode, with * wildcards ex : ('*_proxy', '*_jnt') (tuple)
+        Return a list of [trigger_list, target], or False if objects can't be paired
+        '''
+        if mode == 'default' :
+            if len(objects_) < 2 :
+                cmds.warning ("Need at least two objects")
+                return False
+            return [[objects_[:-1], objects_[-1]]]
+
+        if mode == 'pairwise' :
+            if len(objects_) < 2 or len(objects_) % 2 :
+                cmds.warning ("Pairwise mode needs an even number of objects : triggers then targets")
+                return False
+            half = len(objects_) // 2
+            return [[[trigger_], target_] for trigger_, target_ in zip(objects_[:half], objects_[half:])]
+
+        if mode == 'one_to_many' :
+            if len(objects_) < 2 :
+                cmds.warning ("Need at least two objects")
+                return False
+            return [[[objects_[0]], target_] for target_ in objects_[1:]]
+
+        if mode == 'name' :
+            if not pattern or len(pattern) != 2 or pattern[0].count('*') != pattern[1].count('*') :
+                cmds.warning ("Name mode needs a trigger and a target pattern with the same number of '*'")
+                return False
+
+            trigger_pattern, target_pattern = pattern
+            if not objects_ :
+                objects_ = cmds.ls (trigger_pattern, type = 'transform') or []
+
+            # Convert trigger pattern to a regular expression where each * is a group
+            regex = re.compile ('^{}$'.format('(.*)'.join(re.escape(part) for part in trigger_pattern.split('*'))))
+
+            pairs = []
+            for trigger_ in objects_ :
+                match = regex.match (trigger_.split('|')[-1])
+                if not match :
+                    continue
+
+                target_ = target_pattern
+                for group in match.groups() :
+                    target_ = target_.replace ('*', group, 1)
+                pairs.append ([[trigger_], target_])
+
+            if not pairs :
+                cmds.warning ("No object matches {}".format(trigger_pattern))
+                return False
+            return pairs
+
+        cmds.warning ("Unknown constraint mode : {}".format(mode))
+        return False
+
+    def check_constraint_pairs (self, pairs, out_connect, handles = None) :
+        '''
+        Check all constraints before building them : objects exist and are unique, each target is used once and target channels are free
+        pairs -> list of [trigger_list, target] (list)
+        out_connect -> parameter of connections to connect target object (list)
+        handles -> handles of pairs objects, if None they are resolved ({name : NodeHandle})
+        Return True if all constraints are valid, otherwise False
+        '''
+        if handles is None :
+            handles = nb_handles.get_handles ([each for trigger_list, target_ in pairs for each in trigger_list + [target_]])
 
         if out_connect [3] == True : 
             out_attr_list = ['offsetParentMatrix'] 
@@ -181,50 +275,266 @@ class MatrixConstraint () :
                              'rotateX', 'rotateY', 'rotateZ',
                              'scaleX', 'scaleY', 'scaleZ'] 
 
-        # If one attr of out_attr_list is already connected, abort parent matrix
-        if not  nb_utils.test_output_connections ( out_attr_list, target_obj) :
-            return
-        
+        errors = []
+        targets = set()
+        for trigger_list, target_ in pairs :
+            missing = [str(each) for each in trigger_list + [target_] if each not in handles]
+            if missing :
+                errors.append ("{} doesn't exists or is not unique".format(', '.join(missing)))
+                continue
+
+            # Objects are compared as nodes, so a name and a path of the same node are the same object
+            if handles[target_] in targets :
+                errors.append ("{} is constrained more than once".format(target_))
+            elif handles[target_] in [handles[each] for each in trigger_list] :
+                errors.append ("{} can't be constrained to itself".format(target_))
+            targets.add (handles[target_])
+
+        if errors :
+            cmds.warning ("Constraint errors : {}".format(' | '.join(errors)))
+            return False
+
+        # If one attr of out_attr_list is already connected, abort parent matrix. All targets are tested in one query
+        return nb_utils.check_output_connections ([handles[target_] for trigger_list, target_ in pairs], out_attr_list)
+
+    def build_parent_constraint (self, trigger_obj, target_obj, offset, trigger_matrix, out_connect, offset_values = None, builder = None, weights = None) :
+        '''
+        Create parent constraint nodal network between triggers and one target. Objects are not checked
+        trigger_obj -> list of triggers (list)
+        target_obj -> target object (str or NodeHandle)
+        offset -> Maintain offset between objects (bool)
+        trigger_matrix -> matrix to connect for parent constraint (str)
+        out_connect -> parameter of connections to connect target object (list)
+        offset_values -> offset matrices of each trigger, if None they are computed (list of numpy array (4, 4))
+        builder -> scene builder used to create nodes, if None a builder of the current backend is used and committed
+        weights -> normalized weight of each trigger, if None triggers weights are 1/n (list)
+        '''
+        commit = builder is None
+        if commit :
+            builder = nb_backend.new_builder()
+
+        # Out mult matrix attributs
+        out_attribut = []
+
         # Get each trigger, create nodal network to parent constraint
         for x in range(len(trigger_obj)) :
 
-            mult_node = cmds.createNode('multMatrix', name = '{}_{}_parentMConstraint_multMat'.format(trigger_obj, target_obj))
+            mult_node = builder.create_node('multMatrix', '{}_{}_parentMConstraint_multMat'.format(nb_handles.short_name(trigger_obj[x]), nb_handles.short_name(target_obj)))
 
             if offset :
 
-                offset_matrix = self.get_offset_matrix(self, target_obj, trigger_obj[x])
+                offset_value = offset_values[x] if offset_values is not None else None
+                offset_matrix = self.get_offset_matrix(self, target_obj, trigger_obj[x], offset_value, builder)
 
-                cmds.connectAttr ('{}.outputMatrix'.format(offset_matrix), '{}.matrixIn[0]'.format(mult_node))
-                cmds.connectAttr ('{}.{}'.format(trigger_obj[x], trigger_matrix), '{}.matrixIn[1]'.format(mult_node))
+                builder.connect (offset_matrix, 'outputMatrix', mult_node, 'matrixIn[0]')
+                builder.connect (trigger_obj[x], trigger_matrix, mult_node, 'matrixIn[1]')
                 if not out_connect [3] :
-                    cmds.connectAttr ('{}.inverseParentMatrix'.format(target_obj), '{}.matrixIn[2]'.format(mult_node))
+                    builder.connect (target_obj, 'inverseParentMatrix', mult_node, 'matrixIn[2]')
 
             else :
-                cmds.connectAttr ('{}.{}'.format(trigger_obj[x], trigger_matrix), '{}.matrixIn[0]'.format(mult_node))
+                builder.connect (trigger_obj[x], trigger_matrix, mult_node, 'matrixIn[0]')
                 if not out_connect [3] :
-                    cmds.connectAttr ('{}.inverseParentMatrix'.format(target_obj), '{}.matrixIn[1]'.format(mult_node))
+                    builder.connect (target_obj, 'inverseParentMatrix', mult_node, 'matrixIn[1]')
 
-            out_attribut.append('{}.matrixSum'.format(mult_node))
+            out_attribut.append([mult_node, 'matrixSum'])
 
         # If more than one out_attribut, create a blend node to make a multiple target parent Matrix
         if len(out_attribut) == 1 :
-            self.connect_out_constraint (self, out_connect, target_obj, out_attribut[0])
+            self.connect_out_constraint (self, out_connect, target_obj, out_attribut[0], builder)
         else :
-            blend_node = cmds.createNode('blendMatrix', name = '{}_parentMConstraint_blendMat'.format(target_obj))
+            blend_node = builder.create_node('blendMatrix', '{}_parentMConstraint_blendMat'.format(nb_handles.short_name(target_obj)))
 
             number_of_parent = len(out_attribut)
-            attr_weight = 1/number_of_parent
+            if weights is None :
+                weights = [1/number_of_parent] * number_of_parent
+
+            # blendMatrix blends targets one after the other, weights are converted so each trigger gets its own weight
+            attr_weights = [float(weight) for weight in nb_math.blend_weights (weights)]
 
             for attr in range(number_of_parent):
                 if attr == 0 :
-                    cmds.connectAttr (out_attribut[attr], '{}.inputMatrix'.format(blend_node))
+                    builder.connect (out_attribut[attr][0], out_attribut[attr][1], blend_node, 'inputMatrix')
 
                 else :
-                    cmds.connectAttr(out_attribut[attr], '{}.target[{}].targetMatrix'.format(blend_node, attr))
-                    cmds.setAttr ('{}.target[{}].weight'.format(blend_node, attr), attr_weight)
+                    builder.connect (out_attribut[attr][0], out_attribut[attr][1], blend_node, 'target[{}].targetMatrix'.format(attr))
+                    builder.set_attr (blend_node, 'target[{}].weight'.format(attr), attr_weights[attr])
 
             
-            self.connect_out_constraint (self, out_connect, target_obj, '{}.outputMatrix'.format(blend_node))
+            self.connect_out_constraint (self, out_connect, target_obj, [blend_node, 'outputMatrix'], builder)
+
+        if commit :
+            builder.commit()
+
+    def get_offset_values (self, pairs) :
+        '''
+        Get offset matrices of all triggers and targets in one pass, each object world matrix is queried once
+        pairs -> list of [trigger_list, target] (list)
+        Return a list with, for each pair, the offset of each trigger (list of numpy array (n, 4, 4))
+        '''
+        nodes = {}
+        for trigger_list, target_ in pairs :
+            for each in trigger_list + [target_] :
+                nodes.setdefault (each, len(nodes))
+
+        world_matrices = nb_math.get_matrices (['{}.worldMatrix[0]'.format(each) for each in nodes])
+        target_index = [nodes[target_] for trigger_list, target_ in pairs for trigger_ in trigger_list]
+        trigger_index = [nodes[trigger_] for trigger_list, target_ in pairs for trigger_ in trigger_list]
+        offsets = nb_math.offset_matrices (world_matrices[target_index], world_matrices[trigger_index])
+
+        offset_values = []
+        start = 0
+        for trigger_list, target_ in pairs :
+            offset_values.append (offsets[start:start + len(trigger_list)])
+            start += len(trigger_list)
+
+        return offset_values
+
+    @nb_transaction.transaction ('matrix_parent_constraint_batch')
+    def matrix_parent_constraint_batch (self, pairs, offset, trigger_matrix, out_connect) :
+        '''
+        Create many parent constraints in one pass. All objects are resolved to node handles and all constraints are checked
+        before anything is built, then all offsets are computed at once
+        pairs -> list of [trigger_list, target] (list)
+        offset -> Maintain offset between objects (bool)
+        trigger_matrix -> matrix to connect for parent constraint (str)
+        out_connect -> parameter of connections to connect target object (list)
+        Return True if constraints are built, otherwise False
+        '''
+        if not pairs :
+            return False
+
+        with nb_profiling.step ('connection check') :
+            handles = nb_handles.get_handles ([each for trigger_list, target_ in pairs for each in trigger_list + [target_]])
+            if not self.check_constraint_pairs (self, pairs, out_connect, handles) :
+                return False
+
+        # Networks are built from handles, names are not resolved again
+        pairs = [[[handles[each] for each in trigger_list], handles[target_]] for trigger_list, target_ in pairs]
+
+        # Get all offsets in one pass
+        offset_values = [None] * len(pairs)
+        if offset :
+            with nb_profiling.step ('offsets') :
+                offset_values = self.get_offset_values (self, pairs)
+
+        # Build all networks with one builder, so om2 backend commits everything at once
+        with nb_profiling.step ('node creation') :
+            builder = nb_backend.new_builder()
+            for (trigger_list, target_), values in zip(pairs, offset_values) :
+                self.build_parent_constraint (self, trigger_list, target_, offset, trigger_matrix, out_connect, values, builder)
+            builder.commit()
+
+        return True
+
+    @nb_transaction.transaction ('mass_attach')
+    def mass_attach (self, followers, drivers, count = 3, falloff = 'inverse', power = 2.0, radius = None, offset = True,
+                     trigger_matrix = 'worldMatrix[0]', out_connect = None) :
+        '''
+        Parent constraint each follower to its nearest drivers, weighted by distance. Nearest drivers and weights of all followers
+        are computed in one vectorized pass from world positions, then all networks are built with one builder
+        followers -> constrained objects (list)
+        drivers -> objects followers can be attached to (list)
+        count -> maximum number of drivers of each follower (int)
+        falloff, power, radius -> distance falloff, see nb_rgtk_math.falloff_weights. Drivers without weight are not connected
+        offset -> maintain offset between objects (bool)
+        trigger_matrix -> drivers matrix to connect (str)
+        out_connect -> parameter of connections to connect followers, every axis in offsetParentMatrix if None (list)
+        Return attachments, for each follower [follower, [(driver, weight), ...]], None if objects are not valid
+        '''
+        followers = list(followers)
+        drivers = list(drivers)
+        if out_connect is None :
+            out_connect = self.get_out_connect (self)
+
+        if not followers or not drivers or count < 1 :
+            cmds.warning ("Mass attach needs followers, drivers and at least one driver by follower")
+            return
+
+        with nb_profiling.step ('connection check') :
+            handles = nb_handles.get_handles (followers + drivers)
+
+            missing = [str(each) for each in followers + drivers if each not in handles]
+            if missing :
+                cmds.warning ("Mass attach errors : {} doesn't exists or is not unique".format(', '.join(missing)))
+                return
+
+            # Duplicates are ignored, order is kept
+            followers = list(dict.fromkeys (handles[each] for each in followers))
+            drivers = list(dict.fromkeys (handles[each] for each in drivers))
+
+            both = set(followers) & set(drivers)
+            if both :
+                cmds.warning ("Mass attach errors : {} can't be follower and driver".format(', '.join(sorted(each.short_name for each in both))))
+                return
+
+        # World matrices are queried once, positions are their translation row
+        with nb_profiling.step ('nearest drivers') :
+            world_matrices = nb_math.get_matrices (['{}.worldMatrix[0]'.format(each) for each in followers + drivers])
+            follower_matrices = world_matrices[:len(followers)]
+            driver_matrices = world_matrices[len(followers):]
+
+            indices, distances = nb_math.nearest_points (driver_matrices[:, 3, :3], follower_matrices[:, 3, :3], count)
+            weights = nb_math.falloff_weights (distances, falloff, power, radius)
+
+        attachments = []
+        for follower, row_indices, row_weights in zip(followers, indices, weights) :
+            used = row_weights > 0
+            attachments.append ([follower, list(zip([drivers[x] for x in row_indices[used]], row_weights[used]))])
+
+        pairs = [[[driver for driver, weight in attached], follower] for follower, attached in attachments]
+        with nb_profiling.step ('connection check') :
+            if not self.check_constraint_pairs (self, pairs, out_connect, {each : each for each in followers + drivers}) :
+                return
+
+        offset_values = [None] * len(pairs)
+        if offset :
+            with nb_profiling.step ('offsets') :
+                driver_index = [x for row_indices, row_weights in zip(indices, weights) for x in row_indices[row_weights > 0]]
+                follower_index = [x for x, (follower, attached) in enumerate(attachments) for each in attached]
+                offsets = nb_math.offset_matrices (follower_matrices[follower_index], driver_matrices[driver_index])
+
+                start = 0
+                for x, (follower, attached) in enumerate(attachments) :
+                    offset_values[x] = offsets[start:start + len(attached)]
+                    start += len(attached)
+
+        with nb_profiling.step ('node creation') :
+            builder = nb_backend.new_builder()
+            for (trigger_list, target_), values, (follower, attached) in zip(pairs, offset_values, attachments) :
+                self.build_parent_constraint (self, trigger_list, target_, offset, trigger_matrix, out_connect, values, builder,
+                                              [weight for driver, weight in attached])
+            builder.commit()
+
+        return [[str(follower), [(str(driver), float(weight)) for driver, weight in attached]] for follower, attached in attachments]
+
+    # main parent matrix function
+    @nb_transaction.transaction ('matrix_parent_constraint')
+    def matrix_parent_constraint (self, offset, trigger_matrix, out_connect, mode = 'default', pattern = None) :
+
+        '''
+        This function create a parent constraint with matrix
+        offset -> Maintain offset between objects (bool)
+        trigger_matrix -> matrix to connect for parent constraint (str)
+        out_connect -> parameter of connections to connect target object (list)
+            [[[['TranslateX', 'translateX'], bool], [['TranslateY', 'translateY'], bool], [['TranslateZ', 'translateZ'], bool]], 
+            [[['RotateX', 'rotateX'], bool], [['RotateY', 'rotateY'], bool], [['RotateZ', 'rotateZ'], bool]],
+            [['ScaleX', 'scaleX'], bool], [['ScaleY', 'scaleY'], bool], [['ScaleZ', 'scaleZ'], bool]],
+            bool]
+        mode -> how selected objects are paired : 'default', 'pairwise', 'one_to_many' or 'name' (str)
+        pattern -> trigger and target name patterns for 'name' mode ex : ('*_proxy', '*_jnt') (tuple)
+        '''
+        # Get selected objects. Name mode can work without selection
+        objects_ = cmds.ls(sl=True) or []
+        if not objects_ and mode != 'name' :
+            cmds.warning ("No object selected")
+            return
+        
+        # Sort objects in triggers and target
+        pairs = self.get_constraint_pairs (self, objects_, mode, pattern)
+        if not pairs :
+            return
+
+        self.matrix_parent_constraint_batch (self, pairs, offset, trigger_matrix, out_connect)
 
     def check_aim_variables (self, world_up_vector, primary_axis, secondary_axis) :
         '''
@@ -251,8 +561,11 @@ class MatrixConstraint () :
         
         return True
 
-    def matrix_aim_constraint(self, in_opm, world_up_vector, world_up_object, primary_axis, secondary_axis) :
-
+    @nb_transaction.transaction ('matrix_aim_constraint')
+    def matrix_aim_constraint(self, in_opm, world_up_vector, world_up_object, primary_axis, secondary_axis, input_mode = 'group') :
+        '''
+        Aim constraint between the two selected objects : the first one is the trigger, the last one is the target. See aim_constraint
+        '''
         objects_ = self.get_objects(self)
 
         if not objects_:
@@ -261,60 +574,381 @@ class MatrixConstraint () :
         target_ = objects_ [1]
         trigger_ = objects_ [0]
 
-        if not self.check_aim_variables(self, world_up_vector, primary_axis, secondary_axis) :
+        if len(trigger_) != 1 :
+            cmds.warning ("More than two objects are selected")
             return
 
-        if world_up_object and not cmds.objExists(world_up_object) :
-            cmds.warning ("World up Object doesn't exists")
+        return self.aim_constraint (self, trigger_[0], target_, in_opm, world_up_vector, world_up_object, primary_axis, secondary_axis, input_mode)
+
+    @nb_transaction.transaction ('aim_constraint')
+    def aim_constraint (self, trigger_, target_, in_opm, world_up_vector, world_up_object, primary_axis, secondary_axis, input_mode = 'group') :
+        '''
+        Create an aim constraint between trigger_ and target_. Target is parented under an input group placed at its position,
+        unless input_mode keeps target in place
+        trigger_ -> object to aim at (str or NodeHandle)
+        target_ -> aimed object (str or NodeHandle)
+        in_opm -> connect aim rotation in target offsetParentMatrix, otherwise in target rotate (bool)
+        world_up_vector -> world up vector for aimConstraint (tuple)
+        world_up_object -> object giving secondary target matrix, trigger_ if empty (str)
+        primary_axis, secondary_axis -> target aim and up axis (tuple)
+        input_mode -> aimMatrix input, 'group' : input group parent of target, 'static' : target rest world matrix,
+                      'parent' : target rest matrix relative to its parent, so the aim follows the parent.
+                      In 'static' and 'parent' modes target hierarchy doesn't change and the aim is always connected in target offsetParentMatrix (str)
+        Return created nodes, None if the constraint is not valid
+        '''
+        if input_mode not in ('group', 'static', 'parent') :
+            cmds.warning ("Unknown input mode {}, use group, static or parent".format(input_mode))
             return
 
-        if len(trigger_) != 1 :
-            cmds.warning ("More than two objects are selected")
+        if not self.check_aim_variables(self, tuple(world_up_vector), tuple(primary_axis), tuple(secondary_axis)) :
             return
+
+        # Resolve objects once : target is reparented under the input group, its handle still finds it
+        handles = nb_handles.get_handles ([trigger_, target_] + ([world_up_object] if world_up_object else []))
+
+        missing = [str(each) for each in (trigger_, target_) if each not in handles]
+        if missing :
+            cmds.warning ("{} doesn't exists or is not unique".format(', '.join(missing)))
+            return
+
+        if world_up_object and world_up_object not in handles :
+            cmds.warning ("World up Object doesn't exists or is not unique")
+            return
+
+        trigger_ = handles[trigger_]
+        target_ = handles[target_]
+        world_up_object = handles.get (world_up_object)
+        in_opm = in_opm or input_mode != 'group'
         
-        trigger_ = trigger_[0]
-        
+        if not nb_utils.test_output_connections (self.get_aim_out_attrs(self, in_opm), target_) :
+            return
+
+        if input_mode != 'group' :
+            return self.build_aim_in_place (self, target_, "{}.worldMatrix[0]".format(trigger_), "{}.worldMatrix[0]".format(world_up_object or trigger_),
+                                            input_mode == 'parent', world_up_vector, primary_axis, secondary_axis)
+
+        # Plugs are named before target is reparented, while paths are known
+        trigger_plug = "{}.worldMatrix[0]".format(trigger_)
+        up_plug = "{}.worldMatrix[0]".format(world_up_object or trigger_)
+
+        aim_grp = self.create_aim_input (self, target_)
+        aim_nodes = self.build_aim_constraint (self, target_, aim_grp, trigger_plug, up_plug, in_opm, world_up_vector, primary_axis, secondary_axis)
+
+        return aim_nodes[:1] + [aim_grp] + aim_nodes[1:]
+
+    @nb_transaction.transaction ('aim_constraint_batch')
+    def aim_constraint_batch (self, pairs, in_opm, world_up_vector, world_up_object, primary_axis, secondary_axis, input_mode = 'group') :
+        '''
+        Create aim constraints of many [trigger, target] pairs in one transaction. All objects are resolved with one query,
+        then each pair is built by aim_constraint from handles
+        pairs -> list of [trigger, target] (list)
+        in_opm, world_up_vector, world_up_object, primary_axis, secondary_axis, input_mode -> see aim_constraint
+        Return created nodes of all pairs, None if a pair is not valid
+        '''
+        handles = nb_handles.get_handles ([each for pair in pairs for each in pair] + ([world_up_object] if world_up_object else []))
+        world_up_object = handles.get (world_up_object, world_up_object)
+
+        created_nodes = []
+        for trigger_, target_ in pairs :
+            # Names that are not resolved are given as they are, aim_constraint warns about them
+            nodes = self.aim_constraint (self, handles.get (trigger_, trigger_), handles.get (target_, target_), in_opm, world_up_vector, world_up_object,
+                                         primary_axis, secondary_axis, input_mode)
+            if not nodes :
+                return None
+            created_nodes += nodes
+
+        return created_nodes
+
+    def get_aim_out_attrs (self, in_opm) :
+        '''
+        Return target attributs driven by an aim constraint
+        in_opm -> aim rotation is connected in target offsetParentMatrix, otherwise in target rotate (bool)
+        '''
         if in_opm == True : 
-            out_attr_list = ['offsetParentMatrix'] 
+            return ['offsetParentMatrix'] 
         else : 
-            out_attr_list = ['rotateX', 'rotateY', 'rotateZ'] 
+            return ['rotateX', 'rotateY', 'rotateZ'] 
 
-        if not  nb_utils.test_output_connections ( out_attr_list, target_) :
-            return
+    def create_aim_input (self, target_) :
+        '''
+        Create the aim input group at target_ position and parent target_ under it. The target handle is refreshed
+        target_ -> aimed object (NodeHandle)
+        Return input group
+        '''
+        aim_grp = cmds.createNode("transform", name = target_.short_name + '_aimMConstraint_input')
+        cmds.matchTransform(aim_grp, str(target_), position = True)
+        # Paths of target and its children are not valid anymore, target path is given by parent
+        old_path = target_.path
+        new_path = cmds.parent (old_path, aim_grp)[0]
+        nb_handles.invalidate (old_path)
+        target_.refresh (new_path)
+
+        cmds.setAttr ("{}.rotate".format(aim_grp), lock = True)
 
-        aim_node = cmds.createNode('aimMatrix', name = target_ + '_aimMConstraint_aimMat')
+        return aim_grp
+
+    def create_aim_node (self, target_, trigger_plug, up_plug, world_up_vector, primary_axis, secondary_axis) :
+        '''
+        Create the aimMatrix node of target_, aiming at trigger_plug with up direction given by up_plug
+        trigger_plug -> matrix plug to aim at ex : 'ctrl.worldMatrix[0]' (str)
+        up_plug -> matrix plug giving the up direction, if None world_up_vector is in world space (str)
+        Return aimMatrix node
+        '''
+        aim_node = cmds.createNode('aimMatrix', name = target_.short_name + '_aimMConstraint_aimMat')
 
         cmds.setAttr ('{}.secondaryMode'.format (aim_node), 2)
         cmds.setAttr ("{}.primaryInputAxis".format(aim_node), *primary_axis)
         cmds.setAttr ("{}.secondaryInputAxis".format(aim_node), *secondary_axis)
         cmds.setAttr ("{}.secondaryTargetVector".format(aim_node), *world_up_vector)
-        cmds.connectAttr ("{}.worldMatrix[0]".format(trigger_), "{}.primaryTargetMatrix".format(aim_node))
+        cmds.connectAttr (trigger_plug, "{}.primaryTargetMatrix".format(aim_node))
+        if up_plug :
+            cmds.connectAttr (up_plug, "{}.secondaryTargetMatrix".format(aim_node))
 
-        if world_up_object :
-            cmds.connectAttr ("{}.worldMatrix[0]".format(world_up_object), "{}.secondaryTargetMatrix".format(aim_node))
-        else :
-            cmds.connectAttr ("{}.worldMatrix[0]".format(trigger_), "{}.secondaryTargetMatrix".format(aim_node))
+        return aim_node
 
-        aim_grp = cmds.createNode("transform", name = target_ + '_aimMConstraint_input')
-        cmds.matchTransform(aim_grp, target_, position = True)
+    def build_aim_constraint (self, target_, aim_grp, trigger_plug, up_plug, in_opm, world_up_vector, primary_axis, secondary_axis) :
+        '''
+        Create aim constraint nodal network of target_, already parented under aim_grp. Objects are not checked
+        trigger_plug, up_plug -> see create_aim_node (str)
+        Return created nodes : aimMatrix, decomposeMatrix and composeMatrix if in_opm
+        '''
+        aim_node = self.create_aim_node (self, target_, trigger_plug, up_plug, world_up_vector, primary_axis, secondary_axis)
         cmds.connectAttr ("{}.worldMatrix[0]".format(aim_grp), "{}.inputMatrix".format(aim_node))
-        cmds.parent (target_, aim_grp)
 
-        cmds.setAttr ("{}.rotate".format(aim_grp), lock = True)
-
-        decompose_mat = cmds.createNode ("decomposeMatrix", name = target_ + '_aimMConstraint_decMat')
+        decompose_mat = cmds.createNode ("decomposeMatrix", name = target_.short_name + '_aimMConstraint_decMat')
         cmds.connectAttr("{}.outputMatrix".format(aim_node), "{}.inputMatrix".format(decompose_mat))
 
+        return [aim_node] + self.connect_aim_rotation (self, target_, decompose_mat, in_opm)
+
+    def build_aim_in_place (self, target_, trigger_plug, up_plug, follow_parent, world_up_vector, primary_axis, secondary_axis, rest_matrices = None) :
+        '''
+        Create aim constraint nodal network of target_ without input group : target rest matrix is the aimMatrix input
+        and the aimed world matrix is connected in target offsetParentMatrix, relative to target parent. Target transform and joint orient
+        are reset. Objects are not checked
+        trigger_plug, up_plug -> see create_aim_node (str)
+        follow_parent -> rest matrix is relative to target parent, otherwise it is a static world matrix (bool)
+        rest_matrices -> target world and parent matrices, if None they are queried (list of numpy array (4, 4))
+        Return created nodes : aimMatrix, rest multMatrix if follow_parent, and output multMatrix
+        '''
+        if rest_matrices is None :
+            rest_matrices = nb_math.get_matrices (['{}.worldMatrix[0]'.format(target_), '{}.parentMatrix[0]'.format(target_)])
+        world_matrix, parent_matrix = rest_matrices
+
+        aim_node = self.create_aim_node (self, target_, trigger_plug, up_plug, world_up_vector, primary_axis, secondary_axis)
+        created_nodes = [aim_node]
+
+        if follow_parent :
+            rest_mult = cmds.createNode ('multMatrix', name = target_.short_name + '_aimMConstraint_restMat')
+            rest_matrix = nb_math.offset_matrices ([world_matrix], [parent_matrix])[0]
+            cmds.setAttr ('{}.matrixIn[0]'.format(rest_mult), nb_math.flatten_matrix(rest_matrix), type = 'matrix')
+            cmds.connectAttr ('{}.parentMatrix[0]'.format(target_), '{}.matrixIn[1]'.format(rest_mult))
+            cmds.connectAttr ('{}.matrixSum'.format(rest_mult), '{}.inputMatrix'.format(aim_node))
+            created_nodes.append (rest_mult)
+        else :
+            cmds.setAttr ('{}.inputMatrix'.format(aim_node), nb_math.flatten_matrix(world_matrix), type = 'matrix')
+
+        # Aimed world matrix back in target parent space
+        out_mult = cmds.createNode ('multMatrix', name = target_.short_name + '_aimMConstraint_multMat')
+        cmds.connectAttr ('{}.outputMatrix'.format(aim_node), '{}.matrixIn[0]'.format(out_mult))
+        cmds.connectAttr ('{}.inverseParentMatrix'.format(target_), '{}.matrixIn[1]'.format(out_mult))
+        cmds.connectAttr ('{}.matrixSum'.format(out_mult), '{}.offsetParentMatrix'.format(target_))
+        created_nodes.append (out_mult)
+
+        cmds.xform (str(target_), translation = (0,0,0), rotation = (0,0,0), scale = (1,1,1))
+
+        # Joint orient is already in the rest matrix, it would rotate the aimed world matrix once more
+        if cmds.objectType (str(target_)) == 'joint' :
+            cmds.setAttr ('{}.jointOrient'.format(target_), 0, 0, 0)
+
+        return created_nodes
+
+    def connect_aim_rotation (self, target_, decompose_mat, in_opm) :
+        '''
+        Connect aim rotation of decompose_mat to target_ and reset target_ transform under its input group
+        Return [decompose_mat] and the created composeMatrix if in_opm
+        '''
         if not in_opm :
             cmds.connectAttr ("{}.outputRotate".format(decompose_mat), "{}.rotate".format(target_))
+            created_nodes = [decompose_mat]
             
         else :
-            compose_node = cmds.createNode ("composeMatrix", name = target_ + '_aimMConstraint_compMat')
-            
-            cmds.setAttr ("{}.rotate".format(target_), *(0,0,0))
+            compose_node = cmds.createNode ("composeMatrix", name = target_.short_name + '_aimMConstraint_compMat')
             
             cmds.connectAttr ("{}.outputRotate".format(decompose_mat), "{}.inputRotate".format(compose_node))
             cmds.connectAttr ("{}.outputMatrix".format(compose_node), "{}.offsetParentMatrix".format(target_))
-            
-        cmds.setAttr ("{}.translate".format(target_), *(0,0,0))
-        cmds.setAttr ("{}.scale".format(target_), *(1,1,1))
+            created_nodes = [decompose_mat, compose_node]
+
+        # Reset target in one call, rotate is driven by the aim when it is not in offsetParentMatrix
+        if in_opm :
+            cmds.xform (str(target_), translation = (0,0,0), rotation = (0,0,0), scale = (1,1,1))
+        else :
+            cmds.xform (str(target_), translation = (0,0,0), scale = (1,1,1))
+
+        return created_nodes
+
+    @nb_transaction.transaction ('aim_chain')
+    def aim_chain (self, chain, world_up_vector, world_up_object, primary_axis, secondary_axis, up_mode = 'object', last_mode = 'align', last_target = None) :
+        '''
+        Aim each object of an ordered chain at the next one. All objects are checked first, then every network is built in one pass.
+        Objects keep their hierarchy, like aim_constraint 'parent' input mode : each object aims at the rest matrix of the next object,
+        relative to a parent its own aim doesn't move, so a joint chain still follows its root. The aim is always connected in offsetParentMatrix
+        chain -> ordered objects, from root to tip (list)
+        world_up_vector, primary_axis, secondary_axis -> see aim_constraint
+        world_up_object -> shared up object, if empty the up direction is world_up_vector (str)
+        up_mode -> 'object' : up given by world_up_object, 'chain' : up given by the previous object of the chain,
+                   so twist follows the chain. The first object uses world_up_object (str)
+        last_mode -> last object fallback, 'align' : same rotation as the previous object, 'aim' : aims at last_target,
+                     'none' : rotation is not constrained (str)
+        last_target -> object aimed by the last object when last_mode is 'aim' (str)
+        Return created nodes, None if the chain is not valid
+        '''
+        chain = list(chain)
+
+        if up_mode not in ('object', 'chain') :
+            cmds.warning ("Unknown up mode {}, use object or chain".format(up_mode))
+            return
+        if last_mode not in ('align', 'aim', 'none') :
+            cmds.warning ("Unknown last mode {}, use align, aim or none".format(last_mode))
+            return
+        if len(chain) < 2 :
+            cmds.warning ("Aim chain needs at least two objects")
+            return
+        if last_mode == 'aim' and not last_target :
+            cmds.warning ("Last target is needed to aim the last object")
+            return
+
+        if not self.check_aim_variables(self, tuple(world_up_vector), tuple(primary_axis), tuple(secondary_axis)) :
+            return
+
+        # Resolve all objects in one query
+        extra_objects = [each for each in (world_up_object, last_target if last_mode == 'aim' else None) if each]
+        handles = nb_handles.get_handles (chain + extra_objects)
+
+        missing = [str(each) for each in chain + extra_objects if each not in handles]
+        if missing :
+            cmds.warning ("Aim chain errors : {} doesn't exists or is not unique".format(', '.join(missing)))
+            return
+
+        chain = [handles[each] for each in chain]
+        world_up_object = handles.get (world_up_object)
+        last_target = handles.get (last_target) if last_mode == 'aim' else None
+
+        errors = []
+        if len(set(chain)) != len(chain) :
+            errors.append ("an object is used more than once")
+        if world_up_object in chain :
+            errors.append ("{} is in the chain and can't be the world up object".format(world_up_object.short_name))
+        if last_target in chain :
+            errors.append ("{} is in the chain and can't be the last target".format(last_target.short_name))
+        if errors :
+            cmds.warning ("Aim chain errors : {}".format(' | '.join(errors)))
+            return
+
+        # All constrained objects are tested in one query
+        constrained = chain if last_mode != 'none' else chain[:-1]
+        if not nb_utils.check_output_connections (constrained, self.get_aim_out_attrs(self, True)) :
+            return
+
+        # Rest matrices are queried once, before any object is reset
+        extra_objects = [each for each in (world_up_object, last_target) if each]
+        matrices = nb_math.get_matrices (['{}.worldMatrix[0]'.format(each) for each in chain + extra_objects] +
+                                         ['{}.parentMatrix[0]'.format(each) for each in chain])
+        world_matrices, parent_matrices = matrices[:len(chain)], matrices[len(chain) + len(extra_objects):]
+        extra_matrices = dict(zip(extra_objects, matrices[len(chain):len(chain) + len(extra_objects)]))
+
+        up_plugs = []
+        for x, each in enumerate(chain) :
+            if up_mode == 'chain' and x > 0 :
+                up_plugs.append ("{}.worldMatrix[0]".format(chain[x - 1]))
+            elif world_up_object :
+                up_plugs.append ("{}.worldMatrix[0]".format(world_up_object))
+            else :
+                up_plugs.append (None)
+
+        # Parent matrices once parent objects of the chain are aimed, so each object keeps its rest world matrix
+        parent_matrices = self.get_chain_parent_matrices (self, chain, world_matrices, parent_matrices, extra_matrices.get (world_up_object),
+                                                          extra_matrices.get (last_target), up_mode, last_mode, world_up_vector, primary_axis, secondary_axis)
+
+        created_nodes = []
+        for x, each in enumerate(chain[:-1]) :
+            target_mult = self.create_chain_target (self, chain, x, world_matrices, parent_matrices)
+            created_nodes.append (target_mult)
+            created_nodes += self.build_aim_in_place (self, each, "{}.matrixSum".format(target_mult), up_plugs[x], True, world_up_vector,
+                                                      primary_axis, secondary_axis, (world_matrices[x], parent_matrices[x]))
+
+        last = chain[-1]
+        rest_matrices = (world_matrices[-1], parent_matrices[-1])
+        if last_mode == 'aim' :
+            created_nodes += self.build_aim_in_place (self, last, "{}.worldMatrix[0]".format(last_target), up_plugs[-1], True, world_up_vector,
+                                                      primary_axis, secondary_axis, rest_matrices)
+        elif last_mode == 'align' :
+            # Both axes of the last object are aligned with the same axes of the previous object
+            previous_plug = "{}.worldMatrix[0]".format(chain[-2])
+            last_nodes = self.build_aim_in_place (self, last, previous_plug, previous_plug, True, secondary_axis, primary_axis, secondary_axis, rest_matrices)
+            cmds.setAttr ("{}.primaryMode".format(last_nodes[0]), 2)
+            cmds.setAttr ("{}.primaryTargetVector".format(last_nodes[0]), *primary_axis)
+            created_nodes += last_nodes
+
+        return created_nodes
+
+    def get_chain_parent_matrices (self, chain, world_matrices, parent_matrices, up_matrix, last_matrix, up_mode, last_mode, world_up_vector,
+                                   primary_axis, secondary_axis) :
+        '''
+        Get the parent matrix of each chain object once the chain is aimed, at rest. Aimed world matrices are computed from root to tip,
+        like aimMatrix nodes do, and objects under an aimed object follow its new rotation
+        chain -> chain objects (list of NodeHandle)
+        world_matrices, parent_matrices -> rest world and parent matrices of chain objects (numpy array (n, 4, 4))
+        up_matrix, last_matrix -> world up object and last target world matrices, None if they are not used (numpy array (4, 4))
+        up_mode, last_mode, world_up_vector, primary_axis, secondary_axis -> see aim_chain
+        Return numpy array of shape (n, 4, 4)
+        '''
+        aimed_matrices = np.array (world_matrices)
+        new_parent_matrices = np.array (parent_matrices)
+
+        for x, each in enumerate(chain) :
+            # Nearest aimed ancestor moves the parent of this object
+            ancestors = [c for c in range(x) if each.path.startswith (chain[c].path + '|')]
+            if ancestors :
+                c = max(ancestors, key = lambda index : len(chain[index].path))
+                new_parent_matrices[x] = parent_matrices[x] @ np.linalg.inv (world_matrices[c]) @ aimed_matrices[c]
+
+            if x == len(chain) - 1 and last_mode != 'aim' :
+                if last_mode == 'align' :
+                    aimed_matrices[x][:3, :3] = nb_math.remove_scale (aimed_matrices[x - 1])[0, :3, :3] * np.linalg.norm (world_matrices[x][:3, :3], axis = 1)[:, None]
+                else :
+                    aimed_matrices[x] = world_matrices[x] @ np.linalg.inv (parent_matrices[x]) @ new_parent_matrices[x]
+                continue
+
+            target_matrix = world_matrices[x + 1] if x < len(chain) - 1 else last_matrix
+            if up_mode == 'chain' and x > 0 :
+                up_vector = np.dot (world_up_vector, aimed_matrices[x - 1][:3, :3])
+            elif up_matrix is not None :
+                up_vector = np.dot (world_up_vector, up_matrix[:3, :3])
+            else :
+                up_vector = world_up_vector
+
+            rotations, valid = nb_math.aim_rotations (target_matrix[3, :3] - world_matrices[x][3, :3], up_vector, primary_axis, secondary_axis)
+            if valid[0] :
+                aimed_matrices[x][:3, :3] = rotations[0] * np.linalg.norm (world_matrices[x][:3, :3], axis = 1)[:, None]
+
+        return new_parent_matrices
+
+    def create_chain_target (self, chain, index, world_matrices, parent_matrices) :
+        '''
+        Create the multMatrix giving the rest matrix of the object following chain[index], relative to the parent of chain[index]
+        if the next object is under it, otherwise relative to the next object parent. The target follows the chain root
+        and never depends on the aim of chain[index], so a hierarchy doesn't create cycles
+        chain -> chain objects (list of NodeHandle)
+        index -> index of the aiming object (int)
+        world_matrices, parent_matrices -> rest world and parent matrices of chain objects (numpy array (n, 4, 4))
+        Return multMatrix node
+        '''
+        object_, next_ = chain[index], chain[index + 1]
+        space = index if next_.path.startswith (object_.path + '|') else index + 1
+
+        target_mult = cmds.createNode ('multMatrix', name = object_.short_name + '_aimMConstraint_targetMat')
+        rest_matrix = nb_math.offset_matrices ([world_matrices[index + 1]], [parent_matrices[space]])[0]
+        cmds.setAttr ('{}.matrixIn[0]'.format(target_mult), nb_math.flatten_matrix(rest_matrix), type = 'matrix')
+        cmds.connectAttr ('{}.parentMatrix[0]'.format(chain[space]), '{}.matrixIn[1]'.format(target_mult))
+
+        return target_mult
@@ -0,0 +1,349 @@
+"""
+Optimizer pass for constraint networks already built by the toolkit.
+Networks are found by the names given by matrix_parent_constraint, matrix_aim_constraint and parentSpace, then :
+- decomposeMatrix -> composeMatrix round trips are removed. The input matrix is connected directly, or through a pickMatrix node
+  when only some channels are used
+- static offset composeMatrix nodes are removed, their matrix is set in multMatrix.matrixIn
+- blendMatrix nodes without effect (no weighted target, or one target at full weight) are removed
+A report gives node count and evaluation time before and after the pass, and world matrices of all transforms are compared.
+"""
+import re
+import time
+
+import numpy as np
+
+from maya import cmds
+from nb_rigging_toolkit import nb_rgtk_math as nb_math
+from nb_rigging_toolkit import nb_rgtk_transaction as nb_transaction
+
+# Long names of short attribut names used in toolkit networks
+ATTR_LONG_NAMES = {'imat' : 'inputMatrix', 'omat' : 'outputMatrix', 'tmat' : 'targetMatrix', 'rot' : 'rotateWeight',
+                   'opm' : 'offsetParentMatrix', 'wm' : 'worldMatrix', 'o' : 'output', 's' : 'selector'}
+
+# Names of toolkit nodes handled by each optimization
+ROUND_TRIP_PATTERNS = ('*_parentMConstraint_compMat', '*_aimMConstraint_compMat')
+OFFSET_PATTERNS = ('*_parentMConstraint_offset',)
+BLEND_PATTERNS = ('*_parentMConstraint_blendMat', '*_parentSpace_blendMat', '*_parentSpace_merge_blendMat')
+
+CHANNELS = ('Translate', 'Rotate', 'Scale')
+CHANNEL_DEFAULTS = {'Translate' : (0, 0, 0), 'Rotate' : (0, 0, 0), 'Scale' : (1, 1, 1)}
+
+# Split 'inputTranslateX' in 'Translate' and 'X'
+_channel_regex = re.compile (r'^(?:input|output)(Translate|Rotate|Scale)([XYZ]?)$')
+
+# Split 'target[2].targetMatrix' in '2' and 'targetMatrix'
+_target_regex = re.compile (r'^target\[(\d+)\]\.(\w+)$')
+
+# Tolerance used to compare world matrices
+TOLERANCE = 1e-4
+
+def long_attr (attr) :
+    '''
+    Return attribut path with long names, ex : 'target[0].tmat' -> 'target[0].targetMatrix'
+    '''
+    return '.'.join (re.sub(r'^\w+', lambda match : ATTR_LONG_NAMES.get(match.group(0), match.group(0)), part) for part in attr.split('.'))
+
+def get_connections (nodes, incoming = True) :
+    '''
+    Return connections of nodes queried in one call : {node : [(node attribut, other plug), ...]}
+    nodes -> queried nodes (list)
+    incoming -> True for incoming connections, False for outgoing connections (bool)
+    '''
+    result = {node : [] for node in nodes}
+    if not nodes :
+        return result
+
+    connections = cmds.listConnections (nodes, source = incoming, destination = not incoming, connections = True, plugs = True) or []
+
+    # connections is a flat list : [node plug, other plug, node plug, other plug, ...]
+    for plug, other in zip(connections[::2], connections[1::2]) :
+        node, attr = plug.split ('.', 1)
+        result.setdefault (node, []).append ((long_attr(attr), other))
+
+    return result
+
+def get_vector (plug) :
+    '''
+    Return a vector attribut value as a tuple of 3 floats
+    '''
+    return tuple(np.asarray (cmds.getAttr(plug), dtype = float).reshape(3))
+
+def find_nodes (patterns, node_type) :
+    '''
+    Return nodes of node_type matching one of patterns
+    '''
+    return list(dict.fromkeys (cmds.ls (list(patterns), type = node_type) or []))
+
+def find_round_trips () :
+    '''
+    Find composeMatrix nodes only fed by one decomposeMatrix, channel by channel
+    Return a list of plans : {'compose', 'decompose', 'source', 'channels', 'destinations', 'remove_decompose'}
+    '''
+    composes = find_nodes (ROUND_TRIP_PATTERNS, 'composeMatrix')
+    compose_inputs = get_connections (composes)
+    compose_outputs = get_connections (composes, incoming = False)
+
+    decomposes = set(cmds.ls (list(set(other.split('.')[0] for node in composes for attr, other in compose_inputs[node])), type = 'decomposeMatrix') or [])
+    decompose_inputs = get_connections (list(decomposes))
+    decompose_outputs = get_connections (list(decomposes), incoming = False)
+
+    plans = []
+    for compose in composes :
+        inputs = compose_inputs[compose]
+        sources = set(other.split('.')[0] for attr, other in inputs)
+        if len(sources) != 1 or not sources & decomposes :
+            continue
+        decompose = sources.pop ()
+
+        # Each connection must link the same channel and axis : outputTranslateX -> inputTranslateX, outputRotate -> inputRotate
+        axis_list = set()
+        for attr, other in inputs :
+            input_match = _channel_regex.match (attr)
+            output_match = _channel_regex.match (other.split('.', 1)[1])
+            if not input_match or not output_match or input_match.groups() != output_match.groups() :
+                break
+            channel, axis = input_match.groups()
+            axis_list.update ((channel, each) for each in (axis or 'XYZ'))
+        else :
+            channels = []
+            for channel in CHANNELS :
+                connected = [(channel, axis) in axis_list for axis in 'XYZ']
+                if any(connected) and not all(connected) :
+                    break
+                channels.append (all(connected))
+            else :
+                source = [other for attr, other in decompose_inputs[decompose] if attr == 'inputMatrix']
+                destinations = [other for attr, other in compose_outputs[compose] if attr == 'outputMatrix']
+                if not source or not destinations :
+                    continue
+
+                # Channels not connected must keep their default value, otherwise they change the composed matrix
+                if any(not connected and get_vector('{}.input{}'.format(compose, channel)) != CHANNEL_DEFAULTS[channel]
+                       for channel, connected in zip(CHANNELS, channels)) :
+                    continue
+
+                plans.append ({'compose' : compose,
+                               'decompose' : decompose,
+                               'source' : source[0],
+                               'channels' : channels,
+                               'destinations' : destinations,
+                               'remove_decompose' : all(other.split('.')[0] == compose for attr, other in decompose_outputs[decompose])})
+
+    return plans
+
+def apply_round_trips (plans) :
+    '''
+    Connect round trips input matrix directly to their destinations, through a pickMatrix node if some channels are not used
+    '''
+    for plan in plans :
+        source = plan['source']
+
+        if not all(plan['channels']) :
+            pick_mat = cmds.createNode ('pickMatrix', name = re.sub(r'_compMat$', '_pickMat', plan['compose']))
+            cmds.connectAttr (source, '{}.inputMatrix'.format(pick_mat))
+
+            for channel, connected in zip(CHANNELS, plan['channels']) :
+                if not connected :
+                    cmds.setAttr ('{}.use{}'.format(pick_mat, channel), False)
+            cmds.setAttr ('{}.useShear'.format(pick_mat), False)
+
+            source = '{}.outputMatrix'.format(pick_mat)
+
+        for destination in plan['destinations'] :
+            cmds.connectAttr (source, destination, force = True)
+
+    removed = [plan['compose'] for plan in plans] + [plan['decompose'] for plan in plans if plan['remove_decompose']]
+    if removed :
+        cmds.delete (removed)
+
+def find_offsets () :
+    '''
+    Find static composeMatrix offsets only connected to multMatrix.matrixIn
+    Return a list of plans : {'compose', 'matrix', 'destinations'}
+    '''
+    composes = find_nodes (OFFSET_PATTERNS, 'composeMatrix')
+    compose_inputs = get_connections (composes)
+    compose_outputs = get_connections (composes, incoming = False)
+
+    mult_nodes = set(cmds.ls (list(set(other.split('.')[0] for node in composes for attr, other in compose_outputs[node])), type = 'multMatrix') or [])
+
+    plans = []
+    for compose in composes :
+        destinations = [other for attr, other in compose_outputs[compose]]
+        if compose_inputs[compose] or not destinations :
+            continue
+
+        if not all(other.split('.')[0] in mult_nodes and other.split('.', 1)[1].startswith('matrixIn[') for other in destinations) :
+            continue
+
+        values = [get_vector ('{}.input{}'.format(compose, channel)) for channel in CHANNELS]
+        plans.append ({'compose' : compose,
+                       'matrix' : nb_math.compose_matrices (*values)[0],
+                       'destinations' : destinations})
+
+    return plans
+
+def apply_offsets (plans) :
+    '''
+    Remove offset nodes and set their matrix in multMatrix.matrixIn
+    '''
+    if not plans :
+        return
+
+    # Offsets are deleted first, a connected plug can't be set
+    cmds.delete ([plan['compose'] for plan in plans])
+
+    for plan in plans :
+        for destination in plan['destinations'] :
+            cmds.setAttr (destination, nb_math.flatten_matrix(plan['matrix']), type = 'matrix')
+
+def find_blends () :
+    '''
+    Find blendMatrix nodes whose output is one of their input matrices : no target with weight, or one target at full weight
+    Return a list of plans : {'blend', 'source', 'destinations'}
+    '''
+    blends = find_nodes (BLEND_PATTERNS, 'blendMatrix')
+    blend_inputs = get_connections (blends)
+    blend_outputs = get_connections (blends, incoming = False)
+
+    plans = []
+    for blend in blends :
+        input_matrix = None
+        targets = {}
+        is_static = True
+
+        for attr, other in blend_inputs[blend] :
+            target_match = _target_regex.match (attr)
+            if attr == 'inputMatrix' :
+                input_matrix = other
+            elif target_match and target_match.group(2) == 'targetMatrix' :
+                targets[int(target_match.group(1))] = other
+            else :
+                # Weights or envelope driven by the rig
+                is_static = False
+
+        destinations = [other for attr, other in blend_outputs[blend] if attr == 'outputMatrix']
+        if not is_static or not destinations :
+            continue
+
+        envelope = cmds.getAttr ('{}.envelope'.format(blend))
+        weighted = [index for index in sorted(targets) if envelope and cmds.getAttr ('{}.target[{}].weight'.format(blend, index))]
+
+        source = None
+        if not weighted :
+            source = input_matrix
+        elif len(weighted) == 1 and envelope == 1 :
+            index = weighted[0]
+            weights = [cmds.getAttr ('{}.target[{}].{}'.format(blend, index, attr)) for attr in ('weight', 'translateWeight', 'rotateWeight', 'scaleWeight', 'shearWeight')]
+            if all(weight == 1 for weight in weights) :
+                source = targets[index]
+
+        if source :
+            plans.append ({'blend' : blend, 'source' : source, 'destinations' : destinations})
+
+    return plans
+
+def apply_blends (plans) :
+    '''
+    Connect blend sources directly to their destinations and remove blends
+    '''
+    for plan in plans :
+        for destination in plan['destinations'] :
+            cmds.connectAttr (plan['source'], destination, force = True)
+
+    if plans :
+        cmds.delete ([plan['blend'] for plan in plans])
+
+def get_world_matrices (nodes) :
+    '''
+    Return world matrices of nodes (numpy array (n, 4, 4))
+    '''
+    return nb_math.get_matrices (['{}.worldMatrix[0]'.format(node) for node in nodes])
+
+def evaluation_time (nodes, repeat = 5) :
+    '''
+    Return mean time to evaluate world matrices of nodes after dirtying the whole scene, in seconds
+    nodes -> evaluated transforms (list)
+    repeat -> number of evaluations (int)
+    '''
+    if not nodes or repeat < 1 :
+        return 0.0
+
+    start = time.perf_counter()
+    for x in range(repeat) :
+        cmds.dgdirty (allPlugs = True)
+        get_world_matrices (nodes)
+
+    return (time.perf_counter() - start) / repeat
+
+@nb_transaction.transaction ('optimize_scene')
+def optimize_networks (dry_run = False) :
+    '''
+    Find and apply all optimizations in one transaction, so they are undone together
+    dry_run -> only find optimizations, the scene is not modified (bool)
+    Return the number of optimized networks (dict) {'round_trips', 'blends', 'offsets' : int}
+    '''
+    # Round trips first, so blends outputs are connected directly to their destinations
+    round_trips = find_round_trips ()
+    if not dry_run :
+        apply_round_trips (round_trips)
+
+    blends = find_blends ()
+    if not dry_run :
+        apply_blends (blends)
+
+    offsets = find_offsets ()
+    if not dry_run :
+        apply_offsets (offsets)
+
+    return {'round_trips' : len(round_trips), 'blends' : len(blends), 'offsets' : len(offsets)}
+
+def optimize_scene (dry_run = False, check = True, repeat = 5) :
+    '''
+    Optimize toolkit networks of the scene and print a report
+    Evaluation time is measured outside the optimize transaction, with the user evaluation manager mode.
+    If a world matrix changed, the optimize transaction is undone. When it can't be undone (undo queue disabled or optimize_scene
+    called inside another transaction), a RuntimeError is raised
+    dry_run -> only find and report optimizations, the scene is not modified (bool)
+    check -> compare all transforms world matrices before and after the pass (bool)
+    repeat -> number of evaluations used to measure evaluation time, 0 to skip (int)
+    Return the report (dict)
+        {'round_trips', 'offsets', 'blends' : number of optimized networks,
+         'nodes_before', 'nodes_after', 'evaluation_before', 'evaluation_after' : node count and time in seconds,
+         'changed' : transforms whose world matrix changed}
+    '''
+    transforms = cmds.ls (type = 'transform', long = True) or []
+    report = {'nodes_before' : len(cmds.ls() or []), 'evaluation_before' : evaluation_time (transforms, repeat)}
+    world_matrices = get_world_matrices (transforms) if check and transforms else None
+
+    report.update (optimize_networks (dry_run))
+    report['nodes_after'] = len(cmds.ls() or [])
+    report['evaluation_after'] = evaluation_time (transforms, repeat)
+
+    report['changed'] = []
+    if world_matrices is not None :
+        new_matrices = get_world_matrices (transforms)
+        report['changed'] = [node for node, before, after in zip(transforms, world_matrices, new_matrices) if not np.allclose(before, after, atol = TOLERANCE)]
+
+    print_report (report, dry_run)
+
+    if report['changed'] and not dry_run :
+        if nb_transaction.is_open () or not cmds.undoInfo (query = True, state = True) :
+            raise RuntimeError ("World matrices changed, undo to restore the scene : {}".format (', '.join(report['changed'])))
+
+        cmds.undo ()
+        cmds.warning ("World matrices changed, optimizations are undone : {}".format (', '.join(report['changed'])))
+
+    return report
+
+def print_report (report, dry_run = False) :
+    '''
+    Print an optimize_scene report
+    '''
+    print ('NB Rigging Toolkit optimizer{}'.format(' (dry run)' if dry_run else ''))
+    print ('    decompose / compose round trips : {}'.format(report['round_trips']))
+    print ('    no-op blends : {}'.format(report['blends']))
+    print ('    static offsets folded : {}'.format(report['offsets']))
+    print ('    nodes : {} -> {}'.format(report['nodes_before'], report['nodes_after']))
+    print ('    evaluation : {:.2f} ms -> {:.2f} ms'.format(report['evaluation_before'] * 1000.0, report['evaluation_after'] * 1000.0))
+    print ('    world matrices : {}'.format('{} changed'.format(len(report['changed'])) if report['changed'] else 'unchanged'))
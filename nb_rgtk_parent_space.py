@@ -1,75 +1,75 @@
 from maya import cmds
-
-def parentSpace (targetControl, triggerControl, settings, parentTranslate, attr_name) :
+from nb_rigging_toolkit import nb_rgtk_math as nb_math
+from nb_rigging_toolkit import nb_rgtk_backend as nb_backend
+from nb_rigging_toolkit import nb_rgtk_utils as nb_utils
+from nb_rigging_toolkit import nb_rgtk_transaction as nb_transaction
+from nb_rigging_toolkit import nb_rgtk_profiling as nb_profiling
+from nb_rigging_toolkit import nb_rgtk_handles as nb_handles
+
+@nb_transaction.transaction ('parentSpace')
+def parentSpace (targetControl, triggerControl, settings, parentTranslate, attr_name, offsets = None, builder = None, use_groups = False) :
     """
     Get all selected object. The last one is the object to create an attribut to, the previous is the object to deal with parent spaces.
-    With a blend matrix node, setup parent contraints between a trigger and the target.
-    blendMatrix weights are controled by choice nodes
-    targetControl : object to deal with parent spaces (str)
+    Setup parent contraints between each trigger and the target. One choice node, controled by the parent space attribut,
+    selects the parent constraint matrix connected to the target
+    Objects are not checked or resolved : callers give handles (see parent_space_batch), or names of unique nodes
+    targetControl : object to deal with parent spaces (str or NodeHandle)
     triggerControl : list of triggers (list)
-    settings  : settings control (str)
+    settings  : settings control (str or NodeHandle)
     parentTranslate : parent spaces controls translation (bool)
     attr_name : name of the attribut that controls parent space
+    offsets : offset matrices between each trigger and the target, computed if None (list of numpy array (4, 4))
+    builder : scene builder used to create nodes, if None a builder of the current backend is used and committed
+    use_groups : legacy mode, blend the world matrix of one transform per trigger instead of parent constraints matrices (bool)
     """
+    commit = builder is None
+    if commit :
+        builder = nb_backend.new_builder()
+
+    # Get every trigger offset in one pass if they are not given
+    if offsets is None :
+        offsets = parent_space_offsets ([(targetControl, settings, triggerControl, attr_name, parentTranslate)])[0]
 
-    # Setup a naming for all created objects used by the function. Also create the string that the cmds.addAttr() comend needs
-    target_name = targetControl.replace("_ctrl", "")
-    enumList = ''
-    targetList = []
-    for each in triggerControl : 
-        enumList += f':{each}'
-        targetList.append (each)
-    
-    enumList = enumList[1:]    # remove the first caracter of the string (":")
+    # Setup a naming for all created objects used by the function
+    target_name = nb_handles.short_name (targetControl).replace("_ctrl", "")
+    targetList = list(triggerControl)
 
     # create the parent space control attribut
-    cmds.addAttr (settings, ln= attr_name, at="enum", en=enumList, k=True)
+    builder.add_enum_attr (settings, attr_name, [nb_handles.short_name (each) for each in targetList])
+
+    # create choice node, its selector is the parent space attribut so input[n] is selected by the n enum field
+    choiceNode = builder.create_node ('choice', '{}_parentSpace_choice'.format(target_name))
+    builder.connect (settings, attr_name, choiceNode, 's')
 
-    # create blendMatrix node
-    blendNode = cmds.createNode('blendMatrix', name = "{}_parentSpace_blendMat".format(target_name))
-    
-    # get the offset off each trigger with the target, connect it to blend matrix and setup choice node values
-    for each in targetList :
+    # get the offset off each trigger with the target and connect it to choice node
+    for x, (each, offset) in enumerate(zip(targetList, offsets)) :
 
         # naming for created nodes
-        nodeName = each.replace ('_ctrl','')
-
-        # create an empty transform node to connect parent spaces (not needed anymore)
-        group = cmds.createNode('transform', name = '{}__{}_parent_grp'.format(nodeName, target_name))
-        cmds.matchTransform (group, targetControl, pos = True, rot = True)
-
-        # create multMatrix node and decomposeMatrix node. connect them
-        mult_node = parent_space_parent_const (each, group)
-        group_decMat = cmds.createNode("decomposeMatrix", name = '{}__{}_parent_decMat'.format(nodeName, target_name))
-        cmds.connectAttr("{}.matrixSum".format(mult_node), "{}.inputMatrix".format(group_decMat))
-        cmds.connectAttr ("{}.outputTranslate".format(group_decMat), "{}.translate".format(group))
-        cmds.connectAttr ("{}.outputRotate".format(group_decMat), "{}.rotate".format(group))
-        cmds.connectAttr ("{}.outputScale".format(group_decMat), "{}.scale".format(group))
-
-        # If the object is the first list item, connect the result to "inputMatrix" attribut
-        # Else, connect to target[n].targetMatrix
-        if each == targetList[0] :
-            cmds.connectAttr ('{}.wm[0]'.format(group), '{}.inputMatrix'.format(blendNode))
-
-        else : 
-            choiceNode = cmds.createNode ('choice', name = '{}__{}_parentSpace_choice'.format(nodeName, target_name))
-
-            # set input value to 1 if the current index is the actual target, otherwise set it to 0
-            for x in range (len(targetList)) :
-
-                if x == targetList.index(each) :
-                    cmds.setAttr ('{}.input[{}]'.format(choiceNode, x), 1)
-
-                else : 
-                    cmds.setAttr ('{}.input[{}]'.format(choiceNode, x), 0)
-            
-            # Connect nodes together
-            cmds.connectAttr ('{}.{}'.format(settings, attr_name), '{}.s'.format(choiceNode))
-            cmds.connectAttr ('{}.o'.format(choiceNode), '{}.target[{}].weight'.format(blendNode, targetList.index(each)))
-            cmds.connectAttr ('{}.wm[0]'.format(group), '{}.target[{}].tmat'.format(blendNode, targetList.index(each)))
+        nodeName = nb_handles.short_name (each).replace ('_ctrl','')
+
+        # Legacy mode : create a transform node driven by the parent constraint, its world matrix is selected.
+        # Otherwise, parent constraint matrix (offset * trigger world) is selected directly, without DAG node or decomposition
+        if use_groups :
+            # its transform values are driven by the decomposeMatrix, so it doesn't need to be matched to the target
+            group = builder.create_node('transform', '{}__{}_parent_grp'.format(nodeName, target_name))
+
+            # create multMatrix node and decomposeMatrix node. connect them
+            mult_node = parent_space_parent_const (each, group, offset, builder)
+            group_decMat = builder.create_node("decomposeMatrix", '{}__{}_parent_decMat'.format(nodeName, target_name))
+            builder.connect (mult_node, "matrixSum", group_decMat, "inputMatrix")
+            builder.connect (group_decMat, "outputTranslate", group, "translate")
+            builder.connect (group_decMat, "outputRotate", group, "rotate")
+            builder.connect (group_decMat, "outputScale", group, "scale")
+            space_matrix = [group, 'wm[0]']
+
+        else :
+            mult_node = parent_space_parent_const (each, targetControl, offset, builder, '{}__{}_parentSpace'.format(nodeName, target_name))
+            space_matrix = [mult_node, 'matrixSum']
+
+        builder.connect (space_matrix[0], space_matrix[1], choiceNode, 'input[{}]'.format(x))
 
         # For rotation mode (ie. parentTranslate = False), keep the last multMatrix object
-        if each == targetList[-1] :
+        if x == len(targetList) - 1 :
             last_mult_node = mult_node
 
     # Rotation mode (ie. parentTranslate = False) : 
@@ -77,27 +77,31 @@ def parentSpace (targetControl, triggerControl, settings, parentTranslate, attr_
     # Connect the result to the target attribut
     if parentTranslate == False :
 
-        rotBlend = cmds.createNode('blendMatrix', name = target_name + '_parentSpace_merge_blendMat')
-        cmds.connectAttr (f'{blendNode}.omat', f'{rotBlend}.inputMatrix')
-        cmds.connectAttr (f'{last_mult_node}.matrixSum', f'{rotBlend}.target[0].tmat')
-        cmds.setAttr (f'{rotBlend}.target[0].rot', 0)
-        cmds.connectAttr (f'{rotBlend}.omat', f'{targetControl}.opm')
+        rotBlend = builder.create_node('blendMatrix', target_name + '_parentSpace_merge_blendMat')
+        builder.connect (choiceNode, 'o', rotBlend, 'inputMatrix')
+        builder.connect (last_mult_node, 'matrixSum', rotBlend, 'target[0].tmat')
+        builder.set_attr (rotBlend, 'target[0].rot', 0)
+        builder.connect (rotBlend, 'omat', targetControl, 'opm')
         
     else :
-        cmds.connectAttr (f'{blendNode}.omat', f'{targetControl}.opm')
+        builder.connect (choiceNode, 'o', targetControl, 'opm')
 
     # Reset targetControl trtansform and rotate values
-    cmds.setAttr (f'{targetControl}.t', *(0,0,0))
-    cmds.setAttr (f'{targetControl}.r', *(0,0,0))
+    builder.set_attr (targetControl, 't', *(0,0,0))
+    builder.set_attr (targetControl, 'r', *(0,0,0))
+
+    if commit :
+        builder.commit()
 
 
+@nb_transaction.transaction ('do_parent_space')
 def do_parent_space (mode, attribut_name) :
     """
     Get selected object and sort them to be used in parentSpace function
     """
 
-    # List selected objects
-    object_list = cmds.ls(sl=True)
+    # List selected objects, resolved once
+    object_list = nb_handles.get_selection()
 
     # sort selected object
     target_control = object_list[-2]
@@ -107,69 +111,150 @@ def do_parent_space (mode, attribut_name) :
     # do parent space
     parentSpace (target_control, trigger_controls, settings_control, mode, attribut_name)
 
-def parent_space_parent_const (trigger_obj, target_obj) :
+def parent_space_offsets (records) :
     """
-    Create a parent constraint for parent space between one trigger and one target. Retrun multMatrix node
+    Get offset matrices between targets and triggers of many parent space records in one vectorized pass.
+    Each target is used without scale : the blended matrix drives target offsetParentMatrix and the target keeps its own scale
+    records : list of (target, settings, triggers, attr_name, parentTranslate) (list)
+    Return a list with, for each record, the list of trigger offsets (list of numpy array (4, 4))
     """
-    
-    offset_matrix = cmds.createNode ('composeMatrix', name = '{}_parentMConstraint_offset'.format(target_obj))
-    temp_offset = cmds.createNode ('composeMatrix', name = trigger_obj + '_temp_offset')
-    temp_mult = cmds.createNode ('multMatrix', name = trigger_obj + '_temp_mult')
-    temp_decMat = cmds.createNode ('decomposeMatrix', name = trigger_obj + '_temp_decMat')
-
-    #get parent
-    parent = cmds.listRelatives (target_obj, p=True, typ = 'transform')
-
-    #parent target_ to trigger_
-    cmds.parent (target_obj, trigger_obj)
-
-    #get translate relative to trigger_
-    temp_target_ = target_obj
-
-    try :
-        cmds.connectAttr ('{}.t'.format (target_obj), '{}.inputTranslate'.format (temp_offset))
-    except RuntimeError :
-        cmds.connectAttr ('{}|{}.t'.format (trigger_obj,target_obj), '{}.inputTranslate'.format (temp_offset))
-        temp_target_ = f'{trigger_obj}|{target_obj}'
-        
-    cmds.connectAttr ('{}.r'.format (temp_target_), '{}.inputRotate'.format (temp_offset))
-    cmds.connectAttr ('{}.s'.format (temp_target_), '{}.inputScale'.format (temp_offset))
 
-    cmds.disconnectAttr ('{}.t'.format (temp_target_), '{}.inputTranslate'.format (temp_offset))
-    cmds.disconnectAttr ('{}.r'.format (temp_target_), '{}.inputRotate'.format (temp_offset))
-    cmds.disconnectAttr ('{}.s'.format (temp_target_), '{}.inputScale'.format (temp_offset))
+    # Query each object world matrix only once
+    nodes = {}
+    for target, settings, triggers, attr_name, parent_translate in records :
+        for each in [target] + list(triggers) :
+            nodes.setdefault (each, len(nodes))
 
-    #reparent target_ to initial parent
-    if parent != None :
-        cmds.parent (temp_target_, parent)
-    else :
-        cmds.parent (temp_target_, w=True)  
+    world_matrices = nb_math.get_matrices (['{}.worldMatrix[0]'.format(each) for each in nodes])
+    group_matrices = nb_math.remove_scale (world_matrices)
+
+    # Compute all trigger / target pairs at once
+    target_index = []
+    trigger_index = []
+    for target, settings, triggers, attr_name, parent_translate in records :
+        for each in triggers :
+            target_index.append (nodes[target])
+            trigger_index.append (nodes[each])
+
+    if not target_index :
+        return [[] for record in records]
+
+    offsets = nb_math.offset_matrices (group_matrices[target_index], world_matrices[trigger_index])
+
+    # Split offsets by record
+    result = []
+    start = 0
+    for target, settings, triggers, attr_name, parent_translate in records :
+        result.append (list(offsets[start:start + len(triggers)]))
+        start += len(triggers)
+
+    return result
+
+def check_parent_space_records (records, handles = None) :
+    """
+    Check all parent space records before building anything. Warn every error found
+    records : list of (target, settings, triggers, attr_name, parentTranslate) (list)
+    handles : handles of records controls, if None they are resolved ({name : NodeHandle})
+    Return True if all records are valid, otherwise False
+    """
+    errors = []
+
+    if handles is None :
+        handles = nb_handles.get_handles ([each for record in records for each in [record[0], record[1]] + list(record[2])])
+
+    # Get incoming connections of all targets in one query
+    index = nb_utils.ConnectionIndex ([handles[record[0]] for record in records if record[0] in handles])
+
+    for target, settings, triggers, attr_name, parent_translate in records :
+
+        missing = [str(each) for each in [target, settings] + list(triggers) if each not in handles]
+        if missing :
+            errors.append ("{} doesn't exists or is not unique".format(', '.join(missing)))
+            continue
+        target, settings = handles[target], handles[settings]
+
+        if not triggers :
+            errors.append ("{} has no trigger".format(target))
+
+        if not attr_name :
+            errors.append ("{} has no parent space attribut name".format(target))
+        elif cmds.objExists ('{}.{}'.format(settings, attr_name)) :
+            errors.append ("{}.{} already exists".format(settings, attr_name))
+
+        if index.is_driven (target, 'offsetParentMatrix') :
+            errors.append ("{}.offsetParentMatrix is already connected".format(target))
+
+    if errors :
+        cmds.warning ("Parent space errors : {}".format(' | '.join(errors)))
+        return False
+
+    return True
+
+@nb_transaction.transaction ('parent_space_batch')
+def parent_space_batch (records, use_groups = False) :
+    """
+    Build parent spaces for many controls in one call.
+    All controls are resolved to node handles and all records are checked first, then every offset is computed in one vectorized pass and all networks are built in one transaction (one undo chunk)
+    records : list of (target, settings, triggers, attr_name, parentTranslate) (list)
+        ex : [('hand_ctrl', 'hand_settings_ctrl', ['world_ctrl', 'root_ctrl', 'chest_ctrl'], 'parentSpace', True)]
+    use_groups : legacy mode, one transform per trigger (bool)
+    Return True if parent spaces are built, otherwise False
+    """
+    if not records :
+        return False
+
+    with nb_profiling.step ('connection check') :
+        handles = nb_handles.get_handles ([each for record in records for each in [record[0], record[1]] + list(record[2])])
+        if not check_parent_space_records (records, handles) :
+            return False
+
+    # Networks are built from handles, names are not resolved again
+    records = [(handles[target], handles[settings], [handles[each] for each in triggers], attr_name, parent_translate)
+               for target, settings, triggers, attr_name, parent_translate in records]
+
+    with nb_profiling.step ('offsets') :
+        offsets = parent_space_offsets (records)
+
+    # Build all networks with one builder, so om2 backend commits everything at once
+    with nb_profiling.step ('node creation') :
+        builder = nb_backend.new_builder()
+
+        for record, record_offsets in zip(records, offsets) :
+            target, settings, triggers, attr_name, parent_translate = record
+            parentSpace (target, triggers, settings, parent_translate, attr_name, offsets = record_offsets, builder = builder, use_groups = use_groups)
+        builder.commit()
+
+    return True
+
+def parent_space_parent_const (trigger_obj, target_obj, offset_value = None, builder = None, name = None) :
+    """
+    Create a parent constraint for parent space between one trigger and one target. Retrun multMatrix node
+    offset_value : offset matrix between trigger and target, computed from world matrices if None (numpy array (4, 4))
+    builder : scene builder used to create nodes, if None a builder of the current backend is used and committed
+    name : prefix of created nodes, target_obj name if None (str)
+    """
+    name = name or nb_handles.short_name (target_obj)
+
+    commit = builder is None
+    if commit :
+        builder = nb_backend.new_builder()
 
-    cmds.connectAttr ('{}.outputMatrix'.format(temp_offset), '{}.matrixIn[0]'.format(temp_mult))
-    cmds.connectAttr ('{}.offsetParentMatrix'.format(target_obj), '{}.matrixIn[1]'.format(temp_mult))
-    cmds.connectAttr ('{}.matrixSum'.format(temp_mult), '{}.inputMatrix'.format(temp_decMat))
+    # Get offset between trigger and target from their world matrices and set it in a composeMatrix node
+    offset_matrix = builder.create_node ('composeMatrix', '{}_parentMConstraint_offset'.format(name))
 
-    #parent target_ to trigger_
-    cmds.connectAttr ('{}.outputTranslate'.format (temp_decMat), '{}.inputTranslate'.format (offset_matrix))
-    cmds.connectAttr ('{}.outputRotate'.format (temp_decMat), '{}.inputRotate'.format (offset_matrix))
-    cmds.connectAttr ('{}.outputScale'.format (temp_decMat), '{}.inputScale'.format (offset_matrix))
+    if offset_value is None :
+        world_matrices = nb_math.get_matrices (['{}.worldMatrix[0]'.format(target_obj), '{}.worldMatrix[0]'.format(trigger_obj)])
+        offset_value = nb_math.offset_matrices (world_matrices[:1], world_matrices[1:])[0]
 
-    cmds.disconnectAttr ('{}.outputTranslate'.format (temp_decMat), '{}.inputTranslate'.format (offset_matrix))
-    cmds.disconnectAttr ('{}.outputRotate'.format (temp_decMat), '{}.inputRotate'.format (offset_matrix))
-    cmds.disconnectAttr ('{}.outputScale'.format (temp_decMat), '{}.inputScale'.format (offset_matrix))
+    builder.set_compose_matrix (offset_matrix, offset_value)
 
-    #delete unused nodes
-    if cmds.objExists(temp_offset) :
-        cmds.delete (temp_offset)
-    if cmds.objExists(temp_mult) :
-        cmds.delete (temp_mult)
-    if cmds.objExists(temp_decMat) :
-        cmds.delete (temp_decMat) 
+    mult_node = builder.create_node('multMatrix', '{}_parentMConstraint_multMat'.format(name))
 
-    mult_node = cmds.createNode('multMatrix', name = '{}_parentMConstraint_multMat'.format(target_obj))
+    builder.connect (offset_matrix, 'outputMatrix', mult_node, 'matrixIn[0]')
+    builder.connect (trigger_obj, 'worldMatrix[0]', mult_node, 'matrixIn[1]')
 
-    cmds.connectAttr ('{}.outputMatrix'.format(offset_matrix), '{}.matrixIn[0]'.format(mult_node))
-    cmds.connectAttr ('{}.worldMatrix[0]'.format(trigger_obj), '{}.matrixIn[1]'.format(mult_node))
+    if commit :
+        builder.commit()
 
     return mult_node
 
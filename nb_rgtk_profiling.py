@@ -0,0 +1,209 @@
+"""
+Profiling of toolkit operations.
+When profiling is enabled, each operation (scene transaction) and each of its steps records wall-clock time, number of maya.cmds
+calls of each kind, and number of created nodes and connections. Finished operations are kept in memory for the Stats view and
+can be written to a JSONL log, one operation per line.
+When profiling is disabled, operations only test one module flag : maya.cmds is not wrapped and nothing is recorded.
+"""
+import collections
+import contextlib
+import functools
+import json
+import sys
+import time
+
+from maya import cmds
+
+# Profiling state
+_enabled = False
+_log_path = None
+
+# Records of opened operations and steps, innermost last
+_stack = []
+
+# Finished operations, newest last
+RECORDS = collections.deque (maxlen = 500)
+
+# Commands counted as node and connection creation
+NODE_COMMANDS = ('createNode', 'om2.createNode')
+CONNECTION_COMMANDS = ('connectAttr', 'om2.connect')
+
+class CountingCmds () :
+    '''
+    maya.cmds wrapper counting each command call in opened records
+    '''
+    def __init__ (self, cmds_module) :
+        self._cmds = cmds_module
+        self._wrappers = {}
+
+    def __getattr__ (self, name) :
+        attribute = getattr (self._cmds, name)
+        if not callable(attribute) :
+            return attribute
+
+        if name not in self._wrappers :
+            @functools.wraps (attribute)
+            def wrapper (*args, **kwargs) :
+                count (name)
+                return attribute (*args, **kwargs)
+
+            self._wrappers[name] = wrapper
+
+        return self._wrappers[name]
+
+_counting_cmds = CountingCmds (cmds)
+
+def _toolkit_modules () :
+    '''
+    Return loaded toolkit modules that use maya.cmds
+    '''
+    return [module for name, module in list(sys.modules.items())
+            if name.startswith ('nb_rigging_toolkit.') and name != __name__ and module is not None and hasattr(module, 'cmds')]
+
+def enable (log_path = None) :
+    '''
+    Enable profiling. Toolkit modules use a counting maya.cmds until profiling is disabled
+    log_path -> JSONL file where finished operations are appended, None to keep them only in memory (str)
+    '''
+    global _enabled, _log_path
+
+    _log_path = log_path
+    _enabled = True
+
+    for module in _toolkit_modules () :
+        if module.cmds is cmds :
+            module.cmds = _counting_cmds
+
+def disable () :
+    '''
+    Disable profiling and give back maya.cmds to toolkit modules
+    '''
+    global _enabled
+
+    _enabled = False
+
+    for module in _toolkit_modules () :
+        if module.cmds is _counting_cmds :
+            module.cmds = cmds
+
+def is_enabled () :
+    '''
+    Return True if profiling is enabled
+    '''
+    return _enabled
+
+def count (command, number = 1) :
+    '''
+    Count command calls in every opened record
+    command -> command name, ex : 'connectAttr' (str)
+    number -> number of calls (int)
+    '''
+    for record in _stack :
+        record['calls'][command] = record['calls'].get (command, 0) + number
+
+def begin (name) :
+    '''
+    Open a record. Return None if profiling is disabled
+    name -> operation or step name (str)
+    '''
+    if not _enabled :
+        return None
+
+    record = {'name' : name,
+              'start' : time.time(),
+              'duration' : 0.0,
+              'calls' : {},
+              'steps' : [],
+              'failed' : False}
+    record['_start'] = time.perf_counter()
+
+    if _stack :
+        _stack[-1]['steps'].append (record)
+    _stack.append (record)
+
+    return record
+
+def end (record, failed = False) :
+    '''
+    Close a record opened by begin. Outer records are stored and written to the log
+    record -> record returned by begin, nothing is done if None (dict)
+    failed -> operation raised an exception (bool)
+    '''
+    if record is None or not any(each is record for each in _stack) :
+        return
+
+    # Close record and its unclosed children
+    while _stack :
+        closed = _stack.pop ()
+        _finish (closed, failed)
+        if closed is record :
+            break
+
+    if not _stack :
+        RECORDS.append (record)
+        if _log_path :
+            with open (_log_path, 'a') as log_file :
+                log_file.write (json.dumps(record) + '\n')
+
+def _finish (record, failed) :
+    '''
+    Set duration and totals of a record
+    '''
+    record['duration'] = time.perf_counter() - record.pop ('_start')
+    record['failed'] = failed
+    record['scene_calls'] = sum(record['calls'].values())
+    record['nodes_created'] = sum(record['calls'].get(command, 0) for command in NODE_COMMANDS)
+    record['connections_created'] = sum(record['calls'].get(command, 0) for command in CONNECTION_COMMANDS)
+
+@contextlib.contextmanager
+def _step_context (name) :
+    record = begin (name)
+    try :
+        yield record
+    except Exception :
+        end (record, failed = True)
+        raise
+    else :
+        end (record)
+
+_null_step = contextlib.nullcontext ()
+
+def step (name) :
+    '''
+    Context manager recording one step of an operation :
+        with nb_profiling.step ('offsets') :
+            ...
+    Return a shared empty context when profiling is disabled
+    name -> step name (str)
+    '''
+    if not _enabled :
+        return _null_step
+
+    return _step_context (name)
+
+def get_records () :
+    '''
+    Return finished operations records, newest last
+    '''
+    return list(RECORDS)
+
+def clear_records () :
+    '''
+    Remove finished operations records from memory. The log file is kept
+    '''
+    RECORDS.clear ()
+
+def summary (records = None) :
+    '''
+    Return totals by operation name : {name : {'count', 'duration', 'scene_calls', 'nodes_created', 'connections_created'}}
+    records -> records to sum, all finished records if None (list)
+    '''
+    totals = collections.OrderedDict ()
+
+    for record in (get_records () if records is None else records) :
+        total = totals.setdefault (record['name'], {'count' : 0, 'duration' : 0.0, 'scene_calls' : 0, 'nodes_created' : 0, 'connections_created' : 0})
+        total['count'] += 1
+        for key in ('duration', 'scene_calls', 'nodes_created', 'connections_created') :
+            total[key] += record[key]
+
+    return totals
@@ -0,0 +1,275 @@
+"""
+Skeleton orientation engine. Joints of whole hierarchies are read once, their new orientations are computed in one numpy pass
+(level by level in aim mode, each level depends on its parents) and written in bulk with one builder.
+
+    from nb_rigging_toolkit import nb_rgtk_skeleton as nb_skeleton
+    nb_skeleton.orient_skeleton (['root_jnt'], mode = 'zero_orient')            # jointOrient in rotate, world pose kept
+    nb_skeleton.orient_skeleton (['root_jnt'], mode = 'rotation_to_orient')     # rotate in jointOrient, world pose kept
+    nb_skeleton.orient_skeleton (['root_jnt'], mode = 'aim', primary_axis = (1, 0, 0), secondary_axis = (0, 1, 0))
+
+Modes :
+- 'zero_orient' : jointOrient is set to 0 and moved into rotate
+- 'rotation_to_orient' : rotate is set to 0 and moved into jointOrient
+- 'aim' : primary axis of each joint aims at its first child joint, secondary axis follows world up vector. rotate is set to 0,
+  joints without child joint get the orientation of their parent. Joint positions and world matrices of other children are kept
+
+Like the rest of the toolkit, rotations use xyz rotate order and rotateAxis is ignored.
+"""
+import numpy as np
+
+from maya import cmds
+from nb_rigging_toolkit import nb_rgtk_math as nb_math
+from nb_rigging_toolkit import nb_rgtk_transaction as nb_transaction
+from nb_rigging_toolkit import nb_rgtk_backend as nb_backend
+from nb_rigging_toolkit import nb_rgtk_profiling as nb_profiling
+from nb_rigging_toolkit import nb_rgtk_utils as nb_utils
+
+ORIENT_MODES = ('zero_orient', 'rotation_to_orient', 'aim')
+
+# Attributs written by each mode, a joint with one of them connected can't be oriented. A connected compound parent is also found
+MODE_ATTRS = {'zero_orient' : [attr + axis for attr in ('rotate', 'jointOrient') for axis in 'XYZ'],
+              'rotation_to_orient' : [attr + axis for attr in ('rotate', 'jointOrient') for axis in 'XYZ'],
+              'aim' : [attr + axis for attr in ('translate', 'rotate', 'jointOrient') for axis in 'XYZ']}
+
+def get_joints (objects_, hierarchy = True) :
+    '''
+    Return joints long names ordered parent first, without duplicates. Other node types are ignored
+    objects_ -> objects to search (list)
+    hierarchy -> add all joint descendants of objects_ (bool)
+    '''
+    objects_ = [str(each) for each in objects_]
+    if not objects_ :
+        return []
+
+    if hierarchy :
+        objects_ += cmds.listRelatives (objects_, allDescendents = True, type = 'joint', fullPath = True) or []
+
+    joints = list(dict.fromkeys (cmds.ls (objects_, type = 'joint', long = True) or []))
+
+    return sorted (joints, key = lambda name : name.count('|'))
+
+def get_parent_indices (paths) :
+    '''
+    Return index of each path parent in paths, -1 if its parent is not in paths
+    paths -> long names (list)
+    '''
+    indices = {path : x for x, path in enumerate(paths)}
+
+    return np.array([indices.get (path.rsplit('|', 1)[0], -1) for path in paths], dtype = int)
+
+def get_vectors (plugs) :
+    '''
+    Query vector plugs (translate, rotate, jointOrient ...) and return them as an array of shape (n, 3)
+    '''
+    return np.array([cmds.getAttr(plug)[0] for plug in plugs], dtype = float).reshape(-1, 3)
+
+def rotation_matrices (rotates) :
+    '''
+    Return rotation matrices of rotate values, degrees and xyz rotate order (numpy array (n, 4, 4))
+    '''
+    rotates = np.asarray(rotates, dtype = float).reshape(-1, 3)
+
+    return nb_math.compose_matrices (np.zeros((len(rotates), 3)), rotates, np.ones((len(rotates), 3)))
+
+def get_rotations (matrices) :
+    '''
+    Return rotate values (degrees, xyz rotate order) of rotation matrices (array like (n, 3, 3) or (n, 4, 4))
+    '''
+    matrices = np.asarray(matrices, dtype = float)
+    full_matrices = np.tile (np.identity(4), (len(matrices), 1, 1))
+    full_matrices[:, :3, :3] = matrices[:, :3, :3]
+
+    return nb_math.decompose_matrices (full_matrices)[1]
+
+def check_orient_options (mode, primary_axis, secondary_axis) :
+    '''
+    Return True if orient options are valid, otherwise warn and return False
+    '''
+    if mode not in ORIENT_MODES :
+        cmds.warning ("Unknown orient mode {}, use {}".format(mode, ', '.join(ORIENT_MODES)))
+        return False
+
+    if mode == 'aim' and not nb_math.axes_frames (primary_axis, secondary_axis)[1][0] :
+        cmds.warning ("Primary and secondary axis must not be parallel")
+        return False
+
+    return True
+
+def orient_values (joints, mode) :
+    '''
+    Move rotations between rotate and jointOrient, world pose is kept : rotate * jointOrient doesn't change
+    joints -> joints long names (list)
+    mode -> 'zero_orient' or 'rotation_to_orient' (str)
+    Return new rotate and jointOrient values (numpy arrays (n, 3))
+    '''
+    rotates = get_vectors (['{}.rotate'.format(each) for each in joints])
+    orients = get_vectors (['{}.jointOrient'.format(each) for each in joints])
+
+    rotations = get_rotations (np.matmul (rotation_matrices(rotates), rotation_matrices(orients)))
+    zeros = np.zeros ((len(joints), 3))
+
+    if mode == 'zero_orient' :
+        return rotations, zeros
+
+    return zeros, rotations
+
+def aim_values (joints, primary_axis, secondary_axis, world_up_vector) :
+    '''
+    Compute aim orientations of joints, parent first. Joint world positions are kept
+    joints -> joints long names, parent first (list)
+    Return new translate and jointOrient values (numpy arrays (n, 3)), world matrices before and after orientation (numpy arrays (n, 4, 4)).
+    rotate values are 0
+    '''
+    world_matrices = nb_math.get_matrices (['{}.worldMatrix[0]'.format(each) for each in joints])
+    local_matrices = nb_math.get_matrices (['{}.matrix'.format(each) for each in joints])
+
+    # Parent space of each joint : offsetParentMatrix * parent world matrix
+    spaces = np.matmul (np.linalg.inv(local_matrices), world_matrices)
+    scales = nb_math.decompose_matrices (local_matrices)[2]
+    positions = world_matrices[:, 3, :3]
+
+    # Each joint aims at its first child joint
+    parent_indices = get_parent_indices (joints)
+    child_indices = np.full (len(joints), -1, dtype = int)
+    for x in range(len(joints) - 1, -1, -1) :
+        if parent_indices[x] >= 0 :
+            child_indices[parent_indices[x]] = x
+
+    has_child = child_indices >= 0
+    aims, valid = nb_math.aim_rotations (positions[child_indices] - positions, world_up_vector, primary_axis, secondary_axis)
+
+    # A joint aiming at a child on its up axis keeps its world orientation
+    current = nb_math.remove_scale (world_matrices)[:, :3, :3]
+    aims = np.where ((has_child & ~valid)[:, None, None], current, aims)
+
+    translates = np.zeros ((len(joints), 3))
+    orients = np.zeros ((len(joints), 3))
+    new_world_matrices = world_matrices.copy ()
+    new_spaces = spaces.copy ()
+
+    # Joints of one level only depend on already computed parents
+    depths = np.array([each.count('|') for each in joints])
+    for depth in np.unique (depths) :
+        level = np.flatnonzero (depths == depth)
+
+        children = level[parent_indices[level] >= 0]
+        parents = parent_indices[children]
+        new_spaces[children] = np.matmul (np.matmul (spaces[children], np.linalg.inv(world_matrices[parents])), new_world_matrices[parents])
+
+        # jointOrient = world rotation * inverse parent space rotation. Joints without child get the parent space rotation
+        space_rotations = nb_math.remove_scale (new_spaces[level])[:, :3, :3]
+        world_rotations = np.where (has_child[level][:, None, None], aims[level], space_rotations)
+        orients[level] = get_rotations (np.matmul (world_rotations, np.transpose(space_rotations, (0, 2, 1))))
+
+        # translate keeps world position : position = translate * parent space
+        translates[level] = np.einsum ('ni,nij->nj', positions[level] - new_spaces[level, 3, :3], np.linalg.inv(new_spaces[level, :3, :3]))
+
+        new_local_matrices = nb_math.compose_matrices (translates[level], orients[level], scales[level])
+        new_world_matrices[level] = np.matmul (new_local_matrices, new_spaces[level])
+
+    return translates, orients, world_matrices, new_world_matrices
+
+def keep_children_values (joints, world_matrices, new_world_matrices) :
+    '''
+    Compute new local values of objects parented under modified joints, so their world matrices are kept
+    joints -> modified joints long names (list)
+    world_matrices, new_world_matrices -> joints world matrices before and after modification (numpy arrays (n, 4, 4))
+    Return children long names and their new translate, rotate and scale values (numpy arrays (m, 3))
+    '''
+    joint_indices = {each : x for x, each in enumerate(joints)}
+    children = [each for each in cmds.listRelatives (joints, children = True, type = 'transform', fullPath = True) or []
+                if each not in joint_indices]
+    if not children :
+        return [], np.zeros((0, 3)), np.zeros((0, 3)), np.zeros((0, 3))
+
+    parents = np.array([joint_indices[each.rsplit('|', 1)[0]] for each in children], dtype = int)
+    child_world_matrices = nb_math.get_matrices (['{}.worldMatrix[0]'.format(each) for each in children])
+    child_local_matrices = nb_math.get_matrices (['{}.matrix'.format(each) for each in children])
+
+    # new parent space = offsetParentMatrix * new parent world matrix
+    spaces = np.matmul (np.linalg.inv(child_local_matrices), child_world_matrices)
+    new_spaces = np.matmul (np.matmul (spaces, np.linalg.inv(world_matrices[parents])), new_world_matrices[parents])
+    translates, rotates, scales = nb_math.decompose_matrices (np.matmul (child_world_matrices, np.linalg.inv(new_spaces)))
+
+    # Child joints rotation is rotate * jointOrient, their jointOrient is kept
+    child_joints = set(cmds.ls (children, type = 'joint', long = True) or [])
+    joint_rows = [x for x, each in enumerate(children) if each in child_joints]
+    if joint_rows :
+        orients = get_vectors (['{}.jointOrient'.format(children[x]) for x in joint_rows])
+        rotations = rotation_matrices (rotates[joint_rows])
+        rotates[joint_rows] = get_rotations (np.matmul (rotations, np.linalg.inv(rotation_matrices(orients))))
+
+    return children, translates, rotates, scales
+
+@nb_transaction.transaction ('orient_skeleton')
+def orient_skeleton (objects_ = None, mode = 'zero_orient', hierarchy = True, primary_axis = (1, 0, 0), secondary_axis = (0, 1, 0),
+                     world_up_vector = (0, 1, 0)) :
+    '''
+    Orient joints of whole skeletons, see module modes. Values are computed for all joints at once and written with one builder
+    objects_ -> joints or skeleton roots, current selection if None (list)
+    mode -> 'zero_orient', 'rotation_to_orient' or 'aim' (str)
+    hierarchy -> also orient all joint descendants of objects_ (bool)
+    primary_axis, secondary_axis -> aim mode joint aim and up axis (tuple)
+    world_up_vector -> aim mode up direction in world space (tuple)
+    Return oriented joints long names, parent first
+    '''
+    if not check_orient_options (mode, primary_axis, secondary_axis) :
+        return []
+
+    if objects_ is None :
+        objects_ = cmds.ls (sl = True)
+    joints = get_joints (objects_ or [], hierarchy)
+    if not joints :
+        return []
+
+    # Joints with connected channels are skipped and reported at once. In aim mode, a joint moves its children,
+    # so nothing is oriented
+    with nb_profiling.step ('connection check') :
+        index = nb_utils.ConnectionIndex (joints)
+        skipped = []
+        valid_joints = []
+        for each in joints :
+            driven = index.driven_plugs (each, MODE_ATTRS[mode])
+            if driven :
+                skipped += driven
+            else :
+                valid_joints.append (each)
+
+    if skipped :
+        cmds.warning ("Skipped joints with connected channels : {}".format (', '.join(skipped)))
+        if mode == 'aim' :
+            return []
+
+    joints = valid_joints
+    if not joints :
+        return []
+
+    builder = nb_backend.new_builder ()
+
+    if mode == 'aim' :
+        with nb_profiling.step ('orientations') :
+            translates, orients, world_matrices, new_world_matrices = aim_values (joints, primary_axis, secondary_axis, world_up_vector)
+            children, child_translates, child_rotates, child_scales = keep_children_values (joints, world_matrices, new_world_matrices)
+
+        with nb_profiling.step ('set values') :
+            for each, translate, orient in zip(joints, translates, orients) :
+                builder.set_attr (each, 'translate', *translate)
+                builder.set_attr (each, 'rotate', 0.0, 0.0, 0.0)
+                builder.set_attr (each, 'jointOrient', *orient)
+
+            for each, translate, rotate, scale in zip(children, child_translates, child_rotates, child_scales) :
+                builder.set_attr (each, 'translate', *translate)
+                builder.set_attr (each, 'rotate', *rotate)
+                builder.set_attr (each, 'scale', *scale)
+    else :
+        with nb_profiling.step ('orientations') :
+            rotates, orients = orient_values (joints, mode)
+
+        with nb_profiling.step ('set values') :
+            for each, rotate, orient in zip(joints, rotates, orients) :
+                builder.set_attr (each, 'rotate', *rotate)
+                builder.set_attr (each, 'jointOrient', *orient)
+
+    builder.commit ()
+
+    return joints
@@ -0,0 +1,378 @@
+"""
+Declarative rig spec : a JSON (or YAML) file describing the constraints, aim setups, parent spaces and modules of a rig.
+apply_spec compares the spec with what was already built in the scene and only builds new entries, removes deleted entries
+and rebuilds changed entries. Unchanged entries are not touched.
+
+    {
+        "entries" : [
+            {"type" : "module", "name" : "arm_L"},
+            {"id" : "hand_follow", "type" : "parent_constraint", "triggers" : ["chest_ctrl"], "target" : "hand_ik_ctrl", "offset" : true,
+             "trigger_matrix" : "worldMatrix[0]", "channels" : {"scale" : false, "in_opm" : true}},
+            {"type" : "aim_constraint", "trigger" : "look_at_ctrl", "target" : "eye_jnt", "in_opm" : false, "world_up_vector" : [0, 1, 0],
+             "world_up_object" : "", "primary_axis" : [1, 0, 0], "secondary_axis" : [0, 1, 0], "input_mode" : "group"},
+            {"type" : "aim_chain", "chain" : ["tail_01_jnt", "tail_02_jnt", "tail_03_jnt"], "up_mode" : "chain", "last_mode" : "align"},
+            {"type" : "parent_space", "target" : "hand_ctrl", "settings" : "hand_settings_ctrl", "triggers" : ["world_ctrl", "chest_ctrl"],
+             "attr_name" : "parentSpace", "parent_translate" : true}
+        ]
+    }
+
+Each built entry is tagged by a network node (nbSpec_<id>) storing the entry and its hash, with a message connection to every node
+the entry created. Objects an entry reparents are stored with their parent from before the build, and given back to it when the entry is removed. Entry id is optional, it defaults to "<type>:<target>" ("module:<name>" for modules, "aim_chain:<first chain object>" for chains).
+"""
+import hashlib
+import json
+import re
+
+from maya import cmds
+from nb_rigging_toolkit import nb_rgtk_matrix as nb_mat
+from nb_rigging_toolkit import nb_rgtk_backend as nb_backend
+from nb_rigging_toolkit import nb_rgtk_parent_space as nb_ps
+from nb_rigging_toolkit import nb_rgtk_utils as nb_utils
+from nb_rigging_toolkit import nb_rgtk_transaction as nb_transaction
+from nb_rigging_toolkit import nb_rgtk_handles as nb_handles
+
+# Tag network nodes attributs
+TAG_PREFIX = 'nbSpec_'
+ID_ATTR = 'nbSpecId'
+HASH_ATTR = 'nbSpecHash'
+ENTRY_ATTR = 'nbSpecEntry'
+NODES_ATTR = 'nbSpecNodes'
+PARENTS_ATTR = 'nbSpecParents'
+
+# Required keys of each entry type
+REQUIRED_KEYS = {'parent_constraint' : ('triggers', 'target'),
+                 'aim_constraint' : ('trigger', 'target'),
+                 'aim_chain' : ('chain',),
+                 'parent_space' : ('target', 'settings', 'triggers', 'attr_name'),
+                 'module' : ('name',)}
+
+class SpecError (Exception) :
+    '''
+    Error raised when a spec or one of its entries is not valid, or can't be built
+    '''
+
+def load_spec (path) :
+    '''
+    Read a spec file. YAML files (.yaml, .yml) need PyYAML
+    Return the spec (dict)
+    '''
+    with open (path) as spec_file :
+        if path.lower().endswith (('.yaml', '.yml')) :
+            try :
+                import yaml
+            except ImportError :
+                raise SpecError ("PyYAML is needed to read {}".format(path))
+            return yaml.safe_load (spec_file)
+
+        return json.load (spec_file)
+
+def get_entries (spec) :
+    '''
+    Check spec entries and return them by id, in spec order : {id : entry}
+    spec -> spec dict, spec file path or list of entries (dict, str or list)
+    '''
+    if isinstance(spec, str) :
+        spec = load_spec (spec)
+    if isinstance(spec, dict) :
+        spec = spec.get ('entries', [])
+
+    entries = {}
+    for entry in spec :
+        entry_type = entry.get ('type')
+        if entry_type not in REQUIRED_KEYS :
+            raise SpecError ("Unknown entry type {}, use one of {}".format(entry_type, ', '.join(REQUIRED_KEYS)))
+
+        missing = [key for key in REQUIRED_KEYS[entry_type] if not entry.get(key)]
+        if missing :
+            raise SpecError ("{} entry needs {}".format(entry_type, ', '.join(missing)))
+        if entry_type == 'aim_chain' and 'in_opm' in entry :
+            raise SpecError ("aim_chain entry can't use in_opm, chains are always connected in offsetParentMatrix")
+
+        entry_id = entry.get ('id') or '{}:{}'.format(entry_type, entry.get('target') or entry.get('name') or entry.get('chain', [None])[0])
+        if entry_id in entries :
+            raise SpecError ("Entry {} is defined twice".format(entry_id))
+
+        entries[entry_id] = dict(entry, id = entry_id)
+
+    return entries
+
+def get_entry_hash (entry) :
+    '''
+    Return a hash of entry values, used to know if an entry changed since it was built
+    '''
+    return hashlib.sha1 (json.dumps(entry, sort_keys = True).encode('utf-8')).hexdigest()
+
+def get_tag_name (entry_id) :
+    '''
+    Return the network node name of an entry id
+    '''
+    return TAG_PREFIX + re.sub (r'\W', '_', entry_id)
+
+def get_scene_entries () :
+    '''
+    Return entries built in the scene : {id : {'tag', 'hash', 'entry', 'nodes', 'parents'}}, see get_entry_parents for parents
+    '''
+    scene_entries = {}
+
+    for tag in cmds.ls ('{}*'.format(TAG_PREFIX), type = 'network') or [] :
+        if not cmds.objExists ('{}.{}'.format(tag, ID_ATTR)) :
+            continue
+
+        # Tags built before parents were stored have no parents attribut
+        parents = {}
+        if cmds.objExists ('{}.{}'.format(tag, PARENTS_ATTR)) :
+            parents = json.loads (cmds.getAttr ('{}.{}'.format(tag, PARENTS_ATTR)) or '{}')
+
+        scene_entries[cmds.getAttr ('{}.{}'.format(tag, ID_ATTR))] = {'tag' : tag,
+                                                                      'hash' : cmds.getAttr ('{}.{}'.format(tag, HASH_ATTR)),
+                                                                      'entry' : json.loads (cmds.getAttr ('{}.{}'.format(tag, ENTRY_ATTR))),
+                                                                      'nodes' : cmds.listConnections ('{}.{}'.format(tag, NODES_ATTR), source = True, destination = False) or [],
+                                                                      'parents' : parents}
+
+    return scene_entries
+
+def diff_spec (spec) :
+    '''
+    Compare spec entries with entries built in the scene
+    spec -> spec dict, spec file path or list of entries (dict, str or list)
+    Return {'add', 'remove', 'change', 'keep' : list of entry ids}
+    '''
+    entries = get_entries (spec)
+    scene_entries = get_scene_entries ()
+
+    diff = {'add' : [], 'remove' : [], 'change' : [], 'keep' : []}
+
+    for entry_id, entry in entries.items() :
+        if entry_id not in scene_entries :
+            diff['add'].append (entry_id)
+        elif scene_entries[entry_id]['hash'] != get_entry_hash (entry) or not scene_entries[entry_id]['nodes'] :
+            # Entries whose nodes were all deleted by hand are rebuilt too
+            diff['change'].append (entry_id)
+        else :
+            diff['keep'].append (entry_id)
+
+    diff['remove'] = [entry_id for entry_id in scene_entries if entry_id not in entries]
+
+    return diff
+
+def build_parent_constraint (entry) :
+    '''
+    Build a parent_constraint entry, return created nodes
+    '''
+    constraint = nb_mat.MatrixConstraint
+    pairs = [[list(entry['triggers']), entry['target']]]
+    out_connect = constraint.get_out_connect (constraint, entry.get('channels'))
+
+    if not constraint.check_constraint_pairs (constraint, pairs, out_connect) :
+        raise SpecError ("Can't build {}, see warnings".format(entry['id']))
+
+    offset = entry.get ('offset', True)
+    offset_values = constraint.get_offset_values (constraint, pairs)[0] if offset else None
+
+    builder = nb_backend.new_builder()
+    constraint.build_parent_constraint (constraint, pairs[0][0], pairs[0][1], offset, entry.get('trigger_matrix', 'worldMatrix[0]'), out_connect, offset_values, builder)
+
+    return builder.commit()
+
+def build_aim_constraint (entry) :
+    '''
+    Build an aim_constraint entry, return created nodes
+    '''
+    created_nodes = nb_mat.MatrixConstraint.aim_constraint (nb_mat.MatrixConstraint, entry['trigger'], entry['target'], entry.get('in_opm', False),
+                                                            tuple(entry.get('world_up_vector', (0, 1, 0))), entry.get('world_up_object', ''),
+                                                            tuple(entry.get('primary_axis', (1, 0, 0))), tuple(entry.get('secondary_axis', (0, 1, 0))),
+                                                            entry.get('input_mode', 'group'))
+    if not created_nodes :
+        raise SpecError ("Can't build {}, see warnings".format(entry['id']))
+
+    return created_nodes
+
+def build_aim_chain (entry) :
+    '''
+    Build an aim_chain entry, return created nodes
+    '''
+    created_nodes = nb_mat.MatrixConstraint.aim_chain (nb_mat.MatrixConstraint, entry['chain'],
+                                                       tuple(entry.get('world_up_vector', (0, 1, 0))), entry.get('world_up_object', ''),
+                                                       tuple(entry.get('primary_axis', (1, 0, 0))), tuple(entry.get('secondary_axis', (0, 1, 0))),
+                                                       entry.get('up_mode', 'object'), entry.get('last_mode', 'align'), entry.get('last_target'))
+    if not created_nodes :
+        raise SpecError ("Can't build {}, see warnings".format(entry['id']))
+
+    return created_nodes
+
+def build_parent_space (entry) :
+    '''
+    Build a parent_space entry, return created nodes
+    '''
+    record = (entry['target'], entry['settings'], list(entry['triggers']), entry['attr_name'], entry.get('parent_translate', True))
+    handles = nb_handles.get_handles ([record[0], record[1]] + record[2])
+    if not nb_ps.check_parent_space_records ([record], handles) :
+        raise SpecError ("Can't build {}, see warnings".format(entry['id']))
+
+    # parentSpace doesn't resolve names, it is given handles
+    record = (handles[record[0]], handles[record[1]], [handles[each] for each in record[2]], record[3], record[4])
+
+    builder = nb_backend.new_builder()
+    nb_ps.parentSpace (record[0], record[2], record[1], record[4], record[3], offsets = nb_ps.parent_space_offsets([record])[0], builder = builder)
+
+    return builder.commit()
+
+def build_module (entry) :
+    '''
+    Build a module entry, return created groups. Groups that already exist are not returned, so they are not tagged
+    and are never deleted when the entry is removed.
+    An optional template key gives the module layout, see nb_rgtk_utils.MODULE_TEMPLATE
+    '''
+    template = entry.get ('template')
+    try :
+        summary = nb_utils.create_modules ([entry['name']], template, entry.get('parent'))
+    except ValueError as error :
+        raise SpecError ("Can't build {} : {}".format(entry['id'], error))
+
+    return summary['groups']
+
+BUILDERS = {'parent_constraint' : build_parent_constraint,
+            'aim_constraint' : build_aim_constraint,
+            'aim_chain' : build_aim_chain,
+            'parent_space' : build_parent_space,
+            'module' : build_module}
+
+def get_entry_objects (entry) :
+    '''
+    Return names of the existing objects an entry is built from
+    '''
+    if entry['type'] == 'parent_constraint' :
+        names = list(entry['triggers']) + [entry['target']]
+    elif entry['type'] == 'aim_constraint' :
+        names = [entry['trigger'], entry['target'], entry.get('world_up_object')]
+    elif entry['type'] == 'aim_chain' :
+        names = list(entry['chain']) + [entry.get('world_up_object'), entry.get('last_target')]
+    elif entry['type'] == 'parent_space' :
+        names = [entry['target'], entry['settings']] + list(entry['triggers'])
+    else :
+        names = [entry.get('parent')]
+
+    return [name for name in names if name]
+
+def get_entry_parents (entry) :
+    '''
+    Return parents of the objects an entry reparents, queried before the entry is built : {object uuid : parent uuid, None for world}.
+    Only aim constraints in 'group' input mode reparent their target, under an input group created at world level
+    '''
+    if entry['type'] != 'aim_constraint' or entry.get ('input_mode', 'group') != 'group' :
+        return {}
+
+    uuids = cmds.ls (entry['target'], uuid = True) or []
+    if len(uuids) != 1 :
+        return {}
+
+    parent = cmds.listRelatives (entry['target'], parent = True, fullPath = True)
+
+    return {uuids[0] : cmds.ls (parent[0], uuid = True)[0] if parent else None}
+
+def tag_entry (entry, nodes, parents = None) :
+    '''
+    Create the network node tagging a built entry and connect it to entry nodes
+    parents -> parents of reparented objects, see get_entry_parents (dict)
+    '''
+    tag = cmds.createNode ('network', name = get_tag_name(entry['id']))
+
+    cmds.addAttr (tag, ln = ID_ATTR, dt = 'string')
+    cmds.addAttr (tag, ln = HASH_ATTR, dt = 'string')
+    cmds.addAttr (tag, ln = ENTRY_ATTR, dt = 'string')
+    cmds.addAttr (tag, ln = NODES_ATTR, at = 'message', multi = True)
+    cmds.addAttr (tag, ln = PARENTS_ATTR, dt = 'string')
+
+    cmds.setAttr ('{}.{}'.format(tag, ID_ATTR), entry['id'], type = 'string')
+    cmds.setAttr ('{}.{}'.format(tag, HASH_ATTR), get_entry_hash(entry), type = 'string')
+    cmds.setAttr ('{}.{}'.format(tag, ENTRY_ATTR), json.dumps(entry, sort_keys = True), type = 'string')
+    cmds.setAttr ('{}.{}'.format(tag, PARENTS_ATTR), json.dumps(parents or {}, sort_keys = True), type = 'string')
+
+    for x, node in enumerate(nodes) :
+        cmds.connectAttr ('{}.message'.format(node), '{}.{}[{}]'.format(tag, NODES_ATTR, x))
+
+    return tag
+
+def remove_entry (scene_entry) :
+    '''
+    Remove nodes and attributs built by an entry, then its tag. Constrained objects keep their current pose
+    scene_entry -> entry built in the scene, as returned by get_scene_entries (dict)
+    '''
+    entry = scene_entry['entry']
+    nodes = [node for node in scene_entry['nodes'] if cmds.objExists(node)]
+
+    # Aim constraint targets are parented under the created input groups, give them back their parent from before the build.
+    # Entries tagged without parents give them to the group parent
+    if entry['type'] == 'aim_constraint' :
+        parents = scene_entry.get ('parents', {})
+        for group in nodes :
+            for child in cmds.listRelatives (group, children = True, type = 'transform', fullPath = True) or [] :
+                if child.split('|')[-1] in nodes :
+                    continue
+
+                uuid = cmds.ls (child, uuid = True)[0]
+                if uuid in parents :
+                    parent = cmds.ls (parents[uuid], long = True) if parents[uuid] else None
+                else :
+                    parent = cmds.listRelatives (group, parent = True, fullPath = True)
+
+                if parent :
+                    cmds.parent (child, parent[0])
+                else :
+                    cmds.parent (child, world = True)
+
+    # Module groups are kept if something was added in them
+    if entry['type'] == 'module' :
+        used = [node for node in nodes if any(child.split('|')[-1] not in nodes for child in cmds.listRelatives (node, children = True, fullPath = True) or [])]
+        if used :
+            cmds.warning ("{} groups are not empty, they are kept : {}".format(entry['id'], ', '.join(used)))
+            nodes = []
+
+    if entry['type'] == 'parent_space' and cmds.objExists ('{}.{}'.format(entry['settings'], entry['attr_name'])) :
+        cmds.deleteAttr (entry['settings'], attribute = entry['attr_name'])
+
+    if nodes :
+        cmds.delete (nodes)
+    cmds.delete (scene_entry['tag'])
+
+@nb_transaction.transaction ('apply_spec')
+def apply_spec (spec, dry_run = False) :
+    '''
+    Build the spec in the scene : entries that don't exist are built, entries not in spec anymore are removed and changed entries are rebuilt.
+    Removed and changed entries are removed first, so their connections are free when entries are built
+    spec -> spec dict, spec file path or list of entries (dict, str or list)
+    dry_run -> only compare spec and scene (bool)
+    Return diff dict : {'add', 'remove', 'change', 'keep', 'failed' : list of entry ids}
+    '''
+    entries = get_entries (spec)
+    diff = diff_spec (list(entries.values()))
+    diff['failed'] = []
+
+    if dry_run :
+        return diff
+
+    scene_entries = get_scene_entries ()
+    for entry_id in diff['remove'] + diff['change'] :
+        remove_entry (scene_entries[entry_id])
+
+    # Removed entries reparent and delete nodes, names resolved before are resolved again
+    if diff['remove'] or diff['change'] :
+        nb_handles.invalidate ()
+
+    # Objects of all built entries are resolved in one query, builders find them in the operation cache
+    built = diff['add'] + diff['change']
+    nb_handles.get_handles ([name for entry_id in built for name in get_entry_objects (entries[entry_id])])
+
+    for entry_id in built :
+        entry = entries[entry_id]
+        parents = get_entry_parents (entry)
+        try :
+            nodes = BUILDERS[entry['type']] (entry)
+        except SpecError as error :
+            cmds.warning (str(error))
+            diff['failed'].append (entry_id)
+            continue
+
+        tag_entry (entry, nodes, parents)
+
+    return diff
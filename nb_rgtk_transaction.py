@@ -0,0 +1,150 @@
+"""
+Scene transaction used by every toolkit entry point.
+A transaction opens one undo chunk, suspends viewport refresh and switches evaluation manager to DG mode while the scene is edited,
+so the evaluation graph is rebuilt only once at the end. Everything is restored even if the operation raises an exception.
+Nested transactions only time themselves, the outer one handles undo, refresh and evaluation.
+When profiling is enabled, each transaction is also recorded by nb_rgtk_profiling.
+The outer transaction also holds the node handles cache (nb_rgtk_handles), so names are resolved once per operation.
+"""
+import collections
+import functools
+import time
+
+from maya import cmds
+from nb_rigging_toolkit import nb_rgtk_profiling as nb_profiling
+from nb_rigging_toolkit import nb_rgtk_handles as nb_handles
+
+# Number of transactions currently opened
+_depth = 0
+
+# Last transactions stats, newest last
+TRANSACTION_STATS = collections.deque (maxlen = 200)
+
+class SceneTransaction () :
+    '''
+    Context manager grouping scene edits :
+        with SceneTransaction ('parentSpace') :
+            ...
+    '''
+    def __init__ (self, name, suspend_refresh = True, defer_evaluation = True) :
+        '''
+        name -> transaction name, used as undo chunk name (str)
+        suspend_refresh -> suspend viewport refresh during transaction (bool)
+        defer_evaluation -> use DG evaluation during transaction and restore evaluation manager mode at the end (bool)
+        '''
+        self.name = name
+        self.suspend_refresh = suspend_refresh
+        self.defer_evaluation = defer_evaluation
+
+        self.is_outer = False
+        self.evaluation_mode = None
+        self.start_time = 0.0
+        self.stats = {}
+        self.record = None
+
+    def __enter__ (self) :
+        '''
+        Open transaction. Only the outer transaction changes scene state
+        '''
+        global _depth
+
+        self.is_outer = _depth == 0
+        _depth += 1
+
+        if self.is_outer :
+            cmds.undoInfo (openChunk = True, chunkName = self.name)
+
+            try :
+                if self.suspend_refresh :
+                    cmds.refresh (suspend = True)
+
+                if self.defer_evaluation :
+                    mode = cmds.evaluationManager (query = True, mode = True)
+                    mode = mode[0] if mode else None
+                    if mode and mode != 'off' :
+                        self.evaluation_mode = mode
+                        cmds.evaluationManager (mode = 'off')
+            except Exception :
+                self._restore ()
+                _depth -= 1
+                raise
+
+            nb_handles.open_cache ()
+
+        self.start_time = time.perf_counter()
+        self.record = nb_profiling.begin (self.name)
+
+        return self
+
+    def __exit__ (self, exc_type, exc_value, traceback) :
+        '''
+        Close transaction, restore scene state and store stats. Exceptions are not catched
+        '''
+        global _depth
+
+        duration = time.perf_counter() - self.start_time
+        nb_profiling.end (self.record, exc_type is not None)
+        _depth -= 1
+
+        if self.is_outer :
+            nb_handles.close_cache ()
+            self._restore ()
+
+        self.stats = {'name' : self.name,
+                      'duration' : duration,
+                      'nested' : not self.is_outer,
+                      'failed' : exc_type is not None}
+        TRANSACTION_STATS.append (self.stats)
+
+        return False
+
+    def _restore (self) :
+        '''
+        Restore evaluation mode and viewport refresh, then close undo chunk. Each step is done even if a previous one fails
+        '''
+        try :
+            if self.evaluation_mode :
+                cmds.evaluationManager (mode = self.evaluation_mode)
+                self.evaluation_mode = None
+        finally :
+            try :
+                if self.suspend_refresh :
+                    cmds.refresh (suspend = False)
+            finally :
+                cmds.undoInfo (closeChunk = True)
+
+def transaction (name = None) :
+    '''
+    Decorator running a function inside a SceneTransaction
+    name -> transaction name, function name if None (str)
+    '''
+    def decorator (function) :
+        transaction_name = name or function.__name__
+
+        @functools.wraps (function)
+        def wrapper (*args, **kwargs) :
+            with SceneTransaction (transaction_name) :
+                return function (*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+def is_open () :
+    '''
+    Return True if a transaction is currently opened
+    '''
+    return _depth > 0
+
+def get_stats (name = None) :
+    '''
+    Return stored transactions stats, optionally only those named name
+    name -> transaction name (str)
+    '''
+    return [stats for stats in TRANSACTION_STATS if name is None or stats['name'] == name]
+
+def clear_stats () :
+    '''
+    Remove all stored transactions stats
+    '''
+    TRANSACTION_STATS.clear ()
@@ -0,0 +1,808 @@
+"""
+NB Rigging Toolkit Qt interface. This module is imported by nb_rgtk_main.show, it should not be imported at maya startup.
+Tabs are built the first time they are opened.
+"""
+# PySide modules
+from PySide2 import QtCore
+from PySide2 import QtWidgets
+from PySide2 import QtGui
+
+from shiboken2 import wrapInstance
+import sys
+
+# Maya api 1.0
+import maya.OpenMayaUI as omui
+from maya.app.general.mayaMixin import MayaQWidgetDockableMixin
+
+# Import other module script. Operations are called through the selection-free api
+from nb_rigging_toolkit import nb_rgtk_api as nb_api
+from nb_rigging_toolkit import nb_rgtk_profiling as nb_profiling
+
+def maya_main_windows() :
+    '''
+    Return maya main window widget as python object
+    '''
+    maya_main_window = omui.MQtUtil.mainWindow()
+    
+    # return int value if current python version is 3 or upper, otherwise return long
+    if sys.version_info.major >= 3 :
+        return wrapInstance(int(maya_main_window), QtWidgets.QWidget)
+    else :
+        return wrapInstance(long(maya_main_window), QtWidgets.QWidget)
+
+class ParentMatrixWdgt (QtWidgets.QDialog):
+    '''
+    Parent Matrix constraint Dialog. This Dialog contains all options for parent matrix constraint
+    '''
+    def __init__(self, parent = None) :
+        '''
+        Initialize parent dialog
+        '''
+        super (ParentMatrixWdgt, self).__init__(parent)     # Init QtWidgets.QDialog
+
+        self.create_widgets()                               # Build dialog
+        self.create_layouts ()
+        self.create_connections()
+        
+        self.setMaximumSize(350, 300)
+
+    def create_widgets (self):
+        '''
+        Create and setup all widget
+        '''
+        # label object
+        self.p_const_parent_text = QtWidgets.QLabel ("Parent")
+        self.p_const_translate_text = QtWidgets.QLabel ("Translate")
+        self.p_const_rotate_text = QtWidgets.QLabel ("Rotate")
+        self.p_const_scale_text = QtWidgets.QLabel ("Scale")
+        self.p_const_x_text = QtWidgets.QLabel ("X")
+        self.p_const_y_text = QtWidgets.QLabel ("Y")
+        self.p_const_z_text = QtWidgets.QLabel ("Z")
+
+        # checkboxs objects
+        #       translate
+        self.p_const_tx_cbox = QtWidgets.QCheckBox()
+        self.p_const_ty_cbox = QtWidgets.QCheckBox()
+        self.p_const_tz_cbox = QtWidgets.QCheckBox()
+        self.p_const_tx_cbox.setCheckState(QtCore.Qt.Checked)
+        self.p_const_ty_cbox.setCheckState(QtCore.Qt.Checked)
+        self.p_const_tz_cbox.setCheckState(QtCore.Qt.Checked)
+
+        #       rotate
+        self.p_const_rx_cbox = QtWidgets.QCheckBox()
+        self.p_const_ry_cbox = QtWidgets.QCheckBox()
+        self.p_const_rz_cbox = QtWidgets.QCheckBox()
+        self.p_const_rx_cbox.setCheckState(QtCore.Qt.Checked)
+        self.p_const_ry_cbox.setCheckState(QtCore.Qt.Checked)
+        self.p_const_rz_cbox.setCheckState(QtCore.Qt.Checked)
+        
+        #       scale
+        self.p_const_sx_cbox = QtWidgets.QCheckBox()
+        self.p_const_sy_cbox = QtWidgets.QCheckBox()
+        self.p_const_sz_cbox = QtWidgets.QCheckBox()
+        self.p_const_sx_cbox.setCheckState(QtCore.Qt.Checked)
+        self.p_const_sy_cbox.setCheckState(QtCore.Qt.Checked)
+        self.p_const_sz_cbox.setCheckState(QtCore.Qt.Checked)
+        
+        #       cheboxs buttons
+        self.p_const_all_t_butt = QtWidgets.QPushButton("All")
+        self.p_const_all_r_butt = QtWidgets.QPushButton("All")
+        self.p_const_all_s_butt = QtWidgets.QPushButton("All")
+
+        self.p_const_none_t_butt = QtWidgets.QPushButton("None")
+        self.p_const_none_r_butt = QtWidgets.QPushButton("None")
+        self.p_const_none_s_butt = QtWidgets.QPushButton("None")
+        
+        # offset and offset parent matrix checkboxs
+        self.opm_text = QtWidgets.QLabel("OffsetParentMatrix")
+        self.offset_text = QtWidgets.QLabel("Maintaint Offset")
+        
+        self.opm_cbox = QtWidgets.QCheckBox()
+        self.offset_cbox = QtWidgets.QCheckBox()
+        self.opm_cbox.setCheckState(QtCore.Qt.Checked)
+        self.offset_cbox.setCheckState(QtCore.Qt.Checked)
+        
+        # constraint mode and name patterns
+        self.mode_text = QtWidgets.QLabel("Mode")
+        self.mode_combo = QtWidgets.QComboBox()
+        self.mode_combo.addItem("Default", "default")
+        self.mode_combo.addItem("Pairwise", "pairwise")
+        self.mode_combo.addItem("One To Many", "one_to_many")
+        self.mode_combo.addItem("Name Pattern", "name")
+
+        self.trigger_pattern_lineEdit = QtWidgets.QLineEdit()
+        self.trigger_pattern_lineEdit.setPlaceholderText("*_proxy")
+        self.target_pattern_lineEdit = QtWidgets.QLineEdit()
+        self.target_pattern_lineEdit.setPlaceholderText("*_jnt")
+        self.trigger_pattern_lineEdit.setEnabled(False)
+        self.target_pattern_lineEdit.setEnabled(False)
+
+        # apply buttons
+        self.parent_button = QtWidgets.QPushButton("Parent Constraint")
+        self.aim_button = QtWidgets.QPushButton("Aim Constraint")
+        self.parent_button.setIcon(QtGui.QIcon(':parentConstraint.png'))
+        
+        
+    def create_layouts (self):
+        '''
+        Order all created widget in layouts
+        '''        
+        #main grid
+        parent_layout = QtWidgets.QGridLayout()
+        parent_layout.addWidget(self.p_const_parent_text, 0, 0, QtCore.Qt.AlignRight)
+        parent_layout.addWidget(self.p_const_translate_text, 1, 0, QtCore.Qt.AlignRight)
+        parent_layout.addWidget(self.p_const_rotate_text, 2, 0, QtCore.Qt.AlignRight)
+        parent_layout.addWidget(self.p_const_scale_text, 3, 0, QtCore.Qt.AlignRight)
+        
+        #text
+        parent_layout.addWidget(self.p_const_x_text, 0, 1)
+        parent_layout.addWidget(self.p_const_y_text, 0, 2)
+        parent_layout.addWidget(self.p_const_z_text, 0, 3)
+        
+        #translate
+        parent_layout.addWidget(self.p_const_tx_cbox, 1, 1)
+        parent_layout.addWidget(self.p_const_ty_cbox, 1, 2)
+        parent_layout.addWidget(self.p_const_tz_cbox, 1, 3)
+        parent_layout.addWidget(self.p_const_all_t_butt, 1, 4)
+        parent_layout.addWidget(self.p_const_none_t_butt, 1, 5)
+        
+        #rotate
+        parent_layout.addWidget(self.p_const_rx_cbox, 2, 1)
+        parent_layout.addWidget(self.p_const_ry_cbox, 2, 2)
+        parent_layout.addWidget(self.p_const_rz_cbox, 2, 3)
+        parent_layout.addWidget(self.p_const_all_r_butt, 2, 4)
+        parent_layout.addWidget(self.p_const_none_r_butt, 2, 5)
+        
+        #scale
+        parent_layout.addWidget(self.p_const_sx_cbox, 3, 1)
+        parent_layout.addWidget(self.p_const_sy_cbox, 3, 2)
+        parent_layout.addWidget(self.p_const_sz_cbox, 3, 3)
+        parent_layout.addWidget(self.p_const_all_s_butt, 3, 4)
+        parent_layout.addWidget(self.p_const_none_s_butt, 3, 5)
+        
+        #set row minimum height
+        parent_layout.setRowMinimumHeight(0,10) 
+        parent_layout.setRowMinimumHeight(1,20)
+        parent_layout.setRowMinimumHeight(2,20)
+        parent_layout.setRowMinimumHeight(3,20)
+        parent_layout.setHorizontalSpacing (15)
+        
+        #maintain offset and opm check box
+        offset_opm_layout = QtWidgets.QHBoxLayout()
+        offset_opm_layout.addWidget (self.offset_text)
+        offset_opm_layout.addWidget (self.offset_cbox)
+        offset_opm_layout.addWidget (self.opm_text)
+        offset_opm_layout.addWidget (self.opm_cbox)
+
+        # mode
+        mode_layout = QtWidgets.QHBoxLayout()
+        mode_layout.addWidget (self.mode_text)
+        mode_layout.addWidget (self.mode_combo)
+        mode_layout.addWidget (self.trigger_pattern_lineEdit)
+        mode_layout.addWidget (self.target_pattern_lineEdit)
+        
+        # buttons
+        button_layout = QtWidgets.QHBoxLayout()
+        button_layout.addWidget(self.parent_button)
+        
+        main_layout = QtWidgets.QVBoxLayout(self)
+        main_layout.addLayout(parent_layout)
+        main_layout.addLayout(offset_opm_layout)
+        main_layout.addLayout(mode_layout)
+        main_layout.addLayout(button_layout)
+        
+    def create_connections(self):
+        '''
+        Connect widgets signals with class functions
+        '''
+        # parent button
+        self.parent_button.clicked.connect(self.do_matrix_parent_constraint)
+
+        # name pattern fields are only used in name mode
+        self.mode_combo.currentIndexChanged.connect(self.update_pattern_fields)
+
+        # all axis button
+        self.p_const_all_t_butt.clicked.connect(lambda  _ : self.check_all_axis ([self.p_const_tx_cbox, self.p_const_ty_cbox, self.p_const_tz_cbox], QtCore.Qt.Checked))
+        self.p_const_all_r_butt.clicked.connect(lambda  _ : self.check_all_axis ([self.p_const_rx_cbox, self.p_const_ry_cbox, self.p_const_rz_cbox], QtCore.Qt.Checked))
+        self.p_const_all_s_butt.clicked.connect(lambda  _ : self.check_all_axis ([self.p_const_sx_cbox, self.p_const_sy_cbox, self.p_const_sz_cbox], QtCore.Qt.Checked))
+
+        # None axis button
+        self.p_const_none_t_butt.clicked.connect(lambda  _ : self.check_all_axis ([self.p_const_tx_cbox, self.p_const_ty_cbox, self.p_const_tz_cbox], QtCore.Qt.Unchecked))
+        self.p_const_none_r_butt.clicked.connect(lambda  _ : self.check_all_axis ([self.p_const_rx_cbox, self.p_const_ry_cbox, self.p_const_rz_cbox], QtCore.Qt.Unchecked))
+        self.p_const_none_s_butt.clicked.connect(lambda  _ : self.check_all_axis ([self.p_const_sx_cbox, self.p_const_sy_cbox, self.p_const_sz_cbox], QtCore.Qt.Unchecked))
+        
+    def do_matrix_parent_constraint (self):
+        '''
+        This function store all checkbox widget values and call nb_api.parent_constraint with selected objects
+        '''
+        
+        # get offset and offset parent matrix checkboxs state
+        offset = self.offset_cbox.isChecked()
+        in_opm_connect = self.opm_cbox.isChecked()
+        
+        # get transform checkboxs state
+        axes = nb_api.AxisMask ([cbox.isChecked() for cbox in (self.p_const_tx_cbox, self.p_const_ty_cbox, self.p_const_tz_cbox)],
+                                [cbox.isChecked() for cbox in (self.p_const_rx_cbox, self.p_const_ry_cbox, self.p_const_rz_cbox)],
+                                [cbox.isChecked() for cbox in (self.p_const_sx_cbox, self.p_const_sy_cbox, self.p_const_sz_cbox)])
+        
+        # get constraint mode and name patterns
+        mode = self.mode_combo.currentData()
+        pattern = (self.trigger_pattern_lineEdit.text(), self.target_pattern_lineEdit.text())
+
+        # name mode searches triggers in scene when nothing is selected
+        objects_ = nb_api.get_selection (0 if mode == "name" else 2)
+        if objects_ is None :
+            return
+
+        # do parent constraint
+        nb_api.parent_constraint (objects_, offset, axes, in_opm_connect, mode, pattern)
+
+    def update_pattern_fields (self) :
+        '''
+        Enable name pattern fields only when name mode is selected
+        '''
+        is_name_mode = self.mode_combo.currentData() == "name"
+        self.trigger_pattern_lineEdit.setEnabled(is_name_mode)
+        self.target_pattern_lineEdit.setEnabled(is_name_mode)
+        
+    def check_all_axis (self, attributs, checked_value) : 
+        '''
+        Set all checkbox in attribut variable with checked_value vaiable
+        attributs -> list of 3 checkboxs for x, y and z axis (list : [QtWidget.QCheckBox, QtWidget.QCheckBox, QtWidget.QCheckBox])
+        checked_value -> check state to turn checkbox (QtCore.Qt.Checked or QtCore.Qt.Unchecked)
+        '''
+        for check_box in attributs :
+            check_box.setCheckState(checked_value)
+
+class AimMatrixWdgt (QtWidgets.QDialog):
+    '''
+    Dialog with all widget to perform a matrix aim constraint
+    '''
+    def __init__(self, parent = None) :
+        '''
+        Initialize Dialog
+        '''
+        super (AimMatrixWdgt, self).__init__(parent)
+
+        self.create_widgets()
+        self.create_layouts ()
+        self.create_connections()
+        
+        self.setMaximumSize(350, 360)
+    
+    def create_widgets (self):
+        '''
+        Create all dialog widgets and setup them
+        '''
+        #text
+        self.aim_const_text = QtWidgets.QLabel ("Aim")
+        self.aim_const_primary_text = QtWidgets.QLabel ("Primary Axis")
+        self.aim_const_secondary_text = QtWidgets.QLabel ("Secondary Axis")
+        self.aim_const_world_up_axis_text = QtWidgets.QLabel ("World Up Axis")
+        self.aim_const_world_up_obj_text = QtWidgets.QLabel ("World Up Object")
+        self.aim_const_x_text = QtWidgets.QLabel ("X")
+        self.aim_const_y_text = QtWidgets.QLabel ("Y")
+        self.aim_const_z_text = QtWidgets.QLabel ("Z")
+
+        # primary axis float field
+        self.aim_primary_x_field = QtWidgets.QDoubleSpinBox()
+        self.aim_primary_x_field.setButtonSymbols(QtWidgets.QAbstractSpinBox.NoButtons)
+        self.aim_primary_x_field.setDecimals(3)
+        self.aim_primary_x_field.setRange (0,1)
+        self.aim_primary_x_field.setValue(1)
+
+        self.aim_primary_y_field = QtWidgets.QDoubleSpinBox()
+        self.aim_primary_y_field.setButtonSymbols(QtWidgets.QAbstractSpinBox.NoButtons)
+        self.aim_primary_y_field.setDecimals(3)
+        self.aim_primary_y_field.setRange (0,1)
+
+        self.aim_primary_z_field = QtWidgets.QDoubleSpinBox()
+        self.aim_primary_z_field.setButtonSymbols(QtWidgets.QAbstractSpinBox.NoButtons)
+        self.aim_primary_z_field.setDecimals(3)
+        self.aim_primary_z_field.setRange (0,1)
+
+        self.aim_secondary_x_field = QtWidgets.QDoubleSpinBox()
+        self.aim_secondary_x_field.setButtonSymbols(QtWidgets.QAbstractSpinBox.NoButtons)
+        self.aim_secondary_x_field.setDecimals(3)
+        self.aim_secondary_x_field.setRange (0,1)
+
+        self.aim_secondary_y_field = QtWidgets.QDoubleSpinBox()
+        self.aim_secondary_y_field.setButtonSymbols(QtWidgets.QAbstractSpinBox.NoButtons)
+        self.aim_secondary_y_field.setDecimals(3)
+        self.aim_secondary_y_field.setRange (0,1)
+        self.aim_secondary_y_field.setValue(1)
+
+        self.aim_secondary_z_field = QtWidgets.QDoubleSpinBox()
+        self.aim_secondary_z_field.setButtonSymbols(QtWidgets.QAbstractSpinBox.NoButtons)
+        self.aim_secondary_z_field.setDecimals(3)
+        self.aim_secondary_z_field.setRange (0,1)
+
+        self.aim_world_up_x_field = QtWidgets.QDoubleSpinBox()
+        self.aim_world_up_x_field.setButtonSymbols(QtWidgets.QAbstractSpinBox.NoButtons)
+        self.aim_world_up_x_field.setDecimals(3)
+        self.aim_world_up_x_field.setRange (0,1)
+
+        self.aim_world_up_y_field = QtWidgets.QDoubleSpinBox()
+        self.aim_world_up_y_field.setButtonSymbols(QtWidgets.QAbstractSpinBox.NoButtons)
+        self.aim_world_up_y_field.setDecimals(3)
+        self.aim_world_up_y_field.setRange (0,1)
+        self.aim_world_up_y_field.setValue(1)
+
+        self.aim_world_up_z_field = QtWidgets.QDoubleSpinBox()
+        self.aim_world_up_z_field.setButtonSymbols(QtWidgets.QAbstractSpinBox.NoButtons)
+        self.aim_world_up_z_field.setDecimals(3)
+        self.aim_world_up_z_field.setRange (0,1)
+
+        self.aim_world_up_object = QtWidgets.QLineEdit()
+        self.aim_world_up_object.setDragEnabled(True)
+        self.aim_world_up_object.setPlaceholderText("World up object (if empty, target)")
+
+        self.in_opm_cb = QtWidgets.QCheckBox("OPM")
+
+        # target stays in its hierarchy, without input group. Aim is connected in offsetParentMatrix
+        self.aim_keep_hierarchy_cb = QtWidgets.QCheckBox("Keep Hierarchy")
+
+        # chain mode : each selected object aims at the next one
+        self.aim_chain_cb = QtWidgets.QCheckBox("Chain")
+        self.aim_chain_up_combo = QtWidgets.QComboBox()
+        self.aim_chain_up_combo.addItems(["Up Object", "Up Chain"])
+        self.aim_chain_last_combo = QtWidgets.QComboBox()
+        self.aim_chain_last_combo.addItems(["Last Align", "Last Free"])
+        self.aim_chain_up_combo.setEnabled(False)
+        self.aim_chain_last_combo.setEnabled(False)
+
+        self.aim_button = QtWidgets.QPushButton("Aim Constraint")
+        self.aim_button.setIcon(QtGui.QIcon(':aimConstraint.png'))
+        
+    def create_layouts (self):
+        '''
+        Order all created widget in layouts
+        '''   
+        #main grid
+        aim_layout = QtWidgets.QGridLayout()
+        aim_layout.addWidget(self.aim_const_text, 0, 0, QtCore.Qt.AlignRight)
+        aim_layout.addWidget(self.aim_const_primary_text, 1, 0, QtCore.Qt.AlignRight)
+        aim_layout.addWidget(self.aim_const_secondary_text, 2, 0, QtCore.Qt.AlignRight)
+        aim_layout.addWidget(self.aim_const_world_up_axis_text, 3, 0, QtCore.Qt.AlignRight)
+        aim_layout.addWidget(self.aim_const_world_up_obj_text, 4, 0, QtCore.Qt.AlignRight)
+
+        aim_layout.addWidget(self.aim_const_x_text, 0, 1, QtCore.Qt.AlignHCenter)
+        aim_layout.addWidget(self.aim_const_y_text, 0, 2, QtCore.Qt.AlignHCenter)
+        aim_layout.addWidget(self.aim_const_z_text, 0, 3, QtCore.Qt.AlignHCenter)
+
+        aim_layout.addWidget(self.aim_primary_x_field, 1, 1)
+        aim_layout.addWidget(self.aim_primary_y_field, 1, 2)
+        aim_layout.addWidget(self.aim_primary_z_field, 1, 3)
+
+        aim_layout.addWidget(self.aim_secondary_x_field, 2, 1)
+        aim_layout.addWidget(self.aim_secondary_y_field, 2, 2)
+        aim_layout.addWidget(self.aim_secondary_z_field, 2, 3)
+
+        aim_layout.addWidget(self.aim_world_up_x_field, 3, 1)
+        aim_layout.addWidget(self.aim_world_up_y_field, 3, 2)
+        aim_layout.addWidget(self.aim_world_up_z_field, 3, 3)
+
+        aim_layout.addWidget(self.aim_world_up_object, 4, 1, 1, 2)
+        aim_layout.addWidget(self.in_opm_cb, 4, 3)
+
+        aim_layout.addWidget(self.aim_chain_cb, 5, 0, QtCore.Qt.AlignRight)
+        aim_layout.addWidget(self.aim_chain_up_combo, 5, 1, 1, 2)
+        aim_layout.addWidget(self.aim_chain_last_combo, 5, 3)
+
+        aim_layout.addWidget(self.aim_keep_hierarchy_cb, 6, 1, 1, 2)
+
+        aim_layout.addWidget(self.aim_button, 7, 0, 1, 4)
+
+        main_aim_layout = QtWidgets.QVBoxLayout(self)
+        main_aim_layout.addLayout(aim_layout)
+        main_aim_layout.addStretch()
+
+    def create_connections(self):
+        '''
+        Connect widgets signals with class functions
+        '''
+        # aim button
+        self.aim_button.clicked.connect(self.do_matrix_aim_constraint) 
+        self.aim_chain_cb.toggled.connect(self.aim_chain_up_combo.setEnabled)
+        self.aim_chain_cb.toggled.connect(self.aim_chain_last_combo.setEnabled)
+        self.aim_chain_cb.toggled.connect(lambda checked : self.aim_keep_hierarchy_cb.setEnabled(not checked))
+        self.aim_chain_cb.toggled.connect(lambda checked : self.in_opm_cb.setEnabled(not checked))
+        
+    def do_matrix_aim_constraint(self) :
+        '''
+        This function stock all aim matrix widget in variable and call nb_api.aim_constraint with the two selected objects,
+        or nb_api.aim_chain with all selected objects in chain mode
+        '''
+        in_opm = self.in_opm_cb.isChecked()
+        world_up_vector = (self.aim_world_up_x_field.value(),
+                           self.aim_world_up_y_field.value(),
+                           self.aim_world_up_z_field.value())
+        
+        primary_axis = (self.aim_primary_x_field.value(),
+                           self.aim_primary_y_field.value(),
+                           self.aim_primary_z_field.value())
+        
+        secondary_axis = (self.aim_secondary_x_field.value(),
+                           self.aim_secondary_y_field.value(),
+                           self.aim_secondary_z_field.value())
+        
+        world_up_object = self.aim_world_up_object.text()
+
+        if self.aim_chain_cb.isChecked() :
+            objects_ = nb_api.get_selection (2)
+            if objects_ is None :
+                return
+
+            up_mode = ['object', 'chain'][self.aim_chain_up_combo.currentIndex()]
+            last_mode = ['align', 'none'][self.aim_chain_last_combo.currentIndex()]
+            nb_api.aim_chain(objects_, world_up_vector, world_up_object, primary_axis, secondary_axis, up_mode, last_mode)
+            return
+
+        objects_ = nb_api.get_selection (2, 2)
+        if objects_ is None :
+            return
+
+        input_mode = 'parent' if self.aim_keep_hierarchy_cb.isChecked() else 'group'
+        nb_api.aim_constraint(objects_[0], objects_[1], in_opm, world_up_vector, world_up_object, primary_axis, secondary_axis, input_mode)
+
+class RiggingProcessWindow (QtWidgets.QDialog) :
+    '''
+    Rigging Process Dialog
+    '''
+
+    def __init__(self, parent = None):
+        '''
+        Initialize Dialog
+        '''
+        super (RiggingProcessWindow, self).__init__(parent)
+
+        self.create_widgets()
+        self.create_layouts ()
+        self.create_connections()
+
+    def create_widgets(self) :
+        '''
+        Create all dialog widgets and setup them
+        '''
+        self.ps_text = QtWidgets.QLabel("Parent Space")
+        self.ps_attribut_name_lineEdit = QtWidgets.QLineEdit()
+        self.ps_attribut_name_lineEdit.setFont("Parent Space Attribut Name...")
+        self.ps_parent_transform_cb = QtWidgets.QCheckBox("Parent Translate")
+        self.ps_button = QtWidgets.QPushButton("Create Parent Spaces")
+
+        self.attr_connect_text = QtWidgets.QLabel("Fast Connect Attribut")
+        self.attr_connect_lineEdit = QtWidgets.QLineEdit()
+        self.attr_connect_button = QtWidgets.QPushButton("Connect")
+
+    def create_layouts(self) :
+        '''
+        Order all created widget in layouts
+        '''   
+        parent_space_layout = QtWidgets.QGridLayout()
+        parent_space_layout.addWidget(self.ps_text, 0, 0)
+        parent_space_layout.addWidget(self.ps_attribut_name_lineEdit, 0, 1, 1, 2)
+        parent_space_layout.addWidget(self.ps_parent_transform_cb, 0, 3)
+        parent_space_layout.addWidget(self.ps_button, 1, 0, 1, 4)
+
+        attr_connect_layout = QtWidgets.QHBoxLayout()
+        attr_connect_layout.addWidget(self.attr_connect_text)
+        attr_connect_layout.addWidget(self.attr_connect_lineEdit)
+        attr_connect_layout.addWidget(self.attr_connect_button)
+
+        main_layout = QtWidgets.QVBoxLayout(self)
+        main_layout.addLayout(parent_space_layout)
+        main_layout.addLayout(attr_connect_layout)
+
+    def create_connections(self) :
+        '''
+        Connect widgets signals with class functions
+        '''
+        self.ps_button.clicked.connect(self.do_parent_spaces)
+        self.attr_connect_button.clicked.connect(self.do_connect_attr)
+
+    def do_parent_spaces (self):
+        '''
+        This function get self.ps_parent_transform_cb and self.ps_attribut_name_lineEdit values and call nb_api.parent_space.
+        Selection : triggers, then the target, then the settings control
+        '''
+        is_fk = self.ps_parent_transform_cb.isChecked()
+        attribut_name = self.ps_attribut_name_lineEdit.text()
+
+        objects_ = nb_api.get_selection (3)
+        if objects_ is None :
+            return
+
+        nb_api.parent_space (objects_[-2], objects_[-1], objects_[:-2], attribut_name, is_fk)
+
+    def do_connect_attr (self) :
+        '''
+        This function get self.attr_connect_lineEdit text and call nb_api.connect_attr : first selected object drives the others
+        '''
+        attribut = self.attr_connect_lineEdit.text()
+
+        objects_ = nb_api.get_selection (2)
+        if objects_ is None :
+            return
+
+        nb_api.connect_attr (attribut, objects_[0], objects_[1:])
+
+class StatsWdgt (QtWidgets.QDialog) :
+    '''
+    Profiling Stats Dialog
+    '''
+
+    def __init__(self, parent = None):
+        '''
+        Initialize Dialog
+        '''
+        super (StatsWdgt, self).__init__(parent)
+
+        self.create_widgets()
+        self.create_layouts ()
+        self.create_connections()
+
+    def create_widgets(self) :
+        '''
+        Create all dialog widgets and setup them
+        '''
+        self.enable_cb = QtWidgets.QCheckBox("Enable Profiling")
+        self.enable_cb.setChecked(nb_profiling.is_enabled())
+        self.log_path_lineEdit = QtWidgets.QLineEdit()
+        self.log_path_lineEdit.setPlaceholderText("JSONL Log File (Optional)...")
+
+        self.stats_tree = QtWidgets.QTreeWidget()
+        self.stats_tree.setHeaderLabels(["Operation", "Time (ms)", "Calls", "Nodes", "Connections"])
+
+        self.refresh_button = QtWidgets.QPushButton("Refresh")
+        self.clear_button = QtWidgets.QPushButton("Clear")
+
+    def create_layouts(self) :
+        '''
+        Order all created widget in layouts
+        '''
+        option_layout = QtWidgets.QHBoxLayout()
+        option_layout.addWidget(self.enable_cb)
+        option_layout.addWidget(self.log_path_lineEdit)
+
+        button_layout = QtWidgets.QHBoxLayout()
+        button_layout.addWidget(self.refresh_button)
+        button_layout.addWidget(self.clear_button)
+
+        main_layout = QtWidgets.QVBoxLayout(self)
+        main_layout.addLayout(option_layout)
+        main_layout.addWidget(self.stats_tree)
+        main_layout.addLayout(button_layout)
+
+    def create_connections(self) :
+        '''
+        Connect widgets signals with class functions
+        '''
+        self.enable_cb.toggled.connect(self.set_profiling)
+        self.refresh_button.clicked.connect(self.refresh_stats)
+        self.clear_button.clicked.connect(self.clear_stats)
+
+    def set_profiling (self, enabled) :
+        '''
+        Enable or disable profiling, with self.log_path_lineEdit text as log file
+        '''
+        if enabled :
+            nb_profiling.enable (self.log_path_lineEdit.text() or None)
+        else :
+            nb_profiling.disable ()
+
+    def refresh_stats (self) :
+        '''
+        Fill self.stats_tree with profiled operations, newest first. Steps are shown as children
+        '''
+        self.stats_tree.clear()
+
+        for record in reversed(nb_profiling.get_records()) :
+            self.stats_tree.addTopLevelItem(self.create_record_item(record))
+
+    def create_record_item (self, record) :
+        '''
+        Return a tree item showing record and its steps
+        '''
+        item = QtWidgets.QTreeWidgetItem([record['name'] + (" (failed)" if record['failed'] else ""),
+                                          "{:.2f}".format(record['duration'] * 1000.0),
+                                          str(record['scene_calls']),
+                                          str(record['nodes_created']),
+                                          str(record['connections_created'])])
+
+        for step in record['steps'] :
+            item.addChild(self.create_record_item(step))
+
+        return item
+
+    def clear_stats (self) :
+        '''
+        Remove profiled operations
+        '''
+        nb_profiling.clear_records ()
+        self.stats_tree.clear()
+
+class ToolkitWindow (MayaQWidgetDockableMixin, QtWidgets.QDialog):
+    '''
+    Main Window function. Use nb_rgtk_main.show to get the toolkit window, it is created once and reused
+    '''
+    # Window object name, also used to find its workspace control
+    WINDOW_NAME = 'nbRiggingToolkitWindow'
+
+    # Tabs : label, dialog class, window attribut. Dialogs are created the first time their tab is opened
+    TABS = [("Parent Matrix Constraint", ParentMatrixWdgt, 'parent_matrix_widget'),
+            ("Aim Matrix Constraint", AimMatrixWdgt, 'aim_matrix_widget'),
+            ("Rigging Process", RiggingProcessWindow, 'rigging_process_widget'),
+            ("Stats", StatsWdgt, 'stats_widget')]
+
+    def __init__(self, parent = None) :
+        '''
+        Initialize Dialog. The dockable mixin parents the window under maya main window
+        '''
+        super (ToolkitWindow, self).__init__(parent)
+
+        self.setObjectName(self.WINDOW_NAME)
+        self.setWindowTitle("NB Rigging Toolkit")
+        self.setFixedSize(400,300)
+        self.setWindowFlags(self.windowFlags()^QtCore.Qt.WindowContextHelpButtonHint)
+        
+        self.create_actions ()
+        self.create_widgets ()
+        self.create_layouts ()
+        self.create_connections ()
+
+        # only the current tab is built
+        self.build_tab (self.tab_widget.currentIndex())
+
+    def create_actions (self) :
+        '''
+        Create all dialog actions
+        '''
+        self.about_action = QtWidgets.QAction("About", self)
+        self.optimize_action = QtWidgets.QAction("Optimize Scene Networks", self)
+        
+        self.module_action = QtWidgets.QAction("Create Module", self)
+        self.in_opm_action = QtWidgets.QAction("Set Transform in OPM", self)
+        self.reset_joint_orient_action = QtWidgets.QAction("Reset Joint Orient", self)
+        self.zero_orient_action = QtWidgets.QAction("Joint Orient to Rotate (Keep Pose)", self)
+        self.rotation_to_orient_action = QtWidgets.QAction("Rotate to Joint Orient (Keep Pose)", self)
+        self.aim_orient_action = QtWidgets.QAction("Orient Joints to Children (X Aim, Y Up)", self)
+
+    def create_widgets (self) :
+        '''
+        Create all dialog widgets and setup them. Tabs get an empty page, filled by self.build_tab
+        '''
+
+        self.menu_bar = QtWidgets.QMenuBar()
+
+        file_menu = self.menu_bar.addMenu("File")
+        file_menu.addAction(self.optimize_action)
+
+        control_menu = self.menu_bar.addMenu("Control")
+        control_menu.addAction(self.module_action)
+        control_menu.addAction(self.in_opm_action)
+
+        skeleton_menu = self.menu_bar.addMenu("Skeleton")
+        skeleton_menu.addAction(self.reset_joint_orient_action)
+        skeleton_menu.addSeparator()
+        skeleton_menu.addAction(self.zero_orient_action)
+        skeleton_menu.addAction(self.rotation_to_orient_action)
+        skeleton_menu.addAction(self.aim_orient_action)
+
+        help_menu = self.menu_bar.addMenu("Help")
+        help_menu.addAction(self.about_action)
+
+        self.tab_widget = QtWidgets.QTabWidget()
+        for label, widget_class, attribut in self.TABS :
+            setattr(self, attribut, None)
+
+            page = QtWidgets.QWidget()
+            page_layout = QtWidgets.QVBoxLayout(page)
+            page_layout.setContentsMargins(0, 0, 0, 0)
+            self.tab_widget.addTab(page, label)
+
+    def build_tab (self, index) :
+        '''
+        Create the dialog of tab index in its page, if it was not created yet. Return the dialog
+        index -> tab index (int)
+        '''
+        if index < 0 :
+            return None
+
+        label, widget_class, attribut = self.TABS[index]
+        widget = getattr(self, attribut)
+
+        if widget is None :
+            widget = widget_class()
+            self.tab_widget.widget(index).layout().addWidget(widget)
+            setattr(self, attribut, widget)
+
+        return widget
+
+    def show_window (self, dockable = False) :
+        '''
+        Show the window, floating or docked in a maya workspace control, and bring it to front
+        dockable -> show window in a workspace control (bool)
+        '''
+        # a docked window is resized by its workspace control
+        if dockable :
+            self.setMinimumSize(400, 300)
+            self.setMaximumSize(16777215, 16777215)     # QWIDGETSIZE_MAX
+        else :
+            self.setFixedSize(400, 300)
+
+        self.show(dockable = dockable)
+        self.raise_()
+        self.activateWindow()
+    
+    def create_layouts(self) :
+        '''
+        Order all created widget in layouts
+        '''   
+        main_layout = QtWidgets.QVBoxLayout(self)
+        main_layout.setContentsMargins(3, 3, 3, 3)
+        main_layout.setSpacing(2)
+        main_layout.setMenuBar(self.menu_bar)
+        main_layout.addWidget(self.tab_widget)
+        main_layout.addStretch()
+
+    def create_connections(self) :
+        '''
+        Connect widgets signals with class functions
+        '''
+        self.about_action.triggered.connect(self.about)
+        self.module_action.triggered.connect(self.call_create_module)
+        self.in_opm_action.triggered.connect(self.call_set_in_opm)
+        self.reset_joint_orient_action.triggered.connect(self.call_reset_joint)
+        self.zero_orient_action.triggered.connect(lambda _ : self.call_orient_skeleton('zero_orient'))
+        self.rotation_to_orient_action.triggered.connect(lambda _ : self.call_orient_skeleton('rotation_to_orient'))
+        self.aim_orient_action.triggered.connect(lambda _ : self.call_orient_skeleton('aim'))
+        self.optimize_action.triggered.connect(self.call_optimize_scene)
+        self.tab_widget.currentChanged.connect(self.build_tab)
+
+    def call_create_module (self) :
+        '''
+        This function call an QInputDialog and get his text. Then call nb_api.create_modules with input prefixes,
+        separated by spaces or commas
+        '''
+        message_box = QtWidgets.QInputDialog.getText(self, "Module's Prefix", "Enter Module's Prefixes (arm_L, arm_R ...)")
+        prefixes = message_box[0].replace(',', ' ').split()
+
+        if message_box[1] and prefixes :
+            nb_api.create_modules(prefixes)
+
+    def call_set_in_opm (self) :
+        '''
+        This function only call nb_api.set_transform_in_opm with selected objects
+        '''
+        objects_ = nb_api.get_selection (1)
+        if objects_ is not None :
+            nb_api.set_transform_in_opm(objects_)
+
+    def about (self) :
+        '''
+        This function call a QMessage box with some documentation about the script   ### Todo Later ###
+        '''
+        QtWidgets.QMessageBox.about(self, "About Simple Outliner", "Add About Text Here")
+
+    def call_optimize_scene (self) :
+        '''
+        This function only call nb_api.optimize_scene, the report is printed in script editor
+        '''
+        nb_api.optimize_scene()
+
+    def call_reset_joint(self) :
+        '''
+        This function only call nb_api.reset_joint_orient with selected objects
+        '''
+        objects_ = nb_api.get_selection (1)
+        if objects_ is not None :
+            nb_api.reset_joint_orient(objects_)
+
+    def call_orient_skeleton (self, mode) :
+        '''
+        This function only call nb_api.orient_skeleton with selected objects and all their joint descendants
+        mode -> orient mode, see nb_rgtk_skeleton.ORIENT_MODES (str)
+        '''
+        objects_ = nb_api.get_selection (1)
+        if objects_ is not None :
+            nb_api.orient_skeleton(objects_, mode)
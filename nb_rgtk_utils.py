@@ -1,17 +1,149 @@
+import fnmatch
+import re
+
+import numpy as np
+
 from maya import cmds
+from nb_rigging_toolkit import nb_rgtk_math as nb_math
+from nb_rigging_toolkit import nb_rgtk_transaction as nb_transaction
+from nb_rigging_toolkit import nb_rgtk_backend as nb_backend
+from nb_rigging_toolkit import nb_rgtk_handles as nb_handles
+
+# Long names of short attribut names used by the toolkit
+ATTR_LONG_NAMES = {'t' : 'translate', 'tx' : 'translateX', 'ty' : 'translateY', 'tz' : 'translateZ',
+                   'r' : 'rotate', 'rx' : 'rotateX', 'ry' : 'rotateY', 'rz' : 'rotateZ',
+                   's' : 'scale', 'sx' : 'scaleX', 'sy' : 'scaleY', 'sz' : 'scaleZ',
+                   'opm' : 'offsetParentMatrix', 'v' : 'visibility', 'jo' : 'jointOrient'}
+
+# Compound parent of attributs used by the toolkit. A connection on the parent drives all its children
+ATTR_PARENTS = {'translateX' : 'translate', 'translateY' : 'translate', 'translateZ' : 'translate',
+                'rotateX' : 'rotate', 'rotateY' : 'rotate', 'rotateZ' : 'rotate',
+                'scaleX' : 'scale', 'scaleY' : 'scale', 'scaleZ' : 'scale',
+                'jointOrientX' : 'jointOrient', 'jointOrientY' : 'jointOrient', 'jointOrientZ' : 'jointOrient'}
+
+# Policies of bulk_connect for destinations already connected to another source :
+# 'skip' keeps them and reports them, 'force' replaces their connection, 'error' connects nothing and raises ConnectConflictError.
+# Missing plugs are skipped and reported with every policy
+CONNECT_POLICIES = ('skip', 'force', 'error')
+
+class ConnectConflictError (Exception) :
+    '''
+    Error raised by bulk_connect 'error' policy when destinations are already connected to another source. Nothing is connected
+    '''
+
+class ConnectionIndex () :
+    '''
+    Index of incoming connections of a set of nodes. All connections are queried in one cmds.listConnections call,
+    then "is this plug driven ?" is answered from memory
+    '''
+    def __init__ (self, nodes) :
+        '''
+        Query incoming connections of all nodes
+        nodes -> nodes names or handles to index (list)
+        '''
+        # {node name : set of driven attributs}
+        self.driven = {}
+        # {(node name, driven attribut) : source plug}
+        self.sources = {}
+        # {short name : node names}, used to match long and short names of the same node
+        self.short_names = {}
+
+        nodes = [str(node) for node in set(nodes) if node]
+        connections = cmds.listConnections (nodes, source = True, destination = False, connections = True, plugs = True) if nodes else None
+
+        # connections is a flat list : [destination plug, source plug, destination plug, source plug, ...]
+        connections = connections or []
+        for destination, source in zip(connections[::2], connections[1::2]) :
+            node, attr = destination.split ('.', 1)
+            self.driven.setdefault (node, set()).add (attr)
+            self.sources[(node, attr)] = source
+            self.short_names.setdefault (node.split('|')[-1], set()).add (node)
+
+    def _get_node_key (self, node) :
+        '''
+        Return the indexed name of node, or None if node has no incoming connection
+        '''
+        node = str(node)
+        if node in self.driven :
+            return node
+
+        for key in self.short_names.get (node.split('|')[-1], ()) :
+            if node.endswith ('|' + key) or key.endswith ('|' + node) :
+                return key
+
+        return None
+
+    def is_driven (self, node, attr) :
+        '''
+        Return True if node.attr, or one of its parent attributs, has an incoming connection
+        node -> node name (str)
+        attr -> attribut name or path, ex : 'translateX', 'target[0].weight' (str)
+        '''
+        key = self._get_node_key (node)
+        if key is None :
+            return False
 
-def test_output_connections (connections_, target_) :
+        driven = self.driven[key]
+        attr = ATTR_LONG_NAMES.get (attr, attr)
+
+        # Test attribut path and each of its parents : target[0].weight, target[0], target
+        while attr :
+            if attr in driven or ATTR_PARENTS.get (attr) in driven :
+                return True
+
+            if '.' in attr :
+                attr = attr.rsplit ('.', 1)[0]
+            elif attr.endswith (']') :
+                attr = attr[:attr.rindex('[')]
+            else :
+                attr = None
+
+        return False
+
+    def get_source (self, node, attr) :
+        '''
+        Return the source plug driving node.attr and the driven attribut, node.attr itself or one of its parent attributs
+        node -> node name (str)
+        attr -> attribut name or path (str)
+        Return (source plug, driven attribut), (None, None) if node.attr is not driven
+        '''
+        key = self._get_node_key (node)
+        attr = ATTR_LONG_NAMES.get (attr, attr)
+
+        while key is not None and attr :
+            for driven_attr in (attr, ATTR_PARENTS.get (attr)) :
+                if (key, driven_attr) in self.sources :
+                    return self.sources[(key, driven_attr)], driven_attr
+
+            if '.' in attr :
+                attr = attr.rsplit ('.', 1)[0]
+            elif attr.endswith (']') :
+                attr = attr[:attr.rindex('[')]
+            else :
+                attr = None
+
+        return None, None
+
+    def driven_plugs (self, node, attrs) :
+        '''
+        Return node plugs of attrs that have an incoming connection
+        node -> node name (str)
+        attrs -> attributs to test (list)
+        '''
+        return ['{}.{}'.format(node, attr) for attr in attrs if self.is_driven (node, attr)]
+
+def test_output_connections (connections_, target_, index = None) :
     '''
     This function test if objects has already a connection
     connection_ -> tested attribut list (list)
     target_ -> tested object (str)
+    index -> connection index already built, if None target_ connections are queried (ConnectionIndex)
     '''
-    result_list = []
+    if index is None :
+        index = ConnectionIndex ([target_])
 
     # Testing attribut connection. If True, append taget_.attr in result_list
-    for attr in connections_ : 
-        if cmds.listConnections( "{}.{}".format (target_, attr)) : 
-            result_list.append ('{}.{}'.format(target_, attr))
+    result_list = index.driven_plugs (target_, connections_)
 
     # If result list, display cmds.warning message with "already connected" and return False. Otherwise, return True
     if len(result_list) == 1 :
@@ -23,6 +155,41 @@ def test_output_connections (connections_, target_) :
     
     return True
 
+def check_output_connections (targets, connections_) :
+    '''
+    Test many objects with one connection query and warn every conflict at once
+    targets -> tested objects (list)
+    connections_ -> tested attribut list, the same for each object (list)
+    Return True if no attribut is connected, otherwise False
+    '''
+    index = ConnectionIndex (targets)
+
+    result_list = []
+    for target_ in targets :
+        result_list += index.driven_plugs (target_, connections_)
+
+    if result_list :
+        cmds.warning ("Channels already connected : {}".format (', '.join(result_list)))
+        return False
+
+    return True
+
+# Default rigging module layout. Each group is named prefix + suffix and is parented under its parent group, groups without parent
+# are the module roots. attributes are added to module groups, links connect a group message to a message attribut of another group :
+#   'attributes' : [{'group' : '_module_grp', 'name' : 'side', 'type' : 'string', 'value' : '{prefix}'}]
+#   'links' : [{'source' : '_module_grp', 'destination' : '_output_grp', 'attr' : 'module'}]
+MODULE_TEMPLATE = {'groups' : [{'suffix' : '_module_grp', 'color' : (1,1,1)},
+                               {'suffix' : '_public_grp', 'color' : (0,1,0), 'parent' : '_module_grp'},
+                               {'suffix' : '_private_grp', 'color' : (1,0,0), 'parent' : '_module_grp'},
+                               {'suffix' : '_input_grp', 'color' : (0,1,1), 'parent' : '_module_grp'},
+                               {'suffix' : '_output_grp', 'color' : (0,1,1), 'parent' : '_module_grp'}],
+                   'attributes' : [],
+                   'links' : []}
+
+# Template attribut types added as data types (addAttr dt flag), other types are attribut types (addAttr at flag)
+ATTR_DATA_TYPES = ('string', 'matrix')
+
+@nb_transaction.transaction ('create_rigging_module')
 def create_rigging_module (module_name) :
     '''
     This functions create a rigging module setup wich is basicly four groups in one module group ordered as follow :
@@ -31,108 +198,407 @@ def create_rigging_module (module_name) :
         private_grp
         input_grp
         output_grp
+    Return created groups
     '''
-    # Created groups
-    group_list = [["_module_grp", (1,1,1)],
-    ["_public_grp", (0,1,0)],
-    ["_private_grp", (1,0,0)],
-    ["_input_grp", (0,1,1)],
-    ["_output_grp", (0,1,1)]]
+    return create_modules ([module_name])['groups']
+
+def check_module_template (template) :
+    '''
+    Check a module template, see MODULE_TEMPLATE. Raise ValueError if it is not valid
+    Return template groups, parents first
+    '''
+    groups = template.get ('groups') or []
+    if not groups :
+        raise ValueError ("Module template needs groups")
+
+    suffixes = [group['suffix'] for group in groups]
+    if len(set(suffixes)) != len(suffixes) :
+        raise ValueError ("Module template groups suffixes must be unique")
+
+    for x, group in enumerate(groups) :
+        if group.get ('parent') and group['parent'] not in suffixes[:x] :
+            raise ValueError ("{} parent {} must be a group defined before it".format(group['suffix'], group['parent']))
+
+    for attribut in template.get ('attributes', []) :
+        if attribut['group'] not in suffixes :
+            raise ValueError ("Attribut {} group {} is not in the template".format(attribut['name'], attribut['group']))
+
+    for link in template.get ('links', []) :
+        if link['destination'] not in suffixes :
+            raise ValueError ("Link {} destination {} is not in the template".format(link['attr'], link['destination']))
+
+    return groups
+
+@nb_transaction.transaction ('create_modules')
+def create_modules (prefixes, template = None, parent = None) :
+    '''
+    Create rigging modules of many prefixes from one template. Existing groups are found with one query, then all hierarchies
+    are created in one pass : groups are created under their parent, so nothing is reparented
+    prefixes -> modules prefixes, ex : ['arm_L', 'arm_R'] (list)
+    template -> groups, colors, nesting, attributes and links of a module, default layout if None (dict, see MODULE_TEMPLATE)
+    parent -> node receiving module roots, world if None (str)
+    Return summary : {'created' : prefixes with created groups, 'skipped' : prefixes that already exist, 'groups' : created groups,
+                      'existing' : groups that already existed}
+    '''
+    template = template or MODULE_TEMPLATE
+    groups = check_module_template (template)
+    prefixes = list(dict.fromkeys (prefixes))
+
+    names = ['{}{}'.format(prefix, group['suffix']) for prefix in prefixes for group in groups]
+    existing = set(name.split('|')[-1] for name in cmds.ls (names) or []) if names else set()
+
+    summary = {'created' : [], 'skipped' : [], 'groups' : [], 'existing' : []}
+    for prefix in prefixes :
+        module_groups = {}
+        for group in groups :
+            name = '{}{}'.format(prefix, group['suffix'])
+            if name in existing :
+                summary['existing'].append (name)
+                module_groups[group['suffix']] = name
+                continue
+
+            group_parent = module_groups.get (group.get('parent')) if group.get('parent') else parent
+            created = cmds.createNode ("transform", name = name, parent = group_parent) if group_parent else cmds.createNode ("transform", name = name)
+            module_groups[group['suffix']] = created
+            summary['groups'].append (created)
+
+            if group.get ('color') is not None :
+                cmds.setAttr("{}.useOutlinerColor".format (created), True)
+                cmds.setAttr("{}.outlinerColor".format (created), *group['color'])
+
+        created_groups = [module_groups[group['suffix']] for group in groups if module_groups[group['suffix']] in summary['groups']]
+        if not created_groups :
+            summary['skipped'].append (prefix)
+            continue
+
+        summary['created'].append (prefix)
+        add_module_attributes (template, prefix, module_groups, created_groups)
+
+    if summary['existing'] :
+        cmds.warning ("{} already exists, passed.".format (', '.join(summary['existing'])))
+
+    return summary
+
+def add_module_attributes (template, prefix, module_groups, created_groups) :
+    '''
+    Add template attributes and links to the created groups of one module
+    module_groups -> module group of each template suffix ({suffix : group})
+    created_groups -> groups created for this module, existing groups are not modified (list)
+    '''
+    for attribut in template.get ('attributes', []) :
+        group = module_groups[attribut['group']]
+        if group not in created_groups :
+            continue
+
+        attr_type = attribut.get ('type', 'double')
+        if attr_type in ATTR_DATA_TYPES :
+            cmds.addAttr (group, ln = attribut['name'], dt = attr_type)
+        else :
+            cmds.addAttr (group, ln = attribut['name'], at = attr_type, k = attribut.get ('keyable', False))
+
+        value = attribut.get ('value')
+        if isinstance(value, str) :
+            cmds.setAttr ('{}.{}'.format(group, attribut['name']), value.format(prefix = prefix), type = 'string')
+        elif value is not None :
+            cmds.setAttr ('{}.{}'.format(group, attribut['name']), value)
+
+    # Link source is a template group, or any node name formatted with the module prefix
+    for link in template.get ('links', []) :
+        destination = module_groups[link['destination']]
+        if destination not in created_groups :
+            continue
 
-    # Created groups, parent them and set outliner color attribut
-    for group_name, group_color in group_list :
+        source = module_groups.get (link['source']) or link['source'].format(prefix = prefix)
+        cmds.addAttr (destination, ln = link['attr'], at = 'message')
+        cmds.connectAttr ('{}.message'.format(source), '{}.{}'.format(destination, link['attr']))
 
-        if not cmds.objExists("{}{}".format(module_name, group_name)) :
+def get_hierarchy_order (objects_, hierarchy = False) :
+    '''
+    Return objects long names ordered parent first, without duplicates
+    objects_ -> objects to order (list)
+    hierarchy -> add all transform descendants of objects_ (bool)
+    '''
+    if hierarchy :
+        objects_ = list(objects_) + (cmds.listRelatives (objects_, allDescendents = True, type = 'transform', fullPath = True) or [])
 
-            group = cmds.createNode("transform", name = "{}{}".format(module_name, group_name))
-            cmds.setAttr("{}.useOutlinerColor".format (group), True)
-            cmds.setAttr("{}.outlinerColor".format (group), *group_color)
-            
-            if not group_list[0][0] in group :
-                cmds.parent (group, "{}{}".format(module_name, group_list[0][0]))
+    long_names = list(dict.fromkeys (cmds.ls (objects_, long = True) or []))
 
-        else : 
-            cmds.warning ("{}{} already exists, passed.".format (module_name, group_name))
+    return sorted (long_names, key = lambda name : name.count('|'))
 
-def set_transform_in_opm () :
+@nb_transaction.transaction ('set_transform_in_opm')
+def set_transform_in_opm (objects_ = None, hierarchy = False) :
     '''
-    This function set all translate, rotate and scale attributs values in offsetParentMatrix
+    This function set all translate, rotate and scale attributs values in offsetParentMatrix.
+    New offsetParentMatrix is computed directly as matrix * offsetParentMatrix and set in one matrix setAttr, no node is created
+    objects_ -> objects to modify, current selection if None (list)
+    hierarchy -> also modify all transform descendants of objects_ (bool)
+    Return modified objects
     '''
 
     # get object selected
-    sel = cmds.ls(sl=True)
-    if not sel:
-        return
-    
-    # For each object, get new matrix by multiply offsetParentMatrix and transformMatrix.
+    if objects_ is None :
+        objects_ = cmds.ls(sl=True)
+    if not objects_:
+        return []
+
+    # Objects are modified parent first
+    objects_ = get_hierarchy_order (objects_, hierarchy)
+
+    # Get incoming connections of all objects in one query. If offsetParentMatrix or a transform attribut is connected,
+    # the object is skipped, all skipped objects are reported at once
+    index = ConnectionIndex (objects_)
+    tested_attrs = ['offsetParentMatrix'] + [attr + axis for attr in ('translate', 'rotate', 'scale') for axis in 'XYZ']
+    skipped = []
+    valid_objects = []
+    for each in objects_ :
+        driven = index.driven_plugs (each, tested_attrs)
+        if driven :
+            skipped += driven
+        else :
+            valid_objects.append (each)
+
+    if skipped :
+        cmds.warning ("Skipped objects with connected channels : {}".format (', '.join(skipped)))
+
+    if not valid_objects :
+        return []
+
+    # For each object, get new matrix by multiply transformMatrix and offsetParentMatrix.
     # This process allows to maintain control position regardless of his parents
-    for each in sel :
+    matrices = nb_math.get_matrices (['{}.{}'.format(each, attr) for each in valid_objects for attr in ('matrix', 'offsetParentMatrix')])
+    new_matrices = np.matmul (matrices[0::2], matrices[1::2])
 
-        # if offsetParentMatrix is already connected, pass
-        if not test_output_connections(['offsetParentMatrix'], each) :
-            continue
+    # Joint matrix includes jointOrient, which is kept : new offsetParentMatrix = inverse jointOrient * matrix * offsetParentMatrix
+    joints = set(cmds.ls (valid_objects, type = 'joint', long = True) or [])
+    for x, each in enumerate(valid_objects) :
+        if each in joints :
+            joint_orient = cmds.getAttr ('{}.jointOrient'.format(each))[0]
+            orient_matrix = nb_math.compose_matrices ([0, 0, 0], joint_orient, [1, 1, 1])[0]
+            new_matrices[x] = np.matmul (np.linalg.inv(orient_matrix), new_matrices[x])
+
+    for each, matrix in zip(valid_objects, new_matrices) :
+        cmds.setAttr ('{}.offsetParentMatrix'.format(each), nb_math.flatten_matrix(matrix), type = 'matrix')
 
-        cmds.select (d=True)
-        
-        # Create necessary nodes
-        composeMat = cmds.createNode ('composeMatrix', name = 'OPMtemp_compMat')
-        decomposeMat = cmds.createNode ('decomposeMatrix', name = 'OPMtemp_decompMat')
-        multMat = cmds.createNode ('multMatrix', name = 'OPMtemp_multMat')
-        
-        # Multiply offsetParentMatrix and transformMatrix
-        cmds.connectAttr('{}.matrix'.format(each), '{}.matrixIn[0]'.format(multMat))
-        cmds.connectAttr('{}.offsetParentMatrix'.format(each), '{}.matrixIn[1]'.format(multMat))
-        
-        cmds.connectAttr('{}.matrixSum'.format(multMat), '{}.inputMatrix'.format(decomposeMat))
-        
-        cmds.connectAttr('{}.outputTranslate'.format(decomposeMat), '{}.inputTranslate'.format(composeMat))
-        cmds.connectAttr('{}.outputRotate'.format(decomposeMat), '{}.inputRotate'.format(composeMat))
-        cmds.connectAttr('{}.outputScale'.format(decomposeMat), '{}.inputScale'.format(composeMat))
-        
-        cmds.disconnectAttr('{}.outputTranslate'.format(decomposeMat), '{}.inputTranslate'.format(composeMat))
-        cmds.disconnectAttr('{}.outputRotate'.format(decomposeMat), '{}.inputRotate'.format(composeMat))
-        cmds.disconnectAttr('{}.outputScale'.format(decomposeMat), '{}.inputScale'.format(composeMat))
-        
-        # Set composeMat matrix in offsetParentMatrix
-        cmds.connectAttr('{}.outputMatrix'.format(composeMat), '{}.offsetParentMatrix'.format(each))
-        
         # reset transform matrix
         cmds.setAttr ('{}.translate'.format(each), *(0,0,0))
         cmds.setAttr ('{}.rotate'.format(each), *(0,0,0))
         cmds.setAttr ('{}.scale'.format(each), *(1,1,1))
-        
-        # delete created node if still exists
-        for custom_node in [composeMat, decomposeMat, multMat] :
-            if cmds.objExists(custom_node) :
-                cmds.delete (custom_node)
-        
-def reset_joint_orient() :
+
+    return valid_objects
+
+@nb_transaction.transaction ('reset_joint_orient')
+def reset_joint_orient(objects_ = None, keep_world = False, hierarchy = False) :
     '''
     This function takes current selection and, if each element is a joint, reset jointOrient attribut
+    objects_ -> objects to reset, current selection if None (list)
+    keep_world -> move jointOrient in rotate so joints keep their world orientation, see nb_rgtk_skeleton.orient_skeleton (bool)
+    hierarchy -> also reset all joint descendants of objects_ (bool)
+    Return reset joints
     '''
-    obj_list = cmds.ls(sl=True)
+    obj_list = cmds.ls(sl=True) if objects_ is None else list(objects_)
 
     if not obj_list :
-        return
-    
-    for element in obj_list :
-        if cmds.objectType(element) == "joint" :
-            cmds.setAttr ("{}.jointOrient".format(element), *(0,0,0))
+        return []
+
+    if keep_world or hierarchy :
+        from nb_rigging_toolkit import nb_rgtk_skeleton as nb_skeleton
+        if keep_world :
+            return nb_skeleton.orient_skeleton (obj_list, 'zero_orient', hierarchy)
+
+        obj_list = nb_skeleton.get_joints (obj_list, hierarchy)
 
-def fast_connect_attr (attribut) :
+    # Joints are found in one query
+    joints = cmds.ls (obj_list, type = 'joint') or []
+    for element in joints :
+        cmds.setAttr ("{}.jointOrient".format(element), *(0,0,0))
+
+    return joints
+
+@nb_transaction.transaction ('fast_connect_attr')
+def fast_connect_attr (attribut, objects_ = None, policy = 'skip') :
     '''
     This function takes object selected and connect the first of them attribut with all others  selected object attribut
     attribut -> attribut to connect (str)
+    objects_ -> source object then destination objects, current selection if None (list)
+    policy -> already connected destinations policy, see bulk_connect (str)
+    Return bulk_connect report, None if there is no object
     '''
-    object_list = cmds.ls(sl=True)
+    object_list = cmds.ls(sl=True) if objects_ is None else list(objects_)
 
     if not object_list :
         return
-    
-    for obj in object_list :
-        if not cmds.objExists("{}.{}".format(obj, attribut)) :
-            cmds.warning("{}.{} doesn't exists".format(obj, attribut))
-            return
-    
-    for x in range(len(object_list)-1) :
-        cmds.connectAttr("{}.{}".format(object_list[0], attribut), "{}.{}".format(object_list[x+1], attribut))
+
+    return bulk_connect ([('{}.{}'.format(object_list[0], attribut), object_list[1:], attribut)], policy)
+
+def parse_connect_rule (rule) :
+    '''
+    Return source node, source attribut, target set and target attribut of a bulk_connect rule
+    rule -> 'source.attr -> targets.attr' string, ex : 'main_ctrl.globalScale -> *_scale_grp.scaleX'. Each side is split at its first dot,
+            so regex target sets with dots need the tuple form (source plug, target set, target attribut) (str or tuple)
+    '''
+    if isinstance(rule, str) :
+        if '->' not in rule :
+            raise ValueError ("Connect rule {} needs 'source.attr -> targets.attr'".format(rule))
+
+        source, destination = [part.strip() for part in rule.split ('->', 1)]
+        if '.' not in destination :
+            raise ValueError ("Connect rule {} needs a target attribut".format(rule))
+        targets, target_attr = destination.split ('.', 1)
+    else :
+        source, targets, target_attr = rule
+
+    if '.' not in source :
+        raise ValueError ("Connect rule source {} needs an attribut".format(source))
+    source_node, source_attr = source.split ('.', 1)
+
+    return source_node, source_attr, targets, target_attr
+
+def find_targets (target_sets) :
+    '''
+    Return nodes of each target set. Wildcard patterns are all listed in one query, regex patterns filter one listing of the scene
+    target_sets -> each set is a wildcard pattern 'arm_*_ctrl', a regex matched on short names 're:arm_\\d+_ctrl' or a list of names (list)
+    Return one list of node names per target set
+    '''
+    patterns = [each for each in target_sets if isinstance(each, str) and not each.startswith ('re:')]
+    listed = (cmds.ls (patterns) or []) if patterns else []
+    scene = (cmds.ls () or []) if any(isinstance(each, str) and each.startswith ('re:') for each in target_sets) else []
+
+    nodes = []
+    for target_set in target_sets :
+        if not isinstance(target_set, str) :
+            nodes.append (list(target_set))
+        elif target_set.startswith ('re:') :
+            regex = re.compile (target_set[3:])
+            nodes.append ([node for node in scene if regex.fullmatch (node.split('|')[-1])])
+        else :
+            nodes.append ([node for node in listed if fnmatch.fnmatchcase (node, target_set) or fnmatch.fnmatchcase (node.split('|')[-1], target_set)])
+
+    return nodes
+
+def get_existing_plugs (plugs) :
+    '''
+    Return long attribut names of plugs that exist. Plugs are tested with one query by attribut name : cmds.ls lists existing plugs
+    with long attribut names, so each listed plug is matched back to the requested plug of the same query by its node
+    plugs -> list of (node handle, attribut) (list)
+    Return {(node handle, attribut) : long attribut name}
+    '''
+    handles_by_attr = {}
+    for handle, attr in plugs :
+        handles_by_attr.setdefault (attr, set()).add (handle)
+
+    existing = {}
+    for attr, handles in handles_by_attr.items() :
+        short_names = {}
+        for handle in handles :
+            short_names.setdefault (handle.short_name, []).append (handle)
+
+        for plug in cmds.ls (['{}.{}'.format(handle, attr) for handle in handles]) or [] :
+            node, long_attr = plug.split ('.', 1)
+            for handle in short_names.get (node.split('|')[-1], ()) :
+                if handle.path == node or handle.path.endswith ('|' + node) :
+                    existing[(handle, attr)] = long_attr
+
+    return existing
+
+def _is_plug (plug, handle, long_attr) :
+    '''
+    Return True if plug name is handle.long_attr
+    '''
+    node, plug_attr = plug.split ('.', 1)
+    same_node = handle.path == node or handle.path.endswith ('|' + node)
+
+    return same_node and plug_attr == long_attr
+
+@nb_transaction.transaction ('bulk_connect')
+def bulk_connect (rules, policy = 'skip') :
+    '''
+    Connect source plugs to every plug of their target sets. Targets are found, resolved, tested and checked for connections
+    with one query each, then all connections are committed with one builder. Failures are skipped and reported, they don't stop other connections
+    rules -> connect rules, see parse_connect_rule, ex : ['main_ctrl.visibility -> *_geo_grp.visibility'] (list)
+    policy -> 'skip', 'force' or 'error', see CONNECT_POLICIES (str)
+    Return report : {'connected', 'replaced', 'kept' (already connected to the source) : list of (source, destination),
+                     'skipped' : list of (plug, reason)}
+    Raise ConnectConflictError with 'error' policy if a destination is already connected to another source
+    '''
+    if policy not in CONNECT_POLICIES :
+        raise ValueError ("Unknown policy {}, use one of {}".format(policy, ', '.join(CONNECT_POLICIES)))
+
+    rules = [parse_connect_rule (rule) for rule in rules]
+    target_nodes = find_targets ([targets for source_node, source_attr, targets, target_attr in rules])
+    handles = nb_handles.get_handles ([rule[0] for rule in rules] + [node for nodes in target_nodes for node in nodes])
+
+    report = {'connected' : [], 'replaced' : [], 'kept' : [], 'skipped' : []}
+
+    # (source handle, source attr, destination handle, destination attr)
+    connections = []
+    for (source_node, source_attr, targets, target_attr), nodes in zip(rules, target_nodes) :
+        if source_node not in handles :
+            report['skipped'].append (('{}.{}'.format(source_node, source_attr), "source doesn't exist or is not unique"))
+            continue
+        if not nodes :
+            report['skipped'].append (('{}.{}'.format(targets, target_attr), "no target found"))
+
+        for node in nodes :
+            if node not in handles :
+                report['skipped'].append (('{}.{}'.format(node, target_attr), "doesn't exist or is not unique"))
+            else :
+                connections.append ((handles[source_node], source_attr, handles[node], target_attr))
+
+    existing = get_existing_plugs (list({(handle, attr) for connection in connections for handle, attr in (connection[:2], connection[2:])}))
+    index = ConnectionIndex ([connection[2] for connection in connections])
+
+    valid = []
+    conflicts = []
+    destinations = set()
+    for connection in connections :
+        source, source_attr, destination, destination_attr = connection
+        destination_plug = '{}.{}'.format(destination, destination_attr)
+
+        missing = [plug for plug in (connection[:2], connection[2:]) if plug not in existing]
+        if missing :
+            report['skipped'].append ((destination_plug, "{} doesn't exist".format(' and '.join('{}.{}'.format(*plug) for plug in missing))))
+            continue
+
+        # Plugs are compared with long attribut names, a source target set can hold the source node itself
+        source_long, destination_long = existing[connection[:2]], existing[connection[2:]]
+        if source == destination and source_long == destination_long :
+            continue
+
+        key = (destination, destination_long)
+
+        if key in destinations :
+            report['skipped'].append ((destination_plug, "is the destination of more than one rule"))
+            continue
+        destinations.add (key)
+
+        current = index.get_source (destination, destination_long)
+        if current[0] and _is_plug (current[0], source, source_long) :
+            report['kept'].append (('{}.{}'.format(source, source_attr), destination_plug))
+        elif current[0] :
+            conflicts.append ((connection, current))
+        else :
+            valid.append ((connection, None))
+
+    if conflicts and policy == 'error' :
+        raise ConnectConflictError ("Nothing connected, {} plugs are already connected : {}".format(
+            len(conflicts), ', '.join('{}.{} to {}'.format(connection[2], connection[3], current[0]) for connection, current in conflicts[:10])))
+
+    if conflicts and policy != 'force' :
+        report['skipped'] += [('{}.{}'.format(*connection[2:]), "already connected to {}".format(current[0])) for connection, current in conflicts]
+        conflicts = []
+
+    builder = nb_backend.new_builder ()
+    for (source, source_attr, destination, destination_attr), current in valid + conflicts :
+        # Forced connections replace the connection of the destination, or of its driven parent attribut
+        if current :
+            current_plug, driven_attr = current
+            builder.disconnect (current_plug.split ('.', 1)[0], current_plug.split ('.', 1)[1], destination, driven_attr)
+
+        builder.connect (source, source_attr, destination, destination_attr)
+        report['replaced' if current else 'connected'].append (('{}.{}'.format(source, source_attr), '{}.{}'.format(destination, destination_attr)))
+    builder.commit ()
+
+    if report['skipped'] :
+        cmds.warning ("{} connections skipped : {}".format(len(report['skipped']), ', '.join('{} {}'.format(plug, reason) for plug, reason in report['skipped'][:10])))
+
+    return report
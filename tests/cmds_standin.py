@@ -0,0 +1,709 @@
+"""
+Recording in-memory stand-in for maya.cmds, used to run toolkit operations without maya.
+It models nodes, attribut values, hierarchy, connections and selection, and counts every command call.
+Nodes are stored by uuid. DAG nodes only need a unique name among their siblings, so short names can be duplicated :
+commands then need a path, and returned names are the shortest unique path like maya does.
+Transform world matrices are computed from static translate / rotate (xyz) / scale / jointOrient / offsetParentMatrix values,
+connections are not evaluated.
+"""
+import collections
+import fnmatch
+import functools
+import re
+
+import numpy as np
+
+# Long names of short transform attributs
+SHORT_NAMES = {'t' : 'translate', 'tx' : 'translateX', 'ty' : 'translateY', 'tz' : 'translateZ',
+               'r' : 'rotate', 'rx' : 'rotateX', 'ry' : 'rotateY', 'rz' : 'rotateZ',
+               's' : 'scale', 'sx' : 'scaleX', 'sy' : 'scaleY', 'sz' : 'scaleZ',
+               'v' : 'visibility', 'opm' : 'offsetParentMatrix', 'wm' : 'worldMatrix', 'jo' : 'jointOrient',
+               'ro' : 'rotateOrder'}
+
+# Vector attributs of transforms and their children
+VECTORS = {'translate' : (0, 0, 0), 'rotate' : (0, 0, 0), 'scale' : (1, 1, 1), 'jointOrient' : (0, 0, 0)}
+
+TRANSFORM_TYPES = ('transform', 'joint')
+
+# Attributs computed from transform values
+MATRIX_ATTRS = ('matrix', 'worldMatrix', 'worldInverseMatrix', 'parentMatrix', 'inverseParentMatrix')
+
+# Default values of non transform nodes attributs. Vector attributs are returned as [(x, y, z)] like maya does
+TYPE_DEFAULTS = {'composeMatrix' : {'inputTranslate' : (0, 0, 0), 'inputRotate' : (0, 0, 0), 'inputScale' : (1, 1, 1), 'inputShear' : (0, 0, 0)},
+                 'blendMatrix' : {'envelope' : 1.0},
+                 'pickMatrix' : {'useTranslate' : True, 'useRotate' : True, 'useScale' : True, 'useShear' : True},
+                 'aimMatrix' : {'primaryInputAxis' : (1, 0, 0), 'primaryMode' : 1, 'primaryTargetVector' : (1, 0, 0),
+                                'secondaryInputAxis' : (0, 1, 0), 'secondaryMode' : 0, 'secondaryTargetVector' : (0, 1, 0)}}
+
+# Matrix attributs of non transform nodes, identity by default
+MATRIX_DEFAULTS = ('inputMatrix', 'targetMatrix', 'matrixIn', 'primaryTargetMatrix', 'secondaryTargetMatrix')
+
+# blendMatrix target attributs with a default value of 1
+BLEND_TARGET_WEIGHTS = ('weight', 'translateWeight', 'rotateWeight', 'scaleWeight', 'shearWeight')
+
+IDENTITY = [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+
+def _recorded (function) :
+    '''
+    Count each call of a stand-in command
+    '''
+    @functools.wraps (function)
+    def wrapper (self, *args, **kwargs) :
+        self.calls[function.__name__] += 1
+        return function (self, *args, **kwargs)
+
+    return wrapper
+
+def _trs_matrix (translate, rotate, scale) :
+    '''
+    Return a maya (row vector) matrix from translate, rotate (degrees, xyz) and scale
+    '''
+    rx, ry, rz = np.radians(rotate)
+    rot_x = np.array([[1, 0, 0], [0, np.cos(rx), np.sin(rx)], [0, -np.sin(rx), np.cos(rx)]])
+    rot_y = np.array([[np.cos(ry), 0, -np.sin(ry)], [0, 1, 0], [np.sin(ry), 0, np.cos(ry)]])
+    rot_z = np.array([[np.cos(rz), np.sin(rz), 0], [-np.sin(rz), np.cos(rz), 0], [0, 0, 1]])
+
+    matrix = np.identity(4)
+    matrix[:3, :3] = np.diag(scale) @ rot_x @ rot_y @ rot_z
+    matrix[3, :3] = translate
+
+    return matrix
+
+class Node () :
+    '''
+    Stand-in scene node
+    '''
+    def __init__ (self, node_type, name) :
+        self.type = node_type
+        self.name = name
+        self.parent = None
+        self.values = {}
+        self.dynamic_attrs = {}
+        self.uuid = None
+
+        if node_type in TRANSFORM_TYPES :
+            for attr, value in VECTORS.items() :
+                if attr != 'jointOrient' or node_type == 'joint' :
+                    self.values[attr] = list(value)
+            self.values['offsetParentMatrix'] = list(IDENTITY)
+            self.values['visibility'] = True
+            self.values['rotateOrder'] = 0
+
+class CmdsStandIn () :
+    '''
+    In-memory maya.cmds. Use reset() to get an empty scene and empty counters
+    '''
+    def __init__ (self) :
+        self.reset ()
+
+    # ------------------------------------------------------------------ #
+    # Scene state
+    # ------------------------------------------------------------------ #
+    def reset (self) :
+        '''
+        Remove all nodes, connections, selection and counters
+        '''
+        # {uuid : node}
+        self.nodes = collections.OrderedDict()
+        # {(destination uuid, attribut) : (source uuid, attribut)}
+        self._connections = {}
+        # selected uuids
+        self._selection = []
+        self.calls = collections.Counter()
+        self.created_nodes = []
+        self.warnings = []
+        self.undo_chunks = 0
+        self.refresh_suspended = False
+        self.evaluation_mode = 'parallel'
+        self.undo_state = True
+        self.batch = False
+        self.scene_modified = False
+        self._uuid_count = 0
+
+    def reset_counters (self) :
+        '''
+        Reset call, created nodes and warnings counters but keep the scene
+        '''
+        self.calls = collections.Counter()
+        self.created_nodes = []
+        self.warnings = []
+
+    @property
+    def total_calls (self) :
+        return sum(self.calls.values())
+
+    @property
+    def connections (self) :
+        '''
+        Return connections as {destination plug : source plug}, with current node names
+        '''
+        return {self._plug_name(self.nodes[destination[0]], destination[1]) : self._plug_name(self.nodes[source[0]], source[1])
+                for destination, source in self._connections.items()}
+
+    @property
+    def selection (self) :
+        return [self._name(self.nodes[uuid]) for uuid in self._selection]
+
+    def _find (self, name) :
+        '''
+        Return nodes matching a uuid, a short name, a partial path or a long path
+        '''
+        if name in self.nodes :
+            return [self.nodes[name]]
+
+        if '|' not in name :
+            return [node for node in self.nodes.values() if node.name == name]
+
+        if name.startswith ('|') :
+            return [node for node in self.nodes.values() if self._long_name(node) == name]
+
+        return [node for node in self.nodes.values() if self._long_name(node).endswith ('|' + name)]
+
+    def _split (self, plug) :
+        '''
+        Return node and long attribut name of a plug, ex : 'a.t' -> (Node a, 'translate')
+        '''
+        node_name, attr = plug.split ('.', 1)
+        node = self._get_node (node_name)
+
+        if node is not None :
+            names = dict(SHORT_NAMES) if node.type in TRANSFORM_TYPES else {}
+            names.update ((kwargs.get ('sn') or kwargs.get ('shortName'), name) for name, kwargs in node.dynamic_attrs.items())
+            attr = '.'.join (names.get(part, part) for part in attr.split('.'))
+
+        return node, attr
+
+    def _get_node (self, name) :
+        '''
+        Return node from its uuid, name or path, None if it doesn't exist or if name matches more than one node
+        '''
+        nodes = self._find (str(name))
+
+        return nodes[0] if len(nodes) == 1 else None
+
+    def _long_name (self, node) :
+        path = []
+        while node is not None :
+            path.append (node.name)
+            node = node.parent
+        return '|' + '|'.join(reversed(path))
+
+    def _name (self, node) :
+        '''
+        Return the shortest unique path of node
+        '''
+        long_name = self._long_name (node)
+        parts = long_name.split ('|')[1:]
+
+        for x in range(len(parts) - 1, -1, -1) :
+            name = '|'.join (parts[x:])
+            if len(self._find (name)) == 1 :
+                return name
+
+        return long_name
+
+    def _plug_name (self, node, attr) :
+        return '{}.{}'.format(self._name(node), attr)
+
+    def _unique_name (self, name, parent = None, dag = True) :
+        '''
+        Return name, or name with a number if it already exists, like maya does.
+        DAG nodes names are only unique among their siblings, other nodes names are unique in the scene
+        '''
+        name = name.replace('[', '_').replace(']', '_').replace("'", '_').replace(' ', '_').replace(',', '_')
+        used = set(node.name for node in self.nodes.values() if not dag or node.parent is parent or node.type not in TRANSFORM_TYPES)
+        if name not in used :
+            return name
+
+        base = name.rstrip ('0123456789')
+        index = 1
+        while '{}{}'.format(base, index) in used :
+            index += 1
+
+        return '{}{}'.format(base, index)
+
+    def local_matrix (self, node) :
+        '''
+        Return node local matrix (numpy (4, 4))
+        '''
+        values = node.values
+        rotate = _trs_matrix ([0, 0, 0], values['rotate'], [1, 1, 1])
+
+        if node.type == 'joint' :
+            rotate = rotate @ _trs_matrix ([0, 0, 0], values['jointOrient'], [1, 1, 1])
+
+        # scale * rotate * translate
+        result = np.identity(4)
+        result[:3, :3] = np.diag(values['scale']) @ rotate[:3, :3]
+        result[3, :3] = values['translate']
+
+        return result
+
+    def world_matrix (self, node) :
+        '''
+        Return node world matrix (numpy (4, 4))
+        '''
+        matrix = self.local_matrix (node) @ np.array(node.values['offsetParentMatrix']).reshape(4, 4)
+        if node.parent is not None :
+            matrix = matrix @ self.world_matrix (node.parent)
+
+        return matrix
+
+    def set_world_matrix (self, node, matrix) :
+        '''
+        Set translate / rotate / scale of a transform so its world matrix is equal to matrix. Used to keep world position on parent
+        '''
+        parent_matrix = np.array(node.values['offsetParentMatrix']).reshape(4, 4)
+        if node.parent is not None :
+            parent_matrix = parent_matrix @ self.world_matrix (node.parent)
+
+        local = matrix @ np.linalg.inv (parent_matrix)
+        scale = np.linalg.norm (local[:3, :3], axis = 1)
+        rows = local[:3, :3] / scale[:, None]
+
+        if node.type == 'joint' :
+            rows = rows @ np.linalg.inv (_trs_matrix([0, 0, 0], node.values['jointOrient'], [1, 1, 1])[:3, :3])
+
+        rotate = [np.degrees(np.arctan2(rows[1, 2], rows[2, 2])),
+                  np.degrees(np.arctan2(-rows[0, 2], np.hypot(rows[0, 0], rows[0, 1]))),
+                  np.degrees(np.arctan2(rows[0, 1], rows[0, 0]))]
+
+        node.values['translate'] = list(local[3, :3])
+        node.values['rotate'] = rotate
+        node.values['scale'] = list(scale)
+
+    # ------------------------------------------------------------------ #
+    # Commands
+    # ------------------------------------------------------------------ #
+    @_recorded
+    def createNode (self, node_type, name = None, parent = None, **kwargs) :
+        parent = self._get_node (parent) if parent else None
+        name = self._unique_name (name or '{}1'.format(node_type), parent, node_type in TRANSFORM_TYPES)
+        node = Node (node_type, name)
+        self._uuid_count += 1
+        node.uuid = 'UUID-{:08d}'.format(self._uuid_count)
+        node.parent = parent
+
+        self.nodes[node.uuid] = node
+        name = self._name (node)
+        self.created_nodes.append (name)
+
+        return name
+
+    @_recorded
+    def delete (self, *nodes, **kwargs) :
+        for name in self._flatten (nodes) :
+            node = self._get_node (name)
+            if node is None :
+                continue
+
+            for child in [each for each in self.nodes.values() if each.parent is node] :
+                self.delete (child.uuid)
+
+            del self.nodes[node.uuid]
+            self._connections = {destination : source for destination, source in self._connections.items()
+                                 if destination[0] != node.uuid and source[0] != node.uuid}
+            if node.uuid in self._selection :
+                self._selection.remove (node.uuid)
+
+    @_recorded
+    def objExists (self, name) :
+        if '.' not in name :
+            return self._get_node (name) is not None
+
+        node, attr = self._split (name)
+        return node is not None and self._has_attr (node, attr)
+
+    def _has_attr (self, node, attr) :
+        '''
+        Return True if node has attr. Only transforms attributs are checked, other node types accept any attribut
+        '''
+        if node.type not in TRANSFORM_TYPES :
+            return True
+
+        base = attr.split('.')[0].split('[')[0]
+        if base in node.values or base in node.dynamic_attrs or base in MATRIX_ATTRS :
+            return True
+
+        return base[:-1] in VECTORS and base[-1] in 'XYZ' and base[:-1] in node.values
+
+    @_recorded
+    def objectType (self, name, **kwargs) :
+        node = self._get_node (name)
+        if node is None :
+            raise RuntimeError ("No object matches name: {}".format(name))
+
+        return node.type
+
+    @_recorded
+    def nodeType (self, name, **kwargs) :
+        return self.objectType (name)
+
+    @_recorded
+    def ls (self, *args, **kwargs) :
+        selection = kwargs.get ('sl') or kwargs.get ('selection')
+        nodes = [self.nodes[uuid] for uuid in self._selection] if selection else []
+
+        plugs = []
+        for pattern in self._flatten (args) :
+            if '.' in pattern :
+                # existing attributs are listed as plugs with long attribut names, like maya does
+                node, attr = self._split (pattern)
+                if node is not None and self._has_attr (node, attr) :
+                    plugs.append ('{}.{}'.format(self._name(node), attr))
+            elif '*' in pattern :
+                nodes += [node for node in self.nodes.values() if fnmatch.fnmatchcase (node.name, pattern)]
+            else :
+                nodes += self._find (pattern)
+
+        if not args and not selection :
+            nodes = list(self.nodes.values())
+
+        # each node is listed once
+        nodes = list(collections.OrderedDict ((node.uuid, node) for node in nodes).values())
+
+        node_type = kwargs.get ('type')
+        if node_type :
+            types = [node_type] if isinstance(node_type, str) else list(node_type)
+            nodes = [node for node in nodes if node.type in types or ('transform' in types and node.type == 'joint')]
+
+        if plugs :
+            return list(collections.OrderedDict.fromkeys (plugs))
+
+        if kwargs.get ('uuid') :
+            return [node.uuid for node in nodes]
+
+        if kwargs.get ('long') :
+            return [self._long_name(node) for node in nodes]
+
+        return [self._name(node) for node in nodes]
+
+    @_recorded
+    def select (self, *args, **kwargs) :
+        if kwargs.get ('d') or kwargs.get ('deselect') or kwargs.get ('clear') or kwargs.get ('cl') :
+            self._selection = []
+            return
+
+        uuids = [self._get_node(name).uuid for name in self._flatten (args)]
+        if kwargs.get ('add') :
+            self._selection += [uuid for uuid in uuids if uuid not in self._selection]
+        else :
+            self._selection = uuids
+
+    @_recorded
+    def listRelatives (self, *args, **kwargs) :
+        names = self._flatten (args)
+        result = []
+
+        for name in names :
+            node = self._get_node (name)
+            if node is None :
+                continue
+
+            if kwargs.get ('p') or kwargs.get ('parent') :
+                result += [node.parent] if node.parent else []
+            elif kwargs.get ('ad') or kwargs.get ('allDescendents') :
+                result += self._descendants (node)
+            else :
+                result += [each for each in self.nodes.values() if each.parent is node]
+
+        node_type = kwargs.get ('type')
+        if node_type :
+            result = [each for each in result if each.type == node_type or (node_type == 'transform' and each.type in TRANSFORM_TYPES)]
+
+        if kwargs.get ('f') or kwargs.get ('fullPath') :
+            return [self._long_name(each) for each in result] or None
+
+        return [self._name(each) for each in result] or None
+
+    def _descendants (self, node) :
+        '''
+        Return all descendants of node, deepest first like maya does
+        '''
+        descendants = []
+        for child in [each for each in self.nodes.values() if each.parent is node] :
+            descendants += self._descendants (child) + [child]
+        return descendants
+
+    @_recorded
+    def parent (self, *args, **kwargs) :
+        names = self._flatten (args)
+        if kwargs.get ('w') or kwargs.get ('world') :
+            children, new_parent = names, None
+        else :
+            children, new_parent = names[:-1], self._get_node (names[-1])
+
+        nodes = [self._get_node (name) for name in children]
+        for node in nodes :
+            world = self.world_matrix (node)
+            node.parent = new_parent
+            self.set_world_matrix (node, world)
+
+        # new names of reparented nodes
+        return [self._name(node) for node in nodes]
+
+    @_recorded
+    def rename (self, name, new_name) :
+        node = self._get_node (name)
+        node.name = new_name
+        return self._name (node)
+
+    @_recorded
+    def matchTransform (self, node_name, target_name, **kwargs) :
+        node = self._get_node (node_name)
+        self.set_world_matrix (node, self.world_matrix (self._get_node (target_name)))
+
+    @_recorded
+    def xform (self, name, **kwargs) :
+        node = self._get_node (name)
+
+        if kwargs.get ('q') or kwargs.get ('query') :
+            if kwargs.get ('matrix') or kwargs.get ('m') :
+                matrix = self.world_matrix (node) if kwargs.get ('ws') or kwargs.get ('worldSpace') else self.local_matrix (node)
+                return [float(value) for value in matrix.reshape(16)]
+            if kwargs.get ('translation') or kwargs.get ('t') :
+                if kwargs.get ('ws') or kwargs.get ('worldSpace') :
+                    return [float(value) for value in self.world_matrix (node)[3, :3]]
+                return list(node.values['translate'])
+            return None
+
+        for flag, attr in (('translation', 'translate'), ('rotation', 'rotate'), ('scale', 'scale')) :
+            if flag in kwargs :
+                node.values[attr] = list(kwargs[flag])
+
+    @_recorded
+    def getAttr (self, plug, **kwargs) :
+        node, attr = self._split (plug)
+        if node is None :
+            raise ValueError ("No object matches name: {}".format(plug))
+
+        base = attr.split('[')[0]
+
+        if node.type in TRANSFORM_TYPES and base in MATRIX_ATTRS :
+            if base == 'matrix' :
+                matrix = self.local_matrix (node)
+            elif base == 'worldMatrix' :
+                matrix = self.world_matrix (node)
+            elif base == 'worldInverseMatrix' :
+                matrix = np.linalg.inv (self.world_matrix (node))
+            else :
+                matrix = self.world_matrix (node.parent) if node.parent else np.identity(4)
+                if base == 'inverseParentMatrix' :
+                    matrix = np.linalg.inv (matrix)
+            return [float(value) for value in matrix.reshape(16)]
+
+        defaults = TYPE_DEFAULTS.get (node.type, {})
+
+        if kwargs.get ('mi') or kwargs.get ('multiIndices') :
+            # indices of set and connected elements, like maya does
+            pattern = re.compile (r'^{}\[(\d+)\]'.format(re.escape(attr)))
+            attrs = list(node.values) + [destination[1] for destination in self._connections if destination[0] == node.uuid]
+            return sorted (set(int(match.group(1)) for match in map(pattern.match, attrs) if match)) or None
+
+        if attr in node.values :
+            value = node.values[attr]
+            if attr in VECTORS or isinstance(defaults.get(attr), tuple) :
+                return [tuple(value)]
+            return value
+
+        if attr in defaults :
+            value = defaults[attr]
+            return [value] if isinstance(value, tuple) else value
+
+        if node.type == 'blendMatrix' and attr.split('.')[-1] in BLEND_TARGET_WEIGHTS :
+            return 1.0
+
+        if re.sub (r'\[\d+\]', '', attr).split('.')[-1] in MATRIX_DEFAULTS :
+            return list(IDENTITY)
+
+        if attr[:-1] in VECTORS and attr[-1] in 'XYZ' and attr[:-1] in node.values :
+            return node.values[attr[:-1]]['XYZ'.index(attr[-1])]
+
+        if attr in node.dynamic_attrs :
+            return node.dynamic_attrs[attr].get ('default', 0)
+
+        return 0
+
+    @_recorded
+    def setAttr (self, plug, *values, **kwargs) :
+        node, attr = self._split (plug)
+        if node is None :
+            raise RuntimeError ("No object matches name: {}".format(plug))
+
+        if not values :
+            return
+
+        if kwargs.get ('type') == 'matrix' :
+            node.values[attr] = [float(value) for value in self._flatten (values)]
+        elif attr in VECTORS and attr in node.values :
+            node.values[attr] = list(values)
+        elif attr[:-1] in VECTORS and attr[-1] in 'XYZ' and attr[:-1] in node.values :
+            node.values[attr[:-1]]['XYZ'.index(attr[-1])] = values[0]
+        else :
+            node.values[attr] = values[0] if len(values) == 1 else list(values)
+
+    @_recorded
+    def addAttr (self, node_name, **kwargs) :
+        node = self._get_node (node_name)
+        attr = kwargs.get ('ln') or kwargs.get ('longName')
+
+        if attr in node.dynamic_attrs :
+            raise RuntimeError ("Attribute already exists: {}.{}".format(node_name, attr))
+
+        node.dynamic_attrs[attr] = kwargs
+        node.values[attr] = kwargs.get ('dv', 0)
+
+    @_recorded
+    def deleteAttr (self, node_name, **kwargs) :
+        node = self._get_node (node_name)
+        attr = kwargs.get ('at') or kwargs.get ('attribute')
+
+        node.dynamic_attrs.pop (attr)
+        node.values.pop (attr, None)
+        self._connections = {destination : source for destination, source in self._connections.items()
+                             if destination != (node.uuid, attr) and source != (node.uuid, attr)}
+
+    @_recorded
+    def attributeQuery (self, attr, **kwargs) :
+        node = self._get_node (kwargs.get ('node') or kwargs.get ('n'))
+        if kwargs.get ('exists') or kwargs.get ('ex') :
+            return node is not None and self._has_attr (node, attr)
+        return None
+
+    @_recorded
+    def connectAttr (self, source, destination, **kwargs) :
+        source_node, source_attr = self._split (source)
+        destination_node, destination_attr = self._split (destination)
+
+        if source_node is None or destination_node is None :
+            raise RuntimeError ("Can't connect {} to {}".format(source, destination))
+
+        if (destination_node.uuid, destination_attr) in self._connections and not kwargs.get ('f') and not kwargs.get ('force') :
+            raise RuntimeError ("{} is already connected".format(self._plug_name (destination_node, destination_attr)))
+
+        self._connections[(destination_node.uuid, destination_attr)] = (source_node.uuid, source_attr)
+
+    @_recorded
+    def disconnectAttr (self, source, destination, **kwargs) :
+        destination_node, destination_attr = self._split (destination)
+        self._connections.pop ((destination_node.uuid, destination_attr), None)
+
+    @_recorded
+    def isConnected (self, source, destination, **kwargs) :
+        source_node, source_attr = self._split (source)
+        destination_node, destination_attr = self._split (destination)
+        return self._connections.get ((destination_node.uuid, destination_attr)) == (source_node.uuid, source_attr)
+
+    @_recorded
+    def listConnections (self, *args, **kwargs) :
+        source = kwargs.get ('s', kwargs.get ('source', True))
+        destination = kwargs.get ('d', kwargs.get ('destination', True))
+        with_connections = kwargs.get ('c') or kwargs.get ('connections')
+        with_plugs = kwargs.get ('p') or kwargs.get ('plugs')
+
+        result = []
+        for name in self._flatten (args) :
+            if '.' in name :
+                node, attr = self._split (name)
+            else :
+                node, attr = self._get_node (name), None
+
+            if node is None :
+                continue
+
+            for destination_plug, source_plug in self._connections.items() :
+                for mine, other, wanted in ((destination_plug, source_plug, source), (source_plug, destination_plug, destination)) :
+                    if not wanted or mine[0] != node.uuid :
+                        continue
+
+                    mine_attr = mine[1]
+                    if attr is not None and mine_attr != attr and not mine_attr.startswith (attr + '.') and not mine_attr.startswith (attr + '[') :
+                        continue
+
+                    other_node = self.nodes[other[0]]
+                    if with_connections :
+                        result.append (self._plug_name (node, mine_attr))
+                    result.append (self._plug_name (other_node, other[1]) if with_plugs else self._name (other_node))
+
+        return result or None
+
+    @_recorded
+    def undoInfo (self, **kwargs) :
+        if kwargs.get ('query') or kwargs.get ('q') :
+            return self.undo_state
+        for flag in ('state', 'stateWithoutFlush') :
+            if flag in kwargs :
+                self.undo_state = kwargs[flag]
+        if kwargs.get ('openChunk') :
+            self.undo_chunks += 1
+        if kwargs.get ('closeChunk') :
+            self.undo_chunks -= 1
+
+    @_recorded
+    def undo (self) :
+        return None
+
+    @_recorded
+    def refresh (self, **kwargs) :
+        if 'suspend' in kwargs :
+            self.refresh_suspended = kwargs['suspend']
+
+    @_recorded
+    def evaluationManager (self, **kwargs) :
+        if kwargs.get ('query') or kwargs.get ('q') :
+            return [self.evaluation_mode]
+        if 'mode' in kwargs :
+            self.evaluation_mode = kwargs['mode']
+
+    @_recorded
+    def dgdirty (self, *args, **kwargs) :
+        return None
+
+    @_recorded
+    def warning (self, message) :
+        self.warnings.append (message)
+
+    @_recorded
+    def about (self, **kwargs) :
+        if kwargs.get ('batch') :
+            return self.batch
+
+    @_recorded
+    def file (self, *args, **kwargs) :
+        if kwargs.get ('query') or kwargs.get ('q') :
+            return self.scene_modified if kwargs.get ('modified') else None
+        if kwargs.get ('new') :
+            self.scene_modified = False
+            self.nodes.clear ()
+            self._connections.clear ()
+            self._selection = []
+
+    # ------------------------------------------------------------------ #
+    # Helpers
+    # ------------------------------------------------------------------ #
+    def _flatten (self, values) :
+        result = []
+        for value in values :
+            if isinstance(value, (list, tuple)) :
+                result += self._flatten (value)
+            else :
+                result.append (value)
+        return result
+
+    def make_transform (self, name, translate = (0, 0, 0), rotate = (0, 0, 0), scale = (1, 1, 1), parent = None, node_type = 'transform') :
+        '''
+        Create a transform without recording the call. Used to build test scenes
+        '''
+        calls = self.calls.copy()
+        created = list(self.created_nodes)
+
+        name = self.createNode (node_type, name = name, parent = parent)
+        node = self._get_node (name)
+        node.values['translate'] = list(translate)
+        node.values['rotate'] = list(rotate)
+        node.values['scale'] = list(scale)
+
+        self.calls = calls
+        self.created_nodes = created
+
+        return name
@@ -0,0 +1,37 @@
+"""
+Test configuration : install the recording maya.cmds stand-in and import the toolkit as nb_rigging_toolkit
+"""
+import importlib.util
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert (0, os.path.dirname(__file__))
+from cmds_standin import CmdsStandIn
+
+ROOT = os.path.dirname (os.path.dirname (os.path.abspath(__file__)))
+
+# Fake maya package with the recording cmds stand-in
+STANDIN = CmdsStandIn ()
+maya_module = types.ModuleType ('maya')
+maya_module.cmds = STANDIN
+sys.modules['maya'] = maya_module
+sys.modules['maya.cmds'] = STANDIN
+
+# Import the repository as nb_rigging_toolkit package
+if 'nb_rigging_toolkit' not in sys.modules :
+    spec = importlib.util.spec_from_file_location ('nb_rigging_toolkit', os.path.join(ROOT, '__init__.py'), submodule_search_locations = [ROOT])
+    package = importlib.util.module_from_spec (spec)
+    sys.modules['nb_rigging_toolkit'] = package
+    spec.loader.exec_module (package)
+
+@pytest.fixture
+def cmds () :
+    '''
+    Empty stand-in scene with reset counters
+    '''
+    STANDIN.reset ()
+    yield STANDIN
+    STANDIN.reset ()
@@ -0,0 +1,68 @@
+"""
+Selection-free API : explicit nodes and options, maya selection is never read or changed
+"""
+import pytest
+
+from nb_rigging_toolkit import nb_rgtk_api as nb_api
+from nb_rigging_toolkit import nb_rgtk_matrix as nb_mat
+
+from test_call_budgets import out_connect
+
+def test_axis_mask () :
+    assert nb_api.AxisMask (translate = 'xz', scale = False).get_channels () == {'translate' : [True, False, True], 'rotate' : [True] * 3,
+                                                                                 'scale' : [False] * 3}
+    assert nb_api.AxisMask (rotate = (1, 0, 0)) == nb_api.AxisMask (rotate = 'x')
+    assert repr(nb_api.AxisMask (scale = 'y')) == 'AxisMask(rotate=xyz, scale=y, translate=xyz)'
+
+    # same rules as the interface checkboxes
+    for in_opm in (True, False) :
+        assert nb_api.AxisMask ().get_out_connect (in_opm) == out_connect (in_opm)
+
+    mask = nb_api.AxisMask (translate = 'y', rotate = False)
+    assert mask.get_out_connect (False) == nb_mat.MatrixConstraint.get_out_connect (nb_mat.MatrixConstraint, dict(mask.get_channels(), in_opm = False))
+
+    with pytest.raises (ValueError, match = 'Unknown axis w') :
+        nb_api.AxisMask (translate = 'xw')
+    with pytest.raises (ValueError, match = '3 values') :
+        nb_api.AxisMask (rotate = [True, False])
+
+def test_operations_keep_selection (cmds) :
+    cmds.make_transform ('world_ctrl')
+    cmds.make_transform ('chest_ctrl', translate = (0, 5, 0))
+    cmds.make_transform ('hand_ctrl', translate = (3, 5, 0))
+    cmds.make_transform ('hand_settings_ctrl')
+    cmds.make_transform ('prop_ctrl', translate = (3, 4, 1))
+    cmds.make_transform ('look_at_ctrl', translate = (0, 6, 10))
+    cmds.make_transform ('eye_jnt', translate = (0, 6, 1), node_type = 'joint')
+    cmds.setAttr ('eye_jnt.jointOrient', 10, 0, 0)
+    cmds.select ('world_ctrl')
+    cmds.reset_counters ()
+
+    assert nb_api.parent_constraint (['hand_ctrl', 'prop_ctrl'], axes = nb_api.AxisMask (scale = False))
+    assert nb_api.parent_space ('hand_ctrl', 'hand_settings_ctrl', ['world_ctrl', 'chest_ctrl'])
+    assert nb_api.aim_constraint ('look_at_ctrl', 'eye_jnt', primary_axis = (0, 0, 1))
+    assert nb_api.reset_joint_orient (['hand_ctrl', 'eye_jnt']) == ['eye_jnt']
+    nb_api.connect_attr ('visibility', 'world_ctrl', ['chest_ctrl', 'look_at_ctrl'])
+
+    assert cmds.calls['select'] == 0 and cmds.selection == ['world_ctrl']
+    assert not cmds.warnings
+    assert cmds.objExists ('prop_ctrl_parentMConstraint_pickMat')
+    assert cmds.getAttr ('eye_jnt.jointOrient') == [(0, 0, 0)]
+    assert cmds.connections['look_at_ctrl.visibility'] == 'world_ctrl.visibility'
+
+def test_invalid_input_is_reported (cmds) :
+    cmds.make_transform ('hand_ctrl')
+
+    assert nb_api.aim_constraint ('missing_ctrl', 'hand_ctrl') is None
+    assert not nb_api.parent_constraint (['hand_ctrl'])
+    assert cmds.warnings
+
+def test_get_selection (cmds) :
+    cmds.make_transform ('hand_ctrl')
+    cmds.make_transform ('prop_ctrl')
+    cmds.select ('hand_ctrl', 'prop_ctrl')
+
+    assert nb_api.get_selection (2) == ['hand_ctrl', 'prop_ctrl']
+    assert nb_api.get_selection (3) is None
+    assert nb_api.get_selection (maximum = 1) is None
+    assert cmds.warnings == ['Select at least 3 objects', 'Select at most 1 object']
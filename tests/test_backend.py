@@ -0,0 +1,22 @@
+"""
+Backends : om2 builder is batch-only, benchmark keeps unsaved scenes
+"""
+import pytest
+
+from nb_rigging_toolkit import nb_rgtk_backend as nb_backend
+
+def test_om2_backend_is_refused_with_undo_queue (cmds) :
+    nb_backend.set_backend ('om2')
+    try :
+        with pytest.raises (RuntimeError, match = "can't be undone") :
+            nb_backend.new_builder ()
+    finally :
+        nb_backend.set_backend ('cmds')
+
+def test_benchmark_refuses_unsaved_scene (cmds) :
+    cmds.make_transform ('rig_grp')
+    cmds.scene_modified = True
+
+    assert nb_backend.benchmark_backends (count = 2) is None
+    assert cmds.objExists ('rig_grp') and cmds.calls['file'] == 1
+    assert 'unsaved changes' in cmds.warnings[0]
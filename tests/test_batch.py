@@ -0,0 +1,141 @@
+"""
+Batch runner scheduling, with a maya layer working on the cmds stand-in
+"""
+import functools
+import json
+import os
+
+import pytest
+
+from conftest import STANDIN
+from nb_rigging_toolkit import nb_rgtk_batch as nb_batch
+
+class StandInLayer () :
+    '''
+    Maya layer opening stand-in scenes : 'rig_<n>.ma' files have n controls and one settings control, other files don't exist
+    '''
+    saved = []
+
+    def __init__ (self, uninitialized_dir = None) :
+        '''
+        uninitialized_dir -> directory where uninitialize writes a file named by the process id (str)
+        '''
+        self.uninitialized_dir = uninitialized_dir
+
+    def initialize (self) :
+        pass
+
+    def open_file (self, path) :
+        name = os.path.basename (path)
+        if not name.startswith ('rig_') :
+            raise RuntimeError ("File not found: {}".format(path))
+
+        STANDIN.reset ()
+        for x in range(int(name[4:-3])) :
+            STANDIN.make_transform ('ctrl{}'.format(x), translate = (x, 0, 0))
+        STANDIN.make_transform ('settings_ctrl')
+
+    def save_file (self, path) :
+        self.saved.append (path)
+
+    def uninitialize (self) :
+        if self.uninitialized_dir :
+            open (os.path.join(self.uninitialized_dir, str(os.getpid())), 'w').close ()
+
+def job (files, **kwargs) :
+    '''
+    Return a job constraining ctrl1 to ctrl0 and baking ctrl2 in offsetParentMatrix
+    '''
+    job_dict = {'files' : files,
+                'operations' : [{'operation' : 'parent_constraint', 'pairs' : [[['ctrl0'], 'ctrl1']], 'channels' : {'scale' : False}},
+                                {'operation' : 'opm', 'objects' : ['ctrl2']}]}
+    job_dict.update (kwargs)
+    return job_dict
+
+@pytest.fixture (autouse = True)
+def clear_saved () :
+    StandInLayer.saved = []
+    yield
+    STANDIN.reset ()
+
+def test_job_is_checked_before_running () :
+    with pytest.raises (nb_batch.BatchError, match = 'Unknown operations') :
+        nb_batch.load_job ({'files' : ['rig_3.ma'], 'operations' : [{'operation' : 'explode'}]})
+
+    with pytest.raises (nb_batch.BatchError, match = 'no file') :
+        nb_batch.load_job ({'files' : []})
+
+def test_files_get_job_and_own_operations (tmp_path) :
+    job_path = tmp_path / 'job.json'
+    job_path.write_text (json.dumps (job(['rig_3.ma', {'path' : 'rig_4.ma', 'operations' : [{'operation' : 'module', 'names' : ['arm_L']}]}],
+                                         output_dir = 'out')))
+
+    tasks = nb_batch.load_job (str(job_path))
+
+    assert [len(task['operations']) for task in tasks] == [2, 3]
+    assert tasks[1]['output'] == os.path.join ('out', 'rig_4.ma')
+
+def test_in_process_run_reports_each_file () :
+    results = nb_batch.run_job (job(['rig_3.ma', 'missing.ma', 'rig_1.ma']), workers = 0, layer_factory = StandInLayer)
+
+    assert [result['status'] for result in results] == ['ok', 'failed', 'failed']
+    assert [name for name, duration in results[0]['operations']] == ['parent_constraint', 'opm']
+    assert 'File not found' in results[1]['error']
+
+    # rig_1 has no ctrl1 : the file stops at the failed constraint and is not saved
+    assert results[2]['operations'] == []
+    assert StandInLayer.saved == ['rig_3.ma']
+
+def test_pool_runs_files_in_workers (capsys) :
+    files = ['rig_{}.ma'.format(x) for x in range(3, 9)] + ['missing.ma']
+
+    results = nb_batch.run_job (job(files, save = False), workers = 3, layer_factory = StandInLayer)
+
+    # Results come back in job order, computed in other processes
+    assert [result['path'] for result in results] == files
+    assert all(result['pid'] != os.getpid() for result in results)
+    assert [result['status'] for result in results] == ['ok'] * 6 + ['failed']
+
+    summary = nb_batch.print_summary (results)
+    assert '7 files, 6 ok, 1 failed' in summary
+    assert 'missing.ma' in capsys.readouterr().out
+
+def test_job_files_are_processed_once () :
+    with pytest.raises (nb_batch.BatchError, match = 'given twice') :
+        nb_batch.load_job (job(['rig_3.ma', 'rig_4.ma', './rig_3.ma']))
+
+    with pytest.raises (nb_batch.BatchError, match = 'both saved as') :
+        nb_batch.load_job (job(['a/rig_3.ma', 'b/rig_3.ma'], output_dir = 'out'))
+
+    with pytest.raises (nb_batch.BatchError, match = 'both saved as') :
+        nb_batch.load_job (job(['rig_3.ma', 'out/rig_3.ma'], output_dir = 'out'))
+
+    # Not saved, same names are fine
+    assert len(nb_batch.load_job (job(['a/rig_3.ma', 'b/rig_3.ma'], save = False))) == 2
+
+def test_pool_saves_files_in_job_order (tmp_path) :
+    files = ['rig_3.ma', 'rig_4.ma', 'missing.ma', 'rig_5.ma', 'rig_6.ma']
+
+    results = nb_batch.run_job (job(files, output_dir = 'out'), workers = 2, layer_factory = functools.partial(StandInLayer, str(tmp_path)))
+
+    assert [result['path'] for result in results] == files
+    assert [result['index'] for result in results] == list(range(len(files)))
+    assert [result['status'] for result in results] == ['ok', 'ok', 'failed', 'ok', 'ok']
+
+    # Each worker stops its layer when the pool is closed
+    assert {str(result['pid']) for result in results} <= set(os.listdir (tmp_path))
+
+def test_in_process_layer_is_stopped (tmp_path) :
+    nb_batch.run_job (job(['rig_3.ma']), workers = 0, layer_factory = functools.partial(StandInLayer, str(tmp_path)))
+
+    assert os.listdir (tmp_path) == [str(os.getpid())]
+    assert nb_batch._layer is None
+
+def test_main_returns_failure_code (tmp_path) :
+    job_path = tmp_path / 'job.json'
+    report_path = tmp_path / 'report.json'
+    job_path.write_text (json.dumps (job(['missing.ma'])))
+
+    # maya.standalone doesn't exist here, the file fails
+    assert nb_batch.main ([str(job_path), '--workers', '0', '--report', str(report_path)]) == 1
+    assert json.loads (report_path.read_text())[0]['status'] == 'failed'
@@ -0,0 +1,237 @@
+"""
+Call-count budgets of toolkit operations.
+Each operation runs against the recording cmds stand-in at several input sizes. The number of calls of each kind and the
+number of created nodes must stay under the operation budget : fixed + linear * n + quadratic * n * n
+"""
+import collections
+
+import pytest
+
+from nb_rigging_toolkit import nb_rgtk_matrix as nb_mat
+from nb_rigging_toolkit import nb_rgtk_parent_space as nb_ps
+from nb_rigging_toolkit import nb_rgtk_utils as nb_utils
+from nb_rigging_toolkit import nb_rgtk_skeleton as nb_skeleton
+
+SIZES = [1, 5, 20]
+
+# {operation : {kind : (fixed, linear, quadratic)}}. 'total' is the sum of all calls, 'nodes' the number of created nodes
+BUDGETS = {
+    'matrix_parent_constraint' : {'total' : (21, 11, 0), 'createNode' : (1, 2, 0), 'connectAttr' : (1, 3, 0), 'setAttr' : (8, 4, 0), 'nodes' : (1, 2, 0)},
+    'matrix_parent_constraint_pairwise' : {'total' : (10, 23, 0), 'createNode' : (0, 3, 0), 'connectAttr' : (0, 13, 0), 'setAttr' : (0, 3, 0), 'nodes' : (0, 3, 0)},
+    'matrix_aim_constraint' : {'total' : (0, 26, 0), 'createNode' : (0, 3, 0), 'connectAttr' : (0, 5, 0), 'setAttr' : (0, 7, 0), 'nodes' : (0, 3, 0)},
+    'aim_constraint_batch' : {'total' : (9, 17, 0), 'createNode' : (0, 3, 0), 'connectAttr' : (0, 5, 0), 'setAttr' : (0, 5, 0), 'ls' : (2, 0, 0), 'nodes' : (0, 3, 0)},
+    'mass_attach' : {'total' : (10, 40, 0), 'createNode' : (0, 7, 0), 'connectAttr' : (1, 10, 0), 'setAttr' : (0, 20, 0), 'getAttr' : (0, 2, 0), 'ls' : (2, 0, 0),
+                     'nodes' : (0, 7, 0)},
+    'aim_constraint_in_place' : {'total' : (0, 30, 0), 'createNode' : (0, 3, 0), 'connectAttr' : (0, 7, 0), 'setAttr' : (0, 5, 0), 'parent' : (0, 0, 0), 'nodes' : (0, 3, 0)},
+    'aim_chain' : {'total' : (30, 22, 0), 'createNode' : (3, 4, 0), 'connectAttr' : (6, 8, 0), 'setAttr' : (6, 7, 0), 'parent' : (0, 0, 0), 'nodes' : (3, 4, 0)},
+    'parentSpace' : {'total' : (14, 9, 0), 'createNode' : (1, 2, 0), 'connectAttr' : (2, 3, 0), 'setAttr' : (2, 3, 0), 'nodes' : (1, 2, 0)},
+    'set_transform_in_opm' : {'total' : (11, 6, 0), 'createNode' : (0, 0, 0), 'connectAttr' : (0, 0, 0), 'setAttr' : (0, 4, 0), 'select' : (0, 0, 0), 'nodes' : (0, 0, 0)},
+    'create_rigging_module' : {'total' : (0, 23, 0), 'createNode' : (0, 5, 0), 'connectAttr' : (0, 0, 0), 'setAttr' : (0, 10, 0), 'objExists' : (0, 0, 0),
+                               'parent' : (0, 0, 0), 'nodes' : (0, 5, 0)},
+    'create_modules' : {'total' : (8, 15, 0), 'createNode' : (0, 5, 0), 'setAttr' : (0, 10, 0), 'ls' : (1, 0, 0), 'parent' : (0, 0, 0), 'nodes' : (0, 5, 0)},
+    'fast_connect_attr' : {'total' : (12, 1, 0), 'createNode' : (0, 0, 0), 'connectAttr' : (0, 1, 0), 'setAttr' : (0, 0, 0), 'ls' : (4, 0, 0), 'objExists' : (0, 0, 0),
+                          'nodes' : (0, 0, 0)},
+    'orient_skeleton' : {'total' : (10, 4, 0), 'getAttr' : (0, 2, 0), 'setAttr' : (0, 2, 0), 'ls' : (2, 0, 0), 'nodes' : (0, 0, 0)},
+    'orient_skeleton_aim' : {'total' : (12, 5, 0), 'getAttr' : (0, 2, 0), 'setAttr' : (0, 3, 0), 'ls' : (2, 0, 0), 'nodes' : (0, 0, 0)},
+}
+
+def out_connect (in_opm) :
+    '''
+    Return matrix_parent_constraint out_connect rules with every axis connected
+    '''
+    return [[[['TranslateX', 'translateX'], True], [['TranslateY', 'translateY'], True], [['TranslateZ', 'translateZ'], True]],
+            [[['RotateX', 'rotateX'], True], [['RotateY', 'rotateY'], True], [['RotateZ', 'rotateZ'], True]],
+            [[['ScaleX', 'scaleX'], True], [['ScaleY', 'scaleY'], True], [['ScaleZ', 'scaleZ'], True]],
+            in_opm]
+
+class Recorder () :
+    '''
+    Accumulate stand-in calls and created nodes of operations only, scene setup calls are ignored
+    '''
+    def __init__ (self, cmds) :
+        self.cmds = cmds
+        self.calls = collections.Counter()
+        self.nodes = 0
+
+    def run (self, function, *args, **kwargs) :
+        self.cmds.reset_counters ()
+        result = function (*args, **kwargs)
+
+        self.calls.update (self.cmds.calls)
+        self.nodes += len(self.cmds.created_nodes)
+
+        return result
+
+    def check (self, operation, size) :
+        '''
+        Fail with a report of every kind over budget
+        '''
+        assert not self.cmds.warnings, self.cmds.warnings
+
+        # Transactions must leave undo, refresh and evaluation state as they were
+        assert self.cmds.undo_chunks == 0
+        assert not self.cmds.refresh_suspended
+        assert self.cmds.evaluation_mode == 'parallel'
+
+        measured = dict(self.calls, total = sum(self.calls.values()), nodes = self.nodes)
+        over_budget = []
+
+        for kind, (fixed, linear, quadratic) in BUDGETS[operation].items() :
+            budget = fixed + linear * size + quadratic * size * size
+            if measured.get (kind, 0) > budget :
+                over_budget.append ('{} : {} > {}'.format(kind, measured.get(kind, 0), budget))
+
+        assert not over_budget, '{} (n = {}) over budget : {}'.format(operation, size, ', '.join(over_budget))
+
+@pytest.mark.parametrize ('size', SIZES)
+def test_matrix_parent_constraint_budget (cmds, size) :
+    triggers = [cmds.make_transform ('trigger{}'.format(x), translate = (x, 1, 0)) for x in range(size)]
+    target = cmds.make_transform ('target', translate = (0, 2, 3), rotate = (10, 20, 30))
+    cmds.select (triggers + [target])
+
+    recorder = Recorder (cmds)
+    recorder.run (nb_mat.MatrixConstraint.matrix_parent_constraint, nb_mat.MatrixConstraint, True, 'worldMatrix[0]', out_connect(True))
+    recorder.check ('matrix_parent_constraint', size)
+
+@pytest.mark.parametrize ('size', SIZES)
+def test_matrix_parent_constraint_pairwise_budget (cmds, size) :
+    triggers = [cmds.make_transform ('proxy{}'.format(x), translate = (x, 1, 0)) for x in range(size)]
+    targets = [cmds.make_transform ('joint{}'.format(x), translate = (x, 0, 0)) for x in range(size)]
+    cmds.select (triggers + targets)
+
+    recorder = Recorder (cmds)
+    recorder.run (nb_mat.MatrixConstraint.matrix_parent_constraint, nb_mat.MatrixConstraint, True, 'worldMatrix[0]', out_connect(False), 'pairwise')
+    recorder.check ('matrix_parent_constraint_pairwise', size)
+
+@pytest.mark.parametrize ('size', SIZES)
+def test_matrix_aim_constraint_budget (cmds, size) :
+    recorder = Recorder (cmds)
+
+    for x in range(size) :
+        trigger = cmds.make_transform ('aim{}'.format(x), translate = (x, 5, 0))
+        target = cmds.make_transform ('eye{}'.format(x), translate = (x, 0, 0))
+        cmds.select ([trigger, target])
+        recorder.run (nb_mat.MatrixConstraint.matrix_aim_constraint, nb_mat.MatrixConstraint, False, (0, 1, 0), '', (1, 0, 0), (0, 1, 0))
+
+    recorder.check ('matrix_aim_constraint', size)
+
+@pytest.mark.parametrize ('size', SIZES)
+def test_aim_constraint_batch_budget (cmds, size) :
+    pairs = [['aim{}'.format(x), cmds.make_transform ('eye{}'.format(x), translate = (x, 0, 0))] for x in range(size)]
+    for x in range(size) :
+        cmds.make_transform ('aim{}'.format(x), translate = (x, 5, 0))
+
+    # Pairs are resolved once, reparented targets don't make other names resolved again
+    recorder = Recorder (cmds)
+    recorder.run (nb_mat.MatrixConstraint.aim_constraint_batch, nb_mat.MatrixConstraint, pairs, False, (0, 1, 0), '', (1, 0, 0), (0, 1, 0))
+    recorder.check ('aim_constraint_batch', size)
+
+@pytest.mark.parametrize ('size', SIZES)
+def test_mass_attach_budget (cmds, size) :
+    drivers = [cmds.make_transform ('spine{}_jnt'.format(x), translate = (0, x, 0)) for x in range(size)]
+    followers = [cmds.make_transform ('button{}_ctrl'.format(x), translate = (1, x + 0.3, 0)) for x in range(size)]
+
+    recorder = Recorder (cmds)
+    recorder.run (nb_mat.MatrixConstraint.mass_attach, nb_mat.MatrixConstraint, followers, drivers, 3)
+    recorder.check ('mass_attach', size)
+
+@pytest.mark.parametrize ('size', SIZES)
+def test_aim_constraint_in_place_budget (cmds, size) :
+    recorder = Recorder (cmds)
+
+    for x in range(size) :
+        trigger = cmds.make_transform ('aim{}'.format(x), translate = (x, 5, 0))
+        head = cmds.make_transform ('head{}'.format(x), translate = (x, 2, 0))
+        target = cmds.make_transform ('eye{}'.format(x), translate = (0, 1, 0), parent = head)
+        recorder.run (nb_mat.MatrixConstraint.aim_constraint, nb_mat.MatrixConstraint, trigger, target, True, (0, 1, 0), '', (1, 0, 0), (0, 1, 0), 'parent')
+
+    recorder.check ('aim_constraint_in_place', size)
+
+@pytest.mark.parametrize ('size', SIZES)
+def test_aim_chain_budget (cmds, size) :
+    chain = [cmds.make_transform ('tail{}'.format(x), translate = (x, 5, 0)) for x in range(size + 1)]
+
+    recorder = Recorder (cmds)
+    recorder.run (nb_mat.MatrixConstraint.aim_chain, nb_mat.MatrixConstraint, chain, (0, 1, 0), '', (1, 0, 0), (0, 1, 0), 'chain')
+    recorder.check ('aim_chain', size)
+
+@pytest.mark.parametrize ('size', SIZES)
+def test_parent_space_budget (cmds, size) :
+    triggers = [cmds.make_transform ('space{}_ctrl'.format(x), translate = (x, 1, 0)) for x in range(size)]
+    target = cmds.make_transform ('hand_ctrl', translate = (3, 2, 1))
+    settings = cmds.make_transform ('settings_ctrl')
+
+    recorder = Recorder (cmds)
+    recorder.run (nb_ps.parentSpace, target, triggers, settings, True, 'parentSpace')
+    recorder.check ('parentSpace', size)
+
+@pytest.mark.parametrize ('size', SIZES)
+def test_set_transform_in_opm_budget (cmds, size) :
+    controls = [cmds.make_transform ('ctrl{}'.format(x), translate = (x, 1, 0), rotate = (0, 15 * x, 0)) for x in range(size)]
+    cmds.select (controls)
+
+    recorder = Recorder (cmds)
+    recorder.run (nb_utils.set_transform_in_opm)
+    recorder.check ('set_transform_in_opm', size)
+
+@pytest.mark.parametrize ('size', SIZES)
+def test_create_rigging_module_budget (cmds, size) :
+    recorder = Recorder (cmds)
+
+    for x in range(size) :
+        recorder.run (nb_utils.create_rigging_module, 'module{}'.format(x))
+
+    recorder.check ('create_rigging_module', size)
+
+@pytest.mark.parametrize ('size', SIZES)
+def test_create_modules_budget (cmds, size) :
+    recorder = Recorder (cmds)
+    recorder.run (nb_utils.create_modules, ['module{}'.format(x) for x in range(size)])
+    recorder.check ('create_modules', size)
+
+@pytest.mark.parametrize ('size', SIZES)
+def test_fast_connect_attr_budget (cmds, size) :
+    nodes = [cmds.make_transform ('node{}'.format(x)) for x in range(size + 1)]
+    cmds.select (nodes)
+
+    recorder = Recorder (cmds)
+    recorder.run (nb_utils.fast_connect_attr, 'visibility')
+    recorder.check ('fast_connect_attr', size)
+
+def make_skeleton (cmds, size) :
+    '''
+    Return root of a joint chain of size joints with a control under each joint
+    '''
+    parent = None
+    for x in range(size) :
+        parent = cmds.make_transform ('spine{}_jnt'.format(x), translate = (0, 1, 0.2 * x), rotate = (0, 10, 0), parent = parent, node_type = 'joint')
+        cmds.setAttr ('{}.jointOrient'.format(parent), 5, 0, 0)
+
+    return 'spine0_jnt'
+
+@pytest.mark.parametrize ('size', SIZES)
+def test_orient_skeleton_budget (cmds, size) :
+    root = make_skeleton (cmds, size)
+
+    recorder = Recorder (cmds)
+    recorder.run (nb_skeleton.orient_skeleton, [root], 'zero_orient')
+    recorder.check ('orient_skeleton', size)
+
+@pytest.mark.parametrize ('size', SIZES)
+def test_orient_skeleton_aim_budget (cmds, size) :
+    root = make_skeleton (cmds, size)
+
+    recorder = Recorder (cmds)
+    recorder.run (nb_skeleton.orient_skeleton, [root], 'aim', True, (0, 1, 0), (0, 0, 1), (0, 0, 1))
+    recorder.check ('orient_skeleton_aim', size)
+
+def test_budget_failure_is_reported (cmds) :
+    '''
+    An operation over budget must fail with the kind and the measured value
+    '''
+    recorder = Recorder (cmds)
+    recorder.run (nb_utils.create_rigging_module, 'module')
+    recorder.run (nb_utils.create_rigging_module, 'other_module')
+
+    with pytest.raises (AssertionError, match = 'createNode : 10 > 5') :
+        recorder.check ('create_rigging_module', 1)
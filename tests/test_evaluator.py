@@ -0,0 +1,144 @@
+"""
+Offline evaluator : networks read from the stand-in scene give back the built pose, and follow new input poses
+"""
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from nb_rigging_toolkit import nb_rgtk_api as nb_api
+from nb_rigging_toolkit import nb_rgtk_evaluator as nb_eval
+from nb_rigging_toolkit import nb_rgtk_math as nb_math
+
+def test_networks_give_back_the_built_pose (cmds) :
+    cmds.make_transform ('hand_ctrl', translate = (3, 5, 0), rotate = (0, 0, 30))
+    cmds.make_transform ('chest_ctrl', translate = (0, 5, 0), rotate = (10, 0, 0))
+    cmds.make_transform ('prop_ctrl', translate = (3, 4, 1), rotate = (0, 45, 0))
+    cmds.make_transform ('button_ctrl', translate = (1, 5, 0.5), scale = (2, 2, 2))
+    head = cmds.make_transform ('head_ctrl', translate = (0, 7, 0))
+    cmds.make_transform ('eye_ctrl', translate = (0.5, 0.5, 1), parent = head)
+    cmds.make_transform ('look_at_ctrl', translate = (0, 8, 10))
+    targets = ['prop_ctrl', 'button_ctrl', 'eye_ctrl']
+    world_matrices = [cmds.world_matrix (cmds._get_node(name)) for name in targets]
+
+    assert nb_api.parent_constraint (['hand_ctrl', 'prop_ctrl'], axes = nb_api.AxisMask (scale = False))
+    assert nb_api.mass_attach (['button_ctrl'], ['hand_ctrl', 'chest_ctrl'], count = 2, axes = nb_api.AxisMask (scale = 'x'))
+    assert nb_api.aim_constraint ('look_at_ctrl', 'eye_ctrl', input_mode = 'parent')
+
+    graph = nb_eval.read_network (targets)
+    assert {'multMatrix', 'blendMatrix', 'pickMatrix', 'aimMatrix', 'composeMatrix', 'decomposeMatrix'} <= set(data['type'] for data in graph['nodes'].values())
+
+    results = nb_eval.evaluate (graph, ['{}.worldMatrix[0]'.format(name) for name in targets], workers = 0)
+    for name, world_matrix in zip(targets[:2], world_matrices) :
+        assert np.allclose (results['{}.worldMatrix[0]'.format(name)], world_matrix[None])
+
+    # eye stays in place and its X axis aims at look_at_ctrl
+    eye_matrix = results['eye_ctrl.worldMatrix[0]'][0]
+    aim = np.array([0, 8, 10]) - world_matrices[2][3, :3]
+    assert np.allclose (eye_matrix[3, :3], world_matrices[2][3, :3])
+    assert np.allclose (eye_matrix[0, :3], aim / np.linalg.norm(aim))
+
+def test_parent_constraint_follows_input_poses (cmds, monkeypatch) :
+    cmds.make_transform ('hand_ctrl', translate = (3, 5, 0), rotate = (0, 0, 30))
+    cmds.make_transform ('prop_ctrl', translate = (3, 4, 1), rotate = (0, 45, 0))
+    offset = cmds.world_matrix (cmds._get_node('prop_ctrl')) @ np.linalg.inv (cmds.world_matrix (cmds._get_node('hand_ctrl')))
+    nb_api.parent_constraint (['hand_ctrl', 'prop_ctrl'])
+
+    # one pose per frame
+    rng = np.random.default_rng (7)
+    translates, rotates = rng.uniform (-10, 10, (50, 3)), rng.uniform (-180, 180, (50, 3))
+    inputs = {'hand_ctrl.translate' : translates, 'hand_ctrl.rotate' : rotates}
+    expected = np.matmul (offset, nb_math.compose_matrices (translates, rotates, np.ones((50, 3))))
+
+    graph = nb_eval.read_network (['prop_ctrl'])
+    results = nb_eval.evaluate (graph, ['prop_ctrl.worldMatrix[0]'], inputs, workers = 0)
+    assert not nb_eval.get_errors (results, {'prop_ctrl.worldMatrix[0]' : expected})
+
+    # by default, long frame ranges are evaluated in the current process
+    monkeypatch.setattr (nb_eval.multiprocessing, 'Pool', None)
+    assert np.allclose (nb_eval.evaluate (graph, ['prop_ctrl.worldMatrix[0]'], inputs, chunk_size = 20)['prop_ctrl.worldMatrix[0]'], expected)
+    monkeypatch.undo ()
+
+    # frames evaluated by chunks in worker processes give the same values
+    pooled = nb_eval.evaluate (graph, ['prop_ctrl.worldMatrix[0]'], inputs, workers = 2, chunk_size = 20)
+    assert np.allclose (pooled['prop_ctrl.worldMatrix[0]'], results['prop_ctrl.worldMatrix[0]'])
+
+def test_parent_space_selector_frames (cmds) :
+    cmds.make_transform ('world_ctrl', translate = (0, 0, 0))
+    cmds.make_transform ('chest_ctrl', translate = (0, 5, 0), rotate = (0, 90, 0))
+    cmds.make_transform ('hand_ctrl', translate = (3, 5, 0))
+    cmds.make_transform ('settings_ctrl')
+    world_matrix = cmds.world_matrix (cmds._get_node('hand_ctrl'))
+    assert nb_api.parent_space ('hand_ctrl', 'settings_ctrl', ['world_ctrl', 'chest_ctrl'])
+
+    graph = nb_eval.read_network (['hand_ctrl'])
+    chest_matrices = np.tile (cmds.world_matrix (cmds._get_node('chest_ctrl')), (4, 1, 1))
+    chest_matrices[:, 3, 0] = [0, 2, 0, 2]
+    results = nb_eval.evaluate (graph, ['hand_ctrl.worldMatrix[0]'], {'settings_ctrl.parentSpace' : [0, 0, 1, 1],
+                                                                      'chest_ctrl.worldMatrix[0]' : chest_matrices})
+
+    # world space doesn't follow chest, chest space does
+    assert np.allclose (results['hand_ctrl.worldMatrix[0]'][:3], world_matrix[None])
+    assert np.allclose (results['hand_ctrl.worldMatrix[0]'][3, 3, :3], world_matrix[3, :3] + (2, 0, 0))
+
+def test_aim_constraint_aims_at_input_positions (cmds) :
+    cmds.make_transform ('look_at_ctrl', translate = (0, 6, 10))
+    cmds.make_transform ('eye_ctrl', translate = (0, 6, 1))
+    nb_api.aim_constraint ('look_at_ctrl', 'eye_ctrl', primary_axis = (0, 0, 1), secondary_axis = (0, 1, 0))
+
+    targets = np.array([[0, 6, 10], [5, 6, 1], [-3, 9, -4]], dtype = float)
+    results = nb_eval.evaluate (nb_eval.read_network (['eye_ctrl']), ['eye_ctrl.worldMatrix[0]'], {'look_at_ctrl.translate' : targets})
+    matrices = results['eye_ctrl.worldMatrix[0]']
+
+    aims = targets - matrices[:, 3, :3]
+    assert np.allclose (matrices[:, 2, :3], aims / np.linalg.norm (aims, axis = -1)[:, None])
+    assert np.allclose (matrices[:, 3, :3], (0, 6, 1))
+    assert np.all (matrices[:, 1, 1] > 0)
+
+def test_graph_file_and_errors (cmds, tmp_path) :
+    graph = {'nodes' : {'hand_ctrl' : {'type' : 'transform', 'parent' : None, 'values' : {'translate' : [1, 2, 3]}},
+                        'blend' : {'type' : 'blendMatrix', 'values' : {'target[0].weight' : 0.5,
+                                                                         'target[0].targetMatrix' : nb_math.flatten_matrix (nb_math.compose_matrices ([4, 0, 0], [0, 0, 90], [3, 3, 3])[0])}},
+                        'curve' : {'type' : 'input', 'values' : {}}},
+             'connections' : [['blend.outputMatrix', 'hand_ctrl.offsetParentMatrix'], ['curve.output', 'hand_ctrl.rotateX']]}
+    path = str(tmp_path / 'graph.json')
+    nb_eval.save_graph (graph, path)
+    loaded = nb_eval.load_graph (path)
+
+    # half way : translate and scale are linear, rotation is spherical
+    results = nb_eval.evaluate (loaded, ['blend.omat', 'hand_ctrl.translateY'], {'curve.output' : [0.0]})
+    assert np.allclose (results['blend.omat'][0], nb_math.compose_matrices ([2, 0, 0], [0, 0, 45], [2, 2, 2])[0])
+    assert results['hand_ctrl.translateY'][0] == 2
+
+    with pytest.raises (nb_eval.EvaluationError, match = 'curve.output has no value') :
+        nb_eval.evaluate (loaded, ['hand_ctrl.worldMatrix[0]'])
+    with pytest.raises (nb_eval.EvaluationError, match = 'different numbers of frames') :
+        nb_eval.evaluate (loaded, ['hand_ctrl.wm[0]'], {'curve.output' : [0.0, 1.0], 'hand_ctrl.translate' : [[0, 0, 0]]})
+
+    loaded['connections'].append (['hand_ctrl.worldMatrix[0]', 'blend.inputMatrix'])
+    with pytest.raises (nb_eval.EvaluationError, match = 'Cycle') :
+        nb_eval.evaluate (loaded, ['hand_ctrl.worldMatrix[0]'], {'curve.output' : [0.0]})
+
+def test_check_scene (cmds) :
+    root = cmds.make_transform ('root_jnt', translate = (1, 2, 3), rotate = (0, 30, 0), node_type = 'joint')
+    cmds.setAttr ('root_jnt.jointOrient', 0, 0, 45)
+    cmds.make_transform ('arm_jnt', translate = (2, 0, 0), rotate = (10, 0, 0), scale = (1, 2, 1), parent = root, node_type = 'joint')
+
+    assert nb_eval.check_scene (['arm_jnt']) == {}
+    assert nb_eval.get_errors ({'arm_jnt.translateX' : np.array([2.0])}, {'arm_jnt.translateX' : [2.5]}) == {'arm_jnt.translateX' : 0.5}
+
+def test_evaluator_runs_without_maya () :
+    root = os.path.dirname (os.path.dirname (os.path.abspath(__file__)))
+    script = ("import importlib.util, sys\n"
+              "spec = importlib.util.spec_from_file_location ('nb_rigging_toolkit', {init!r}, submodule_search_locations = [{root!r}])\n"
+              "sys.modules['nb_rigging_toolkit'] = importlib.util.module_from_spec (spec)\n"
+              "spec.loader.exec_module (sys.modules['nb_rigging_toolkit'])\n"
+              "from nb_rigging_toolkit import nb_rgtk_evaluator as nb_eval\n"
+              "graph = {{'nodes' : {{'a' : {{'type' : 'joint', 'parent' : None, 'values' : {{'jointOrient' : [0, 0, 90]}}}}}}, 'connections' : []}}\n"
+              "print (nb_eval.evaluate (graph, ['a.matrix'], frames = 3)['a.matrix'].shape, 'maya' in sys.modules)\n").format(init = os.path.join(root, '__init__.py'), root = root)
+
+    output = subprocess.run ([sys.executable, '-c', script], capture_output = True, text = True, check = True).stdout
+
+    assert output.strip() == '(3, 4, 4) False'
@@ -0,0 +1,93 @@
+"""
+Node handles : names resolved once per operation, duplicate short names, nodes reparented during an operation
+"""
+import pytest
+
+from nb_rigging_toolkit import nb_rgtk_handles as nb_handles
+from nb_rigging_toolkit import nb_rgtk_matrix as nb_mat
+from nb_rigging_toolkit import nb_rgtk_parent_space as nb_ps
+from nb_rigging_toolkit import nb_rgtk_transaction as nb_transaction
+
+from test_call_budgets import out_connect
+
+def duplicated_controls (cmds) :
+    '''
+    Build two 'ctrl' transforms, under left_grp and right_grp
+    '''
+    cmds.make_transform ('left_grp', translate = (2, 0, 0))
+    cmds.make_transform ('right_grp', translate = (-2, 0, 0))
+    cmds.make_transform ('ctrl', translate = (0, 1, 0), parent = 'left_grp')
+    cmds.make_transform ('ctrl', translate = (0, 3, 0), parent = 'right_grp')
+
+def test_names_are_resolved_once_per_operation (cmds) :
+    duplicated_controls (cmds)
+
+    with nb_transaction.SceneTransaction ('resolve') :
+        left, right = nb_handles.resolve (['left_grp|ctrl', '|right_grp|ctrl'])
+        cmds.reset_counters ()
+
+        assert nb_handles.resolve (['|right_grp|ctrl', 'left_grp|ctrl']) == [right, left]
+        assert cmds.calls['ls'] == 0
+
+    assert left.path == '|left_grp|ctrl' and left.short_name == 'ctrl'
+    assert '{}.worldMatrix[0]'.format(right) == '|right_grp|ctrl.worldMatrix[0]'
+
+    # A short name matching two nodes is not resolved
+    with pytest.raises (ValueError, match = 'ctrl doesn\'t exist or is not unique') :
+        nb_handles.resolve (['left_grp', 'ctrl'])
+
+def test_constraint_between_duplicated_short_names (cmds) :
+    duplicated_controls (cmds)
+
+    assert nb_mat.MatrixConstraint.matrix_parent_constraint_batch (nb_mat.MatrixConstraint, [[['left_grp|ctrl'], 'right_grp|ctrl']], True, 'worldMatrix[0]', out_connect(True))
+    assert not cmds.warnings
+
+    assert cmds.connections['right_grp|ctrl.offsetParentMatrix'] == 'ctrl_ctrl_parentMConstraint_multMat.matrixSum'
+    assert cmds.connections['ctrl_ctrl_parentMConstraint_multMat.matrixIn[1]'] == 'left_grp|ctrl.worldMatrix[0]'
+
+    # A constraint to itself is found even when the node is given by two names
+    cmds.reset_counters ()
+    assert not nb_mat.MatrixConstraint.matrix_parent_constraint_batch (nb_mat.MatrixConstraint, [[['|left_grp|ctrl'], 'left_grp|ctrl']], True, 'worldMatrix[0]', out_connect(False))
+    assert "can't be constrained to itself" in cmds.warnings[0]
+
+def test_ambiguous_names_are_reported (cmds) :
+    duplicated_controls (cmds)
+    cmds.make_transform ('settings_ctrl')
+
+    assert not nb_ps.parent_space_batch ([('left_grp|ctrl', 'settings_ctrl', ['ctrl'], 'parentSpace', True)])
+    assert cmds.warnings == ["Parent space errors : ctrl doesn't exists or is not unique"]
+
+def test_aim_target_is_found_after_reparent (cmds) :
+    duplicated_controls (cmds)
+    cmds.make_transform ('look_at', translate = (0, 10, 0))
+    cmds.select (['look_at', 'right_grp|ctrl'])
+
+    nb_mat.MatrixConstraint.matrix_aim_constraint (nb_mat.MatrixConstraint, True, (0, 1, 0), '', (1, 0, 0), (0, 1, 0))
+
+    # Target is reset and connected under its input group, the other ctrl is not touched
+    assert cmds.ls ('ctrl', long = True) == ['|left_grp|ctrl', '|ctrl_aimMConstraint_input|ctrl']
+    assert cmds.connections['ctrl_aimMConstraint_input|ctrl.offsetParentMatrix'] == 'ctrl_aimMConstraint_compMat.outputMatrix'
+    assert cmds._get_node('ctrl_aimMConstraint_input|ctrl').values['translate'] == [0, 0, 0]
+    assert cmds._get_node('left_grp|ctrl').values['translate'] == [0, 1, 0]
+
+def test_handle_follows_reparent_and_rename (cmds) :
+    cmds.make_transform ('grp')
+    cmds.make_transform ('ctrl')
+
+    # Out of operations, every use checks the path
+    handle = nb_handles.resolve (['ctrl'])[0]
+    cmds.parent ('ctrl', 'grp')
+    assert str(handle) == '|grp|ctrl'
+    cmds.rename ('|grp|ctrl', 'hand_ctrl')
+    assert handle.short_name == 'hand_ctrl'
+
+    # A handle of a previous operation is checked once in the next one
+    with nb_transaction.SceneTransaction ('first') :
+        handle = nb_handles.resolve (['hand_ctrl'])[0]
+    cmds.parent ('hand_ctrl', world = True)
+
+    with nb_transaction.SceneTransaction ('second') :
+        assert handle.path == '|hand_ctrl'
+        cmds.reset_counters ()
+        assert '{}.worldMatrix[0]'.format(handle) == '|hand_ctrl.worldMatrix[0]'
+        assert cmds.calls['ls'] == 0
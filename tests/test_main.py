@@ -0,0 +1,16 @@
+"""
+Toolkit entry point : importing it doesn't touch Qt or the interface module
+"""
+import sys
+
+import pytest
+
+def test_main_import_is_lazy () :
+    from nb_rigging_toolkit import nb_rgtk_main as nb_main
+
+    assert 'nb_rigging_toolkit.nb_rgtk_ui' not in sys.modules
+    assert not [name for name in sys.modules if name.startswith ('PySide')]
+    assert nb_main.get_window () is None and nb_main.IMPORT_TIME >= 0.0
+
+    with pytest.raises (AttributeError) :
+        nb_main.MissingWindow
@@ -0,0 +1,260 @@
+"""
+Matrix constraint networks : output connections according to enabled axis
+"""
+import numpy as np
+import pytest
+
+from nb_rigging_toolkit import nb_rgtk_evaluator as nb_eval
+from nb_rigging_toolkit import nb_rgtk_math as nb_math
+from nb_rigging_toolkit import nb_rgtk_matrix as nb_mat
+
+def out_connect (translate = True, rotate = True, scale = True, in_opm = True) :
+    '''
+    Return matrix_parent_constraint out_connect rules, each value enables or disables all axis of a channel
+    translate, rotate, scale -> enable all axis, or a list of 3 values, one per axis (bool or list)
+    '''
+    rules = []
+    for channel, enabled in (('Translate', translate), ('Rotate', rotate), ('Scale', scale)) :
+        enabled = enabled if isinstance(enabled, list) else [enabled] * 3
+        rules.append ([[[channel + axis, channel.lower() + axis], value] for axis, value in zip('XYZ', enabled)])
+
+    return rules + [in_opm]
+
+def test_out_connect_from_channels () :
+    rules = nb_mat.MatrixConstraint.get_out_connect (nb_mat.MatrixConstraint, {'rotate' : [True, False, True], 'in_opm' : False})
+
+    assert rules == out_connect (rotate = [True, False, True], in_opm = False)
+
+    with pytest.raises (ValueError) :
+        nb_mat.MatrixConstraint.get_out_connect (nb_mat.MatrixConstraint, {'scale' : [True]})
+
+def build (cmds, rules) :
+    '''
+    Constraint a rotated target to one trigger and return created nodes types
+    '''
+    trigger = cmds.make_transform ('trigger', translate = (1, 2, 3), rotate = (0, 30, 0))
+    target = cmds.make_transform ('target', translate = (4, 0, 0), rotate = (10, 20, 30), scale = (1, 2, 1))
+    cmds.select ([trigger, target])
+    cmds.reset_counters ()
+
+    nb_mat.MatrixConstraint.matrix_parent_constraint (nb_mat.MatrixConstraint, True, 'worldMatrix[0]', rules)
+
+    return sorted (cmds.objectType(node) for node in cmds.created_nodes)
+
+def test_every_axis_connects_matrix_sum_to_opm (cmds) :
+    assert build (cmds, out_connect()) == ['composeMatrix', 'multMatrix']
+    assert cmds.connections['target.offsetParentMatrix'] == 'trigger_target_parentMConstraint_multMat.matrixSum'
+
+    # Offset keeps target pose : offset * trigger world is target world
+    target = cmds._get_node ('target')
+    offset = cmds._get_node ('trigger_target_parentMConstraint_offset').values
+    offset_matrix = nb_math.compose_matrices (offset['inputTranslate'], offset['inputRotate'], offset['inputScale'])[0]
+    world_matrix = nb_math.compose_matrices ((4, 0, 0), (10, 20, 30), (1, 2, 1))[0]
+
+    assert np.allclose (offset_matrix @ cmds.world_matrix (cmds._get_node('trigger')), world_matrix)
+    assert target.values['translate'] == [0, 0, 0] and target.values['scale'] == [1, 1, 1]
+
+def test_translate_rotate_uses_pick_matrix (cmds) :
+    assert build (cmds, out_connect(scale = False)) == ['composeMatrix', 'multMatrix', 'pickMatrix']
+
+    pick_matrix = cmds._get_node ('target_parentMConstraint_pickMat')
+    assert pick_matrix.values['useScale'] is False and pick_matrix.values['useShear'] is False
+    assert 'useTranslate' not in pick_matrix.values
+    assert cmds.connections['target.offsetParentMatrix'] == 'target_parentMConstraint_pickMat.outputMatrix'
+
+    # Scale is not driven, it is kept
+    assert cmds._get_node('target').values['scale'] == [1, 2, 1]
+
+def test_some_axis_use_decompose_network (cmds) :
+    nodes = build (cmds, out_connect(translate = [True, False, True]))
+
+    assert nodes == ['composeMatrix', 'composeMatrix', 'decomposeMatrix', 'multMatrix']
+    assert 'target_parentMConstraint_compMat.inputTranslateY' not in cmds.connections
+
+def test_channels_without_opm_use_decompose_network (cmds) :
+    assert build (cmds, out_connect(in_opm = False)) == ['composeMatrix', 'decomposeMatrix', 'multMatrix']
+    assert cmds.connections['target.translateX'] == 'target_parentMConstraint_decMat.outputTranslateX'
+
+def tail (cmds, size = 4) :
+    '''
+    Build a joint chain tail_01_jnt ... tail_<size>_jnt, each joint under the previous one
+    '''
+    parent = None
+    for x in range(size) :
+        parent = cmds.make_transform ('tail_{:02d}_jnt'.format(x + 1), translate = (2, 0, 0) if parent else (0, 5, 0), parent = parent, node_type = 'joint')
+
+    return ['tail_{:02d}_jnt'.format(x + 1) for x in range(size)]
+
+def test_aim_chain_keeps_hierarchy (cmds) :
+    chain = tail (cmds)
+    cmds.make_transform ('tail_grp')
+    cmds.parent ('tail_01_jnt', 'tail_grp')
+    cmds.setAttr ('tail_03_jnt.translate', 2, 1, 0)
+    positions = [cmds.world_matrix (cmds._get_node(joint))[3, :3] for joint in chain]
+    cmds.reset_counters ()
+
+    created_nodes = nb_mat.MatrixConstraint.aim_chain (nb_mat.MatrixConstraint, chain, (0, 1, 0), '', (1, 0, 0), (0, 1, 0), up_mode = 'chain')
+
+    assert not cmds.warnings and cmds.calls['parent'] == 0 and len(created_nodes) == 3 * 4 + 3
+    assert not cmds.ls ('*_aimMConstraint_input')
+    for parent, joint in zip(['tail_grp'] + chain, chain) :
+        assert cmds.listRelatives (joint, parent = True) == [parent]
+        assert cmds.connections['{}.offsetParentMatrix'.format(joint)] == '{}_aimMConstraint_multMat.matrixSum'.format(joint)
+
+    # Joints aim at the rest matrix of the next joint relative to their own parent, up comes from the previous joint, the first one uses world up
+    assert cmds.connections['tail_01_jnt_aimMConstraint_aimMat.primaryTargetMatrix'] == 'tail_01_jnt_aimMConstraint_targetMat.matrixSum'
+    assert cmds.connections['tail_02_jnt_aimMConstraint_targetMat.matrixIn[1]'] == 'tail_02_jnt.parentMatrix[0]'
+    assert 'tail_01_jnt_aimMConstraint_aimMat.secondaryTargetMatrix' not in cmds.connections
+    assert cmds.connections['tail_03_jnt_aimMConstraint_aimMat.secondaryTargetMatrix'] == 'tail_02_jnt.worldMatrix[0]'
+
+    # Each joint stays in place and its X axis aims at the next joint, the last joint is aligned with the previous one
+    graph = nb_eval.read_network (chain)
+    plugs = ['{}.worldMatrix[0]'.format(joint) for joint in chain]
+    matrices = [nb_eval.evaluate (graph, plugs)[plug][0] for plug in plugs]
+    for x, matrix in enumerate(matrices) :
+        assert np.allclose (matrix[3, :3], positions[x])
+    for x in range(3) :
+        aim = positions[x + 1] - positions[x]
+        assert np.allclose (matrices[x][0, :3], aim / np.linalg.norm(aim))
+    assert np.allclose (matrices[3][:3, :3], matrices[2][:3, :3])
+
+    # The whole chain follows its parent
+    group_matrix = nb_math.compose_matrices ([0, 3, 0], [0, 0, 30], [1, 1, 1])[0]
+    moved = nb_eval.evaluate (graph, plugs, {'tail_grp.translate' : [[0, 3, 0]], 'tail_grp.rotate' : [[0, 0, 30]]})
+    for plug, matrix in zip(plugs, matrices) :
+        assert np.allclose (moved[plug][0], matrix @ group_matrix)
+
+def test_aim_chain_last_modes (cmds) :
+    chain = tail (cmds, 3)
+    cmds.make_transform ('tip_ctrl', translate = (10, 5, 0))
+    cmds.make_transform ('up_ctrl', translate = (0, 10, 0))
+
+    nb_mat.MatrixConstraint.aim_chain (nb_mat.MatrixConstraint, chain[:2], (0, 1, 0), 'up_ctrl', (1, 0, 0), (0, 1, 0), last_mode = 'none')
+    assert 'tail_02_jnt.offsetParentMatrix' not in cmds.connections
+    assert cmds.connections['tail_01_jnt_aimMConstraint_aimMat.secondaryTargetMatrix'] == 'up_ctrl.worldMatrix[0]'
+
+    # tail_02_jnt is not constrained, it can start another chain
+    nb_mat.MatrixConstraint.aim_chain (nb_mat.MatrixConstraint, chain[1:], (0, 1, 0), '', (1, 0, 0), (0, 1, 0), last_mode = 'aim', last_target = 'tip_ctrl')
+    assert cmds.connections['tail_03_jnt_aimMConstraint_aimMat.primaryTargetMatrix'] == 'tip_ctrl.worldMatrix[0]'
+    assert cmds.connections['tail_03_jnt.offsetParentMatrix'] == 'tail_03_jnt_aimMConstraint_multMat.matrixSum'
+    assert not cmds.warnings
+
+def test_aim_chain_is_checked_before_build (cmds) :
+    chain = tail (cmds, 3)
+    cmds.connectAttr ('tail_02_jnt.worldMatrix[0]', 'tail_03_jnt.offsetParentMatrix')
+    cmds.reset_counters ()
+
+    assert nb_mat.MatrixConstraint.aim_chain (nb_mat.MatrixConstraint, chain, (0, 1, 0), '', (1, 0, 0), (0, 1, 0)) is None
+    assert nb_mat.MatrixConstraint.aim_chain (nb_mat.MatrixConstraint, chain + ['tail_01_jnt'], (0, 1, 0), '', (1, 0, 0), (0, 1, 0)) is None
+    assert nb_mat.MatrixConstraint.aim_chain (nb_mat.MatrixConstraint, chain, (0, 1, 0), '', (1, 0, 0), (0, 1, 0), last_mode = 'aim') is None
+
+    assert len(cmds.warnings) == 3 and 'more than once' in cmds.warnings[1]
+    assert cmds.calls['createNode'] == cmds.calls['parent'] == 0
+
+@pytest.mark.parametrize ('input_mode', ['static', 'parent'])
+def test_aim_in_place_keeps_hierarchy (cmds, input_mode) :
+    cmds.make_transform ('head_grp', translate = (0, 5, 0))
+    cmds.make_transform ('eye_jnt', translate = (1, 1, 0), parent = 'head_grp')
+    cmds.make_transform ('look_at_ctrl', translate = (1, 6, 10))
+
+    created_nodes = nb_mat.MatrixConstraint.aim_constraint (nb_mat.MatrixConstraint, 'look_at_ctrl', 'eye_jnt', False, (0, 1, 0), '', (0, 0, 1), (0, 1, 0),
+                                                            input_mode)
+
+    assert not cmds.warnings and cmds.calls['parent'] == 0
+    assert cmds.listRelatives ('eye_jnt', parent = True) == ['head_grp']
+    assert not cmds.ls ('*_aimMConstraint_input')
+
+    # Aimed world matrix goes back in eye parent space, through offsetParentMatrix
+    assert cmds.connections['eye_jnt.offsetParentMatrix'] == 'eye_jnt_aimMConstraint_multMat.matrixSum'
+    assert cmds.connections['eye_jnt_aimMConstraint_multMat.matrixIn[1]'] == 'eye_jnt.inverseParentMatrix'
+    assert cmds._get_node('eye_jnt').values['translate'] == [0, 0, 0]
+
+    if input_mode == 'static' :
+        assert len(created_nodes) == 2
+        rest = cmds._get_node('eye_jnt_aimMConstraint_aimMat').values['inputMatrix']
+        assert rest[12:15] == pytest.approx ([1, 6, 0])
+    else :
+        assert len(created_nodes) == 3
+        assert cmds.connections['eye_jnt_aimMConstraint_aimMat.inputMatrix'] == 'eye_jnt_aimMConstraint_restMat.matrixSum'
+        assert cmds.connections['eye_jnt_aimMConstraint_restMat.matrixIn[1]'] == 'eye_jnt.parentMatrix[0]'
+        rest = cmds._get_node('eye_jnt_aimMConstraint_restMat').values['matrixIn[0]']
+        assert rest[12:15] == pytest.approx ([1, 1, 0])
+
+@pytest.mark.parametrize ('input_mode', ['static', 'parent'])
+def test_aim_in_place_resets_joint_orient (cmds, input_mode) :
+    cmds.make_transform ('head_jnt', translate = (0, 5, 0), rotate = (0, 20, 0), node_type = 'joint')
+    cmds.make_transform ('eye_jnt', translate = (1, 1, 0), parent = 'head_jnt', node_type = 'joint')
+    cmds.setAttr ('eye_jnt.jointOrient', 30, -15, 60)
+    cmds.make_transform ('look_at_ctrl', translate = (1, 6, 10))
+    eye_position = cmds.world_matrix (cmds._get_node('eye_jnt'))[3, :3]
+
+    nb_mat.MatrixConstraint.aim_constraint (nb_mat.MatrixConstraint, 'look_at_ctrl', 'eye_jnt', False, (0, 1, 0), '', (0, 0, 1), (0, 1, 0), input_mode)
+    assert cmds._get_node('eye_jnt').values['jointOrient'] == [0, 0, 0]
+
+    # Eye world matrix is the aimMatrix output : it stays in place and its Z axis aims at look_at_ctrl
+    results = nb_eval.evaluate (nb_eval.read_network (['eye_jnt']), ['eye_jnt.worldMatrix[0]'])
+    eye_matrix = results['eye_jnt.worldMatrix[0]'][0]
+    aim = np.array([1, 6, 10]) - eye_position
+    assert np.allclose (eye_matrix[3, :3], eye_position)
+    assert np.allclose (eye_matrix[2, :3], aim / np.linalg.norm(aim))
+
+def test_nearest_points_and_weights () :
+    rng = np.random.default_rng (4)
+    drivers = rng.uniform (-10, 10, (50, 3))
+    followers = rng.uniform (-10, 10, (300, 3))
+
+    indices, distances = nb_math.nearest_points (drivers, followers, 3, chunk_size = 64)
+
+    all_distances = np.linalg.norm (followers[:, None] - drivers[None], axis = -1)
+    assert np.array_equal (indices, np.argsort (all_distances, axis = 1)[:, :3])
+    assert distances == pytest.approx (np.sort (all_distances, axis = 1)[:, :3])
+
+    weights = nb_math.falloff_weights ([[1.0, 2.0], [0.0, 3.0], [2.0, 2.0]])
+    assert weights == pytest.approx (np.array ([[0.8, 0.2], [1.0, 0.0], [0.5, 0.5]]))
+    assert nb_math.falloff_weights ([[1.0, 3.0], [2.0, 2.0]], 'linear') == pytest.approx (np.array ([[1.0, 0.0], [1.0, 0.0]]))
+
+    # blendMatrix weights give back each input weight
+    blend = nb_math.blend_weights ([0.5, 0.3, 0.2])
+    result = np.array ([1.0, 0.0, 0.0])
+    for x, weight in enumerate(blend[1:]) :
+        result = result * (1 - weight) + np.eye (3)[x + 1] * weight
+    assert result == pytest.approx ([0.5, 0.3, 0.2])
+
+def test_parent_constraint_triggers_get_equal_weights (cmds) :
+    triggers = [cmds.make_transform (name, translate = translate) for name, translate in (('a_ctrl', (0, 0, 0)), ('b_ctrl', (3, 0, 0)), ('c_ctrl', (0, 6, 0)))]
+    cmds.make_transform ('target')
+    cmds.select (triggers + ['target'])
+
+    nb_mat.MatrixConstraint.matrix_parent_constraint (nb_mat.MatrixConstraint, False, 'worldMatrix[0]', out_connect())
+
+    # blendMatrix blends targets one after the other : second trigger gets 1/2 of the first one, third trigger 1/3 of both
+    blend = cmds._get_node ('target_parentMConstraint_blendMat').values
+    assert [blend['target[1].weight'], blend['target[2].weight']] == pytest.approx ([1 / 2, 1 / 3])
+
+    results = nb_eval.evaluate (nb_eval.read_network (['target']), ['target.worldMatrix[0]'])
+    assert np.allclose (results['target.worldMatrix[0]'][0, 3, :3], (1, 2, 0))
+
+def test_mass_attach_uses_nearest_drivers (cmds) :
+    for x in range(4) :
+        cmds.make_transform ('spine_{}_jnt'.format(x), translate = (0, 2 * x, 0))
+    cmds.make_transform ('button_a_ctrl', translate = (1, 1, 0))
+    cmds.make_transform ('button_b_ctrl', translate = (0, 6, 0))
+
+    attachments = nb_mat.MatrixConstraint.mass_attach (nb_mat.MatrixConstraint, ['button_a_ctrl', 'button_b_ctrl'], cmds.ls ('spine_*_jnt'), 2)
+
+    assert not cmds.warnings
+    assert sorted(driver for driver, weight in attachments[0][1]) == ['|spine_0_jnt', '|spine_1_jnt']
+    assert [weight for driver, weight in attachments[0][1]] == pytest.approx ([0.5, 0.5])
+
+    # button_b is on spine_3 : one driver with all the weight, connected without blendMatrix
+    assert attachments[1][1] == [('|spine_3_jnt', 1.0)]
+    assert cmds.connections['button_b_ctrl.offsetParentMatrix'] == 'spine_3_jnt_button_b_ctrl_parentMConstraint_multMat.matrixSum'
+    assert cmds.connections['button_a_ctrl.offsetParentMatrix'] == 'button_a_ctrl_parentMConstraint_blendMat.outputMatrix'
+
+def test_mass_attach_checks_objects (cmds) :
+    cmds.make_transform ('spine_jnt')
+    cmds.make_transform ('button_ctrl')
+
+    assert nb_mat.MatrixConstraint.mass_attach (nb_mat.MatrixConstraint, ['button_ctrl', 'spine_jnt'], ['spine_jnt']) is None
+    assert nb_mat.MatrixConstraint.mass_attach (nb_mat.MatrixConstraint, ['button_ctrl'], ['missing_jnt']) is None
+    assert len(cmds.warnings) == 2 and not cmds.created_nodes
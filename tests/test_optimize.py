@@ -0,0 +1,149 @@
+"""
+Optimizer pass on networks built by previous toolkit versions
+"""
+import numpy as np
+import pytest
+
+from nb_rigging_toolkit import nb_rgtk_math as nb_math
+from nb_rigging_toolkit import nb_rgtk_optimize as nb_optimize
+
+def legacy_parent_constraint (cmds, channels = ('Translate', 'Rotate', 'Scale'), axis = 'XYZ') :
+    '''
+    Build a parent constraint network like older toolkit versions did in offsetParentMatrix mode
+    '''
+    cmds.make_transform ('trigger', translate = (1, 2, 3))
+    cmds.make_transform ('target', translate = (4, 0, 0))
+
+    offset = cmds.createNode ('composeMatrix', name = 'trigger_target_parentMConstraint_offset')
+    cmds.setAttr ('{}.inputTranslate'.format(offset), 3, -2, -3)
+    cmds.setAttr ('{}.inputRotate'.format(offset), 0, 45, 0)
+    mult_node = cmds.createNode ('multMatrix', name = 'trigger_target_parentMConstraint_multMat')
+    cmds.connectAttr ('{}.outputMatrix'.format(offset), '{}.matrixIn[0]'.format(mult_node))
+    cmds.connectAttr ('trigger.worldMatrix[0]', '{}.matrixIn[1]'.format(mult_node))
+
+    decompose = cmds.createNode ('decomposeMatrix', name = 'target_parentMConstraint_decMat')
+    compose = cmds.createNode ('composeMatrix', name = 'target_parentMConstraint_compMat')
+    cmds.connectAttr ('{}.matrixSum'.format(mult_node), '{}.inputMatrix'.format(decompose))
+    for channel in channels :
+        for each in axis :
+            cmds.connectAttr ('{}.output{}{}'.format(decompose, channel, each), '{}.input{}{}'.format(compose, channel, each))
+    cmds.connectAttr ('{}.outputMatrix'.format(compose), 'target.offsetParentMatrix')
+
+    cmds.reset_counters ()
+
+def test_round_trip_and_offset_are_collapsed (cmds) :
+    legacy_parent_constraint (cmds)
+    world_matrix = cmds.world_matrix (cmds._get_node('target'))
+
+    report = nb_optimize.optimize_scene ()
+
+    assert (report['round_trips'], report['blends'], report['offsets']) == (1, 0, 1)
+    assert report['nodes_before'] - report['nodes_after'] == 3
+    assert report['changed'] == []
+    assert sorted(cmds.ls()) == ['target', 'trigger', 'trigger_target_parentMConstraint_multMat']
+
+    # Multiplied matrices are unchanged
+    assert cmds.connections['target.offsetParentMatrix'] == 'trigger_target_parentMConstraint_multMat.matrixSum'
+    assert cmds.connections['trigger_target_parentMConstraint_multMat.matrixIn[1]'] == 'trigger.worldMatrix[0]'
+    offset_matrix = nb_math.compose_matrices ((3, -2, -3), (0, 45, 0), (1, 1, 1))[0]
+    assert np.allclose (cmds._get_node('trigger_target_parentMConstraint_multMat').values['matrixIn[0]'], offset_matrix.reshape(16))
+    assert np.allclose (cmds.world_matrix (cmds._get_node('target')), world_matrix)
+
+def test_rotate_round_trip_uses_pick_matrix (cmds) :
+    legacy_parent_constraint (cmds, channels = ['Rotate'])
+
+    report = nb_optimize.optimize_scene ()
+
+    pick_matrix = cmds._get_node ('target_parentMConstraint_pickMat')
+    assert report['round_trips'] == 1
+    assert cmds.connections['target.offsetParentMatrix'] == 'target_parentMConstraint_pickMat.outputMatrix'
+    assert (pick_matrix.values['useTranslate'], pick_matrix.values['useScale'], pick_matrix.values['useShear']) == (False, False, False)
+    assert 'useRotate' not in pick_matrix.values
+
+def test_partial_channel_is_kept (cmds) :
+    legacy_parent_constraint (cmds, axis = 'XY')
+
+    report = nb_optimize.optimize_scene ()
+
+    assert report['round_trips'] == 0
+    assert cmds.connections['target.offsetParentMatrix'] == 'target_parentMConstraint_compMat.outputMatrix'
+
+def test_no_op_blends_are_removed (cmds) :
+    cmds.make_transform ('world_ctrl')
+    cmds.make_transform ('root_ctrl')
+    cmds.make_transform ('hand_ctrl')
+    cmds.make_transform ('foot_ctrl')
+
+    # Single space blend of older parentSpace versions : only inputMatrix
+    cmds.createNode ('blendMatrix', name = 'hand_parentSpace_blendMat')
+    cmds.connectAttr ('world_ctrl.worldMatrix[0]', 'hand_parentSpace_blendMat.inputMatrix')
+    cmds.connectAttr ('hand_parentSpace_blendMat.omat', 'hand_ctrl.offsetParentMatrix')
+
+    # One target at full weight
+    cmds.createNode ('blendMatrix', name = 'foot_parentMConstraint_blendMat')
+    cmds.connectAttr ('world_ctrl.worldMatrix[0]', 'foot_parentMConstraint_blendMat.inputMatrix')
+    cmds.connectAttr ('root_ctrl.worldMatrix[0]', 'foot_parentMConstraint_blendMat.target[1].tmat')
+    cmds.connectAttr ('foot_parentMConstraint_blendMat.outputMatrix', 'foot_ctrl.offsetParentMatrix')
+
+    report = nb_optimize.optimize_scene ()
+
+    assert report['blends'] == 2
+    assert not cmds.objExists ('hand_parentSpace_blendMat') and not cmds.objExists ('foot_parentMConstraint_blendMat')
+    assert cmds.connections['hand_ctrl.offsetParentMatrix'] == 'world_ctrl.worldMatrix[0]'
+    assert cmds.connections['foot_ctrl.offsetParentMatrix'] == 'root_ctrl.worldMatrix[0]'
+
+def test_weighted_blend_is_kept (cmds) :
+    cmds.make_transform ('world_ctrl')
+    cmds.make_transform ('root_ctrl')
+    cmds.make_transform ('hand_ctrl')
+
+    cmds.createNode ('blendMatrix', name = 'hand_parentMConstraint_blendMat')
+    cmds.connectAttr ('world_ctrl.worldMatrix[0]', 'hand_parentMConstraint_blendMat.inputMatrix')
+    cmds.connectAttr ('root_ctrl.worldMatrix[0]', 'hand_parentMConstraint_blendMat.target[1].tmat')
+    cmds.setAttr ('hand_parentMConstraint_blendMat.target[1].weight', 0.5)
+    cmds.connectAttr ('hand_parentMConstraint_blendMat.outputMatrix', 'hand_ctrl.offsetParentMatrix')
+
+    assert nb_optimize.optimize_scene ()['blends'] == 0
+    assert cmds.objExists ('hand_parentMConstraint_blendMat')
+
+def test_dry_run_keeps_scene (cmds) :
+    legacy_parent_constraint (cmds)
+    nodes = list(cmds.nodes)
+    connections = dict(cmds.connections)
+
+    report = nb_optimize.optimize_scene (dry_run = True)
+
+    assert (report['round_trips'], report['offsets']) == (1, 1)
+    assert list(cmds.nodes) == nodes and cmds.connections == connections
+    assert cmds.calls['createNode'] == cmds.calls['connectAttr'] == cmds.calls['delete'] == 0
+
+def test_evaluation_is_timed_with_user_mode (cmds, monkeypatch) :
+    legacy_parent_constraint (cmds)
+    modes = []
+    monkeypatch.setattr (nb_optimize, 'evaluation_time', lambda nodes, repeat : modes.append (cmds.evaluation_mode) or 0.0)
+
+    nb_optimize.optimize_scene ()
+
+    assert modes == ['parallel', 'parallel'] and cmds.undo_chunks == 0
+
+def test_changed_world_matrices_are_undone (cmds, monkeypatch) :
+    legacy_parent_constraint (cmds)
+    get_world_matrices = nb_optimize.get_world_matrices
+    calls = []
+
+    def moved_world_matrices (nodes) :
+        # Second query is done after the pass : move every transform
+        calls.append (nodes)
+        return get_world_matrices (nodes) + (len(calls) > 1)
+    monkeypatch.setattr (nb_optimize, 'get_world_matrices', moved_world_matrices)
+
+    report = nb_optimize.optimize_scene (repeat = 0)
+    assert report['changed'] == ['|trigger', '|target'] and cmds.calls['undo'] == 1
+    assert 'optimizations are undone' in cmds.warnings[0]
+
+    # Without undo queue the scene can't be restored
+    calls.clear ()
+    cmds.undo_state = False
+    with pytest.raises (RuntimeError, match = 'World matrices changed') :
+        nb_optimize.optimize_scene (repeat = 0)
+    assert cmds.calls['undo'] == 1
@@ -0,0 +1,78 @@
+"""
+Parent space networks : selected matrices and node count
+"""
+import numpy as np
+
+from nb_rigging_toolkit import nb_rgtk_math as nb_math
+from nb_rigging_toolkit import nb_rgtk_parent_space as nb_ps
+
+def build (cmds, use_groups) :
+    '''
+    Build a three spaces setup and return created nodes types
+    '''
+    triggers = [cmds.make_transform ('world_ctrl'),
+                cmds.make_transform ('root_ctrl', translate = (0, 1, 0), rotate = (0, 90, 0)),
+                cmds.make_transform ('chest_ctrl', translate = (0, 5, 1), rotate = (20, 0, 10), scale = (2, 2, 2))]
+    target = cmds.make_transform ('hand_ctrl', translate = (3, 2, 1), rotate = (0, 0, 45), scale = (1, 3, 1))
+    settings = cmds.make_transform ('settings_ctrl')
+    cmds.reset_counters ()
+
+    nb_ps.parentSpace (target, triggers, settings, True, 'parentSpace', use_groups = use_groups)
+
+    return [cmds.objectType(node) for node in cmds.created_nodes]
+
+def space_matrix (cmds, choice_plug) :
+    '''
+    Evaluate the parent constraint matrix connected to a choice plug : offset * trigger world
+    '''
+    source = cmds.connections[choice_plug]
+    if source.endswith ('.matrixSum') :
+        mult_node = source.split('.')[0]
+    else :
+        # Legacy group, driven by a decomposeMatrix fed by the parent constraint
+        group = source.split('.')[0]
+        decompose = cmds.connections['{}.translate'.format(group)].split('.')[0]
+        mult_node = cmds.connections['{}.inputMatrix'.format(decompose)].split('.')[0]
+
+    offset = cmds._get_node (cmds.connections['{}.matrixIn[0]'.format(mult_node)].split('.')[0]).values
+    trigger = cmds._get_node (cmds.connections['{}.matrixIn[1]'.format(mult_node)].split('.')[0])
+    offset_matrix = nb_math.compose_matrices (offset['inputTranslate'], offset['inputRotate'], offset['inputScale'])[0]
+
+    return offset_matrix @ cmds.world_matrix (trigger)
+
+def test_spaces_are_selected_without_groups (cmds) :
+    node_types = build (cmds, use_groups = False)
+
+    assert 'transform' not in node_types and 'decomposeMatrix' not in node_types
+    assert sorted(node_types) == ['choice'] + ['composeMatrix'] * 3 + ['multMatrix'] * 3
+
+    target_matrix = nb_math.remove_scale (nb_math.compose_matrices ((3, 2, 1), (0, 0, 45), (1, 3, 1)))[0]
+    for x in range(3) :
+        assert np.allclose (space_matrix (cmds, 'hand_parentSpace_choice.input[{}]'.format(x)), target_matrix)
+
+    # Enum field n selects input[n]
+    assert cmds.connections['hand_parentSpace_choice.s'] == 'settings_ctrl.parentSpace'
+    assert cmds.connections['hand_ctrl.offsetParentMatrix'] == 'hand_parentSpace_choice.o'
+    assert cmds._get_node('settings_ctrl').dynamic_attrs['parentSpace']['en'] == 'world_ctrl:root_ctrl:chest_ctrl'
+
+def test_selected_matrices_match_legacy_groups (cmds) :
+    build (cmds, use_groups = False)
+    matrices = [space_matrix (cmds, 'hand_parentSpace_choice.input[{}]'.format(x)) for x in range(3)]
+
+    cmds.reset ()
+    node_types = build (cmds, use_groups = True)
+    legacy_matrices = [space_matrix (cmds, 'hand_parentSpace_choice.input[{}]'.format(x)) for x in range(3)]
+
+    assert node_types.count ('transform') == node_types.count ('decomposeMatrix') == 3
+    assert np.allclose (matrices, legacy_matrices)
+
+def test_rotation_mode_merges_last_space (cmds) :
+    triggers = [cmds.make_transform ('space{}_ctrl'.format(x), translate = (x, 1, 0)) for x in range(4)]
+    target = cmds.make_transform ('head_ctrl', translate = (3, 2, 1))
+    settings = cmds.make_transform ('settings_ctrl')
+
+    nb_ps.parentSpace (target, triggers, settings, False, 'rotateSpace')
+
+    assert cmds.connections['head_parentSpace_merge_blendMat.inputMatrix'] == 'head_parentSpace_choice.o'
+    assert cmds.connections['head_parentSpace_merge_blendMat.target[0].tmat'] == 'space3__head_parentSpace_parentMConstraint_multMat.matrixSum'
+    assert cmds.connections['head_ctrl.offsetParentMatrix'] == 'head_parentSpace_merge_blendMat.omat'
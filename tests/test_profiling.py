@@ -0,0 +1,97 @@
+"""
+Profiling of toolkit operations : records, counters, JSONL log and cost when disabled
+"""
+import json
+
+import pytest
+
+from nb_rigging_toolkit import nb_rgtk_matrix as nb_mat
+from nb_rigging_toolkit import nb_rgtk_parent_space as nb_ps
+from nb_rigging_toolkit import nb_rgtk_profiling as nb_profiling
+from nb_rigging_toolkit import nb_rgtk_utils as nb_utils
+
+from test_call_budgets import out_connect
+
+@pytest.fixture
+def profiling () :
+    '''
+    Empty profiling records, profiling is always disabled after the test
+    '''
+    nb_profiling.clear_records ()
+    yield nb_profiling
+    nb_profiling.disable ()
+    nb_profiling.clear_records ()
+
+def test_disabled_profiling_records_nothing (cmds, profiling) :
+    nb_utils.create_rigging_module ('module')
+
+    assert nb_utils.cmds is cmds
+    assert profiling.step ('offsets') is profiling.step ('node creation')
+    assert profiling.get_records () == []
+
+def test_enabled_profiling_counts_scene_calls (cmds, profiling) :
+    triggers = [cmds.make_transform ('trigger{}'.format(x), translate = (x, 1, 0)) for x in range(3)]
+    target = cmds.make_transform ('target', translate = (0, 2, 3), rotate = (10, 20, 30))
+    cmds.select (triggers + [target])
+
+    profiling.enable ()
+    assert nb_mat.cmds is not cmds
+
+    cmds.reset_counters ()
+    nb_mat.MatrixConstraint.matrix_parent_constraint (nb_mat.MatrixConstraint, True, 'worldMatrix[0]', out_connect(True))
+
+    record, = profiling.get_records ()
+    assert record['name'] == 'matrix_parent_constraint'
+    assert not record['failed']
+    # Undo chunk, refresh and evaluation calls of the transaction are outside the record
+    assert 0 < record['scene_calls'] <= cmds.total_calls
+    assert record['calls']['setAttr'] == cmds.calls['setAttr']
+    assert record['nodes_created'] == cmds.calls['createNode']
+    assert record['connections_created'] == cmds.calls['connectAttr']
+    assert record['duration'] > 0.0
+
+    profiling.disable ()
+    assert nb_mat.cmds is cmds
+
+def test_steps_are_nested_in_operations (cmds, profiling) :
+    triggers = [cmds.make_transform ('space{}_ctrl'.format(x), translate = (x, 1, 0)) for x in range(3)]
+    target = cmds.make_transform ('hand_ctrl', translate = (3, 2, 1))
+    settings = cmds.make_transform ('settings_ctrl')
+
+    profiling.enable ()
+    nb_ps.parent_space_batch ([(target, settings, triggers, 'parentSpace', True)])
+
+    record, = profiling.get_records ()
+    steps = [step['name'] for step in record['steps']]
+    assert steps == ['connection check', 'offsets', 'node creation']
+
+    # Nested parentSpace transaction is a child of the node creation step
+    node_creation = record['steps'][-1]
+    assert [step['name'] for step in node_creation['steps']] == ['parentSpace']
+    assert node_creation['nodes_created'] == record['nodes_created'] > 0
+
+def test_records_are_written_to_log (cmds, profiling, tmp_path) :
+    log_path = tmp_path / 'profile.jsonl'
+
+    profiling.enable (str(log_path))
+    nb_utils.create_rigging_module ('module')
+    nb_utils.create_rigging_module ('other_module')
+
+    lines = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert [line['name'] for line in lines] == ['create_rigging_module', 'create_rigging_module']
+    assert lines[0]['nodes_created'] == 5
+
+    totals = profiling.summary ()
+    assert totals['create_rigging_module']['count'] == 2
+    assert totals['create_rigging_module']['nodes_created'] == 10
+
+def test_failed_operation_is_recorded (cmds, profiling) :
+    profiling.enable ()
+
+    with pytest.raises (ZeroDivisionError) :
+        with nb_profiling.step ('failing') :
+            1 / 0
+
+    record, = profiling.get_records ()
+    assert record['failed']
+    assert profiling._stack == []
@@ -0,0 +1,118 @@
+"""
+Skeleton orientation engine : world pose kept, aim orientations and skipped joints
+"""
+import numpy as np
+
+from nb_rigging_toolkit import nb_rgtk_skeleton as nb_skeleton
+from nb_rigging_toolkit import nb_rgtk_utils as nb_utils
+
+def make_arm (cmds) :
+    '''
+    Return nodes of a placed arm : shoulder, elbow and wrist joints with rotate and jointOrient values, a control under the wrist
+    '''
+    shoulder = cmds.make_transform ('shoulder_jnt', translate = (2, 10, 0), rotate = (0, 0, -40), node_type = 'joint')
+    cmds.setAttr ('shoulder_jnt.jointOrient', 10, 20, 0)
+    elbow = cmds.make_transform ('elbow_jnt', translate = (3, 0, 0), rotate = (0, 30, 15), parent = shoulder, node_type = 'joint')
+    cmds.setAttr ('elbow_jnt.jointOrient', 0, -45, 5)
+    wrist = cmds.make_transform ('wrist_jnt', translate = (3, 0.5, 0), rotate = (20, 0, 0), parent = elbow, node_type = 'joint')
+    hand = cmds.make_transform ('hand_ctrl', translate = (0.5, 0, 0), rotate = (0, 0, 90), parent = wrist)
+
+    return [cmds._get_node(name) for name in (shoulder, elbow, wrist, hand)]
+
+def test_zero_orient_keeps_world_matrices (cmds) :
+    nodes = make_arm (cmds)
+    world_matrices = [cmds.world_matrix (node) for node in nodes]
+    cmds.reset_counters ()
+
+    joints = nb_skeleton.orient_skeleton (['shoulder_jnt'], 'zero_orient')
+
+    assert joints == ['|shoulder_jnt', '|shoulder_jnt|elbow_jnt', '|shoulder_jnt|elbow_jnt|wrist_jnt']
+    for node, world_matrix in zip(nodes, world_matrices) :
+        assert np.allclose (cmds.world_matrix (node), world_matrix)
+    for node in nodes[:3] :
+        assert np.allclose (node.values['jointOrient'], 0)
+
+    assert cmds.calls['getAttr'] == 6 and cmds.calls['setAttr'] == 6
+    assert not cmds.created_nodes
+
+def test_rotation_to_orient_keeps_world_matrices (cmds) :
+    nodes = make_arm (cmds)
+    world_matrices = [cmds.world_matrix (node) for node in nodes]
+
+    joints = nb_skeleton.orient_skeleton (['elbow_jnt', 'hand_ctrl'], 'rotation_to_orient', hierarchy = False)
+
+    assert joints == ['|shoulder_jnt|elbow_jnt']
+    for node, world_matrix in zip(nodes, world_matrices) :
+        assert np.allclose (cmds.world_matrix (node), world_matrix)
+    assert np.allclose (nodes[1].values['rotate'], 0)
+    assert not np.allclose (nodes[0].values['rotate'], 0)
+
+def test_aim_orients_joints_to_children (cmds) :
+    nodes = make_arm (cmds)
+    world_matrices = [cmds.world_matrix (node) for node in nodes]
+
+    nb_skeleton.orient_skeleton (['shoulder_jnt'], 'aim', primary_axis = (1, 0, 0), secondary_axis = (0, 1, 0), world_up_vector = (0, 0, -1))
+    new_world_matrices = [cmds.world_matrix (node) for node in nodes]
+
+    # Positions are kept, each joint X axis aims at its child, Y axis is the closest to world up
+    for world_matrix, new_world_matrix in zip(world_matrices, new_world_matrices) :
+        assert np.allclose (new_world_matrix[3, :3], world_matrix[3, :3])
+
+    for parent, child in ((0, 1), (1, 2)) :
+        aim = new_world_matrices[child][3, :3] - new_world_matrices[parent][3, :3]
+        assert np.allclose (new_world_matrices[parent][0, :3], aim / np.linalg.norm(aim))
+        assert np.dot (new_world_matrices[parent][1, :3], (0, 0, -1)) > 0
+        assert abs(np.dot (new_world_matrices[parent][2, :3], (0, 0, -1))) < 1e-8
+
+    # Last joint gets its parent orientation, the control keeps its world matrix
+    assert np.allclose (nodes[2].values['jointOrient'], 0)
+    assert np.allclose (new_world_matrices[2][:3, :3], new_world_matrices[1][:3, :3])
+    assert np.allclose (new_world_matrices[3], world_matrices[3])
+
+    for node in nodes[:3] :
+        assert np.allclose (node.values['rotate'], 0)
+
+def test_aim_with_negative_axes (cmds) :
+    make_arm (cmds)
+
+    nb_skeleton.orient_skeleton (['shoulder_jnt'], 'aim', primary_axis = (0, -1, 0), secondary_axis = (0, 0, 1))
+    shoulder, elbow = (cmds.world_matrix (cmds._get_node(name)) for name in ('shoulder_jnt', 'elbow_jnt'))
+
+    aim = elbow[3, :3] - shoulder[3, :3]
+    assert np.allclose (-shoulder[1, :3], aim / np.linalg.norm(aim))
+    assert np.dot (shoulder[2, :3], (0, 1, 0)) > 0
+
+def test_connected_joints_are_skipped (cmds) :
+    make_arm (cmds)
+    cmds.make_transform ('driver')
+    cmds.connectAttr ('driver.rotate', 'elbow_jnt.rotate')
+    cmds.reset_counters ()
+
+    joints = nb_skeleton.orient_skeleton (['shoulder_jnt'], 'zero_orient')
+
+    assert joints == ['|shoulder_jnt', '|shoulder_jnt|elbow_jnt|wrist_jnt']
+    assert len(cmds.warnings) == 1 and 'elbow_jnt.rotateX' in cmds.warnings[0]
+
+    # a connected joint moves its children in aim mode, nothing is oriented
+    assert nb_skeleton.orient_skeleton (['shoulder_jnt'], 'aim') == []
+    assert cmds.calls['setAttr'] == 4
+
+def test_invalid_options (cmds) :
+    make_arm (cmds)
+
+    assert nb_skeleton.orient_skeleton (['shoulder_jnt'], 'freeze') == []
+    assert nb_skeleton.orient_skeleton (['shoulder_jnt'], 'aim', primary_axis = (1, 0, 0), secondary_axis = (-2, 0, 0)) == []
+    assert len(cmds.warnings) == 2
+
+def test_reset_joint_orient_keep_world (cmds) :
+    nodes = make_arm (cmds)
+    world_matrices = [cmds.world_matrix (node) for node in nodes]
+
+    assert nb_utils.reset_joint_orient (['shoulder_jnt'], keep_world = True, hierarchy = True) == nb_skeleton.get_joints (['shoulder_jnt'])
+    for node, world_matrix in zip(nodes, world_matrices) :
+        assert np.allclose (cmds.world_matrix (node), world_matrix)
+
+    # without keep_world, only jointOrient is reset
+    cmds.setAttr ('elbow_jnt.jointOrient', 0, 10, 0)
+    assert nb_utils.reset_joint_orient (['shoulder_jnt', 'elbow_jnt']) == ['shoulder_jnt', 'elbow_jnt']
+    assert nodes[1].values['jointOrient'] == [0, 0, 0]
@@ -0,0 +1,155 @@
+"""
+Rig spec : diff between spec and scene, incremental apply
+"""
+import json
+
+import pytest
+
+from nb_rigging_toolkit import nb_rgtk_spec as nb_spec
+
+def rig (cmds) :
+    '''
+    Build a small rig scene and return its spec
+    '''
+    cmds.make_transform ('world_ctrl')
+    cmds.make_transform ('chest_ctrl', translate = (0, 5, 0))
+    cmds.make_transform ('hand_ctrl', translate = (3, 5, 0))
+    cmds.make_transform ('hand_settings_ctrl')
+    cmds.make_transform ('prop_ctrl', translate = (3, 4, 1))
+    cmds.make_transform ('look_at_ctrl', translate = (0, 6, 10))
+    cmds.make_transform ('eye_jnt', translate = (0, 6, 1))
+
+    return {'entries' : [{'type' : 'module', 'name' : 'arm_L'},
+                         {'id' : 'prop_follow', 'type' : 'parent_constraint', 'triggers' : ['hand_ctrl'], 'target' : 'prop_ctrl', 'channels' : {'scale' : False}},
+                         {'type' : 'aim_constraint', 'trigger' : 'look_at_ctrl', 'target' : 'eye_jnt'},
+                         {'type' : 'parent_space', 'target' : 'hand_ctrl', 'settings' : 'hand_settings_ctrl', 'triggers' : ['world_ctrl', 'chest_ctrl'],
+                          'attr_name' : 'parentSpace'}]}
+
+def test_spec_entries_are_checked () :
+    with pytest.raises (nb_spec.SpecError, match = 'Unknown entry type') :
+        nb_spec.get_entries ([{'type' : 'ik_chain'}])
+
+    with pytest.raises (nb_spec.SpecError, match = 'needs target') :
+        nb_spec.get_entries ([{'type' : 'parent_constraint', 'triggers' : ['a']}])
+
+    with pytest.raises (nb_spec.SpecError, match = 'defined twice') :
+        nb_spec.get_entries ([{'type' : 'module', 'name' : 'arm'}, {'type' : 'module', 'name' : 'arm'}])
+
+def test_spec_is_built_then_kept (cmds) :
+    spec = rig (cmds)
+
+    diff = nb_spec.apply_spec (spec)
+    assert diff['add'] == ['module:arm_L', 'prop_follow', 'aim_constraint:eye_jnt', 'parent_space:hand_ctrl']
+    assert diff['failed'] == [] and not cmds.warnings
+
+    scene_entries = nb_spec.get_scene_entries ()
+    assert sorted(scene_entries['module:arm_L']['nodes']) == sorted(['arm_L_module_grp', 'arm_L_public_grp', 'arm_L_private_grp', 'arm_L_input_grp', 'arm_L_output_grp'])
+    assert 'prop_ctrl_parentMConstraint_pickMat' in scene_entries['prop_follow']['nodes']
+
+    # Running the same spec again doesn't touch the scene
+    cmds.reset_counters ()
+    diff = nb_spec.apply_spec (spec)
+
+    assert diff['keep'] == list(nb_spec.get_entries(spec)) and not diff['add'] + diff['change'] + diff['remove']
+    assert cmds.calls['createNode'] == cmds.calls['connectAttr'] == cmds.calls['delete'] == 0
+
+def test_only_edited_entry_is_rebuilt (cmds, tmp_path) :
+    spec = rig (cmds)
+    nb_spec.apply_spec (spec)
+    aim_nodes = nb_spec.get_scene_entries ()['aim_constraint:eye_jnt']['nodes']
+
+    # Edit one entry and remove another one, from a spec file
+    spec['entries'][1]['channels'] = {}
+    del spec['entries'][3]
+    spec_path = tmp_path / 'rig.json'
+    spec_path.write_text (json.dumps(spec))
+
+    cmds.reset_counters ()
+    diff = nb_spec.apply_spec (str(spec_path))
+
+    assert diff['change'] == ['prop_follow'] and diff['remove'] == ['parent_space:hand_ctrl']
+    assert diff['keep'] == ['module:arm_L', 'aim_constraint:eye_jnt']
+
+    # Every axis is now connected straight to offsetParentMatrix
+    assert not cmds.objExists ('prop_ctrl_parentMConstraint_pickMat')
+    assert cmds.connections['prop_ctrl.offsetParentMatrix'] == 'hand_ctrl_prop_ctrl_parentMConstraint_multMat.matrixSum'
+
+    # Parent space is removed with its attribut, other entries are untouched
+    assert not cmds.objExists ('hand_parentSpace_choice')
+    assert 'parentSpace' not in cmds._get_node('hand_settings_ctrl').dynamic_attrs
+    assert 'hand_ctrl.offsetParentMatrix' not in cmds.connections
+    assert nb_spec.get_scene_entries ()['aim_constraint:eye_jnt']['nodes'] == aim_nodes
+    assert all(cmds.objExists (node) for node in aim_nodes)
+
+def test_removed_aim_gives_back_its_target (cmds) :
+    spec = rig (cmds)
+    nb_spec.apply_spec (spec)
+    assert cmds.listRelatives ('eye_jnt', parent = True) == ['eye_jnt_aimMConstraint_input']
+
+    diff = nb_spec.apply_spec ([entry for entry in spec['entries'] if entry['type'] != 'aim_constraint'])
+
+    assert diff['remove'] == ['aim_constraint:eye_jnt']
+    assert cmds.objExists ('eye_jnt') and cmds.listRelatives ('eye_jnt', parent = True) is None
+    assert not cmds.ls ('eye_jnt_aimMConstraint_*')
+
+def test_aim_target_gets_back_its_parent (cmds) :
+    spec = rig (cmds)
+    cmds.make_transform ('head_grp', translate = (0, 5, 0))
+    cmds.parent ('eye_jnt', 'head_grp')
+    world_matrix = cmds.world_matrix (cmds._get_node('eye_jnt'))
+    nb_spec.apply_spec (spec)
+
+    # Editing the aim entry rebuilds it : eye goes back under head_grp before it is parented under a new input group
+    spec['entries'][2]['primary_axis'] = [0, 0, 1]
+    assert nb_spec.apply_spec (spec)['change'] == ['aim_constraint:eye_jnt']
+    assert cmds.listRelatives ('eye_jnt', parent = True) == ['eye_jnt_aimMConstraint_input']
+
+    nb_spec.apply_spec ([entry for entry in spec['entries'] if entry['type'] != 'aim_constraint'])
+    assert cmds.listRelatives ('eye_jnt', parent = True) == ['head_grp']
+    assert not cmds.ls ('eye_jnt_aimMConstraint_*')
+    assert cmds.world_matrix (cmds._get_node('eye_jnt'))[3, :3].tolist() == pytest.approx (world_matrix[3, :3].tolist())
+
+def test_existing_module_groups_are_kept (cmds) :
+    # arm_L groups made by hand, leg_L root only
+    for suffix in ('_module_grp', '_public_grp', '_private_grp', '_input_grp', '_output_grp') :
+        cmds.make_transform ('arm_L{}'.format(suffix))
+    cmds.make_transform ('leg_L_module_grp')
+    spec = [{'type' : 'module', 'name' : 'arm_L'}, {'type' : 'module', 'name' : 'leg_L'}]
+
+    assert nb_spec.apply_spec (spec)['add'] == ['module:arm_L', 'module:leg_L']
+    scene_entries = nb_spec.get_scene_entries ()
+    assert scene_entries['module:arm_L']['nodes'] == []
+    assert 'leg_L_module_grp' not in scene_entries['module:leg_L']['nodes'] and 'leg_L_public_grp' in scene_entries['module:leg_L']['nodes']
+
+    # Only created groups are deleted
+    nb_spec.apply_spec ([])
+    assert cmds.ls ('arm_L_*_grp') and len(cmds.ls ('arm_L_*_grp')) == 5
+    assert cmds.ls ('leg_L_*') == ['leg_L_module_grp']
+
+def test_dry_run_and_failed_entries (cmds) :
+    spec = rig (cmds)
+    spec['entries'].append ({'type' : 'parent_constraint', 'triggers' : ['missing_ctrl'], 'target' : 'world_ctrl'})
+
+    diff = nb_spec.apply_spec (spec, dry_run = True)
+    assert len(diff['add']) == 5 and not cmds.ls ('nbSpec_*')
+
+    # Failed entries are reported and not tagged, so they are built by the next apply
+    diff = nb_spec.apply_spec (spec)
+    assert diff['failed'] == ['parent_constraint:world_ctrl']
+    assert nb_spec.diff_spec (spec)['add'] == ['parent_constraint:world_ctrl']
+
+def test_aim_chain_entry (cmds) :
+    for x, translate in enumerate([(0, 5, 0), (2, 5, 0), (4, 5, 0)]) :
+        cmds.make_transform ('tail_{:02d}_ctrl'.format(x + 1), translate = translate)
+    spec = [{'type' : 'aim_chain', 'chain' : ['tail_01_ctrl', 'tail_02_ctrl', 'tail_03_ctrl'], 'up_mode' : 'chain'}]
+
+    assert nb_spec.apply_spec (spec)['add'] == ['aim_chain:tail_01_ctrl']
+    assert cmds.connections['tail_03_ctrl.offsetParentMatrix'] == 'tail_03_ctrl_aimMConstraint_multMat.matrixSum'
+
+    nb_spec.apply_spec ([])
+    assert all(cmds.listRelatives (control, parent = True) is None for control in spec[0]['chain'])
+    assert not cmds.ls ('tail_*_aimMConstraint_*')
+
+    # Chains are always in offsetParentMatrix, an in_opm value is refused instead of ignored
+    with pytest.raises (nb_spec.SpecError, match = "can't use in_opm") :
+        nb_spec.get_entries ([dict(spec[0], in_opm = False)])
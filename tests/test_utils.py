@@ -0,0 +1,142 @@
+"""
+Utils operations results : world matrices kept, hierarchy order and reported conflicts
+"""
+import numpy as np
+import pytest
+
+from nb_rigging_toolkit import nb_rgtk_utils as nb_utils
+
+def test_set_transform_in_opm_keeps_world_matrices (cmds) :
+    root = cmds.make_transform ('root_ctrl', translate = (1, 2, 3), rotate = (10, 0, 30), scale = (2, 2, 2))
+    child = cmds.make_transform ('child_ctrl', translate = (0, 4, 0), rotate = (0, 45, 0), parent = root)
+    joint = cmds.make_transform ('arm_jnt', translate = (3, 0, 0), rotate = (0, 0, 20), parent = child, node_type = 'joint')
+    cmds.setAttr ('{}.jointOrient'.format(joint), 0, 30, 0)
+
+    nodes = [cmds._get_node(name) for name in (root, child, joint)]
+    world_matrices = [cmds.world_matrix (node) for node in nodes]
+
+    cmds.select ([root])
+    modified = nb_utils.set_transform_in_opm (hierarchy = True)
+
+    # Parent first, with long names
+    assert modified == ['|root_ctrl', '|root_ctrl|child_ctrl', '|root_ctrl|child_ctrl|arm_jnt']
+    for node, world_matrix in zip(nodes, world_matrices) :
+        assert np.allclose (cmds.world_matrix (node), world_matrix)
+        assert node.values['translate'] == [0, 0, 0]
+        assert node.values['rotate'] == [0, 0, 0]
+
+    # jointOrient is kept
+    assert nodes[2].values['jointOrient'] == [0, 30, 0]
+    assert not cmds.created_nodes
+
+def test_set_transform_in_opm_reports_skipped_objects_together (cmds) :
+    driver = cmds.make_transform ('driver')
+    controls = [cmds.make_transform ('ctrl{}'.format(x), translate = (x, 0, 0)) for x in range(4)]
+    cmds.connectAttr ('driver.worldMatrix[0]', 'ctrl1.offsetParentMatrix')
+    cmds.connectAttr ('driver.translateX', 'ctrl3.translateX')
+    cmds.reset_counters ()
+
+    modified = nb_utils.set_transform_in_opm (controls)
+
+    assert modified == ['|ctrl0', '|ctrl2']
+    assert len(cmds.warnings) == 1
+    assert '|ctrl1.offsetParentMatrix' in cmds.warnings[0] and '|ctrl3.translateX' in cmds.warnings[0]
+    assert cmds._get_node('ctrl3').values['translate'] == [3, 0, 0]
+
+def geo_groups (cmds) :
+    '''
+    Build main_ctrl with a globalScale attribut and three geometry groups
+    '''
+    cmds.make_transform ('main_ctrl')
+    cmds.addAttr ('main_ctrl', ln = 'globalScale', dv = 1.0)
+    for name in ('body_geo_grp', 'hair_geo_grp', 'cloth_geo_grp') :
+        cmds.make_transform (name)
+
+def test_bulk_connect_fans_out_patterns (cmds) :
+    geo_groups (cmds)
+    cmds.reset_counters ()
+
+    report = nb_utils.bulk_connect (['main_ctrl.v -> *_geo_grp.visibility', ('main_ctrl.globalScale', r're:(body|hair)_geo_grp', 'scaleX')])
+
+    assert len(report['connected']) == 5 and not report['skipped'] and not cmds.warnings
+    assert cmds.connections['cloth_geo_grp.visibility'] == 'main_ctrl.visibility'
+    assert cmds.connections['hair_geo_grp.scaleX'] == 'main_ctrl.globalScale'
+    assert 'cloth_geo_grp.scaleX' not in cmds.connections
+
+    # Existence and connections are tested once for all targets
+    assert cmds.calls['objExists'] == 0 and cmds.calls['listConnections'] == 1
+
+    # Running again keeps existing connections
+    report = nb_utils.bulk_connect (['main_ctrl.v -> *_geo_grp.visibility'])
+    assert len(report['kept']) == 3 and not report['connected']
+
+def test_bulk_connect_policies (cmds) :
+    geo_groups (cmds)
+    cmds.make_transform ('other_ctrl')
+    cmds.connectAttr ('other_ctrl.visibility', 'hair_geo_grp.visibility')
+    cmds.connectAttr ('other_ctrl.scale', 'body_geo_grp.scale')
+
+    # Missing attributs and connected plugs are skipped, others are connected
+    report = nb_utils.bulk_connect (['main_ctrl.visibility -> *_geo_grp.visibility', 'main_ctrl.missingAttr -> cloth_geo_grp.visibility'])
+    assert report['connected'] == [('|main_ctrl.visibility', '|body_geo_grp.visibility'), ('|main_ctrl.visibility', '|cloth_geo_grp.visibility')]
+    assert sorted(reason for plug, reason in report['skipped']) == ['already connected to other_ctrl.visibility', "|main_ctrl.missingAttr doesn't exist"]
+    assert cmds.connections['hair_geo_grp.visibility'] == 'other_ctrl.visibility'
+
+    with pytest.raises (ValueError, match = 'Unknown policy') :
+        nb_utils.bulk_connect ([], 'replace')
+
+    # Error policy connects nothing when a destination is already connected
+    with pytest.raises (nb_utils.ConnectConflictError, match = 'already connected') :
+        nb_utils.bulk_connect (['main_ctrl.globalScale -> *_geo_grp.scaleX'], 'error')
+    assert 'body_geo_grp.scaleX' not in cmds.connections and 'hair_geo_grp.scaleX' not in cmds.connections and cmds.undo_chunks == 0
+
+    # Missing targets are only skipped
+    report = nb_utils.bulk_connect ([('main_ctrl.globalScale', ['cloth_geo_grp', 'gone_geo_grp'], 'scaleZ')], 'error')
+    assert report['connected'] == [('|main_ctrl.globalScale', '|cloth_geo_grp.scaleZ')]
+    assert [plug for plug, reason in report['skipped']] == ['gone_geo_grp.scaleZ']
+
+    # Force policy replaces connections, of the plug or of its parent attribut
+    report = nb_utils.bulk_connect (['main_ctrl.globalScale -> *_geo_grp.scaleX', 'main_ctrl.visibility -> hair_geo_grp.visibility'], 'force')
+    assert len(report['replaced']) == 2 and len(report['connected']) == 2
+    assert 'body_geo_grp.scale' not in cmds.connections
+    assert cmds.connections['body_geo_grp.scaleX'] == cmds.connections['hair_geo_grp.scaleX'] == 'main_ctrl.globalScale'
+    assert cmds.connections['hair_geo_grp.visibility'] == 'main_ctrl.visibility'
+
+def test_bulk_connect_short_names (cmds) :
+    geo_groups (cmds)
+    cmds.addAttr ('main_ctrl', ln = 'geoRotateOrder', sn = 'gro', at = 'enum')
+    cmds.connectAttr ('main_ctrl.visibility', 'hair_geo_grp.visibility')
+
+    # Short names outside the toolkit names are found with their long names, error policy doesn't block them
+    report = nb_utils.bulk_connect (['main_ctrl.gro -> *_geo_grp.ro', 'main_ctrl.v -> hair_geo_grp.v'], 'error')
+
+    assert not report['skipped'] and len(report['connected']) == 3 and report['kept'] == [('|main_ctrl.v', '|hair_geo_grp.v')]
+    assert cmds.connections['body_geo_grp.rotateOrder'] == 'main_ctrl.geoRotateOrder'
+
+def test_create_modules_from_template (cmds) :
+    cmds.make_transform ('rig_grp')
+    cmds.make_transform ('finger_B_root')
+    template = {'groups' : [{'suffix' : '_root', 'color' : (1, 1, 0)},
+                            {'suffix' : '_ctrl_grp', 'parent' : '_root'},
+                            {'suffix' : '_jnt_grp', 'color' : (1, 0, 0), 'parent' : '_ctrl_grp'}],
+                'attributes' : [{'group' : '_root', 'name' : 'moduleName', 'type' : 'string', 'value' : '{prefix}'}],
+                'links' : [{'source' : 'rig_grp', 'destination' : '_jnt_grp', 'attr' : 'rig'}]}
+    cmds.reset_counters ()
+
+    summary = nb_utils.create_modules (['finger_A', 'finger_B', 'finger_A'], template, 'rig_grp')
+
+    assert summary['created'] == ['finger_A', 'finger_B'] and summary['existing'] == ['finger_B_root']
+    assert cmds.calls['ls'] == 1 and cmds.calls['objExists'] == cmds.calls['parent'] == 0
+
+    # Groups are created under their parent, existing groups are not modified
+    assert cmds.ls ('finger_A_jnt_grp', long = True) == ['|rig_grp|finger_A_root|finger_A_ctrl_grp|finger_A_jnt_grp']
+    assert cmds.ls ('finger_B_ctrl_grp', long = True) == ['|finger_B_root|finger_B_ctrl_grp']
+    assert cmds.getAttr ('finger_A_root.moduleName') == 'finger_A'
+    assert 'moduleName' not in cmds._get_node('finger_B_root').dynamic_attrs
+    assert cmds.connections['finger_B_jnt_grp.rig'] == 'rig_grp.message'
+
+    # A module with all its groups is skipped
+    assert nb_utils.create_modules (['finger_A'], template)['skipped'] == ['finger_A']
+
+    with pytest.raises (ValueError, match = 'defined before') :
+        nb_utils.create_modules (['toe'], {'groups' : [{'suffix' : '_a', 'parent' : '_b'}, {'suffix' : '_b'}]})